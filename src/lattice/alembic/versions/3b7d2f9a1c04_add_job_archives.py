@@ -0,0 +1,64 @@
+"""Add job_archives and archived_jobs
+
+Revision ID: 3b7d2f9a1c04
+Revises: ca3f6e7fcc54
+Create Date: 2026-10-17 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7d2f9a1c04'
+down_revision: Union[str, Sequence[str], None] = 'ca3f6e7fcc54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_archives',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('organization_id', sa.String(), nullable=True),
+    sa.Column('user_id', sa.String(), nullable=True),
+    sa.Column('cluster_name', sa.String(), nullable=False),
+    sa.Column('saved_at', sa.DateTime(), nullable=False),
+    sa.Column('job_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('status', sa.String(), server_default=sa.text("'complete'"), nullable=False),
+    sa.Column('source_file', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('source_file', 'organization_id', 'user_id', name='uq_job_archives_source')
+    )
+    op.create_index('ix_job_archives_org_user_saved', 'job_archives', ['organization_id', 'user_id', 'saved_at'], unique=False)
+    op.create_index('ix_job_archives_org_cluster', 'job_archives', ['organization_id', 'cluster_name'], unique=False)
+    op.create_table('archived_jobs',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('archive_id', sa.String(), nullable=False),
+    sa.Column('organization_id', sa.String(), nullable=True),
+    sa.Column('cluster_name', sa.String(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=True),
+    sa.Column('job_name', sa.String(), nullable=True),
+    sa.Column('username', sa.String(), nullable=True),
+    sa.Column('submitted_at', sa.Float(), nullable=True),
+    sa.Column('start_at', sa.Float(), nullable=True),
+    sa.Column('end_at', sa.Float(), nullable=True),
+    sa.Column('resources', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('log_path', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_archived_jobs_archive_id'), 'archived_jobs', ['archive_id'], unique=False)
+    op.create_index('ix_archived_jobs_org_cluster_job', 'archived_jobs', ['organization_id', 'cluster_name', 'job_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_archived_jobs_org_cluster_job', table_name='archived_jobs')
+    op.drop_index(op.f('ix_archived_jobs_archive_id'), table_name='archived_jobs')
+    op.drop_table('archived_jobs')
+    op.drop_index('ix_job_archives_org_cluster', table_name='job_archives')
+    op.drop_index('ix_job_archives_org_user_saved', table_name='job_archives')
+    op.drop_table('job_archives')
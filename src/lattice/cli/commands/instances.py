@@ -349,6 +349,12 @@ def destroy_instance_command(console: Console, cluster_name: Optional[str]):
                 console.print(f"[bold]Message:[/bold] {msg}")
                 if data.get("request_id"):
                     console.print(f"[dim]Request ID: {data['request_id']}[/dim]")
+                elif data.get("archive_id"):
+                    # The down is issued once the cluster's job logs are saved
+                    console.print(
+                        "[dim]Saving job logs before teardown. "
+                        f"Archive ID: {data['archive_id']}[/dim]"
+                    )
             else:
                 console.print("[bold red]✗[/bold red] Failed to destroy instance.")
                 console.print(f"[bold]Status Code:[/bold] {resp.status_code}")
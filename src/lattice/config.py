@@ -117,3 +117,165 @@ AZURE_CONFIG_FILE = Path.home() / ".azure" / "lattice_config.json"
 
 # CSRF enforcement (double-submit cookie pattern)
 CSRF_ENABLED = os.getenv("CSRF_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+
+# SkyPilot cluster status cache: how long a fetched status snapshot is served
+# before a read triggers a refetch, how often the background refresher runs
+# while the dashboard is being polled, and after how long without reads the
+# refresher goes quiet.
+SKYPILOT_STATUS_TTL_SECONDS = float(os.getenv("SKYPILOT_STATUS_TTL_SECONDS", "10"))
+SKYPILOT_STATUS_REFRESH_INTERVAL_SECONDS = float(
+    os.getenv("SKYPILOT_STATUS_REFRESH_INTERVAL_SECONDS", "5")
+)
+SKYPILOT_STATUS_IDLE_SECONDS = float(os.getenv("SKYPILOT_STATUS_IDLE_SECONDS", "60"))
+
+# API key identity cache: how long a resolved API key identity is reused
+# before it is looked up again, and how often buffered last_used_at updates
+# are written back (0 writes them through on every request).
+API_KEY_CACHE_TTL_SECONDS = float(os.getenv("API_KEY_CACHE_TTL_SECONDS", "60"))
+API_KEY_LAST_USED_FLUSH_INTERVAL_SECONDS = float(
+    os.getenv("API_KEY_LAST_USED_FLUSH_INTERVAL_SECONDS", "30")
+)
+
+# Isolated SkyPilot launch workers: how many pre-started worker processes are
+# kept warm (and how many launches run at once), how many launches a worker
+# serves before it is replaced, and how long to wait for a worker to start
+# and for a launch to return.
+LAUNCH_WORKER_POOL_SIZE = int(os.getenv("LAUNCH_WORKER_POOL_SIZE", "2"))
+LAUNCH_WORKER_MAX_LAUNCHES = int(os.getenv("LAUNCH_WORKER_MAX_LAUNCHES", "1"))
+LAUNCH_WORKER_STARTUP_TIMEOUT_SECONDS = float(
+    os.getenv("LAUNCH_WORKER_STARTUP_TIMEOUT_SECONDS", "120")
+)
+LAUNCH_WORKER_TIMEOUT_SECONDS = float(os.getenv("LAUNCH_WORKER_TIMEOUT_SECONDS", "600"))
+
+# Usage reports store: raw events are kept in daily segments that are
+# gzip-compacted once they are older than REPORTS_COMPACT_AFTER_DAYS and
+# deleted after REPORTS_RAW_RETENTION_DAYS; the pre-aggregated daily rollups
+# that reports are served from are kept for REPORTS_ROLLUP_RETENTION_DAYS.
+REPORTS_COMPACT_AFTER_DAYS = int(os.getenv("REPORTS_COMPACT_AFTER_DAYS", "2"))
+REPORTS_RAW_RETENTION_DAYS = int(os.getenv("REPORTS_RAW_RETENTION_DAYS", "90"))
+REPORTS_ROLLUP_RETENTION_DAYS = int(os.getenv("REPORTS_ROLLUP_RETENTION_DAYS", "730"))
+
+# SSH node pool GPU inventory: how old a pool's cached gpu_resources may get
+# before /clouds/ssh/node-info schedules a background refresh, and how many
+# pools are refreshed at once.
+SSH_GPU_RESOURCES_MAX_AGE_SECONDS = float(
+    os.getenv("SSH_GPU_RESOURCES_MAX_AGE_SECONDS", "300")
+)
+SSH_GPU_REFRESH_CONCURRENCY = int(os.getenv("SSH_GPU_REFRESH_CONCURRENCY", "4"))
+
+# SkyPilot SDK adapter: size of the thread pool blocking SDK calls run on, and
+# the default per-operation concurrency limit and timeout (0 = no timeout).
+# SKYPILOT_SDK_CONCURRENCY / SKYPILOT_SDK_TIMEOUTS override single operations,
+# e.g. "cost_report=1,status=8" and "download_logs=300".
+SKYPILOT_SDK_MAX_WORKERS = int(os.getenv("SKYPILOT_SDK_MAX_WORKERS", "16"))
+SKYPILOT_SDK_DEFAULT_CONCURRENCY = int(os.getenv("SKYPILOT_SDK_DEFAULT_CONCURRENCY", "4"))
+SKYPILOT_SDK_DEFAULT_TIMEOUT_SECONDS = float(
+    os.getenv("SKYPILOT_SDK_DEFAULT_TIMEOUT_SECONDS", "60")
+)
+SKYPILOT_SDK_CONCURRENCY = os.getenv("SKYPILOT_SDK_CONCURRENCY", "")
+SKYPILOT_SDK_TIMEOUTS = os.getenv("SKYPILOT_SDK_TIMEOUTS", "")
+
+# SkyPilot request lifecycle watcher: how often pending/running requests are
+# checked against the API server, and how long a request the API server does
+# not know (yet) is kept pending before it is marked failed.
+SKYPILOT_REQUEST_POLL_INTERVAL_SECONDS = float(
+    os.getenv("SKYPILOT_REQUEST_POLL_INTERVAL_SECONDS", "5")
+)
+SKYPILOT_REQUEST_UNKNOWN_GRACE_SECONDS = float(
+    os.getenv("SKYPILOT_REQUEST_UNKNOWN_GRACE_SECONDS", "600")
+)
+
+# Log broker: how many recent lines of each shared job/request log stream are
+# kept for late joiners and slow viewers, and how long a tailer is kept after
+# its last viewer left (or after it finished) before it is stopped.
+LOG_BROKER_BUFFER_LINES = int(os.getenv("LOG_BROKER_BUFFER_LINES", "5000"))
+LOG_BROKER_IDLE_GRACE_SECONDS = float(os.getenv("LOG_BROKER_IDLE_GRACE_SECONDS", "10"))
+
+# Job logs: how long a downloaded job log is served from its local copy before
+# the next view downloads it again (logs of finished jobs are kept).
+JOB_LOG_CACHE_TTL_SECONDS = float(os.getenv("JOB_LOG_CACHE_TTL_SECONDS", "15"))
+
+# Job archival on teardown: how many clusters are archived at once, how many
+# log downloads run in parallel (across all archives) and how many jobs' logs
+# one download fetches.
+JOB_ARCHIVE_MAX_PIPELINES = int(os.getenv("JOB_ARCHIVE_MAX_PIPELINES", "2"))
+JOB_ARCHIVE_DOWNLOAD_PARALLELISM = int(
+    os.getenv("JOB_ARCHIVE_DOWNLOAD_PARALLELISM", "4")
+)
+JOB_ARCHIVE_DOWNLOAD_BATCH_SIZE = int(
+    os.getenv("JOB_ARCHIVE_DOWNLOAD_BATCH_SIZE", "16")
+)
+# Longest a teardown waits for archival; the cluster is torn down after this
+# even if its logs are still being saved.
+JOB_ARCHIVE_TIMEOUT_SECONDS = float(os.getenv("JOB_ARCHIVE_TIMEOUT_SECONDS", "1800"))
+
+# Cloud credentials: how long an organization's resolved Azure/RunPod
+# credentials are reused before they are read from the database again (writes
+# through /clouds/{cloud}/config invalidate them immediately).
+CLOUD_CREDENTIALS_CACHE_TTL_SECONDS = float(
+    os.getenv("CLOUD_CREDENTIALS_CACHE_TTL_SECONDS", "300")
+)
+
+# SSH node pools file (~/.sky/ssh_node_pools.yaml): changes to pools in the
+# database are written to it after this quiet period, so bursts of node
+# registrations produce one write, but never later than the max delay.
+SSH_NODE_POOLS_WRITE_DEBOUNCE_SECONDS = float(
+    os.getenv("SSH_NODE_POOLS_WRITE_DEBOUNCE_SECONDS", "0.5")
+)
+SSH_NODE_POOLS_WRITE_MAX_DELAY_SECONDS = float(
+    os.getenv("SSH_NODE_POOLS_WRITE_MAX_DELAY_SECONDS", "2")
+)
+
+# Web terminal: PTY output is read in chunks of up to TERMINAL_READ_SIZE bytes
+# and sent in frames of at most TERMINAL_MAX_FRAME_BYTES, flushed this long
+# after the first unsent byte. TERMINAL_COMPRESS_OUTPUT makes the terminal page
+# ask for deflated frames (useful when the WebSocket isn't compressed already).
+TERMINAL_READ_SIZE = int(os.getenv("TERMINAL_READ_SIZE", str(64 * 1024)))
+TERMINAL_MAX_FRAME_BYTES = int(os.getenv("TERMINAL_MAX_FRAME_BYTES", str(64 * 1024)))
+TERMINAL_FLUSH_INTERVAL_SECONDS = float(
+    os.getenv("TERMINAL_FLUSH_INTERVAL_SECONDS", "0.005")
+)
+TERMINAL_COMPRESS_OUTPUT = os.getenv(
+    "TERMINAL_COMPRESS_OUTPUT", "false"
+).strip().lower() in ("1", "true", "yes")
+TERMINAL_COMPRESSION_LEVEL = int(os.getenv("TERMINAL_COMPRESSION_LEVEL", "6"))
+
+# Web terminal sessions: how much recent output each session keeps for
+# reattaching viewers, and how long its SSH process is kept after the last
+# viewer disconnected (a page reload or network blip reattaches in between).
+TERMINAL_SCROLLBACK_BYTES = int(os.getenv("TERMINAL_SCROLLBACK_BYTES", str(1024 * 1024)))
+TERMINAL_SESSION_GRACE_SECONDS = float(
+    os.getenv("TERMINAL_SESSION_GRACE_SECONDS", "120")
+)
+
+# Upstream SSH connection pool (web terminal): sessions to a cluster share
+# OpenSSH ControlMaster connections per (cluster, user). A connection carries
+# at most SSH_POOL_MAX_SESSIONS sessions (sshd's MaxSessions), a cluster gets
+# at most SSH_POOL_MAX_CONNECTIONS_PER_CLUSTER of them, idle ones are closed
+# after SSH_POOL_IDLE_SECONDS and reused ones are re-checked this often.
+SSH_POOL_ENABLED = os.getenv(
+    "SSH_POOL_ENABLED", "true"
+).strip().lower() in ("1", "true", "yes")
+SSH_POOL_IDLE_SECONDS = float(os.getenv("SSH_POOL_IDLE_SECONDS", "300"))
+SSH_POOL_HEALTH_CHECK_SECONDS = float(os.getenv("SSH_POOL_HEALTH_CHECK_SECONDS", "30"))
+SSH_POOL_MAX_SESSIONS = int(os.getenv("SSH_POOL_MAX_SESSIONS", "10"))
+SSH_POOL_MAX_CONNECTIONS_PER_CLUSTER = int(
+    os.getenv("SSH_POOL_MAX_CONNECTIONS_PER_CLUSTER", "4")
+)
+SSH_POOL_CONNECT_TIMEOUT_SECONDS = float(
+    os.getenv("SSH_POOL_CONNECT_TIMEOUT_SECONDS", "20")
+)
+
+# Storage bucket browsing: filesystem clients (with their connections and
+# listing caches) are reused per (bucket, storage options) for this long, and
+# at most this many are kept.
+STORAGE_FS_POOL_TTL_SECONDS = float(os.getenv("STORAGE_FS_POOL_TTL_SECONDS", "300"))
+STORAGE_FS_POOL_MAX_ENTRIES = int(os.getenv("STORAGE_FS_POOL_MAX_ENTRIES", "64"))
+
+# Storage bucket listings: complete directory listings are cached for this
+# long (uploads and deletes through the API drop them earlier), keeping at
+# most this many items across all cached directories.
+STORAGE_LIST_CACHE_TTL_SECONDS = float(
+    os.getenv("STORAGE_LIST_CACHE_TTL_SECONDS", "60")
+)
+STORAGE_LIST_CACHE_MAX_ITEMS = int(os.getenv("STORAGE_LIST_CACHE_MAX_ITEMS", "200000"))
@@ -11,7 +11,9 @@ from sqlalchemy import (
     UniqueConstraint,
     Index,
     text,
+    event,
 )
+from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 from lattice.db.base import Base
 import secrets
@@ -127,6 +129,8 @@ class SSHNodePool(Base, ValidationMixin):
     # Store SSH nodes inline as a list of dictionaries
     # Example item: {"ip": "1.2.3.4", "user": "ubuntu", "identity_file": "/path", "password": null, "resources": {"vcpus": "4", "memory_gb": "16"}}
     nodes = Column(JSON, nullable=True)
+    # Bumped on every nodes update; writers compare-and-set on it
+    version = Column(Integer, nullable=False, default=0, server_default=text("0"))
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
@@ -450,6 +454,8 @@ class ClusterPlatform(Base, ValidationMixin):
     display_name = Column(String, nullable=False)
     # Platform: runpod, azure, ssh, etc.
     platform = Column(String, nullable=False)
+    # Cloud SkyPilot picked for a multi-cloud launch, once known
+    actual_cloud = Column(String, nullable=True)
     # State of the cluster: active, terminating, etc.
     state = Column(String, nullable=True, default="active")
     # Experiment ID from YAML submission (optional)
@@ -518,6 +524,62 @@ class SkyPilotRequest(Base, ValidationMixin):
     )
 
 
+class JobArchive(Base, ValidationMixin):
+    """Jobs of one cluster, saved when the cluster was torn down"""
+
+    __tablename__ = "job_archives"
+
+    id = Column(String, primary_key=True, default=lambda: secrets.token_urlsafe(16))
+    # Owner; NULL for backfilled archives whose cluster no longer exists
+    organization_id = Column(String, nullable=True)
+    user_id = Column(String, nullable=True)
+    cluster_name = Column(String, nullable=False)  # Display name
+    saved_at = Column(DateTime, nullable=False)
+    job_count = Column(Integer, nullable=False, server_default=text("0"))
+    # pending -> fetching -> downloading -> complete | failed
+    status = Column(String, nullable=False, server_default=text("'complete'"))
+    logs_saved = Column(Integer, nullable=False, server_default=text("0"))
+    logs_failed = Column(Integer, nullable=False, server_default=text("0"))
+    error_message = Column(Text, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    # Actual name of a cluster to tear down once archival is over; cleared
+    # when the down is issued, so a restart can issue it if it wasn't
+    teardown_cluster = Column(String, nullable=True)
+    down_request_id = Column(String, nullable=True)
+    # Legacy JSON file this archive was backfilled from, if any
+    source_file = Column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_job_archives_org_user_saved", "organization_id", "user_id", "saved_at"),
+        Index("ix_job_archives_org_cluster", "organization_id", "cluster_name"),
+        UniqueConstraint("source_file", "organization_id", "user_id", name="uq_job_archives_source"),
+    )
+
+
+class ArchivedJob(Base, ValidationMixin):
+    """One job of a JobArchive"""
+
+    __tablename__ = "archived_jobs"
+
+    id = Column(String, primary_key=True, default=lambda: secrets.token_urlsafe(16))
+    archive_id = Column(String, nullable=False, index=True)
+    organization_id = Column(String, nullable=True)
+    cluster_name = Column(String, nullable=False)  # Display name
+    job_id = Column(Integer, nullable=True)
+    job_name = Column(String, nullable=True)
+    username = Column(String, nullable=True)
+    submitted_at = Column(Float, nullable=True)
+    start_at = Column(Float, nullable=True)
+    end_at = Column(Float, nullable=True)
+    resources = Column(Text, nullable=True)
+    status = Column(String, nullable=True)
+    log_path = Column(String, nullable=True)  # gzip-compressed (or legacy plain) log
+
+    __table_args__ = (
+        Index("ix_archived_jobs_org_cluster_job", "organization_id", "cluster_name", "job_id"),
+    )
+
+
 class CloudAccount(Base, ValidationMixin):
     __tablename__ = "cloud_accounts"
 
@@ -605,6 +667,56 @@ class MachineSizeTemplate(Base, ValidationMixin):
         Index("ix_mst_org", "organization_id"),
     )
 
+
+# Tables other processes (the SSH proxy's auth cache) watch for changes
+COUNTED_TABLES = ("ssh_keys", "cluster_platforms")
+
+
+# Change counters let other processes notice writes to a table without
+# relying on timestamps (updated_at only has one-second resolution)
+class ChangeCounter(Base):
+    __tablename__ = "change_counters"
+
+    # Name of the counted table
+    name = Column(String, primary_key=True)
+    # Bumped in the same transaction as every insert, update or delete
+    version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+
+def bump_change_counter(connection, name: str):
+    """Increment a table's change counter on the given connection."""
+    table = ChangeCounter.__table__
+    result = connection.execute(
+        table.update()
+        .where(table.c.name == name)
+        .values(version=table.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(name=name, version=1))
+
+
+def _bump_for_row(mapper, connection, target):
+    bump_change_counter(connection, mapper.local_table.name)
+
+
+def _bump_for_bulk_statement(orm_execute_state):
+    # Query.update()/delete() skip the mapper events above
+    mapper = orm_execute_state.bind_mapper
+    if (
+        (orm_execute_state.is_update or orm_execute_state.is_delete)
+        and mapper is not None
+        and mapper.local_table.name in COUNTED_TABLES
+    ):
+        bump_change_counter(
+            orm_execute_state.session.connection(), mapper.local_table.name
+        )
+
+
+for _model in (SSHKey, ClusterPlatform):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _bump_for_row)
+event.listen(Session, "do_orm_execute", _bump_for_bulk_statement)
+
 # Utility functions for application-level foreign key validation
 def validate_relationships_before_save(model_instance, session):
     """
@@ -31,6 +31,16 @@ from routes.ssh_config.routes import router as ssh_config_router
 from routes.container_registries.routes import router as container_registries_router
 from routes.admin.machine_size_templates_routes import router as mst_router
 from routes.storage_buckets.browse import router as storage_buckets_browse_router
+from routes.jobs.archiver import job_archiver
+from routes.instances.utils import resume_cluster_teardown
+from routes.node_pools.pools_file import node_pools_file
+from routes.terminal.sessions import ssh_connection_pool, terminal_sessions
+from utils.launch_worker_pool import launch_worker_pool
+from utils.log_broker import log_broker
+from utils.skypilot_async import skypilot_sdk
+from utils.skypilot_status_cache import skypilot_status_cache
+from utils.skypilot_tracker import skypilot_tracker
+from services.api_keys.identity_cache import api_key_identity_cache
 
 
 @asynccontextmanager
@@ -41,7 +51,29 @@ async def lifespan(app: FastAPI):
         raise RuntimeError(
             "COOKIE_SAMESITE=None requires COOKIE_SECURE=True for modern browsers."
         )
+    # Warm up isolated launch workers so the first launch doesn't pay for imports
+    launch_worker_pool.start()
+    # Keep stored SkyPilot request status current in the background
+    skypilot_tracker.start()
+    # The database is the source of truth for SSH node pools; adopt pools
+    # only found in SkyPilot's file, then regenerate it
+    node_pools_file.import_legacy_pools()
+    node_pools_file.flush()
+    # Tear down clusters whose archival a previous run didn't get to finish
+    job_archiver.recover(resume_cluster_teardown)
     yield
+    # Shutdown: stop background refreshers and workers, flush buffered writes
+    # (queued archivals still issue their teardown, so go first)
+    job_archiver.stop()
+    skypilot_tracker.stop()
+    skypilot_status_cache.stop()
+    api_key_identity_cache.stop()
+    launch_worker_pool.stop()
+    log_broker.stop()
+    skypilot_sdk.stop()
+    node_pools_file.stop()
+    await terminal_sessions.stop()
+    ssh_connection_pool.stop()
 
 
 # Create main app
@@ -149,7 +149,10 @@ class DownClusterRequest(BaseModel):
 
 
 class DownClusterResponse(BaseModel):
-    request_id: str
+    # The down is issued once the cluster's jobs are archived; its request ID
+    # is then on the archive (GET /jobs/past-jobs/archives/{archive_id})
+    request_id: Optional[str] = None
+    archive_id: Optional[str] = None
     cluster_name: str
     message: str
 
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from config import SessionLocal
 from db.db_models import APIKey
+from services.api_keys.identity_cache import api_key_identity_cache
 from .utils import get_current_user
 from typing import Optional
 import json
@@ -42,6 +43,13 @@ async def get_api_key_user(
         # Hash the provided key
         key_hash = APIKey.hash_key(api_key)
 
+        # Serve recently resolved keys without touching the DB or WorkOS
+        cached = api_key_identity_cache.get(key_hash)
+        if cached:
+            api_key_identity_cache.record_use(cached["api_key_id"])
+            return cached
+        generation = api_key_identity_cache.generation()
+
         # Find the API key in the database
         api_key_record = (
             db.query(APIKey)
@@ -68,9 +76,10 @@ async def get_api_key_user(
         except Exception as _org_err:
             pass
 
-        # Update last used time and persist any inferred org
-        api_key_record.update_last_used()
-        db.commit()
+        # Persist any inferred org; last used time is written in batches
+        if db.is_modified(api_key_record):
+            db.commit()
+        api_key_identity_cache.record_use(api_key_record.id)
 
         # Parse scopes robustly (treat invalid as []) and normalize to lowercase
         scopes = []
@@ -98,7 +107,7 @@ async def get_api_key_user(
             # Log the error but don't fail the request
             print(f"Failed to get user info for user_id {api_key_record.user_id}: {str(e)}")
 
-        return {
+        identity = {
             "id": api_key_record.user_id,
             "email": user_info.email if user_info else "",
             "first_name": user_info.first_name if user_info else "",
@@ -109,6 +118,12 @@ async def get_api_key_user(
             "scopes": scopes,
             "auth_method": "api_key",
         }
+        # Only cache complete identities so a WorkOS hiccup is retried soon
+        if user_info:
+            api_key_identity_cache.put(
+                key_hash, identity, api_key_record.expires_at, generation
+            )
+        return identity
 
     except Exception as e:
         # Log the error but don't expose it
@@ -5,6 +5,7 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any
 from lattice.services.api_keys.service import APIKeyService
+from services.api_keys.identity_cache import api_key_identity_cache
 from .utils import get_current_user
 from .api_key_auth import get_db
 
@@ -64,9 +65,8 @@ async def start_cli_authorization(
                 and api_key_record.is_active
             ):
                 print("[DEBUG] API key is valid")
-                # Update last used time
-                api_key_record.update_last_used()
-                db.commit()
+                # Update last used time (written in the next batched flush)
+                api_key_identity_cache.record_use(api_key_record.id)
 
                 return {
                     "status": "success",
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from config import get_db
 from db.db_models import CloudAccount
 from routes.clouds.utils import normalize_key, require_org_id
+from utils.vm_catalog import get_vm_catalog
 
 
 def load_azure_config(
@@ -380,22 +381,7 @@ def az_setup_config(organization_id: Optional[str] = None):
 def az_get_regions():
     """Get available Azure regions from SkyPilot's Azure catalog"""
     try:
-        from sky.catalog.common import read_catalog
-
-        # Read the Azure catalog using SkyPilot's read_catalog function
-        df = read_catalog("azure/vms.csv")
-
-        regions = set()  # Use set to avoid duplicates
-
-        # Extract regions from the catalog
-        for _, row in df.iterrows():
-            region = str(row.get("Region", "")).strip()
-
-            # Skip rows with NaN or empty values
-            if region and region != "Region" and region.lower() != "nan":
-                regions.add(region)
-
-        regions_list = sorted(list(regions))
+        regions_list = list(get_vm_catalog("azure/vms.csv").regions)
 
         if regions_list:
             print(f"✅ Found {len(regions_list)} regions from SkyPilot Azure catalog")
@@ -412,26 +398,7 @@ def az_get_regions():
 def az_get_instance_types():
     """Get available Azure instance types from SkyPilot's Azure catalog"""
     try:
-        from sky.catalog.common import read_catalog
-
-        # Read the Azure catalog using SkyPilot's read_catalog function
-        df = read_catalog("azure/vms.csv")
-
-        instance_types = set()  # Use set to avoid duplicates
-
-        # Extract instance types from the catalog
-        for _, row in df.iterrows():
-            instance_type = str(row.get("InstanceType", "")).strip()
-
-            # Skip rows with NaN or empty values
-            if (
-                instance_type
-                and instance_type != "InstanceType"
-                and instance_type.lower() != "nan"
-            ):
-                instance_types.add(instance_type)
-
-        instance_types_list = sorted(list(instance_types))
+        instance_types_list = list(get_vm_catalog("azure/vms.csv").instance_types)
 
         if instance_types_list:
             print(
@@ -573,49 +540,11 @@ def az_save_config_with_setup(
 def az_get_price_per_hour(instance_type: str, region: str | None = None) -> float | None:
     """Return the price per hour for a given Azure instance type, optionally filtered by region.
 
+    If the region has no row for the instance type, any region's price is used.
     Returns None if not found or price unavailable.
     """
     try:
-        from sky.catalog.common import read_catalog
-
-        df = read_catalog("azure/vms.csv")
-        if df is None:
-            return None
-
-        # Validate required columns exist
-        if "InstanceType" not in df.columns:
-            return None
-
-        # Normalize and filter by instance type
-        base = df.copy()
-        try:
-            base["InstanceType"] = base["InstanceType"].astype(str)
-        except Exception:
-            return None
-        subset = base[base["InstanceType"] == str(instance_type)]
-
-        # Optional region filter; if no rows after filtering, fall back to any region
-        if region and "Region" in subset.columns:
-            try:
-                tmp = subset.copy()
-                tmp["Region"] = tmp["Region"].astype(str)
-                tmp = tmp[tmp["Region"] == str(region)]
-                if len(tmp) > 0:
-                    subset = tmp
-            except Exception:
-                # Ignore region filtering on failure
-                pass
-
-        if subset is None or len(subset) == 0:
-            return None
-
-        # Prefer first row
-        row = subset.iloc[0]
-        price = row.get("Price", None) if "Price" in subset.columns else None
-        try:
-            return float(price) if price is not None and str(price).lower() != "nan" else None
-        except Exception:
-            return None
+        return get_vm_catalog("azure/vms.csv").price(instance_type, region)
     except Exception as e:
         print(f"Error getting Azure price for '{instance_type}' ({region}): {e}")
         return None
@@ -627,47 +556,7 @@ def az_infer_gpu_count(instance_type: str) -> int:
     Returns 0 if the instance is CPU-only or unknown. Falls back to 0 on errors.
     """
     try:
-        from sky.catalog.common import read_catalog
-
-        df = read_catalog("azure/vms.csv")
-        if df is None:
-            return 0
-
-        # Ensure required column exists
-        if "InstanceType" not in df.columns:
-            return 0
-        # Normalize and filter by InstanceType
-        try:
-            df["InstanceType"] = df["InstanceType"].astype(str)
-        except Exception:
-            return 0
-        rows = df[df["InstanceType"] == str(instance_type)]
-        if rows is None or len(rows) == 0:
-            return 0
-
-        row = rows.iloc[0]
-
-        # Common column names for accelerator counts
-        for key in (
-            "AcceleratorCount",
-            "GPUs",
-            "GpuCount",
-            "GPUCount",
-            "NumAccelerators",
-            "num_accelerators",
-        ):
-            if key in row and str(row[key]).lower() != "nan":
-                try:
-                    return max(0, int(float(row[key])))
-                except Exception:
-                    continue
-
-        # If accelerator name exists and is non-empty, assume 1 GPU
-        for key in ("AcceleratorName", "GPU", "Gpu", "Accelerator"):
-            if key in row and str(row[key]).strip().lower() not in ("", "nan", "none"):
-                return 1
-
-        return 0
+        return get_vm_catalog("azure/vms.csv").gpu_count(instance_type)
     except Exception as e:
         print(f"Error inferring Azure GPU count for {instance_type}: {e}")
         return 0
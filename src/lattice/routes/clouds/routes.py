@@ -32,8 +32,11 @@ from .runpod.utils import (
     rp_get_price_per_hour,
 )
 from routes.instances.utils import get_skypilot_status
+from utils.cloud_credentials import cloud_credentials
+from routes.storage_buckets.browse import storage_filesystems
+from utils.skypilot_async import skypilot_sdk
 from utils.cluster_utils import (
-    get_cluster_platform_info as get_cluster_platform_data,
+    get_cluster_platform_info_map,
 )
 from routes.clouds.ssh.routes import router as ssh_router
 from routes.auth.utils import requires_admin
@@ -435,6 +438,10 @@ async def save_cloud_config(
         raise HTTPException(
             status_code=500, detail=f"Failed to save {cloud} configuration: {str(e)}"
         )
+    finally:
+        # Resolved credentials for this cloud may have changed
+        cloud_credentials.invalidate(user.get("organization_id"), cloud)
+        storage_filesystems.invalidate(organization_id=user.get("organization_id"))
 
 
 @router.post("/{cloud}/config/{config_key}/set-default")
@@ -461,6 +468,10 @@ async def set_cloud_default_config(
         raise HTTPException(
             status_code=500, detail=f"Failed to set {cloud} default config: {str(e)}"
         )
+    finally:
+        # Resolved credentials for this cloud may have changed
+        cloud_credentials.invalidate(user.get("organization_id"), cloud)
+        storage_filesystems.invalidate(organization_id=user.get("organization_id"))
 
 
 @router.delete("/{cloud}/config/{config_key}")
@@ -492,6 +503,10 @@ async def delete_cloud_config(
         raise HTTPException(
             status_code=500, detail=f"Failed to delete {cloud} config: {str(e)}"
         )
+    finally:
+        # Resolved credentials for this cloud may have changed
+        cloud_credentials.invalidate(user.get("organization_id"), cloud)
+        storage_filesystems.invalidate(organization_id=user.get("organization_id"))
 
 
 @router.post("/{cloud}/test")
@@ -554,12 +569,16 @@ async def get_cloud_instances(
         else:
             raise HTTPException(status_code=400, detail=f"Unsupported cloud: {cloud}")
 
-        skyPilotStatus = get_skypilot_status()
+        skyPilotStatus = await skypilot_sdk.run("status", get_skypilot_status)
+
+        platform_info_map = get_cluster_platform_info_map(
+            (cluster.get("name", "") for cluster in skyPilotStatus), db=db
+        )
 
         user_cloud_clusters = []
         for cluster in skyPilotStatus:
             cluster_name = cluster.get("name", "")
-            platform_info = get_cluster_platform_data(cluster_name)
+            platform_info = platform_info_map.get(cluster_name)
 
             if (
                 platform_info
@@ -606,6 +625,8 @@ async def get_cloud_instances(
             "max_instances": max_instances,
             "can_launch": (max_instances == 0 or current_count < max_instances) and access_allowed,
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to get {cloud} instance count: {str(e)}"
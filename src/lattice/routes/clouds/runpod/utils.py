@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from config import get_db
 from db.db_models import CloudAccount
 from routes.clouds.utils import normalize_key, require_org_id
+from utils.vm_catalog import get_vm_catalog
 
 # Legacy config.toml path (no longer required)
 RUNPOD_CONFIG_TOML = Path.home() / ".runpod" / "config.toml"
@@ -393,10 +394,7 @@ def map_runpod_display_to_instance_type(display_string: str) -> str:
     - "A100:4" -> "NVIDIA A100"
     """
     try:
-        from sky.catalog.common import read_catalog
-
-        # Read the RunPod catalog
-        df = read_catalog("runpod/vms.csv")
+        catalog = get_vm_catalog("runpod/vms.csv")
 
         # Handle CPU instances (format: "CPU:vCPUs-MemoryGiB")
         if display_string.startswith("CPU:"):
@@ -410,33 +408,16 @@ def map_runpod_display_to_instance_type(display_string: str) -> str:
                         vcpus = int(vcpus_str)
                         memory_gb = int(memory_part.replace("GB", ""))
 
-                        # Find matching CPU instance
-                        cpu_rows = df[
-                            (df["AcceleratorName"].isna())
-                            | (df["AcceleratorName"] == "")
-                            | (df["AcceleratorName"].str.lower() == "nan")
-                        ]
-
-                        # Find the row with matching vCPUs and memory
-                        matching_row = cpu_rows[
-                            (cpu_rows["vCPUs"] == vcpus)
-                            & (cpu_rows["MemoryGiB"] == memory_gb)
-                        ]
-                        if not matching_row.empty:
-                            return matching_row.iloc[0]["InstanceType"]
+                        # Find the CPU instance with matching vCPUs and memory
+                        instance_type = catalog.cpu_instance_type(vcpus, memory_gb)
+                        if instance_type is not None:
+                            return instance_type
                     else:
                         # Fallback to old format: CPU:vCPUs
                         vcpus = int(cpu_memory_part)
-                        cpu_rows = df[
-                            (df["AcceleratorName"].isna())
-                            | (df["AcceleratorName"] == "")
-                            | (df["AcceleratorName"].str.lower() == "nan")
-                        ]
-
-                        # Find the row with matching vCPUs
-                        matching_row = cpu_rows[cpu_rows["vCPUs"] == vcpus]
-                        if not matching_row.empty:
-                            return matching_row.iloc[0]["InstanceType"]
+                        instance_type = catalog.cpu_instance_type(vcpus)
+                        if instance_type is not None:
+                            return instance_type
             except (ValueError, IndexError):
                 pass
 
@@ -447,13 +428,9 @@ def map_runpod_display_to_instance_type(display_string: str) -> str:
                 count = int(count_str)
 
                 # Find matching GPU instance
-                gpu_rows = df[
-                    (df["AcceleratorName"] == gpu_name)
-                    & (df["AcceleratorCount"] == count)
-                ]
-
-                if not gpu_rows.empty:
-                    return gpu_rows.iloc[0]["InstanceType"]
+                instance_type = catalog.accelerator_instance_type(gpu_name, count)
+                if instance_type is not None:
+                    return instance_type
             except (ValueError, IndexError):
                 pass
 
@@ -466,75 +443,78 @@ def map_runpod_display_to_instance_type(display_string: str) -> str:
         return display_string
 
 
+def _rp_build_display_options(catalog) -> list[str]:
+    """Compute RunPod display options from the catalog (memoized per catalog version)."""
+    display_options = set()  # Use set to avoid duplicates
+
+    # Extract GPU instances from the catalog
+    for row in catalog.records:
+        accelerator_name = str(row.get("AcceleratorName", "")).strip()
+        accelerator_count_raw = row.get("AcceleratorCount", 1)
+        vcpus = row.get("vCPUs", 0)
+
+        # Skip rows with NaN or empty values for required fields
+        if (
+            accelerator_name
+            and accelerator_name != "AcceleratorName"
+            and accelerator_name.lower() != "nan"
+            and accelerator_count_raw is not None
+            and str(accelerator_count_raw).lower() != "nan"
+        ):
+            # Convert count to integer to ensure consistent format
+            try:
+                accelerator_count = int(float(accelerator_count_raw))
+            except (ValueError, TypeError):
+                accelerator_count = 1
+
+            # Format: GPU_NAME:COUNT
+            display_option = f"{accelerator_name}:{accelerator_count}"
+            display_options.add(display_option)
+
+    # Extract CPU instances (where AcceleratorName is blank/NaN)
+    for row in catalog.records:
+        accelerator_name = str(row.get("AcceleratorName", "")).strip()
+        vcpus = row.get("vCPUs", 0)
+
+        # Include CPU instances (no accelerator or empty accelerator name)
+        if (
+            (
+                not accelerator_name
+                or accelerator_name == ""
+                or accelerator_name.lower() == "nan"
+                or accelerator_name == "AcceleratorName"
+            )
+            and vcpus is not None
+            and str(vcpus).lower() != "nan"
+            and vcpus > 0
+        ):
+            try:
+                vcpus_int = int(float(vcpus))
+                memory_gb = row.get("MemoryGiB", 0)
+                memory_int = (
+                    int(float(memory_gb))
+                    if memory_gb and str(memory_gb).lower() != "nan"
+                    else 0
+                )
+                # Format: CPU:vCPUs-MemoryGiB
+                display_option = f"CPU:{vcpus_int}-{memory_int}GB"
+                display_options.add(display_option)
+            except (ValueError, TypeError):
+                continue
+
+    return sorted(list(display_options))
+
+
 def rp_get_display_options():
     """
     Get available RunPod options with user-friendly display names.
     Returns both GPU instances (AcceleratorName:Count) and CPU instances (CPU:vCPUs).
     """
     try:
-        from sky.catalog.common import read_catalog
-
-        # Read the RunPod catalog using SkyPilot's read_catalog function
-        df = read_catalog("runpod/vms.csv")
-
-        display_options = set()  # Use set to avoid duplicates
-
-        # Extract GPU instances from the catalog
-        for _, row in df.iterrows():
-            accelerator_name = str(row.get("AcceleratorName", "")).strip()
-            accelerator_count_raw = row.get("AcceleratorCount", 1)
-            vcpus = row.get("vCPUs", 0)
-
-            # Skip rows with NaN or empty values for required fields
-            if (
-                accelerator_name
-                and accelerator_name != "AcceleratorName"
-                and accelerator_name.lower() != "nan"
-                and accelerator_count_raw is not None
-                and str(accelerator_count_raw).lower() != "nan"
-            ):
-                # Convert count to integer to ensure consistent format
-                try:
-                    accelerator_count = int(float(accelerator_count_raw))
-                except (ValueError, TypeError):
-                    accelerator_count = 1
-
-                # Format: GPU_NAME:COUNT
-                display_option = f"{accelerator_name}:{accelerator_count}"
-                display_options.add(display_option)
-
-        # Extract CPU instances (where AcceleratorName is blank/NaN)
-        for _, row in df.iterrows():
-            accelerator_name = str(row.get("AcceleratorName", "")).strip()
-            vcpus = row.get("vCPUs", 0)
-
-            # Include CPU instances (no accelerator or empty accelerator name)
-            if (
-                (
-                    not accelerator_name
-                    or accelerator_name == ""
-                    or accelerator_name.lower() == "nan"
-                    or accelerator_name == "AcceleratorName"
-                )
-                and vcpus is not None
-                and str(vcpus).lower() != "nan"
-                and vcpus > 0
-            ):
-                try:
-                    vcpus_int = int(float(vcpus))
-                    memory_gb = row.get("MemoryGiB", 0)
-                    memory_int = (
-                        int(float(memory_gb))
-                        if memory_gb and str(memory_gb).lower() != "nan"
-                        else 0
-                    )
-                    # Format: CPU:vCPUs-MemoryGiB
-                    display_option = f"CPU:{vcpus_int}-{memory_int}GB"
-                    display_options.add(display_option)
-                except (ValueError, TypeError):
-                    continue
-
-        display_options_list = sorted(list(display_options))
+        catalog = get_vm_catalog("runpod/vms.csv")
+        display_options_list = list(
+            catalog.derived("rp_display_options", _rp_build_display_options)
+        )
 
         if display_options_list:
             print(
@@ -550,47 +530,92 @@ def rp_get_display_options():
         return []
 
 
-def rp_get_display_options_with_pricing():
-    """
-    Get available RunPod options with user-friendly display names and pricing information.
-    Returns both GPU instances (AcceleratorName:Count) and CPU instances (CPU:vCPUs).
-    """
-    try:
-        from sky.catalog.common import read_catalog
-
-        # Read the RunPod catalog using SkyPilot's read_catalog function
-        df = read_catalog("runpod/vms.csv")
-
-        display_options = {}  # Use dict to store detailed info
-
-        # Extract GPU instances from the catalog
-        for _, row in df.iterrows():
-            accelerator_name = str(row.get("AcceleratorName", "")).strip()
-            accelerator_count_raw = row.get("AcceleratorCount", 1)
-            price_per_hour = row.get("Price", None)
-            vcpus = row.get("vCPUs", 0)
-            memory_gb = row.get("MemoryGiB", 0)
-
-            # Skip rows with NaN or empty values for required fields
-            if (
-                accelerator_name
-                and accelerator_name != "AcceleratorName"
-                and accelerator_name.lower() != "nan"
-                and accelerator_count_raw is not None
-                and str(accelerator_count_raw).lower() != "nan"
-            ):
-                # Convert count to integer to ensure consistent format
+def _rp_build_display_options_with_pricing(catalog) -> dict:
+    """Compute RunPod display options with pricing, keyed by option name (memoized per catalog version)."""
+    display_options = {}  # Use dict to store detailed info
+
+    # Extract GPU instances from the catalog
+    for row in catalog.records:
+        accelerator_name = str(row.get("AcceleratorName", "")).strip()
+        accelerator_count_raw = row.get("AcceleratorCount", 1)
+        price_per_hour = row.get("Price", None)
+        vcpus = row.get("vCPUs", 0)
+        memory_gb = row.get("MemoryGiB", 0)
+
+        # Skip rows with NaN or empty values for required fields
+        if (
+            accelerator_name
+            and accelerator_name != "AcceleratorName"
+            and accelerator_name.lower() != "nan"
+            and accelerator_count_raw is not None
+            and str(accelerator_count_raw).lower() != "nan"
+        ):
+            # Convert count to integer to ensure consistent format
+            try:
+                accelerator_count = int(float(accelerator_count_raw))
+            except (ValueError, TypeError):
+                accelerator_count = 1
+
+            # Format: GPU_NAME:COUNT
+            display_option = f"{accelerator_name}:{accelerator_count}"
+
+            # Format price information
+            price_str = "Unknown"
+            if price_per_hour is not None and str(price_per_hour).lower() != "nan":
                 try:
-                    accelerator_count = int(float(accelerator_count_raw))
+                    price_float = float(price_per_hour)
+                    price_str = f"${price_float:.2f}"
                 except (ValueError, TypeError):
-                    accelerator_count = 1
+                    price_str = "Unknown"
 
-                # Format: GPU_NAME:COUNT
-                display_option = f"{accelerator_name}:{accelerator_count}"
+            display_options[display_option] = {
+                "name": display_option,
+                "display_name": f"{accelerator_name} ({accelerator_count}x)",
+                "type": "GPU",
+                "accelerator_name": accelerator_name,
+                "accelerator_count": str(accelerator_count),
+                "vcpus": str(vcpus),
+                "memory_gb": str(memory_gb),
+                "price": price_str,
+                "price_per_hour": price_per_hour,
+            }
+
+    # Extract CPU instances (where AcceleratorName is blank/NaN)
+    for row in catalog.records:
+        accelerator_name = str(row.get("AcceleratorName", "")).strip()
+        price_per_hour = row.get("Price", None)
+        vcpus = row.get("vCPUs", 0)
+        memory_gb = row.get("MemoryGiB", 0)
+
+        # Include CPU instances (no accelerator or empty accelerator name)
+        if (
+            (
+                not accelerator_name
+                or accelerator_name == ""
+                or accelerator_name.lower() == "nan"
+                or accelerator_name == "AcceleratorName"
+            )
+            and vcpus is not None
+            and str(vcpus).lower() != "nan"
+            and vcpus > 0
+        ):
+            try:
+                vcpus_int = int(float(vcpus))
+                memory_gb = row.get("MemoryGiB", 0)
+                memory_int = (
+                    int(float(memory_gb))
+                    if memory_gb and str(memory_gb).lower() != "nan"
+                    else 0
+                )
+                # Format: CPU:vCPUs-MemoryGiB
+                display_option = f"CPU:{vcpus_int}-{memory_int}GB"
 
                 # Format price information
                 price_str = "Unknown"
-                if price_per_hour is not None and str(price_per_hour).lower() != "nan":
+                if (
+                    price_per_hour is not None
+                    and str(price_per_hour).lower() != "nan"
+                ):
                     try:
                         price_float = float(price_per_hour)
                         price_str = f"${price_float:.2f}"
@@ -599,73 +624,33 @@ def rp_get_display_options_with_pricing():
 
                 display_options[display_option] = {
                     "name": display_option,
-                    "display_name": f"{accelerator_name} ({accelerator_count}x)",
-                    "type": "GPU",
-                    "accelerator_name": accelerator_name,
-                    "accelerator_count": str(accelerator_count),
-                    "vcpus": str(vcpus),
-                    "memory_gb": str(memory_gb),
+                    "display_name": f"CPU ({vcpus_int} vCPUs, {memory_int}GB RAM)",
+                    "type": "CPU",
+                    "accelerator_name": None,
+                    "accelerator_count": "0",
+                    "vcpus": str(vcpus_int),
+                    "memory_gb": str(memory_int),
                     "price": price_str,
                     "price_per_hour": price_per_hour,
                 }
+            except (ValueError, TypeError):
+                continue
 
-        # Extract CPU instances (where AcceleratorName is blank/NaN)
-        for _, row in df.iterrows():
-            accelerator_name = str(row.get("AcceleratorName", "")).strip()
-            price_per_hour = row.get("Price", None)
-            vcpus = row.get("vCPUs", 0)
-            memory_gb = row.get("MemoryGiB", 0)
-
-            # Include CPU instances (no accelerator or empty accelerator name)
-            if (
-                (
-                    not accelerator_name
-                    or accelerator_name == ""
-                    or accelerator_name.lower() == "nan"
-                    or accelerator_name == "AcceleratorName"
-                )
-                and vcpus is not None
-                and str(vcpus).lower() != "nan"
-                and vcpus > 0
-            ):
-                try:
-                    vcpus_int = int(float(vcpus))
-                    memory_gb = row.get("MemoryGiB", 0)
-                    memory_int = (
-                        int(float(memory_gb))
-                        if memory_gb and str(memory_gb).lower() != "nan"
-                        else 0
-                    )
-                    # Format: CPU:vCPUs-MemoryGiB
-                    display_option = f"CPU:{vcpus_int}-{memory_int}GB"
-
-                    # Format price information
-                    price_str = "Unknown"
-                    if (
-                        price_per_hour is not None
-                        and str(price_per_hour).lower() != "nan"
-                    ):
-                        try:
-                            price_float = float(price_per_hour)
-                            price_str = f"${price_float:.2f}"
-                        except (ValueError, TypeError):
-                            price_str = "Unknown"
-
-                    display_options[display_option] = {
-                        "name": display_option,
-                        "display_name": f"CPU ({vcpus_int} vCPUs, {memory_int}GB RAM)",
-                        "type": "CPU",
-                        "accelerator_name": None,
-                        "accelerator_count": "0",
-                        "vcpus": str(vcpus_int),
-                        "memory_gb": str(memory_int),
-                        "price": price_str,
-                        "price_per_hour": price_per_hour,
-                    }
-                except (ValueError, TypeError):
-                    continue
+    return display_options
 
-        display_options_list = list(display_options.values())
+
+def rp_get_display_options_with_pricing():
+    """
+    Get available RunPod options with user-friendly display names and pricing information.
+    Returns both GPU instances (AcceleratorName:Count) and CPU instances (CPU:vCPUs).
+    """
+    try:
+        catalog = get_vm_catalog("runpod/vms.csv")
+        display_options = catalog.derived(
+            "rp_display_options_with_pricing", _rp_build_display_options_with_pricing
+        )
+        # Copies, so callers can't modify the shared catalog view
+        display_options_list = [dict(opt) for opt in display_options.values()]
 
         if display_options_list:
             print(
@@ -724,16 +709,19 @@ def rp_get_price_per_hour(display_option: str) -> float | None:
     """
     try:
         sel = str(display_option)
-        options = rp_get_display_options_with_pricing()
+        options_by_name = get_vm_catalog("runpod/vms.csv").derived(
+            "rp_display_options_with_pricing", _rp_build_display_options_with_pricing
+        )
+        options = options_by_name.values()
 
         # First attempt: exact match on the canonical name
-        for opt in options:
-            if str(opt.get("name")) == sel:
-                price = opt.get("price_per_hour")
-                try:
-                    return float(price) if price is not None and str(price).lower() != "nan" else None
-                except Exception:
-                    return None
+        opt = options_by_name.get(sel)
+        if opt is not None:
+            price = opt.get("price_per_hour")
+            try:
+                return float(price) if price is not None and str(price).lower() != "nan" else None
+            except Exception:
+                return None
 
         # Second attempt: normalize short GPU token like "A100:1"
         if ":" in sel and not sel.upper().startswith("CPU"):
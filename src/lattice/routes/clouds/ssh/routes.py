@@ -1,3 +1,5 @@
+import json
+
 from fastapi import (
     APIRouter,
     HTTPException,
@@ -5,73 +7,182 @@ from fastapi import (
     Response,
     Depends,
 )
+from fastapi.concurrency import run_in_threadpool
 from routes.auth.api_key_auth import get_user_or_api_key
-from config import get_db
+from config import SessionLocal, get_db
 from db.db_models import SSHNodePool as SSHNodePoolDB
 from sqlalchemy.orm import Session
 
 router = APIRouter()
 
+def _load_org_node_info(db: Session, organization_id: str, refreshing) -> dict:
+    """Build node info for every pool in an org from cached DB data (one query)."""
+    from routes.node_pools.utils import cluster_config_from_pool
+
+    db.expire_all()
+    ssh_node_info = {}
+    for pool in (
+        db.query(SSHNodePoolDB)
+        .filter(SSHNodePoolDB.organization_id == organization_id)
+        .all()
+    ):
+        other_data = pool.other_data or {}
+        ssh_node_info[pool.name] = {
+            "hosts": cluster_config_from_pool(pool).get("hosts", []),
+            "gpu_resources": other_data.get("gpu_resources") or {},
+            "last_updated": other_data.get("last_updated"),
+            "refreshing": pool.name in refreshing,
+        }
+    return ssh_node_info
+
+
 @router.get("/node-info")
 async def get_ssh_node_info(
     request: Request,
     response: Response,
     user: dict = Depends(get_user_or_api_key),
     db: Session = Depends(get_db),
+    refresh: str = "stale",
+    wait: bool = False,
+    timeout: float = 120,
 ):
-    """Get SSH node information from database with fresh GPU data"""
+    """
+    Get SSH node information from database, cache-first.
+
+    Cached GPU resources are returned right away with their "last_updated"
+    time. Pools selected by ``refresh`` ("stale": older than
+    SSH_GPU_RESOURCES_MAX_AGE_SECONDS or never fetched, "all", or "none") are
+    refreshed in the background, a bounded number at a time and at most once
+    per pool concurrently; they are flagged "refreshing". With ``wait``, the
+    response waits up to ``timeout`` seconds for those refreshes. Clients can
+    also subscribe to completions via /node-info/refresh-events.
+    """
     try:
+        from config import SSH_GPU_RESOURCES_MAX_AGE_SECONDS
         from routes.node_pools.utils import (
-            list_cluster_names_from_db_by_org,
-            get_cluster_config_from_db,
-            get_cached_gpu_resources,
+            get_inflight_gpu_resources_updates,
+            gpu_resources_age_seconds,
+            iter_completed_gpu_resources_updates,
+            schedule_gpu_resources_updates,
         )
-        from routes.instances.utils import fetch_and_parse_gpu_resources
-        from datetime import datetime
 
-        # Build comprehensive SSH node info from database with fresh GPU data
-        ssh_node_info = {}
-        cluster_names = list_cluster_names_from_db_by_org(user["organization_id"])
+        if refresh not in ("stale", "all", "none"):
+            raise HTTPException(
+                status_code=400, detail="refresh must be one of: stale, all, none"
+            )
 
-        for cluster_name in cluster_names:
-            cfg = get_cluster_config_from_db(cluster_name)
+        pools = (
+            db.query(SSHNodePoolDB.name, SSHNodePoolDB.other_data)
+            .filter(SSHNodePoolDB.organization_id == user["organization_id"])
+            .all()
+        )
+        if refresh != "none":
+            # Refresh every pool due at once so they share one probe
+            due = []
+            for name, other_data in pools:
+                age = gpu_resources_age_seconds(other_data)
+                if (
+                    refresh == "all"
+                    or age is None
+                    or age > SSH_GPU_RESOURCES_MAX_AGE_SECONDS
+                ):
+                    due.append(name)
+            if due:
+                schedule_gpu_resources_updates(due)
 
-            # Fetch and update GPU resources synchronously
-            try:
-                gpu_resources = await fetch_and_parse_gpu_resources(cluster_name)
+        updates = get_inflight_gpu_resources_updates([name for name, _ in pools])
+        if wait and updates:
+            async for _ in iter_completed_gpu_resources_updates(updates, timeout):
+                pass
+            updates = get_inflight_gpu_resources_updates(list(updates))
+
+        return _load_org_node_info(db, user["organization_id"], updates)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to load SSH node info: {str(e)}"
+        )
 
-                # Update the database with fresh GPU resources
+
+@router.get("/node-info/refresh-events")
+async def stream_ssh_node_info_refreshes(
+    request: Request,
+    response: Response,
+    user: dict = Depends(get_user_or_api_key),
+    db: Session = Depends(get_db),
+    timeout: float = 300,
+):
+    """
+    Stream GPU resources refresh completions for the org's SSH node pools.
+
+    Sends one server-sent event per pool whose in-progress refresh finishes
+    (with its new node info), then a final {"status": "completed"}.
+    """
+    try:
+        from fastapi.responses import StreamingResponse
+        from routes.node_pools.utils import (
+            cluster_config_from_pool,
+            get_inflight_gpu_resources_updates,
+            iter_completed_gpu_resources_updates,
+        )
+
+        organization_id = user["organization_id"]
+
+        def load_names():
+            return [
+                name
+                for (name,) in db.query(SSHNodePoolDB.name)
+                .filter(SSHNodePoolDB.organization_id == organization_id)
+                .all()
+            ]
+
+        def load_event(name: str):
+            # The request's session is closed once streaming starts
+            event_db = SessionLocal()
+            try:
                 pool = (
-                    db.query(SSHNodePoolDB)
-                    .filter(SSHNodePoolDB.name == cluster_name)
+                    event_db.query(SSHNodePoolDB)
+                    .filter(
+                        SSHNodePoolDB.name == name,
+                        SSHNodePoolDB.organization_id == organization_id,
+                    )
                     .first()
                 )
-                if pool:
-                    current_other_data = pool.other_data or {}
-                    current_other_data.update(
-                        {
-                            "gpu_resources": gpu_resources,
-                            "last_updated": datetime.utcnow().isoformat(),
-                        }
-                    )
-                    pool.other_data = current_other_data
-                    db.commit()
-
-                ssh_node_info[cluster_name] = {
-                    "hosts": cfg.get("hosts", []),
-                    "gpu_resources": gpu_resources,
-                }
-            except Exception as e:
-                print(f"Error updating GPU resources for {cluster_name}: {e}")
-                # Fallback to cached data if fresh fetch fails
-                cached_gpu_resources = get_cached_gpu_resources(cluster_name)
-                ssh_node_info[cluster_name] = {
-                    "hosts": cfg.get("hosts", []),
-                    "gpu_resources": cached_gpu_resources,
+                if pool is None:
+                    return None
+                other_data = pool.other_data or {}
+                return {
+                    "node_pool": name,
+                    "hosts": cluster_config_from_pool(pool).get("hosts", []),
+                    "gpu_resources": other_data.get("gpu_resources") or {},
+                    "last_updated": other_data.get("last_updated"),
                 }
+            finally:
+                event_db.close()
+
+        updates = get_inflight_gpu_resources_updates(
+            await run_in_threadpool(load_names)
+        )
+
+        async def generate_events():
+            async for name in iter_completed_gpu_resources_updates(updates, timeout):
+                event = await run_in_threadpool(load_event, name)
+                if event is None:
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+            yield f"data: {json.dumps({'status': 'completed'})}\n\n"
 
-        return ssh_node_info
+        return StreamingResponse(
+            generate_events(),
+            media_type="text/plain",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "Content-Type": "text/event-stream",
+            },
+        )
     except Exception as e:
         raise HTTPException(
-            status_code=500, detail=f"Failed to load SSH node info: {str(e)}"
+            status_code=500, detail=f"Failed to stream SSH node info refreshes: {str(e)}"
         )
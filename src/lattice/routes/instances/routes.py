@@ -18,6 +18,7 @@ from fastapi import (
     Depends,
     File,
     Form,
+    Header,
     HTTPException,
     Request,
     Response,
@@ -60,21 +61,27 @@ from db.db_models import MachineSizeTemplate
 
 from utils.cluster_resolver import handle_cluster_name_param
 
-from utils.cluster_utils import get_cluster_platform_info as get_cluster_platform_data
 from utils.cluster_utils import (
     get_cluster_platform_info as get_cluster_platform_info_util,
 )
 from utils.cluster_utils import (
-    get_cluster_state,
-    get_cluster_user_info,
-    get_display_name_from_actual,
     load_cluster_platforms,
     update_cluster_state,
     create_cluster_platform_entry,
     get_actual_cluster_name,
     get_cluster_platform,
+    get_cluster_platform_info_map,
+)
+from utils.launch_worker_pool import launch_worker_pool
+from utils.cloud_credentials import cloud_credentials
+from utils.skypilot_async import skypilot_sdk
+from utils.event_bus import event_bus
+from utils.log_broker import format_sse, log_broker
+from utils.skypilot_tracker import (
+    REQUEST_EVENTS_TOPIC,
+    TERMINAL_STATUSES,
+    skypilot_tracker,
 )
-from utils.skypilot_tracker import skypilot_tracker
 from werkzeug.utils import secure_filename
 
 from routes.auth.api_key_auth import enforce_csrf
@@ -815,13 +822,15 @@ async def stop_instance(
             display_name, user["id"], user["organization_id"]
         )
 
-        if is_down_only_cluster(actual_cluster_name):
+        if await skypilot_sdk.run("status", is_down_only_cluster, actual_cluster_name):
             cluster_type = "SSH" if is_ssh_cluster(actual_cluster_name) else "RunPod"
             raise HTTPException(
                 status_code=400,
                 detail=f"{cluster_type} cluster '{display_name}' cannot be stopped. Use down operation instead.",
             )
-        request_id = stop_cluster_with_skypilot(
+        request_id = await skypilot_sdk.run(
+            "stop",
+            stop_cluster_with_skypilot,
             actual_cluster_name,
             user_id=user["id"],
             organization_id=user["organization_id"],
@@ -858,7 +867,9 @@ async def down_instance(
         # Update cluster state to terminating
         update_cluster_state(actual_cluster_name, "terminating")
 
-        request_id = down_cluster_with_skypilot(
+        archive_id = await skypilot_sdk.run(
+            "down",
+            down_cluster_with_skypilot,
             actual_cluster_name,
             display_name,
             user_id=user["id"],
@@ -882,10 +893,12 @@ async def down_instance(
             )
 
         return DownClusterResponse(
-            request_id=request_id,
+            archive_id=archive_id,
             cluster_name=display_name,  # Return display name to user
             message=f"Cluster '{display_name}' termination initiated successfully",
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to terminate cluster: {str(e)}"
@@ -897,6 +910,7 @@ async def get_instance_status(
     request: Request,
     response: Response,
     cluster_names: Optional[str] = None,
+    max_staleness: Optional[float] = None,
     user: dict = Depends(get_user_or_api_key),
 ):
     try:
@@ -915,11 +929,21 @@ async def get_instance_status(
                 if actual_name:
                     actual_cluster_list.append(actual_name)
 
-        cluster_records = get_skypilot_status(actual_cluster_list)
+        cluster_records = await skypilot_sdk.run(
+            "status",
+            get_skypilot_status,
+            actual_cluster_list, max_staleness=max_staleness
+        )
         clusters = []
 
+        # Resolve ownership, display names and state for all clusters in one query
+        platform_info_map = get_cluster_platform_info_map(
+            record["name"] for record in cluster_records
+        )
+
         for record in cluster_records:
-            user_info = get_cluster_user_info(record["name"])
+            platform_info = platform_info_map.get(record["name"])
+            user_info = platform_info["user_info"] if platform_info else {}
 
             # Skip clusters without user info (they might be from before user tracking was added)
             if not user_info or not user_info.get("id"):
@@ -933,12 +957,10 @@ async def get_instance_status(
                 continue
 
             # Get display name for the response
-            display_name = get_display_name_from_actual(record["name"])
-            if not display_name:
-                display_name = record["name"]  # Fallback to actual name
+            display_name = platform_info.get("display_name") or record["name"]
 
             # Get cluster state
-            state = get_cluster_state(record["name"])
+            state = platform_info.get("state") or "active"
 
             clusters.append(
                 ClusterStatusResponse(
@@ -955,6 +977,8 @@ async def get_instance_status(
                 )
             )
         return StatusResponse(clusters=clusters)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error getting cluster status: {e}")
         raise HTTPException(
@@ -1022,13 +1046,25 @@ async def get_all_cluster_platforms(request: Request, response: Response):
         )
 
 
+@router.get("/launch-pool/metrics")
+async def get_launch_pool_metrics(request: Request, response: Response):
+    """Get state and counters of the isolated launch worker pool."""
+    return launch_worker_pool.metrics()
+
+
+@router.get("/sdk/metrics")
+async def get_sdk_metrics(request: Request, response: Response):
+    """Get per-operation counters and latency histograms of SkyPilot SDK calls."""
+    return skypilot_sdk.metrics()
+
+
 @router.get("/cost-report")
 async def get_cost_report(
     request: Request, response: Response, user: dict = Depends(get_user_or_api_key)
 ):
     """Get cost report for clusters belonging to the current user within their organization."""
     try:
-        report = generate_cost_report()
+        report = await skypilot_sdk.run("cost_report", generate_cost_report)
         if not report:
             return []
 
@@ -1040,13 +1076,18 @@ async def get_cost_report(
         if not current_user_id:
             return []
 
+        # Resolve ownership for every cluster in the report in one query
+        platform_info_map = get_cluster_platform_info_map(
+            cluster_data.get("name") for cluster_data in report
+        )
+
         for cluster_data in report:
             cluster_name = cluster_data.get("name")
             if not cluster_name:
                 continue
 
             # Get platform info for this cluster to check ownership
-            platform_info = get_cluster_platform_data(cluster_name)
+            platform_info = platform_info_map.get(cluster_name)
             if not platform_info or not platform_info.get("user_id"):
                 continue
 
@@ -1060,8 +1101,7 @@ async def get_cost_report(
                 and cluster_org_id == current_user_org_id
             ):
                 # Get display name for user-facing response
-                display_name = get_display_name_from_actual(cluster_name)
-                cluster_display_name = display_name if display_name else cluster_name
+                cluster_display_name = platform_info.get("display_name") or cluster_name
 
                 # Create a copy of cluster data with display name and cloud provider
                 filtered_cluster_data = cluster_data.copy()
@@ -1072,6 +1112,8 @@ async def get_cost_report(
                 filtered_clusters.append(filtered_cluster_data)
 
         return filtered_clusters
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"🔍 Error in /cost-report: {str(e)}")
         raise HTTPException(
@@ -1108,6 +1150,7 @@ async def get_cluster_basic_info(
     cluster_name: str,
     request: Request,
     response: Response,
+    max_staleness: Optional[float] = None,
     user: dict = Depends(get_user_or_api_key),
 ):
     """
@@ -1139,11 +1182,20 @@ async def get_cluster_basic_info(
         )
 
         # Get cluster status information
-        cluster_records = get_skypilot_status([actual_cluster_name])
+        cluster_records = await skypilot_sdk.run(
+            "status",
+            get_skypilot_status,
+            [actual_cluster_name], max_staleness=max_staleness
+        )
         cluster_data = None
 
+        # One lookup serves ownership, display name, platform and state below
+        cluster_platform_info = get_cluster_platform_info_util(actual_cluster_name)
+
         for record in cluster_records:
-            user_info = get_cluster_user_info(record["name"])
+            if record["name"] != actual_cluster_name or not cluster_platform_info:
+                continue
+            user_info = cluster_platform_info["user_info"]
 
             # Skip clusters without user info or not belonging to current user
             if not user_info or not user_info.get("id"):
@@ -1156,9 +1208,7 @@ async def get_cluster_basic_info(
                 continue
 
             # Get display name for the response
-            display_name = get_display_name_from_actual(record["name"])
-            if not display_name:
-                display_name = record["name"]  # Fallback to actual name
+            display_name = cluster_platform_info.get("display_name") or record["name"]
 
             cluster_data = {
                 "cluster_name": display_name,
@@ -1187,10 +1237,10 @@ async def get_cluster_basic_info(
         }
 
         # Get platform information
-        platform_info = get_cluster_platform(actual_cluster_name)
+        platform_info = cluster_platform_info.get("platform") or "unknown"
 
         # Get cluster state
-        state = get_cluster_state(actual_cluster_name)
+        state = cluster_platform_info.get("state") or "active"
 
         # Get SSH node information if it's an SSH cluster
         ssh_node_info = None
@@ -1249,56 +1299,14 @@ async def get_cluster_jobs(
         # Get jobs for this cluster
         try:
             # Fetch credentials for the cluster based on the platform
-            platform_info_jobs = get_cluster_platform_info_util(actual_cluster_name)
-            credentials = None
-            if platform_info_jobs and platform_info_jobs.get("platform"):
-                platform = platform_info_jobs["platform"]
-                if platform == "multi-cloud":
-                    # Determine the actual cloud used by SkyPilot
-                    actual_platform = determine_actual_cloud_from_skypilot_status(
-                        cluster_name
-                    )
-                    platform = actual_platform if actual_platform else platform
-                if platform == "azure":
-                    try:
-                        azure_config_dict = az_get_current_config(
-                            organization_id=user.get("organization_id")
-                        )
-                        credentials = {
-                            "azure": {
-                                "service_principal": {
-                                    "tenant_id": azure_config_dict["tenant_id"],
-                                    "client_id": azure_config_dict["client_id"],
-                                    "client_secret": azure_config_dict["client_secret"],
-                                    "subscription_id": azure_config_dict[
-                                        "subscription_id"
-                                    ],
-                                },
-                            }
-                        }
-                    except Exception as e:
-                        print(f"Failed to get Azure credentials: {e}")
-                        credentials = None
-                elif platform == "runpod":
-                    try:
-                        from routes.clouds.runpod.utils import rp_get_current_config
-
-                        rp_config = rp_get_current_config(
-                            organization_id=user.get("organization_id")
-                        )
-                        if rp_config and rp_config.get("api_key"):
-                            credentials = {
-                                "runpod": {
-                                    "api_key": rp_config.get("api_key"),
-                                }
-                            }
-                    except Exception as e:
-                        print(f"Failed to get RunPod credentials: {e}")
-                        credentials = None
-                else:
-                    credentials = None
+            credentials = cloud_credentials.for_cluster(
+                actual_cluster_name,
+                user.get("organization_id"),
+            )
 
-            job_records = get_cluster_job_queue(
+            job_records = await skypilot_sdk.run(
+                "queue",
+                get_cluster_job_queue,
                 actual_cluster_name, credentials=credentials
             )
             jobs = []
@@ -1355,7 +1363,7 @@ async def get_cluster_cost_info(
         cost_info = None
         try:
             # Get the full cost report and find this cluster's cost data
-            report = generate_cost_report()
+            report = await skypilot_sdk.run("cost_report", generate_cost_report)
             if report:
                 for cluster_cost_data in report:
                     if cluster_cost_data.get("name") == actual_cluster_name:
@@ -1397,6 +1405,7 @@ async def get_cluster_info(
     cluster_name: str,
     request: Request,
     response: Response,
+    max_staleness: Optional[float] = None,
     user: dict = Depends(get_user_or_api_key),
 ):
     """
@@ -1426,11 +1435,20 @@ async def get_cluster_info(
         )
 
         # Get cluster status information
-        cluster_records = get_skypilot_status([actual_cluster_name])
+        cluster_records = await skypilot_sdk.run(
+            "status",
+            get_skypilot_status,
+            [actual_cluster_name], max_staleness=max_staleness
+        )
         cluster_data = None
 
+        # One lookup serves ownership, display name, platform and state below
+        cluster_platform_info = get_cluster_platform_info_util(actual_cluster_name)
+
         for record in cluster_records:
-            user_info = get_cluster_user_info(record["name"])
+            if record["name"] != actual_cluster_name or not cluster_platform_info:
+                continue
+            user_info = cluster_platform_info["user_info"]
 
             # Skip clusters without user info or not belonging to current user
             if not user_info or not user_info.get("id"):
@@ -1443,9 +1461,7 @@ async def get_cluster_info(
                 continue
 
             # Get display name for the response
-            display_name = get_display_name_from_actual(record["name"])
-            if not display_name:
-                display_name = record["name"]  # Fallback to actual name
+            display_name = cluster_platform_info.get("display_name") or record["name"]
 
             cluster_data = {
                 "cluster_name": display_name,
@@ -1474,64 +1490,23 @@ async def get_cluster_info(
         }
 
         # Get platform information
-        platform_info = get_cluster_platform(actual_cluster_name)
+        platform_info = cluster_platform_info.get("platform") or "unknown"
 
         # Get cluster state
-        state = get_cluster_state(actual_cluster_name)
+        state = cluster_platform_info.get("state") or "active"
 
         # Get jobs for this cluster
         try:
             # Fetch credentials for the cluster based on the platform
-            platform_info_jobs = get_cluster_platform_info_util(actual_cluster_name)
-            credentials = None
-            if platform_info_jobs and platform_info_jobs.get("platform"):
-                platform = platform_info_jobs["platform"]
-                if platform == "multi-cloud":
-                    # Determine the actual cloud used by SkyPilot
-                    actual_platform = determine_actual_cloud_from_skypilot_status(
-                        cluster_name
-                    )
-                    platform = actual_platform if actual_platform else platform
-                if platform == "azure":
-                    try:
-                        azure_config_dict = az_get_current_config(
-                            organization_id=user.get("organization_id")
-                        )
-                        credentials = {
-                            "azure": {
-                                "service_principal": {
-                                    "tenant_id": azure_config_dict["tenant_id"],
-                                    "client_id": azure_config_dict["client_id"],
-                                    "client_secret": azure_config_dict["client_secret"],
-                                    "subscription_id": azure_config_dict[
-                                        "subscription_id"
-                                    ],
-                                },
-                            }
-                        }
-                    except Exception as e:
-                        print(f"Failed to get Azure credentials: {e}")
-                        credentials = None
-                elif platform == "runpod":
-                    try:
-                        from routes.clouds.runpod.utils import rp_get_current_config
-
-                        rp_config = rp_get_current_config(
-                            organization_id=user.get("organization_id")
-                        )
-                        if rp_config and rp_config.get("api_key"):
-                            credentials = {
-                                "runpod": {
-                                    "api_key": rp_config.get("api_key"),
-                                }
-                            }
-                    except Exception as e:
-                        print(f"Failed to get RunPod credentials: {e}")
-                        credentials = None
-                else:
-                    credentials = None
+            credentials = cloud_credentials.for_cluster(
+                actual_cluster_name,
+                user.get("organization_id"),
+                platform_info=cluster_platform_info,
+            )
 
-            job_records = get_cluster_job_queue(
+            job_records = await skypilot_sdk.run(
+                "queue",
+                get_cluster_job_queue,
                 actual_cluster_name, credentials=credentials
             )
             jobs = []
@@ -1574,7 +1549,7 @@ async def get_cluster_info(
         cost_info = None
         try:
             # Get the full cost report and find this cluster's cost data
-            report = generate_cost_report()
+            report = await skypilot_sdk.run("cost_report", generate_cost_report)
             if report:
                 for cluster_cost_data in report:
                     if cluster_cost_data.get("name") == actual_cluster_name:
@@ -1665,6 +1640,44 @@ async def get_user_requests(
         raise HTTPException(status_code=500, detail=f"Failed to get requests: {str(e)}")
 
 
+@router.get("/requests/events")
+async def stream_request_events(
+    keepalive_seconds: float = 15,
+    user: dict = Depends(get_user_or_api_key),
+):
+    """
+    Stream status transitions of the current user's SkyPilot requests (SSE)
+    """
+    subscription = event_bus.subscribe_async(REQUEST_EVENTS_TOPIC)
+
+    async def generate_events():
+        try:
+            while True:
+                event = await subscription.get(timeout=keepalive_seconds)
+                if event is None:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                if (
+                    event["user_id"] != user["id"]
+                    or event["organization_id"] != user["organization_id"]
+                ):
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        generate_events(),
+        media_type="text/plain",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Content-Type": "text/event-stream",
+        },
+    )
+
+
 @router.get("/requests/{request_id}")
 async def get_request_details(
     request_id: str,
@@ -1757,6 +1770,7 @@ async def stream_request_logs(
     request_id: str,
     tail: Optional[int] = None,
     follow: bool = True,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
     user: dict = Depends(get_user_or_api_key),
 ):
     """
@@ -1773,73 +1787,30 @@ async def stream_request_logs(
         if request.organization_id != user["organization_id"]:
             raise HTTPException(status_code=403, detail="Access denied")
 
-        def generate_logs():
+        def tail_request_logs(output_stream):
             try:
-                import queue
-                import threading
-
-                # Create a queue to pass log lines from the stream to the generator
-                log_queue = queue.Queue()
-                streaming_complete = threading.Event()
-
-                class LogCaptureStream:
-                    def __init__(self, log_queue):
-                        self.log_queue = log_queue
-
-                    def write(self, text):
-                        if text.strip():
-                            # Put the log line in the queue for immediate streaming
-                            self.log_queue.put(text.strip())
-
-                    def flush(self):
-                        pass
-
-                # Create the capture stream
-                capture_stream = LogCaptureStream(log_queue)
-
-                # Start the SkyPilot log streaming in a separate thread
-                def stream_logs():
-                    try:
-                        skypilot_tracker.get_request_logs(
-                            request_id=request_id,
-                            tail=tail,
-                            follow=follow,
-                            output_stream=capture_stream,
-                        )
-                        # Signal that streaming is complete
-                        streaming_complete.set()
-                    except Exception as e:
-                        # Put error in queue
-                        log_queue.put(f"ERROR: {str(e)}")
-                        streaming_complete.set()
-
-                # Start streaming in background thread
-                stream_thread = threading.Thread(target=stream_logs)
-                stream_thread.daemon = True
-                stream_thread.start()
-
-                # Yield log lines as they come in
-                while not streaming_complete.is_set() or not log_queue.empty():
-                    try:
-                        # Get log line with timeout to allow checking completion
-                        log_line = log_queue.get(timeout=0.1)
-                        yield f"data: {json.dumps({'log_line': str(log_line)})}\n\n"
-                    except queue.Empty:
-                        # No log line available, continue checking
-                        continue
-
-                # Update the request status to completed (don't store logs in DB)
-                skypilot_tracker.update_request_status(
-                    request_id=request_id, status="completed"
-                )
-                yield f"data: {json.dumps({'status': 'completed'})}\n\n"
-
-            except Exception as e:
-                # Update the request status if it failed
-                skypilot_tracker.update_request_status(
-                    request_id=request_id, status="failed", error_message=str(e)
+                skypilot_tracker.get_request_logs(
+                    request_id=request_id,
+                    tail=tail,
+                    follow=follow,
+                    output_stream=output_stream,
                 )
-                yield f"data: {json.dumps({'error': str(e), 'status': 'failed'})}\n\n"
+            finally:
+                # The stream ended, so the request most likely did too; sync
+                # its status now rather than on the watcher's next poll
+                try:
+                    skypilot_tracker.refresh_requests([request_id])
+                except Exception as e:
+                    print(f"Failed to refresh status of request {request_id}: {e}")
+
+        async def generate_logs():
+            async for event in log_broker.subscribe(
+                ("request", request_id, follow),
+                tail_request_logs,
+                last_event_id=last_event_id,
+                keepalive_seconds=15,
+            ):
+                yield format_sse(event)
 
         return StreamingResponse(
             generate_logs(),
@@ -1881,7 +1852,7 @@ async def cancel_request(
             raise HTTPException(status_code=403, detail="Access denied")
 
         # Check if request can be cancelled
-        if request.status in ["completed", "failed", "cancelled"]:
+        if request.status in TERMINAL_STATUSES:
             raise HTTPException(
                 status_code=400, detail=f"Request is already {request.status}"
             )
@@ -2,19 +2,18 @@ import asyncio
 import configparser
 import json
 import os
-import sys
-import tempfile
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy import or_
 
 import sky
 from fastapi import HTTPException
-from routes.clouds.azure.utils import az_get_current_config
-from routes.jobs.utils import get_cluster_job_queue, save_cluster_jobs
-from utils.cluster_utils import (
-    get_cluster_platform_info as get_cluster_platform_info_util,
-)
+from routes.jobs.archiver import job_archiver
+from routes.node_pools.pools_file import node_pools_file
+from utils.cloud_credentials import cloud_credentials
 from sqlalchemy.orm import Session
+from utils.gpu_probe import parse_show_gpus_output, probe_node_pools
+from utils.launch_worker_pool import launch_worker_pool
+from utils.skypilot_status_cache import skypilot_status_cache
 from utils.skypilot_tracker import skypilot_tracker
 from werkzeug.utils import secure_filename
 
@@ -72,6 +71,35 @@ def create_selective_aws_credentials_file(organization_id: Optional[str] = None)
 
 
 async def fetch_and_parse_gpu_resources(cluster_name: str):
+    """
+    Bring up an SSH node pool and read its GPU availability.
+
+    GPU availability comes from the in-process SDK probe (utils.gpu_probe);
+    if that fails, falls back to parsing ``sky show-gpus`` output.
+    """
+    results = await fetch_and_parse_gpu_resources_for_pools([cluster_name])
+    result = results[cluster_name]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+async def fetch_and_parse_gpu_resources_for_pools(
+    cluster_names: List[str], max_concurrency: int = 8
+) -> Dict[str, Any]:
+    """
+    Bring up several SSH node pools and read their GPU availability.
+
+    Pools are brought up concurrently (at most ``max_concurrency`` at once),
+    then probed together, so their GPU totals cost one SDK call (see
+    ``utils.gpu_probe.probe_node_pools``). If the probe fails, each pool
+    falls back to parsing ``sky show-gpus`` output.
+
+    Returns:
+        Pool name -> parsed GPU resources, or the Exception that prevented
+        bringing the pool up
+    """
+
     async def run_cmd(cmd, capture_output=True):
         try:
             process = await asyncio.create_subprocess_exec(
@@ -90,87 +118,43 @@ async def fetch_and_parse_gpu_resources(cluster_name: str):
             print(f"Error running command: {e}")
             return None, None, str(e)
 
-    # code, out, err = await run_cmd(["sky", "ssh", "up", "--infra", cluster_name])
-    request_id = sky.client.sdk.ssh_up(infra=cluster_name)
+    slots = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def ssh_up(cluster_name):
+        async with slots:
+            request_id = sky.client.sdk.ssh_up(infra=cluster_name)
+            try:
+                # sky.get blocks until the request finishes; keep it off the event loop
+                await asyncio.to_thread(sky.get, request_id)
+            except Exception as e:
+                print(f"Error bringing up SSH cluster: {e}")
+                raise Exception(f"Failed to bring up SSH cluster: {e}")
+
+    # SkyPilot reads the pools from the file; make sure it has every change
+    node_pools_file.flush()
+    outcomes = await asyncio.gather(
+        *(ssh_up(name) for name in cluster_names), return_exceptions=True
+    )
+    results: Dict[str, Any] = {
+        name: outcome
+        for name, outcome in zip(cluster_names, outcomes)
+        if isinstance(outcome, Exception)
+    }
+    up = [name for name in cluster_names if name not in results]
+    if not up:
+        return results
+
     try:
-        sky.get(request_id)
+        inventories = await asyncio.to_thread(probe_node_pools, up)
+        results.update({name: inventories[name].to_dict() for name in up})
+        return results
     except Exception as e:
-        print(f"Error bringing up SSH cluster: {e}")
-        raise Exception(f"Failed to bring up SSH cluster: {e}")
-    # if code != 0:
-    #     raise Exception(f"Failed to bring up SSH cluster: {err or out}")
-    # 3. sky show-gpus --infra ssh
-    code, out, err = await run_cmd(
-        ["sky", "show-gpus", "--infra", f"ssh/{cluster_name}"]
-    )
-    # 4. sky ssh down (cleanup)
-    # await run_cmd(["sky", "ssh", "down", "--infra", cluster_name], capture_output=False)
-
-    def parse_gpu_output(output, cluster_name):
-        import re
-
-        lines = output.splitlines()
-        gpus = []
-        node_gpus = []
-        pool_section = False
-        per_node_section = False
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(f"SSH Node Pool: {cluster_name}"):
-                pool_section = True
-                per_node_section = False
-                continue
-            if line.startswith("SSH Node Pool per-node GPU availability"):
-                pool_section = False
-                per_node_section = True
-                continue
-            if pool_section:
-                if line.startswith("GPU"):
-                    continue  # skip header
-                parts = re.split(r"\s{2,}", line)
-                if len(parts) >= 3:
-                    gpus.append(
-                        {
-                            "gpu": parts[0],
-                            "requestable_qty_per_node": parts[1],
-                            "utilization": parts[2],
-                            "free": parts[2].split("of")[0].strip(),
-                            "total": parts[2].split("of")[1].split("free")[0].strip(),
-                        }
-                    )
-            elif per_node_section:
-                if line.startswith("NODE_POOL"):
-                    continue  # skip per-node header
-                parts = re.split(r"\s{2,}", line)
-                if len(parts) >= 4:
-                    node_gpus.append(
-                        {
-                            "node_pool": parts[0],
-                            "node": parts[1],
-                            "gpu": parts[2],
-                            "utilization": parts[3],
-                            "free": parts[3].split("of")[0].strip(),
-                            "total": parts[3].split("of")[1].split("free")[0].strip(),
-                        }
-                    )
-        if gpus or node_gpus:
-            return {"gpus": gpus, "node_gpus": node_gpus}
-        if "No GPUs found in any SSH clusters" in output:
-            return {
-                "gpus": [],
-                "node_gpus": [],
-                "message": "No GPUs found in this SSH cluster.",
-            }
-        return {
-            "gpus": [],
-            "node_gpus": [],
-            "message": "No GPU info found for this cluster.",
-        }
+        print(f"GPU probe failed for {up}, falling back to sky show-gpus: {e}")
 
-    return parse_gpu_output(out, cluster_name)
+    for name in up:
+        code, out, err = await run_cmd(["sky", "show-gpus", "--infra", f"ssh/{name}"])
+        results[name] = parse_show_gpus_output(out, name)
+    return results
 
 
 def generate_cost_report():
@@ -241,6 +225,8 @@ def launch_cluster_with_skypilot(
                     ),
                 )
             try:
+                # SkyPilot reads the pool from the file; make sure it has every change
+                node_pools_file.flush()
                 print(
                     f"[SkyPilot] Running: sky.client.sdk.ssh_up(infra={validation_name})"
                 )
@@ -672,6 +658,7 @@ async def launch_cluster_with_skypilot_isolated(
     """
     Launch cluster in a separate process to avoid thread-local storage leakage.
     This prevents SkyPilot's thread-local variables from interfering between launches.
+    The process comes from the shared launch worker pool (see utils/launch_worker_pool.py).
     """
     try:
         # Serialize the launch parameters
@@ -704,110 +691,14 @@ async def launch_cluster_with_skypilot_isolated(
             "disabled_mandatory_mounts": disabled_mandatory_mounts,
         }
 
-        # Create a temporary file to pass parameters
-        with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
-            json.dump(launch_params, f, default=str)
-            params_file = f.name
+        # Round-trip through JSON so the worker sees plain values, as before
+        launch_params = json.loads(json.dumps(launch_params, default=str))
 
         try:
-            # Prepare environment for the child process
-            self_env = os.environ.copy()
-
-            # Get the current working directory and Python path
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            lattice_root = os.path.dirname(os.path.dirname(current_dir))
-
-            # Create the worker script content
-            worker_script = f'''
-import sys
-import os
-import json
-
-# Add the lattice directory to Python path
-sys.path.insert(0, "{lattice_root}")
-
-# Change to the correct working directory
-os.chdir("{lattice_root}")
-
-# Import the worker function
-from lattice.routes.instances.utils import _launch_cluster_worker
-
-# Load parameters
-with open("{params_file}", "r") as f:
-    params = json.load(f)
-
-# Execute the launch
-try:
-    result = _launch_cluster_worker(**params)
-    print(json.dumps({{"success": True, "request_id": result}}))
-except Exception as e:
-    print(json.dumps({{"success": False, "error": str(e)}}))
-'''
-
-            # Run the launch in a separate process
-            process = await asyncio.create_subprocess_exec(
-                sys.executable,
-                "-c",
-                worker_script,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=lattice_root,
-                env=self_env,
-            )
-
-            stdout, stderr = await process.communicate()
-
-            if process.returncode != 0:
-                error_msg = stderr.decode() if stderr else "Unknown error"
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Launch process failed with code {process.returncode}: {error_msg}",
-                )
-
-            # Parse the result: handle noisy stdout before JSON
-            output_text = stdout.decode().strip() if stdout else ""
-            # Try to parse the last JSON-looking line
-            if output_text:
-                lines = [ln.strip() for ln in output_text.splitlines() if ln.strip()]
-                for ln in reversed(lines):
-                    print(f"[SkyPilot] Output text: {ln}")
-                    if ln.startswith("{") and ln.endswith("}"):
-                        try:
-                            result_data = json.loads(ln)
-                            if result_data.get("success"):
-                                return result_data.get("request_id")
-                            else:
-                                raise HTTPException(
-                                    status_code=500,
-                                    detail=f"Launch failed: {result_data.get('error', 'Unknown error')}",
-                                )
-                        except Exception:
-                            continue
-                # Fallback: extract request id from 'REQUEST ID: <id>' line
-                try:
-                    import re
-
-                    m = re.search(
-                        r"REQUEST ID:\s*([0-9a-fA-F\-]{36}|[A-Za-z0-9_\-]{8,})",
-                        output_text,
-                    )
-                    if m:
-                        return m.group(1)
-                except Exception:
-                    pass
-                # Last resort: return the raw output to aid debugging
-                return output_text
-            else:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Launch process returned invalid output: {stderr.decode() if stderr else 'No output'}",
-                )
+            # Run the launch in a warm, isolated worker process
+            return await launch_worker_pool.launch(launch_params)
         finally:
-            # Clean up the temporary file
-            try:
-                os.unlink(params_file)
-            except FileNotFoundError:
-                pass
+            skypilot_status_cache.invalidate([cluster_name])
 
     except Exception as e:
         print(f"Error in isolated launch: {e}")
@@ -886,52 +777,12 @@ def stop_cluster_with_skypilot(
 ):
     try:
         # Fetch credentials for the cluster based on the platform
-        platform_info = get_cluster_platform_info_util(cluster_name)
-        credentials = None
-        if platform_info and platform_info.get("platform"):
-            platform = platform_info["platform"]
-            if platform == "multi-cloud":
-                # Determine the actual cloud used by SkyPilot
-                actual_platform = determine_actual_cloud_from_skypilot_status(
-                    cluster_name
-                )
-                platform = actual_platform if actual_platform else platform
-            if platform == "azure":
-                try:
-                    azure_config_dict = az_get_current_config(
-                        organization_id=organization_id, db=db
-                    )
-                    credentials = {
-                        "azure": {
-                            "service_principal": {
-                                "tenant_id": azure_config_dict["tenant_id"],
-                                "client_id": azure_config_dict["client_id"],
-                                "client_secret": azure_config_dict["client_secret"],
-                                "subscription_id": azure_config_dict["subscription_id"],
-                            },
-                        }
-                    }
-                except Exception as e:
-                    print(f"Failed to get Azure credentials: {e}")
-                    credentials = None
-            elif platform == "runpod":
-                try:
-                    from routes.clouds.runpod.utils import rp_get_current_config
-
-                    rp_config = rp_get_current_config(organization_id=organization_id)
-                    if rp_config and rp_config.get("api_key"):
-                        credentials = {
-                            "runpod": {
-                                "api_key": rp_config.get("api_key"),
-                            }
-                        }
-                except Exception as e:
-                    print(f"Failed to get RunPod credentials: {e}")
-                    credentials = None
-            else:
-                credentials = None
+        credentials = cloud_credentials.for_cluster(
+            cluster_name, organization_id, db=db
+        )
 
         request_id = sky.stop(cluster_name=cluster_name, credentials=credentials)
+        skypilot_status_cache.invalidate([cluster_name])
 
         # Store the request in the database if user info is provided
         if user_id and organization_id:
@@ -963,126 +814,109 @@ def down_cluster_with_skypilot(
     organization_id: Optional[str] = None,
     db: Optional[Session] = None,
 ):
+    """
+    Archive a cluster's jobs and then tear it down, in the background.
+
+    Returns:
+        ID of the job archive; the down request is tracked once it is issued
+    """
     try:
         # Fetch credentials for the cluster based on the platform
-        platform_info = get_cluster_platform_info_util(cluster_name)
-        credentials = None
-        if platform_info and platform_info.get("platform"):
-            platform = platform_info["platform"]
-            if platform == "multi-cloud":
-                # Determine the actual cloud used by SkyPilot
-                actual_platform = determine_actual_cloud_from_skypilot_status(
-                    cluster_name
-                )
-                platform = actual_platform if actual_platform else platform
+        credentials = cloud_credentials.for_cluster(
+            cluster_name, organization_id, db=db
+        )
 
-            if platform == "azure":
-                try:
-                    azure_config_dict = az_get_current_config(
-                        organization_id=organization_id, db=db
-                    )
-                    credentials = {
-                        "azure": {
-                            "service_principal": {
-                                "tenant_id": azure_config_dict["tenant_id"],
-                                "client_id": azure_config_dict["client_id"],
-                                "client_secret": azure_config_dict["client_secret"],
-                                "subscription_id": azure_config_dict["subscription_id"],
-                            },
-                        }
-                    }
-                except Exception as e:
-                    print(f"Failed to get Azure credentials: {e}")
-                    credentials = None
-            elif platform == "runpod":
-                try:
-                    from routes.clouds.runpod.utils import rp_get_current_config
-
-                    rp_config = rp_get_current_config(organization_id=organization_id)
-                    if rp_config and rp_config.get("api_key"):
-                        credentials = {
-                            "runpod": {
-                                "api_key": rp_config.get("api_key"),
-                            }
-                        }
-                except Exception as e:
-                    print(f"Failed to get RunPod credentials: {e}")
-                    credentials = None
-            else:
-                credentials = None
+        # Archive the cluster's jobs in the background and tear it down once
+        # their logs are saved
+        archive_id = job_archiver.archive_cluster(
+            cluster_name,
+            display_name or cluster_name,
+            user_id,
+            organization_id,
+            credentials=credentials,
+            teardown=lambda: _issue_down(
+                cluster_name, display_name, user_id, organization_id, credentials
+            ),
+        )
+        return archive_id
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to terminate cluster: {str(e)}"
+        )
+
+
+def resume_cluster_teardown(archive: Dict[str, Any]) -> Optional[str]:
+    """
+    Tear down a cluster whose archival an earlier server process didn't
+    finish (see ``JobArchiver.recover``).
+
+    Args:
+        archive: The job archive, with its owner and ``teardown_cluster``
+
+    Returns:
+        The down request ID
+    """
+    cluster_name = archive["teardown_cluster"]
+    credentials = cloud_credentials.for_cluster(
+        cluster_name, archive["organization_id"]
+    )
+    return _issue_down(
+        cluster_name,
+        archive["cluster_name"],
+        archive["user_id"],
+        archive["organization_id"],
+        credentials,
+    )
+
+
+def _issue_down(
+    cluster_name: str,
+    display_name: Optional[str],
+    user_id: Optional[str],
+    organization_id: Optional[str],
+    credentials: Optional[dict],
+):
+    """Submit ``sky.down`` for a cluster and track the request."""
+    request_id = sky.down(cluster_name=cluster_name, credentials=credentials)
+    skypilot_status_cache.invalidate([cluster_name])
 
-        # First, get all jobs from the cluster before tearing down
+    # Store the request in the database if user info is provided
+    if user_id and organization_id:
         try:
-            job_records = get_cluster_job_queue(cluster_name, credentials=credentials)
-            # Extract jobs from the job records
-            if job_records and hasattr(job_records, "jobs"):
-                jobs = job_records.jobs
-                if jobs:
-                    if display_name:
-                        save_cluster_jobs(display_name, jobs, user_id, organization_id)
-                    else:
-                        save_cluster_jobs(cluster_name, jobs, user_id, organization_id)
-            elif isinstance(job_records, list):
-                # If it's already a list of jobs
-                if display_name:
-                    save_cluster_jobs(
-                        display_name, job_records, user_id, organization_id
-                    )
-                else:
-                    save_cluster_jobs(
-                        cluster_name, job_records, user_id, organization_id
-                    )
+            # Use display_name if provided, otherwise fall back to cluster_name
+            cluster_name_to_store = display_name if display_name else cluster_name
+            skypilot_tracker.store_request(
+                user_id=user_id,
+                organization_id=organization_id,
+                task_type="terminate",
+                request_id=request_id,
+                cluster_name=cluster_name_to_store,
+            )
+            print(f"Stored SkyPilot down request {request_id} in database")
         except Exception as e:
-            print(f"Failed to save jobs for cluster {cluster_name}: {str(e)}")
+            print(
+                f"Warning: Failed to store SkyPilot down request in database: {e}"
+            )
 
-        request_id = sky.down(cluster_name=cluster_name, credentials=credentials)
+    return request_id
 
-        # Store the request in the database if user info is provided
-        if user_id and organization_id:
-            try:
-                # Use display_name if provided, otherwise fall back to cluster_name
-                cluster_name_to_store = display_name if display_name else cluster_name
-                skypilot_tracker.store_request(
-                    user_id=user_id,
-                    organization_id=organization_id,
-                    task_type="terminate",
-                    request_id=request_id,
-                    cluster_name=cluster_name_to_store,
-                )
-                print(f"Stored SkyPilot down request {request_id} in database")
-            except Exception as e:
-                print(
-                    f"Warning: Failed to store SkyPilot down request in database: {e}"
-                )
 
-        return request_id
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Failed to terminate cluster: {str(e)}"
-        )
+def get_skypilot_status(cluster_names=None, max_staleness: Optional[float] = None):
+    """
+    Get SkyPilot cluster status records from the shared status cache.
 
+    Args:
+        cluster_names: Restrict the result to these clusters (all if None)
+        max_staleness: Maximum acceptable age of the data in seconds; defaults
+            to the cache TTL, 0 forces a fresh ``sky.status`` call
 
-def get_skypilot_status(cluster_names=None):
+    Returns:
+        List of cluster status records with credentials and handles stripped
+    """
     try:
-        request_id = sky.status(
-            cluster_names=cluster_names, refresh=sky.StatusRefreshMode.AUTO
+        return skypilot_status_cache.get_status(
+            cluster_names=cluster_names, max_staleness=max_staleness
         )
-        result = sky.get(request_id)
-        result_new = result.copy()
-        for cluster in result_new:
-            # Delete the credentials if they exist
-            if "credentials" in cluster:
-                cluster["credentials"] = None
-            if "last_creation_yaml" in cluster:
-                cluster["last_creation_yaml"] = ""
-            if "last_update_yaml" in cluster:
-                cluster["last_update_yaml"] = ""
-            if "handle" in cluster:
-                cluster["handle"] = ""
-            if "storage_mounts_metadata" in cluster:
-                cluster["storage_mounts_metadata"] = {}
-
-        return result_new
     except Exception as e:
         print(f"ERROR: {e}")
         raise HTTPException(
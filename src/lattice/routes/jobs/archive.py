@@ -0,0 +1,587 @@
+"""
+Indexed archive of jobs saved from torn-down clusters.
+
+Past jobs used to be one JSON file per teardown in
+``~/.sky/lattice_data/jobs``, and every listing loaded all of them (across
+all organizations) before filtering by owner and sorting. The archive now
+lives in the database:
+
+- ``JobArchive``: one row per teardown, indexed by (organization, user,
+  saved_at) and (organization, cluster), so a page of a user's history is
+  one indexed query;
+- ``ArchivedJob``: the archive's jobs, with the path of each job's log,
+  indexed by (organization, cluster, job id) for per-job log lookup;
+- job logs are written gzip-compressed to
+  ``~/.sky/lattice_data/logs/<archive id>/<job id>.log.gz``.
+
+Legacy JSON files are backfilled the first time the archive is read (owners
+resolved from ``ClusterPlatform`` by display name, as the old listing did)
+and renamed to ``<name>.json.migrated``. Their plain-text logs stay where
+they are.
+"""
+
+import gzip
+import os
+import shutil
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import or_
+
+from config import SessionLocal
+from db.db_models import ArchivedJob, ClusterPlatform, JobArchive
+
+_JOB_FIELDS = ("job_name", "username", "resources", "status")
+_TIME_FIELDS = ("submitted_at", "start_at", "end_at")
+# Archive statuses of an archival that is still running
+UNFINISHED_STATUSES = ("pending", "fetching", "downloading")
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _job_status(job: Dict[str, Any]) -> str:
+    status = job.get("status", "")
+    # SkyPilot returns a JobStatus enum
+    return status.name if hasattr(status, "name") else str(status or "")
+
+
+def _open_log(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", errors="replace")
+    return open(path, "r", errors="replace")
+
+
+class JobArchiveStore:
+    """Database-backed store of past jobs and their compressed logs"""
+
+    def __init__(self, base_dir: Optional[Path] = None):
+        self.base_dir = base_dir or Path.home() / ".sky" / "lattice_data"
+        self._backfill_lock = threading.Lock()
+        self._backfilled = False
+
+    @property
+    def jobs_dir(self) -> Path:
+        return self.base_dir / "jobs"
+
+    @property
+    def logs_dir(self) -> Path:
+        return self.base_dir / "logs"
+
+    def create_archive(
+        self,
+        cluster_name: str,
+        jobs: Iterable[Dict[str, Any]],
+        user_id: Optional[str],
+        organization_id: Optional[str],
+        saved_at: Optional[datetime] = None,
+        status: str = "complete",
+        teardown_cluster: Optional[str] = None,
+    ) -> str:
+        """
+        Record a cluster's jobs.
+
+        Args:
+            cluster_name: Display name of the cluster
+            jobs: Job records (SkyPilot queue entries or saved dicts)
+            user_id: Owner's user ID
+            organization_id: Owner's organization ID
+            saved_at: When the jobs were saved (now by default)
+            status: Archive status
+            teardown_cluster: Actual name of a cluster to tear down once
+                archival is over (see ``claim_teardown``)
+
+        Returns:
+            The archive ID
+        """
+        db = SessionLocal()
+        try:
+            archive = self._add_archive(
+                db, cluster_name, list(jobs), user_id, organization_id,
+                saved_at or datetime.now(), status,
+            )
+            archive.teardown_cluster = teardown_cluster
+            db.commit()
+            return archive.id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def log_path_for(self, archive_id: str, job_id: Any) -> Path:
+        return self.logs_dir / archive_id / f"{job_id}.log.gz"
+
+    def add_jobs(
+        self, archive_id: str, jobs: Iterable[Dict[str, Any]], status: str
+    ):
+        """Record the jobs of an archive created before they were known."""
+        db = SessionLocal()
+        try:
+            archive = db.query(JobArchive).filter(JobArchive.id == archive_id).one()
+            jobs = list(jobs)
+            self._add_jobs(db, archive, jobs)
+            archive.job_count = len(jobs)
+            if archive.status in UNFINISHED_STATUSES:
+                archive.status = status
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def update(self, archive_id: str, **fields: Any):
+        """Set columns of an archive (status, error_message, completed_at...)."""
+        db = SessionLocal()
+        try:
+            db.query(JobArchive).filter(JobArchive.id == archive_id).update(
+                {getattr(JobArchive, name): value for name, value in fields.items()},
+                synchronize_session=False,
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def update_unfinished(self, archive_id: str, **fields: Any) -> bool:
+        """
+        Set columns of an archive whose archival is still running.
+
+        A finished (e.g. timed out) archive keeps its final status.
+
+        Returns:
+            Whether the archive was updated
+        """
+        db = SessionLocal()
+        try:
+            updated = (
+                db.query(JobArchive)
+                .filter(
+                    JobArchive.id == archive_id,
+                    JobArchive.status.in_(UNFINISHED_STATUSES),
+                )
+                .update(
+                    {getattr(JobArchive, name): value for name, value in fields.items()},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return bool(updated)
+        finally:
+            db.close()
+
+    def claim_teardown(self, archive_id: str) -> Optional[str]:
+        """
+        Take over an archive's pending teardown.
+
+        The teardown is cleared in the same conditional update, so only one
+        caller (thread, timer or process) gets it.
+
+        Returns:
+            The cluster to tear down, or None if there is none or it was
+            already claimed
+        """
+        db = SessionLocal()
+        try:
+            archive = db.query(JobArchive).filter(JobArchive.id == archive_id).first()
+            cluster_name = archive.teardown_cluster if archive else None
+            if not cluster_name:
+                return None
+            claimed = (
+                db.query(JobArchive)
+                .filter(
+                    JobArchive.id == archive_id,
+                    JobArchive.teardown_cluster == cluster_name,
+                )
+                .update(
+                    {JobArchive.teardown_cluster: None}, synchronize_session=False
+                )
+            )
+            db.commit()
+            return cluster_name if claimed else None
+        finally:
+            db.close()
+
+    def interrupted_archives(self) -> List[Dict[str, Any]]:
+        """Archives still running or with a teardown that was never issued."""
+        db = SessionLocal()
+        try:
+            archives = (
+                db.query(JobArchive)
+                .filter(
+                    or_(
+                        JobArchive.status.in_(UNFINISHED_STATUSES),
+                        JobArchive.teardown_cluster.isnot(None),
+                    )
+                )
+                .all()
+            )
+            return [
+                {
+                    **self._archive_dict(archive),
+                    "user_id": archive.user_id,
+                    "organization_id": archive.organization_id,
+                    "teardown_cluster": archive.teardown_cluster,
+                }
+                for archive in archives
+            ]
+        finally:
+            db.close()
+
+    def write_log(self, archive_id: str, job_id: Any, source) -> str:
+        """
+        Store a job's log compressed and record its path on the job row.
+
+        Args:
+            archive_id: Archive the job belongs to
+            job_id: Job ID
+            source: Log text, or a path to a plain-text log file (streamed)
+
+        Returns:
+            Path of the compressed log
+        """
+        path = self.compress_log(archive_id, job_id, source)
+        self.record_logs(archive_id, {job_id: path})
+        return path
+
+    def compress_log(self, archive_id: str, job_id: Any, source) -> str:
+        """Write a job's log gzip-compressed, streaming it from ``source``."""
+        path = self.log_path_for(archive_id, job_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with gzip.open(tmp_path, "wb") as out:
+            if isinstance(source, (str, os.PathLike)) and os.path.isfile(source):
+                with open(source, "rb") as src:
+                    shutil.copyfileobj(src, out, 1 << 20)
+            else:
+                out.write(str(source).encode("utf-8"))
+        os.replace(tmp_path, path)
+        return str(path)
+
+    def record_logs(
+        self, archive_id: str, log_paths: Dict[Any, str], failed: int = 0
+    ):
+        """
+        Record stored logs on their job rows and add them (and any failures)
+        to the archive's progress, in one transaction.
+        """
+        db = SessionLocal()
+        try:
+            for job_id, log_path in log_paths.items():
+                db.query(ArchivedJob).filter(
+                    ArchivedJob.archive_id == archive_id,
+                    ArchivedJob.job_id == _as_int(job_id),
+                ).update({ArchivedJob.log_path: log_path}, synchronize_session=False)
+            db.query(JobArchive).filter(JobArchive.id == archive_id).update(
+                {
+                    JobArchive.logs_saved: JobArchive.logs_saved + len(log_paths),
+                    JobArchive.logs_failed: JobArchive.logs_failed + failed,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def get_archive(
+        self, archive_id: str, user_id: str, organization_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """An archive's status and progress, if it belongs to the user."""
+        db = SessionLocal()
+        try:
+            archive = (
+                db.query(JobArchive)
+                .filter(
+                    JobArchive.id == archive_id,
+                    JobArchive.organization_id == organization_id,
+                    JobArchive.user_id == user_id,
+                )
+                .first()
+            )
+            return self._archive_dict(archive) if archive else None
+        finally:
+            db.close()
+
+    def list_archives(
+        self,
+        user_id: str,
+        organization_id: str,
+        limit: int = 50,
+        offset: int = 0,
+        cluster_name: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        One page of a user's archives, newest first.
+
+        Returns:
+            {"past_jobs": [...], "total": n, "next_offset": m or None}; each
+            past job entry has the legacy shape (cluster_name, saved_at, jobs)
+        """
+        self.ensure_backfilled()
+        db = SessionLocal()
+        try:
+            query = db.query(JobArchive).filter(
+                JobArchive.organization_id == organization_id,
+                JobArchive.user_id == user_id,
+            )
+            if cluster_name:
+                query = query.filter(JobArchive.cluster_name == cluster_name)
+            total = query.count()
+            archives = (
+                query.order_by(JobArchive.saved_at.desc(), JobArchive.id)
+                .offset(max(0, offset))
+                .limit(max(0, limit))
+                .all()
+            )
+            jobs_by_archive: Dict[str, List[ArchivedJob]] = {a.id: [] for a in archives}
+            if archives:
+                rows = (
+                    db.query(ArchivedJob)
+                    .filter(ArchivedJob.archive_id.in_(list(jobs_by_archive)))
+                    .order_by(ArchivedJob.job_id)
+                    .all()
+                )
+                for row in rows:
+                    jobs_by_archive[row.archive_id].append(row)
+            past_jobs = [
+                {
+                    **self._archive_dict(archive),
+                    "jobs": [self._job_dict(job) for job in jobs_by_archive[archive.id]],
+                }
+                for archive in archives
+            ]
+        finally:
+            db.close()
+        next_offset = offset + len(past_jobs)
+        return {
+            "past_jobs": past_jobs,
+            "total": total,
+            "next_offset": next_offset if next_offset < total else None,
+        }
+
+    def find_job_log(
+        self, organization_id: str, cluster_name: str, job_id: int
+    ) -> Optional[str]:
+        """Path of the most recently archived log of a job, if any."""
+        self.ensure_backfilled()
+        db = SessionLocal()
+        try:
+            row = (
+                db.query(ArchivedJob.log_path)
+                .join(JobArchive, JobArchive.id == ArchivedJob.archive_id)
+                .filter(
+                    ArchivedJob.organization_id == organization_id,
+                    ArchivedJob.cluster_name == cluster_name,
+                    ArchivedJob.job_id == job_id,
+                    ArchivedJob.log_path.isnot(None),
+                    ArchivedJob.log_path != "",
+                )
+                .order_by(JobArchive.saved_at.desc())
+                .first()
+            )
+        finally:
+            db.close()
+        return row[0] if row else None
+
+    def read_log(
+        self,
+        path: str,
+        tail_lines: Optional[int] = None,
+        start_line: Optional[int] = None,
+        limit: int = 1000,
+    ) -> Dict[str, Any]:
+        """
+        Read an archived log, streaming through it with bounded memory.
+
+        Compressed logs can't be seeked by line, so a page costs a scan up to
+        its end, and a tail keeps only the last ``tail_lines`` lines.
+        """
+        with _open_log(path) as f:
+            if start_line is not None:
+                start_line = max(0, start_line)
+                lines = []
+                total = 0
+                for number, line in enumerate(f):
+                    if start_line <= number < start_line + limit:
+                        lines.append(line)
+                    total = number + 1
+                return {
+                    "logs": "".join(lines),
+                    "start_line": start_line,
+                    "end_line": min(total, start_line + max(0, limit)),
+                    "total_lines": total,
+                }
+            if tail_lines is not None:
+                return {"logs": "".join(deque(f, maxlen=max(0, tail_lines)))}
+            return {"logs": f.read()}
+
+    def ensure_backfilled(self):
+        """Import legacy JSON files once per process."""
+        if self._backfilled:
+            return
+        with self._backfill_lock:
+            if self._backfilled:
+                return
+            try:
+                self.backfill_legacy_files()
+            except Exception as e:
+                print(f"Failed to backfill past jobs: {str(e)}")
+            self._backfilled = True
+
+    def backfill_legacy_files(self) -> int:
+        """
+        Import ``~/.sky/lattice_data/jobs/*.json`` into the archive.
+
+        Returns:
+            Number of files imported
+        """
+        if not self.jobs_dir.exists():
+            return 0
+        import json
+
+        imported = 0
+        for filepath in sorted(self.jobs_dir.glob("*.json")):
+            try:
+                with open(filepath, "r") as f:
+                    data = json.load(f)
+                self._import_legacy(filepath, data)
+                filepath.rename(filepath.with_name(filepath.name + ".migrated"))
+                imported += 1
+            except Exception as e:
+                print(f"Failed to backfill job file {filepath}: {str(e)}")
+        return imported
+
+    def _import_legacy(self, filepath: Path, data: Dict[str, Any]):
+        cluster_name = data.get("cluster_name", "")
+        try:
+            saved_at = datetime.fromisoformat(data.get("saved_at", ""))
+        except (TypeError, ValueError):
+            saved_at = datetime.fromtimestamp(filepath.stat().st_mtime)
+        db = SessionLocal()
+        try:
+            # Everyone with a cluster of this display name used to see the file
+            owners = (
+                db.query(ClusterPlatform.user_id, ClusterPlatform.organization_id)
+                .filter(ClusterPlatform.display_name == cluster_name)
+                .distinct()
+                .all()
+            ) or [(None, None)]
+            for user_id, organization_id in owners:
+                exists = (
+                    db.query(JobArchive.id)
+                    .filter(
+                        JobArchive.source_file == filepath.name,
+                        JobArchive.organization_id == organization_id,
+                        JobArchive.user_id == user_id,
+                    )
+                    .first()
+                )
+                if exists:
+                    continue
+                archive = self._add_archive(
+                    db, cluster_name, data.get("jobs", []), user_id,
+                    organization_id, saved_at, "complete",
+                )
+                archive.source_file = filepath.name
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _add_archive(
+        self,
+        db,
+        cluster_name: str,
+        jobs: List[Dict[str, Any]],
+        user_id: Optional[str],
+        organization_id: Optional[str],
+        saved_at: datetime,
+        status: str,
+    ) -> JobArchive:
+        archive = JobArchive(
+            organization_id=organization_id,
+            user_id=user_id,
+            cluster_name=cluster_name,
+            saved_at=saved_at,
+            job_count=len(jobs),
+            status=status,
+        )
+        db.add(archive)
+        db.flush()
+        self._add_jobs(db, archive, jobs)
+        return archive
+
+    @staticmethod
+    def _add_jobs(db, archive: JobArchive, jobs: List[Dict[str, Any]]):
+        organization_id = archive.organization_id
+        cluster_name = archive.cluster_name
+        db.bulk_insert_mappings(
+            ArchivedJob,
+            [
+                {
+                    "archive_id": archive.id,
+                    "organization_id": organization_id,
+                    "cluster_name": cluster_name,
+                    "job_id": _as_int(job.get("job_id")),
+                    **{name: str(job.get(name) or "") for name in _JOB_FIELDS},
+                    "status": _job_status(job),
+                    **{name: _as_float(job.get(name)) for name in _TIME_FIELDS},
+                    "log_path": job.get("log_path") or None,
+                }
+                for job in jobs
+            ],
+        )
+
+    @staticmethod
+    def _archive_dict(archive: JobArchive) -> Dict[str, Any]:
+        return {
+            "id": archive.id,
+            "cluster_name": archive.cluster_name,
+            "saved_at": archive.saved_at.isoformat(),
+            "status": archive.status,
+            "job_count": archive.job_count,
+            "logs_saved": archive.logs_saved,
+            "logs_failed": archive.logs_failed,
+            "error_message": archive.error_message,
+            "completed_at": (
+                archive.completed_at.isoformat() if archive.completed_at else None
+            ),
+            "down_request_id": archive.down_request_id,
+        }
+
+    @staticmethod
+    def _job_dict(job: ArchivedJob) -> Dict[str, Any]:
+        return {
+            "job_id": job.job_id,
+            "job_name": job.job_name or "",
+            "username": job.username or "",
+            "submitted_at": job.submitted_at,
+            "start_at": job.start_at,
+            "end_at": job.end_at,
+            "resources": job.resources or "",
+            "status": job.status or "",
+            "log_path": job.log_path or "",
+        }
+
+
+# Global instance
+job_archive_store = JobArchiveStore()
@@ -0,0 +1,311 @@
+"""
+Background archival of a cluster's jobs before it is torn down.
+
+Tearing a cluster down used to save its jobs inline: the job queue was
+fetched, then each job's log was downloaded on its own (resolving the
+platform credentials again every time) and written as plain text, all before
+``sky.down`` was issued, so ``/down`` could block for minutes. Now ``/down``
+hands the cluster to the archiver and returns:
+
+- the archive row is created right away with status ``pending``, and moves
+  through ``fetching`` (job queue) and ``downloading`` to ``complete`` or
+  ``failed``; ``logs_saved`` / ``logs_failed`` count progress;
+- logs are downloaded in batches of ``JOB_ARCHIVE_DOWNLOAD_BATCH_SIZE`` jobs
+  per ``sky.download_logs`` call, ``JOB_ARCHIVE_DOWNLOAD_PARALLELISM``
+  batches at a time, with the credentials resolved once by the caller;
+- each log is gzip-compressed to disk as a stream, never held in memory;
+- the teardown itself runs once archival has finished (or failed), since
+  the logs live on the cluster, or after ``JOB_ARCHIVE_TIMEOUT_SECONDS`` if
+  archival takes longer. The cluster to tear down is stored on the archive
+  row and cleared when the down is issued, so a teardown a restarted server
+  didn't get to is issued on the next start (see ``recover``).
+"""
+
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import (
+    JOB_ARCHIVE_DOWNLOAD_BATCH_SIZE,
+    JOB_ARCHIVE_DOWNLOAD_PARALLELISM,
+    JOB_ARCHIVE_MAX_PIPELINES,
+    JOB_ARCHIVE_TIMEOUT_SECONDS,
+)
+from routes.jobs.archive import (
+    UNFINISHED_STATUSES,
+    JobArchiveStore,
+    job_archive_store,
+)
+from routes.jobs.utils import download_job_logs, get_cluster_job_queue
+
+
+class JobArchiver:
+    """Runs archival pipelines on background threads"""
+
+    def __init__(
+        self,
+        store: JobArchiveStore = job_archive_store,
+        max_pipelines: int = JOB_ARCHIVE_MAX_PIPELINES,
+        download_parallelism: int = JOB_ARCHIVE_DOWNLOAD_PARALLELISM,
+        batch_size: int = JOB_ARCHIVE_DOWNLOAD_BATCH_SIZE,
+        timeout_seconds: float = JOB_ARCHIVE_TIMEOUT_SECONDS,
+    ):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.timeout_seconds = timeout_seconds
+        self._pipelines = ThreadPoolExecutor(
+            max_workers=max(1, max_pipelines), thread_name_prefix="job-archive"
+        )
+        self._downloads = ThreadPoolExecutor(
+            max_workers=max(1, download_parallelism),
+            thread_name_prefix="job-archive-download",
+        )
+        self._lock = threading.Lock()
+        # archive id -> teardown of pipelines that have not started yet
+        self._queued: Dict[str, Optional[Callable[[], Optional[str]]]] = {}
+        # archive id -> timer tearing the cluster down if archival runs late
+        self._deadlines: Dict[str, threading.Timer] = {}
+
+    def archive_cluster(
+        self,
+        cluster_name: str,
+        display_name: str,
+        user_id: Optional[str],
+        organization_id: Optional[str],
+        credentials: Optional[dict] = None,
+        teardown: Optional[Callable[[], Optional[str]]] = None,
+    ) -> str:
+        """
+        Archive a cluster's jobs and logs in the background.
+
+        Args:
+            cluster_name: Actual SkyPilot cluster name
+            display_name: Name the archive is listed under
+            user_id: Owner's user ID
+            organization_id: Owner's organization ID
+            credentials: Cloud credentials for SkyPilot calls on the cluster
+            teardown: Tears the cluster down and returns the down request ID;
+                called once, when archival is over (whether or not it
+                succeeded) or has run for ``timeout_seconds``
+
+        Returns:
+            The archive ID, for following progress
+        """
+        archive_id = self.store.create_archive(
+            display_name,
+            [],
+            user_id,
+            organization_id,
+            status="pending",
+            teardown_cluster=cluster_name if teardown else None,
+        )
+        with self._lock:
+            self._queued[archive_id] = teardown
+        if self.timeout_seconds > 0:
+            self._schedule_deadline(archive_id, teardown, self.timeout_seconds)
+        self._pipelines.submit(
+            self._run, archive_id, cluster_name, credentials, teardown
+        )
+        return archive_id
+
+    def recover(self, teardown: Callable[[Dict[str, Any]], Optional[str]]) -> int:
+        """
+        Pick up archives an earlier server process left unfinished (used on
+        startup).
+
+        Their archival can't be resumed, so once their time limit has passed
+        (right away if it has already) they are marked failed and their
+        pending teardown is issued; so is that of finished archives whose
+        down failed. Archives another live process is still working on are
+        left to it until their time limit; claiming the teardown through the
+        archive row makes sure it is issued only once.
+
+        Args:
+            teardown: Tears down ``archive["teardown_cluster"]`` and returns
+                the down request ID, given the archive (with its owner)
+
+        Returns:
+            Number of archives picked up
+        """
+        archives = self.store.interrupted_archives()
+        now = datetime.now()
+        for archive in archives:
+            delay = 0.0
+            if self.timeout_seconds > 0 and archive["status"] in UNFINISHED_STATUSES:
+                deadline = datetime.fromisoformat(archive["saved_at"]) + timedelta(
+                    seconds=self.timeout_seconds
+                )
+                delay = max(0.0, (deadline - now).total_seconds())
+            follow_up = None
+            if archive["teardown_cluster"]:
+                follow_up = functools.partial(teardown, archive)
+            self._schedule_deadline(archive["id"], follow_up, delay)
+        if archives:
+            print(f"Recovering {len(archives)} interrupted job archive(s)")
+        return len(archives)
+
+    def stop(self):
+        """
+        Stop accepting work (used on application shutdown).
+
+        Pipelines that have not started are marked failed, but their
+        teardown is still issued. Teardowns of running pipelines stay on
+        their archive rows for ``recover`` on the next start.
+        """
+        self._pipelines.shutdown(wait=False, cancel_futures=True)
+        self._downloads.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            queued, self._queued = self._queued, {}
+            deadlines, self._deadlines = self._deadlines, {}
+        for timer in deadlines.values():
+            timer.cancel()
+        for archive_id, teardown in queued.items():
+            self._finish(
+                archive_id, "failed", "Server shut down before archival started"
+            )
+            self._teardown(archive_id, teardown)
+
+    def _run(
+        self,
+        archive_id: str,
+        cluster_name: str,
+        credentials: Optional[dict],
+        teardown: Optional[Callable[[], Optional[str]]],
+    ):
+        with self._lock:
+            if archive_id not in self._queued:
+                return  # Already handed off by stop()
+            del self._queued[archive_id]
+        try:
+            self._archive(archive_id, cluster_name, credentials)
+            self._finish(archive_id, "complete")
+        except Exception as e:
+            print(f"Failed to archive jobs for cluster {cluster_name}: {str(e)}")
+            self._finish(archive_id, "failed", str(e))
+        finally:
+            with self._lock:
+                timer = self._deadlines.pop(archive_id, None)
+            if timer is not None:
+                timer.cancel()
+            self._teardown(archive_id, teardown)
+
+    def _archive(
+        self, archive_id: str, cluster_name: str, credentials: Optional[dict]
+    ):
+        self.store.update_unfinished(archive_id, status="fetching")
+        job_records = get_cluster_job_queue(cluster_name, credentials=credentials)
+        if job_records and hasattr(job_records, "jobs"):
+            jobs = job_records.jobs or []
+        else:
+            jobs = job_records or []
+        self.store.add_jobs(archive_id, jobs, status="downloading")
+
+        job_ids = [job.get("job_id") for job in jobs if job.get("job_id") is not None]
+        batches = [
+            job_ids[i : i + self.batch_size]
+            for i in range(0, len(job_ids), self.batch_size)
+        ]
+        futures = {
+            self._downloads.submit(
+                self._archive_batch, archive_id, cluster_name, batch, credentials
+            ): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                batch = futures[future]
+                print(f"Failed to save logs for jobs {batch}: {str(e)}")
+                self.store.record_logs(archive_id, {}, failed=len(batch))
+
+    def _archive_batch(
+        self,
+        archive_id: str,
+        cluster_name: str,
+        job_ids: List[Any],
+        credentials: Optional[dict],
+    ) -> Tuple[int, int]:
+        local_files = download_job_logs(cluster_name, job_ids, credentials)
+        saved = {}
+        for job_id in job_ids:
+            log_file = local_files.get(str(job_id))
+            if not log_file:
+                continue
+            try:
+                saved[job_id] = self.store.compress_log(archive_id, job_id, log_file)
+            except Exception as e:
+                print(f"Failed to save logs for job {job_id}: {str(e)}")
+        failed = len(job_ids) - len(saved)
+        self.store.record_logs(archive_id, saved, failed=failed)
+        return len(saved), failed
+
+    def _finish(
+        self, archive_id: str, status: str, error: Optional[str] = None
+    ) -> bool:
+        # Conditional: a pipeline finishing after its deadline must not
+        # overwrite the "failed" set by _expire
+        try:
+            return self.store.update_unfinished(
+                archive_id,
+                status=status,
+                error_message=error,
+                completed_at=datetime.now(),
+            )
+        except Exception as e:
+            print(f"Failed to update job archive {archive_id}: {str(e)}")
+            return False
+
+    def _schedule_deadline(
+        self,
+        archive_id: str,
+        teardown: Optional[Callable[[], Optional[str]]],
+        delay: float,
+    ):
+        timer = threading.Timer(delay, self._expire, args=(archive_id, teardown))
+        timer.daemon = True
+        with self._lock:
+            self._deadlines[archive_id] = timer
+        timer.start()
+
+    def _expire(
+        self, archive_id: str, teardown: Optional[Callable[[], Optional[str]]]
+    ):
+        with self._lock:
+            self._deadlines.pop(archive_id, None)
+        if self._finish(archive_id, "failed", "Archival did not finish in time"):
+            print(f"Job archive {archive_id} timed out; tearing down")
+        self._teardown(archive_id, teardown)
+
+    def _teardown(
+        self, archive_id: str, teardown: Optional[Callable[[], Optional[str]]]
+    ):
+        if teardown is None:
+            return
+        try:
+            cluster_name = self.store.claim_teardown(archive_id)
+        except Exception as e:
+            print(f"Failed to claim teardown of job archive {archive_id}: {str(e)}")
+            return
+        if cluster_name is None:
+            return  # Issued already (e.g. at the deadline)
+        try:
+            request_id = teardown()
+        except Exception as e:
+            print(f"Failed to tear down cluster {cluster_name}: {str(e)}")
+            # Leave it pending, so the next start issues it again
+            self._update(archive_id, teardown_cluster=cluster_name)
+            return
+        self._update(archive_id, down_request_id=request_id)
+
+    def _update(self, archive_id: str, **fields: Any):
+        try:
+            self.store.update(archive_id, **fields)
+        except Exception as e:
+            print(f"Failed to update job archive {archive_id}: {str(e)}")
+
+
+# Global instance
+job_archiver = JobArchiver()
@@ -3,16 +3,15 @@ from fastapi import (
     Depends,
     HTTPException,
     Form,
+    Header,
     UploadFile,
     File,
     Request,
     Response,
 )
+import asyncio
 import os
 from fastapi.responses import StreamingResponse
-import json
-import queue
-import threading
 from werkzeug.utils import secure_filename
 from sqlalchemy.orm import Session
 from config import get_db
@@ -24,23 +23,26 @@ from models import (
 from .utils import (
     get_cluster_job_queue,
     get_job_logs,
+    get_job_log_path,
+    read_log_file,
+    read_log_range,
     cancel_job_with_skypilot,
     submit_job_to_existing_cluster,
     get_past_jobs,
 )
+from routes.jobs.archive import job_archive_store
 from routes.jobs.vscode_parser import get_vscode_tunnel_info
 from utils.cluster_resolver import (
     handle_cluster_name_param,
 )
-from routes.clouds.azure.utils import az_get_current_config
-from utils.cluster_utils import (
-    get_cluster_platform_info as get_cluster_platform_info_util,
-)
+from utils.cloud_credentials import cloud_credentials
+from utils.log_broker import format_sse, log_broker
+from utils.log_files import tail_lines as tail_log_lines
+from utils.skypilot_async import skypilot_sdk
 from routes.auth.api_key_auth import get_user_or_api_key, require_scope, enforce_csrf
 from routes.auth.utils import get_current_user
 from routes.reports.utils import record_usage
 from typing import Optional
-from pathlib import Path
 import yaml
 
 
@@ -53,50 +55,89 @@ router = APIRouter(
 
 @router.get("/past-jobs")
 async def get_past_jobs_endpoint(
-    request: Request, response: Response, user: dict = Depends(get_user_or_api_key)
+    request: Request,
+    response: Response,
+    limit: int = 50,
+    offset: int = 0,
+    cluster_name: Optional[str] = None,
+    user: dict = Depends(get_user_or_api_key),
 ):
-    """Get past jobs from saved files for the current user and organization."""
+    """Get a page of archived jobs for the current user and organization."""
     try:
-        past_jobs = get_past_jobs(
-            user_id=user["id"], organization_id=user["organization_id"]
+        return await asyncio.to_thread(
+            get_past_jobs,
+            user_id=user["id"],
+            organization_id=user["organization_id"],
+            limit=limit,
+            offset=offset,
+            cluster_name=cluster_name,
         )
-        return {"past_jobs": past_jobs}
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to get past jobs: {str(e)}"
         )
 
 
+@router.get("/past-jobs/archives/{archive_id}")
+async def get_job_archive_status(
+    archive_id: str,
+    request: Request,
+    response: Response,
+    user: dict = Depends(get_user_or_api_key),
+):
+    """Get the status and progress of a job archive (e.g. during teardown)."""
+    archive = await asyncio.to_thread(
+        job_archive_store.get_archive,
+        archive_id,
+        user["id"],
+        user["organization_id"],
+    )
+    if not archive:
+        raise HTTPException(status_code=404, detail="Job archive not found")
+    return archive
+
+
 @router.get("/past-jobs/{cluster_name}/{job_id}/logs")
 async def get_past_job_logs(
     cluster_name: str,
     job_id: int,
     request: Request,
     response: Response,
+    tail_lines: Optional[int] = None,
+    start_line: Optional[int] = None,
+    limit: int = 1000,
+    user: dict = Depends(get_user_or_api_key),
 ):
-    """Get logs for a past job."""
+    """Get logs for a past job (whole log, its tail, or a page of lines)."""
     try:
-        # Look for the log file in the saved logs directory
-        lattice_dir = Path.home() / ".sky" / "lattice_data"
-        logs_dir = lattice_dir / "logs"
-
-        if not logs_dir.exists():
-            raise HTTPException(status_code=404, detail="No saved logs found")
-
-        # Find the log file for this job
-        log_files = list(logs_dir.glob(f"{cluster_name}_{job_id}_*.log"))
-        if not log_files:
+        log_file = await asyncio.to_thread(
+            job_archive_store.find_job_log,
+            user["organization_id"],
+            cluster_name,
+            job_id,
+        )
+        if not log_file or not os.path.exists(log_file):
             raise HTTPException(
                 status_code=404, detail="Log file not found for this job"
             )
 
-        # Use the most recent log file if multiple exist
-        log_file = sorted(log_files)[-1]
-
-        with open(log_file, "r") as f:
-            logs = f.read()
+        if log_file.endswith(".gz"):
+            return await asyncio.to_thread(
+                job_archive_store.read_log,
+                log_file,
+                tail_lines=tail_lines,
+                start_line=start_line,
+                limit=limit,
+            )
+        # Uncompressed logs saved before the archive existed
+        if start_line is not None:
+            return await asyncio.to_thread(
+                read_log_range, log_file, start_line=start_line, limit=limit
+            )
+        if tail_lines is not None:
+            return {"logs": await asyncio.to_thread(tail_log_lines, log_file, tail_lines)}
 
-        return {"logs": logs}
+        return {"logs": await asyncio.to_thread(read_log_file, log_file)}
     except HTTPException:
         raise
     except Exception as e:
@@ -119,59 +160,12 @@ async def get_cluster_jobs(
         )
 
         # Fetch credentials for the cluster based on the platform
-        platform_info = get_cluster_platform_info_util(actual_cluster_name)
-        credentials = None
-        if platform_info and platform_info.get("platform"):
-            platform = platform_info["platform"]
-            if platform == "multi-cloud":
-                from routes.instances.utils import (
-                    determine_actual_cloud_from_skypilot_status,
-                )
-
-                # Determine the actual cloud used by SkyPilot
-                actual_platform = determine_actual_cloud_from_skypilot_status(
-                    actual_cluster_name
-                )
-                platform = actual_platform if actual_platform else platform
-            if platform == "azure":
-                try:
-                    azure_config_dict = az_get_current_config(
-                        organization_id=user["organization_id"]
-                    )
-                    credentials = {
-                        "azure": {
-                            "service_principal": {
-                                "tenant_id": azure_config_dict["tenant_id"],
-                                "client_id": azure_config_dict["client_id"],
-                                "client_secret": azure_config_dict["client_secret"],
-                                "subscription_id": azure_config_dict["subscription_id"],
-                            },
-                        }
-                    }
-                except Exception as e:
-                    print(f"Failed to get Azure credentials: {e}")
-                    credentials = None
-            elif platform == "runpod":
-                try:
-                    from routes.clouds.runpod.utils import rp_get_current_config
-
-                    rp_config = rp_get_current_config(
-                        organization_id=user["organization_id"]
-                    )
-                    if rp_config and rp_config.get("api_key"):
-                        credentials = {
-                            "runpod": {
-                                "api_key": rp_config.get("api_key"),
-                            }
-                        }
-                except Exception as e:
-                    print(f"Failed to get RunPod credentials: {e}")
-                    credentials = None
-            else:
-                credentials = None
+        credentials = cloud_credentials.for_cluster(
+            actual_cluster_name, user["organization_id"]
+        )
 
-        job_records = get_cluster_job_queue(
-            actual_cluster_name, credentials=credentials
+        job_records = await skypilot_sdk.run(
+            "queue", get_cluster_job_queue, actual_cluster_name, credentials=credentials
         )
         jobs = []
         for record in job_records:
@@ -208,7 +202,9 @@ async def get_cluster_job_logs(
             cluster_name, user["id"], user["organization_id"]
         )
 
-        logs = get_job_logs(
+        logs = await skypilot_sdk.run(
+            "download_logs",
+            get_job_logs,
             actual_cluster_name,
             job_id,
             tail_lines,
@@ -216,11 +212,61 @@ async def get_cluster_job_logs(
             user["organization_id"],
         )
         return JobLogsResponse(job_id=job_id, logs=logs)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Failed to get job logs: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get job logs: {str(e)}")
 
 
+@router.get("/{cluster_name}/{job_id}/logs/range")
+async def get_cluster_job_log_range(
+    cluster_name: str,
+    job_id: int,
+    request: Request,
+    response: Response,
+    start_line: Optional[int] = None,
+    limit: int = 1000,
+    offset: Optional[int] = None,
+    length: int = 1 << 20,
+    user: dict = Depends(get_user_or_api_key),
+):
+    """
+    Get one page of a job's log, by line (start_line/limit, negative start_line
+    counts from the end) or by byte range (offset/length).
+    """
+    try:
+        # Resolve display name to actual cluster name
+        actual_cluster_name = handle_cluster_name_param(
+            cluster_name, user["id"], user["organization_id"]
+        )
+
+        log_path = await skypilot_sdk.run(
+            "download_logs",
+            get_job_log_path,
+            actual_cluster_name,
+            job_id,
+            user["id"],
+            user["organization_id"],
+        )
+        page = await asyncio.to_thread(
+            read_log_range,
+            log_path,
+            start_line=start_line,
+            limit=min(limit, 10000),
+            offset=offset,
+            length=min(length, 16 << 20),
+        )
+        return {"job_id": job_id, **page}
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Failed to get job log range: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to get job logs: {str(e)}"
+        )
+
+
 @router.get("/{cluster_name}/{job_id}/logs/stream")
 async def stream_job_logs(
     cluster_name: str,
@@ -229,6 +275,7 @@ async def stream_job_logs(
     follow: bool = True,
     request: Request = None,
     response: Response = None,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
     user: dict = Depends(get_user_or_api_key),
 ):
     """
@@ -241,108 +288,32 @@ async def stream_job_logs(
         )
 
         # Fetch credentials for the cluster based on the platform
-        platform_info = get_cluster_platform_info_util(actual_cluster_name)
-        credentials = None
-        if platform_info and platform_info.get("platform"):
-            platform = platform_info["platform"]
-            if platform == "azure":
-                try:
-                    azure_config_dict = az_get_current_config(
-                        organization_id=user["organization_id"]
-                    )
-                    credentials = {
-                        "azure": {
-                            "service_principal": {
-                                "tenant_id": azure_config_dict["tenant_id"],
-                                "client_id": azure_config_dict["client_id"],
-                                "client_secret": azure_config_dict["client_secret"],
-                                "subscription_id": azure_config_dict["subscription_id"],
-                            },
-                        }
-                    }
-                except Exception as e:
-                    print(f"Failed to get Azure credentials: {e}")
-                    credentials = None
-            elif platform == "runpod":
-                try:
-                    from routes.clouds.runpod.utils import rp_get_current_config
-
-                    rp_config = rp_get_current_config(
-                        organization_id=user["organization_id"]
-                    )
-                    if rp_config and rp_config.get("api_key"):
-                        credentials = {
-                            "runpod": {
-                                "api_key": rp_config.get("api_key"),
-                            }
-                        }
-                except Exception as e:
-                    print(f"Failed to get RunPod credentials: {e}")
-                    credentials = None
-            else:
-                credentials = None
+        credentials = cloud_credentials.for_cluster(
+            actual_cluster_name, user["organization_id"]
+        )
 
-        def generate_logs():
-            try:
-                import sky
-
-                # Create a queue to pass log lines from the stream to the generator
-                log_queue = queue.Queue()
-                streaming_complete = threading.Event()
-
-                class LogCaptureStream:
-                    def __init__(self, log_queue):
-                        self.log_queue = log_queue
-
-                    def write(self, text):
-                        if text.strip():
-                            # Put the log line in the queue for immediate streaming
-                            self.log_queue.put(text.strip())
-
-                    def flush(self):
-                        pass
-
-                # Create the capture stream
-                capture_stream = LogCaptureStream(log_queue)
-
-                # Start the SkyPilot log streaming in a separate thread
-                def stream_logs():
-                    try:
-                        # Use sky.tail_logs to stream job logs
-                        sky.tail_logs(
-                            cluster_name=actual_cluster_name,
-                            job_id=str(job_id),
-                            tail=tail,
-                            follow=follow,
-                            output_stream=capture_stream,
-                            credentials=credentials,
-                        )
-                        # Signal that streaming is complete
-                        streaming_complete.set()
-                    except Exception as e:
-                        # Put error in queue
-                        log_queue.put(f"ERROR: {str(e)}")
-                        streaming_complete.set()
-
-                # Start streaming in background thread
-                stream_thread = threading.Thread(target=stream_logs)
-                stream_thread.daemon = True
-                stream_thread.start()
-
-                # Yield log lines as they come in
-                while not streaming_complete.is_set() or not log_queue.empty():
-                    try:
-                        # Get log line with timeout to allow checking completion
-                        log_line = log_queue.get(timeout=0.1)
-                        yield f"data: {json.dumps({'log_line': str(log_line)})}\n\n"
-                    except queue.Empty:
-                        # No log line available, continue checking
-                        continue
-
-                yield f"data: {json.dumps({'status': 'completed'})}\n\n"
-
-            except Exception as e:
-                yield f"data: {json.dumps({'error': str(e), 'status': 'failed'})}\n\n"
+        def tail_job_logs(output_stream):
+            import sky
+
+            sky.tail_logs(
+                cluster_name=actual_cluster_name,
+                job_id=str(job_id),
+                tail=tail,
+                follow=follow,
+                output_stream=output_stream,
+                credentials=credentials,
+            )
+
+        async def generate_logs():
+            # Viewers of the same job share one tailer; ``tail`` applies when
+            # it starts, later viewers get the buffered lines replayed
+            async for event in log_broker.subscribe(
+                ("job", actual_cluster_name, job_id, follow),
+                tail_job_logs,
+                last_event_id=last_event_id,
+                keepalive_seconds=15,
+            ):
+                yield format_sse(event)
 
         return StreamingResponse(
             generate_logs(),
@@ -374,7 +345,9 @@ async def cancel_cluster_job(
             cluster_name, user["id"], user["organization_id"]
         )
 
-        result = cancel_job_with_skypilot(actual_cluster_name, job_id)
+        result = await skypilot_sdk.run(
+            "cancel", cancel_job_with_skypilot, actual_cluster_name, job_id
+        )
         return {
             "request_id": result["request_id"],
             "job_id": job_id,
@@ -382,6 +355,8 @@ async def cancel_cluster_job(
             "message": result["message"],
             "result": result["result"],
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to cancel job: {str(e)}")
 
@@ -612,21 +587,9 @@ async def submit_job_to_cluster(
 
         # Handle mandatory storage mounts (skip for RunPod clusters)
         storage_mounts = {}
-        platform_info = get_cluster_platform_info_util(actual_cluster_name)
-        is_runpod = False
-        if platform_info and platform_info.get("platform"):
-            platform = platform_info["platform"]
-            if platform == "multi-cloud":
-                from routes.instances.utils import (
-                    determine_actual_cloud_from_skypilot_status,
-                )
-
-                # Determine the actual cloud used by SkyPilot
-                actual_platform = determine_actual_cloud_from_skypilot_status(
-                    actual_cluster_name
-                )
-                platform = actual_platform if actual_platform else platform
-            is_runpod = platform == "runpod"
+        is_runpod = (
+            cloud_credentials.platform_for_cluster(actual_cluster_name) == "runpod"
+        )
 
         if (
             not is_runpod
@@ -706,7 +669,9 @@ async def get_vscode_tunnel_info_endpoint(
     """Get VSCode tunnel information from job logs."""
     try:
         # Get job logs
-        logs = get_job_logs(
+        logs = await skypilot_sdk.run(
+            "download_logs",
+            get_job_logs,
             cluster_name,
             job_id,
             user_id=user["id"],
@@ -718,6 +683,8 @@ async def get_vscode_tunnel_info_endpoint(
 
         return tunnel_info
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Failed to get VSCode tunnel info: {str(e)}")
         raise HTTPException(
@@ -0,0 +1,190 @@
+"""
+Generation of SkyPilot's ``~/.sky/ssh_node_pools.yaml`` from the database.
+
+Node pool changes used to parse the whole YAML file, edit it and dump it
+back, with no locking, so concurrent node registrations lost updates. The
+``ssh_node_pools`` table is now the only source of truth and the file is
+derived from it:
+
+- ``schedule()`` marks the file stale; it is rewritten once changes have
+  been quiet for ``SSH_NODE_POOLS_WRITE_DEBOUNCE_SECONDS`` (and at most
+  ``SSH_NODE_POOLS_WRITE_MAX_DELAY_SECONDS`` after the first one), so a burst
+  of node registrations costs one write;
+- ``flush()`` writes immediately, for callers about to hand the pools to
+  SkyPilot (``ssh_up``);
+- each write renders all pools from one query and replaces the file
+  atomically (write then rename);
+- ``import_legacy_pools()`` adopts pools that only exist in the file, so
+  the first regeneration doesn't drop them.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config import (
+    SSH_NODE_POOLS_WRITE_DEBOUNCE_SECONDS,
+    SSH_NODE_POOLS_WRITE_MAX_DELAY_SECONDS,
+    SessionLocal,
+)
+from db.db_models import SSHNodePool as SSHNodePoolDB
+from utils.file_utils import load_ssh_node_pools, save_ssh_node_pools
+
+
+def _host_entry(host: Any) -> Optional[Dict[str, Any]]:
+    """
+    A pool host as a dict; SkyPilot also accepts a bare address (or SSH
+    config alias) string, which becomes ``{"ip": host}``. None if invalid.
+    """
+    if isinstance(host, str) and host.strip():
+        return {"ip": host.strip()}
+    if isinstance(host, dict):
+        return host
+    return None
+
+
+def pool_file_config(pool: SSHNodePoolDB) -> Dict[str, Any]:
+    """A pool's entry in ``ssh_node_pools.yaml``."""
+    hosts = []
+    for n in pool.nodes or []:
+        n = _host_entry(n)
+        if n is None:
+            continue
+        # Node names are ours; SkyPilot only knows hosts by address. Unset
+        # fields are left out so the pool's defaults apply
+        host = {"ip": n.get("ip")}
+        for key in ("user", "identity_file", "password", "resources"):
+            if n.get(key):
+                host[key] = n.get(key)
+        hosts.append(host)
+    cfg: Dict[str, Any] = {"hosts": hosts}
+    if pool.default_user:
+        cfg["user"] = pool.default_user
+    if pool.identity_file_path:
+        cfg["identity_file"] = pool.identity_file_path
+    if pool.password:
+        cfg["password"] = pool.password
+    if pool.resources:
+        cfg["resources"] = pool.resources
+    return cfg
+
+
+class NodePoolsFileWriter:
+    """Debounced writer of the SSH node pools file"""
+
+    def __init__(
+        self,
+        debounce_seconds: float = SSH_NODE_POOLS_WRITE_DEBOUNCE_SECONDS,
+        max_delay_seconds: float = SSH_NODE_POOLS_WRITE_MAX_DELAY_SECONDS,
+    ):
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._lock = threading.Lock()
+        # Serializes writes; held while rendering and replacing the file
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._first_change_at: Optional[float] = None
+        self.writes = 0
+
+    def schedule(self):
+        """Rewrite the file after the debounce period."""
+        if self.debounce_seconds <= 0:
+            self.flush()
+            return
+        with self._lock:
+            now = time.monotonic()
+            if self._first_change_at is None:
+                self._first_change_at = now
+            delay = min(
+                self.debounce_seconds,
+                max(0.0, self._first_change_at + self.max_delay_seconds - now),
+            )
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write the file now (cancelling any pending write)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._first_change_at = None
+        self._write()
+
+    def stop(self):
+        """Write any pending change (used on application shutdown)."""
+        with self._lock:
+            pending = self._timer is not None
+        if pending:
+            self.flush()
+
+    def import_legacy_pools(self) -> int:
+        """
+        Add pools that exist only in the file to the database (unowned, as
+        they were invisible in the UI before).
+
+        Returns:
+            Number of pools imported
+        """
+        pools = load_ssh_node_pools()
+        if not pools:
+            return 0
+        db = SessionLocal()
+        try:
+            known = {name for (name,) in db.query(SSHNodePoolDB.name).all()}
+            imported = 0
+            for name, cfg in pools.items():
+                if name in known or not isinstance(cfg, dict):
+                    continue
+                db.add(
+                    SSHNodePoolDB(
+                        name=name,
+                        default_user=cfg.get("user"),
+                        identity_file_path=cfg.get("identity_file"),
+                        password=cfg.get("password"),
+                        resources=cfg.get("resources"),
+                        nodes=[
+                            host
+                            for host in map(_host_entry, cfg.get("hosts") or [])
+                            if host is not None
+                        ],
+                    )
+                )
+                imported += 1
+            db.commit()
+            return imported
+        except Exception as e:
+            db.rollback()
+            print(f"Failed to import SSH node pools from file: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+            self._first_change_at = None
+        try:
+            self._write()
+        except Exception as e:
+            print(f"Failed to write SSH node pools file: {e}")
+
+    def _write(self):
+        with self._write_lock:
+            db = SessionLocal()
+            try:
+                pools = {
+                    pool.name: pool_file_config(pool)
+                    for pool in db.query(SSHNodePoolDB).order_by(SSHNodePoolDB.name)
+                }
+            finally:
+                db.close()
+            save_ssh_node_pools(pools)
+            self.writes += 1
+
+
+# Global instance
+node_pools_file = NodePoolsFileWriter()
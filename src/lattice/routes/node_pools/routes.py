@@ -18,7 +18,8 @@ from routes.clouds.azure.utils import az_get_current_config, load_azure_config
 from routes.clouds.runpod.utils import load_runpod_config, rp_get_current_config
 from routes.instances.utils import get_skypilot_status
 from routes.reports.utils import record_availability
-from utils.cluster_utils import get_cluster_platform_info, get_display_name_from_actual
+from utils.cluster_utils import get_cluster_platform_info_map, is_owned_by
+from utils.skypilot_async import skypilot_sdk
 from utils.file_utils import (
     delete_named_identity_file,
     save_named_identity_file,
@@ -32,9 +33,9 @@ from .utils import (
     create_cluster_in_pools,
     delete_cluster_in_pools,
     remove_node_from_cluster,
-    get_cluster_config_from_db,
+    cluster_config_from_pool,
     get_cached_gpu_resources,
-    schedule_gpu_resources_update,
+    schedule_gpu_resources_updates,
 )
 from config import get_db
 from db.db_models import (
@@ -57,6 +58,7 @@ router = APIRouter(
 async def get_node_pools(
     request: Request,
     response: Response,
+    max_staleness: Optional[float] = None,
     user: dict = Depends(get_user_or_api_key),
     db: Session = Depends(get_db),
 ):
@@ -67,6 +69,9 @@ async def get_node_pools(
     - Azure instances from /clouds/azure/instances
     - SSH node info from /skypilot/ssh-node-info
     - SkyPilot status from /instances/status
+
+    ``max_staleness`` (seconds) bounds the age of the cached SkyPilot status;
+    pass 0 to force a fresh fetch.
     """
     try:
         # Initialize response structure
@@ -85,26 +90,29 @@ async def get_node_pools(
 
         # 2. Get aggregated instances data (combining all cloud providers)
         try:
-            skyPilotStatus = get_skypilot_status()
+            skyPilotStatus = await skypilot_sdk.run(
+                "status", get_skypilot_status, max_staleness=max_staleness
+            )
 
-            # Count all cloud clusters (non-SSH clusters) that belong to the current user
-            cloud_clusters = []
+            # Resolve ownership for every cluster in one query and index the
+            # current user's clusters by platform for the per-pool counts below
+            platform_info_map = get_cluster_platform_info_map(
+                (cluster.get("name", "") for cluster in skyPilotStatus), db=db
+            )
+            user_clusters_by_platform: dict[str, list] = {}
             for cluster in skyPilotStatus:
-                cluster_name = cluster.get("name", "")
-                platform_info = get_cluster_platform_info(cluster_name)
-
-                # Check if this is a cloud cluster
-                if platform_info and platform_info.get("platform") in [
-                    "runpod",
-                    "azure",
-                ]:
-                    # Only include clusters that belong to the current user and organization
-                    if (
-                        platform_info.get("user_id") == user["id"]
-                        and platform_info.get("organization_id")
-                        == user["organization_id"]
-                    ):
-                        cloud_clusters.append(cluster)
+                platform_info = platform_info_map.get(cluster.get("name", ""))
+                if is_owned_by(platform_info, user):
+                    user_clusters_by_platform.setdefault(
+                        platform_info.get("platform"), []
+                    ).append((cluster, platform_info))
+
+            # Count all cloud clusters (non-SSH clusters) that belong to the current user
+            cloud_clusters = [
+                cluster
+                for platform in ("runpod", "azure")
+                for cluster, _ in user_clusters_by_platform.get(platform, [])
+            ]
 
             # Get total max instances from all cloud providers
             total_max_instances = 0
@@ -138,22 +146,18 @@ async def get_node_pools(
 
         # 4. Get SkyPilot status (filtered by user and with display names)
         try:
-            cluster_records = get_skypilot_status()
+            # Reuse the snapshot fetched above instead of a second status call
+            cluster_records = skyPilotStatus
             filtered_status = []
 
             for record in cluster_records:
                 cluster_name = record.get("name", "")
-                platform_info = get_cluster_platform_info(cluster_name)
+                platform_info = platform_info_map.get(cluster_name)
 
                 # Only include clusters that belong to the current user and organization
-                if platform_info and (
-                    platform_info.get("user_id") == user["id"]
-                    and platform_info.get("organization_id") == user["organization_id"]
-                ):
+                if is_owned_by(platform_info, user):
                     # Get display name for the response
-                    display_name = get_display_name_from_actual(cluster_name)
-                    if not display_name:
-                        display_name = cluster_name  # Fallback to actual name
+                    display_name = platform_info.get("display_name") or cluster_name
 
                     # Create a copy of the record with display name
                     filtered_record = record.copy()
@@ -168,23 +172,37 @@ async def get_node_pools(
         try:
             node_pools = []
 
-            # Helper to map team IDs to names for display
+            # Load the organization's teams once to map team IDs to names for display
+            try:
+                team_names_by_id = {
+                    t.id: t.name
+                    for t in db.query(TeamDB)
+                    .filter(TeamDB.organization_id == user["organization_id"])
+                    .all()
+                }
+            except Exception:
+                team_names_by_id = {}
+
             def map_team_ids_to_names(team_ids: list[str]) -> list[str]:
-                if not team_ids:
-                    return []
-                try:
-                    # Fetch teams in one query
-                    teams = (
-                        db.query(TeamDB)
-                        .filter(
-                            TeamDB.organization_id == user["organization_id"],
-                            TeamDB.id.in_(team_ids),
-                        )
-                        .all()
-                    )
-                    return [t.name for t in teams]
-                except Exception:
-                    return []
+                return [
+                    team_names_by_id[tid] for tid in team_ids or [] if tid in team_names_by_id
+                ]
+
+            # Load all cloud pool access rows for the organization once
+            try:
+                access_team_ids_by_pool = {
+                    (row.provider, row.pool_key): row.allowed_team_ids or []
+                    for row in db.query(NodePoolAccessDB)
+                    .filter(NodePoolAccessDB.organization_id == user["organization_id"])
+                    .all()
+                }
+            except Exception:
+                access_team_ids_by_pool = {}
+
+            # The user's team does not depend on the pool being rendered
+            user_team_id = (
+                get_user_team_id(db, user["organization_id"], user["id"]) if db else None
+            )
 
             # Get Azure configs
             try:
@@ -192,44 +210,14 @@ async def get_node_pools(
                 if azure_config_data.get("configs"):
                     for config_key, config in azure_config_data["configs"].items():
                         # Get current Azure instances for this config (filtered by user)
-                        azure_instances = 0
-                        for cluster in skyPilotStatus:
-                            cluster_name = cluster.get("name", "")
-                            platform_info = get_cluster_platform_info(cluster_name)
-                            if (
-                                platform_info
-                                and platform_info.get("platform") == "azure"
-                            ):
-                                # Only count clusters that belong to the current user and organization
-                                if (
-                                    platform_info.get("user_id") == user["id"]
-                                    and platform_info.get("organization_id")
-                                    == user["organization_id"]
-                                ):
-                                    azure_instances += 1
+                        azure_instances = len(user_clusters_by_platform.get("azure", []))
 
                         # Determine access teams for display from DB
-                        access_team_ids = []
-                        try:
-                            access_row = (
-                                db.query(NodePoolAccessDB)
-                                .filter(
-                                    NodePoolAccessDB.organization_id
-                                    == user["organization_id"],
-                                    NodePoolAccessDB.provider == "azure",
-                                    NodePoolAccessDB.pool_key == config_key,
-                                )
-                                .first()
-                            )
-                            if access_row and access_row.allowed_team_ids:
-                                access_team_ids = access_row.allowed_team_ids
-                        except Exception:
-                            pass
+                        access_team_ids = access_team_ids_by_pool.get(
+                            ("azure", config_key), []
+                        )
                         access_team_names = map_team_ids_to_names(access_team_ids)
                         # team-based access evaluation
-                        user_team_id = (
-                            get_user_team_id(db, user["organization_id"], user["id"]) if db else None
-                        )
                         access_allowed = True
                         if access_team_ids:
                             access_allowed = user_team_id is not None and user_team_id in access_team_ids
@@ -278,44 +266,14 @@ async def get_node_pools(
                 if runpod_config_data.get("configs"):
                     for config_key, config in runpod_config_data["configs"].items():
                         # Get current RunPod instances for this config (filtered by user)
-                        runpod_instances = 0
-                        for cluster in skyPilotStatus:
-                            cluster_name = cluster.get("name", "")
-                            platform_info = get_cluster_platform_info(cluster_name)
-                            if (
-                                platform_info
-                                and platform_info.get("platform") == "runpod"
-                            ):
-                                # Only count clusters that belong to the current user and organization
-                                if (
-                                    platform_info.get("user_id") == user["id"]
-                                    and platform_info.get("organization_id")
-                                    == user["organization_id"]
-                                ):
-                                    runpod_instances += 1
+                        runpod_instances = len(user_clusters_by_platform.get("runpod", []))
 
                         # Determine access teams for display from DB
-                        access_team_ids = []
-                        try:
-                            access_row = (
-                                db.query(NodePoolAccessDB)
-                                .filter(
-                                    NodePoolAccessDB.organization_id
-                                    == user["organization_id"],
-                                    NodePoolAccessDB.provider == "runpod",
-                                    NodePoolAccessDB.pool_key == config_key,
-                                )
-                                .first()
-                            )
-                            if access_row and access_row.allowed_team_ids:
-                                access_team_ids = access_row.allowed_team_ids
-                        except Exception:
-                            pass
+                        access_team_ids = access_team_ids_by_pool.get(
+                            ("runpod", config_key), []
+                        )
                         access_team_names = map_team_ids_to_names(access_team_ids)
                         # team-based access evaluation
-                        user_team_id = (
-                            get_user_team_id(db, user["organization_id"], user["id"]) if db else None
-                        )
                         access_allowed = True
                         if access_team_ids:
                             access_allowed = user_team_id is not None and user_team_id in access_team_ids
@@ -362,44 +320,14 @@ async def get_node_pools(
                 if aws_config_data.get("configs"):
                     for config_key, config in aws_config_data["configs"].items():
                         # Get current AWS instances for this config (filtered by user)
-                        aws_instances = 0
-                        for cluster in skyPilotStatus:
-                            cluster_name = cluster.get("name", "")
-                            platform_info = get_cluster_platform_info(cluster_name)
-                            if (
-                                platform_info
-                                and platform_info.get("platform") == "aws"
-                            ):
-                                # Only count clusters that belong to the current user and organization
-                                if (
-                                    platform_info.get("user_id") == user["id"]
-                                    and platform_info.get("organization_id")
-                                    == user["organization_id"]
-                                ):
-                                    aws_instances += 1
+                        aws_instances = len(user_clusters_by_platform.get("aws", []))
 
                         # Determine access teams for display from DB
-                        access_team_ids = []
-                        try:
-                            access_row = (
-                                db.query(NodePoolAccessDB)
-                                .filter(
-                                    NodePoolAccessDB.organization_id
-                                    == user["organization_id"],
-                                    NodePoolAccessDB.provider == "aws",
-                                    NodePoolAccessDB.pool_key == config_key,
-                                )
-                                .first()
-                            )
-                            if access_row and access_row.allowed_team_ids:
-                                access_team_ids = access_row.allowed_team_ids
-                        except Exception:
-                            pass
+                        access_team_ids = access_team_ids_by_pool.get(
+                            ("aws", config_key), []
+                        )
                         access_team_names = map_team_ids_to_names(access_team_ids)
                         # team-based access evaluation
-                        user_team_id = (
-                            get_user_team_id(db, user["organization_id"], user["id"]) if db else None
-                        )
                         access_allowed = True
                         if access_team_ids:
                             access_allowed = user_team_id is not None and user_team_id in access_team_ids
@@ -451,53 +379,44 @@ async def get_node_pools(
                     .all()
                 )
 
+                # Trigger one background refresh of GPU resources for all pools
+                if user_ssh_pools:
+                    try:
+                        schedule_gpu_resources_updates(
+                            [pool.name for pool in user_ssh_pools]
+                        )
+                    except Exception as e:
+                        print(f"Failed to schedule GPU refresh for SSH pools: {e}")
+
                 for pool in user_ssh_pools:
                     cluster_name = pool.name
-                    cfg = get_cluster_config_from_db(cluster_name)
+                    # Build the config from the row we already loaded
+                    cfg = cluster_config_from_pool(pool)
                     hosts_count = len(cfg.get("hosts", []))
-                    # Trigger background refresh of GPU resources for this pool
-                    try:
-                        schedule_gpu_resources_update(cluster_name)
-                    except Exception as e:
-                        print(f"Failed to schedule GPU refresh for {cluster_name}: {e}")
                     # Get cached GPU resources (fast response) for this pool
-                    cached_gpu_resources = get_cached_gpu_resources(cluster_name)
+                    cached_gpu_resources = (pool.other_data or {}).get(
+                        "gpu_resources"
+                    ) or {}
 
                     # Find active clusters that use this node pool as platform
                     active_clusters = []
-                    ssh_instances_for_user = 0
-                    for cluster in skyPilotStatus:
+                    for cluster, platform_info in user_clusters_by_platform.get(
+                        cluster_name, []
+                    ):
                         sky_cluster_name = cluster.get("name", "")
-                        platform_info = get_cluster_platform_info(sky_cluster_name)
-
-                        # Check if this cluster uses this node pool as platform
-                        if (
-                            platform_info
-                            and platform_info.get("platform") == cluster_name
-                        ):
-                            # Only include clusters that belong to the current user and organization
-                            if (
-                                platform_info.get("user_id") == user["id"]
-                                and platform_info.get("organization_id")
-                                == user["organization_id"]
-                            ):
-                                # Get display name for the response
-                                display_name = get_display_name_from_actual(
-                                    sky_cluster_name
-                                )
-                                if not display_name:
-                                    display_name = (
-                                        sky_cluster_name  # Fallback to actual name
-                                    )
+                        # Get display name for the response
+                        display_name = (
+                            platform_info.get("display_name") or sky_cluster_name
+                        )
 
-                                active_clusters.append(
-                                    {
-                                        "cluster_name": display_name,  # Return display name
-                                        "status": cluster.get("status"),
-                                        "user_info": platform_info.get("user_info", {}),
-                                    }
-                                )
-                                ssh_instances_for_user += 1
+                        active_clusters.append(
+                            {
+                                "cluster_name": display_name,  # Return display name
+                                "status": cluster.get("status"),
+                                "user_info": platform_info.get("user_info", {}),
+                            }
+                        )
+                    ssh_instances_for_user = len(active_clusters)
 
                     # Determine access teams for display (from DB other_data)
                     allowed_team_ids = []
@@ -510,9 +429,6 @@ async def get_node_pools(
 
                     access_team_names = map_team_ids_to_names(allowed_team_ids)
                     # team-based access evaluation
-                    user_team_id = (
-                        get_user_team_id(db, user["organization_id"], user["id"]) if db else None
-                    )
                     access_allowed = True
                     if allowed_team_ids:
                         access_allowed = user_team_id is not None and user_team_id in allowed_team_ids
@@ -546,6 +462,8 @@ async def get_node_pools(
 
         return response_data
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to get node pools data: {str(e)}"
@@ -1,16 +1,17 @@
 from fastapi import HTTPException
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 import threading
-from utils.file_utils import (
-    load_ssh_node_pools,
-    save_ssh_node_pools,
-)
+from typing import Callable, Optional
 from models import SSHNode
 import os
 from datetime import datetime
-from ..instances.utils import fetch_and_parse_gpu_resources
-from config import SessionLocal
-from db.db_models import SSHNodePool as SSHNodePoolDB, validate_relationships_before_save, validate_relationships_before_delete
+from ..instances.utils import fetch_and_parse_gpu_resources_for_pools
+from config import SSH_GPU_REFRESH_CONCURRENCY, SessionLocal
+from utils.event_bus import event_bus
+from utils.skypilot_tracker import REQUEST_EVENTS_TOPIC
+from routes.node_pools.pools_file import node_pools_file, pool_file_config
+from sqlalchemy.exc import IntegrityError
+from db.db_models import ClusterPlatform, SSHNodePool as SSHNodePoolDB, validate_relationships_before_save, validate_relationships_before_delete
 
 
 async def update_gpu_resources_for_node_pool(node_pool_name: str):
@@ -18,91 +19,242 @@ async def update_gpu_resources_for_node_pool(node_pool_name: str):
     Update GPU resources for a specific node pool.
     This should be called when launching or stopping clusters.
     """
+    await update_gpu_resources_for_node_pools([node_pool_name])
+
+
+async def update_gpu_resources_for_node_pools(node_pool_names: list[str]):
+    """
+    Update GPU resources of several node pools, probed together (one SDK
+    availability call for all of them).
+    """
     try:
         # Fetch fresh GPU resources
-        gpu_resources = await fetch_and_parse_gpu_resources(node_pool_name)
+        results = await fetch_and_parse_gpu_resources_for_pools(
+            node_pool_names, max_concurrency=SSH_GPU_REFRESH_CONCURRENCY
+        )
+    except Exception as e:
+        print(f"Error in update_gpu_resources_for_node_pools for {node_pool_names}: {e}")
+        return
+    for node_pool_name, gpu_resources in results.items():
+        if isinstance(gpu_resources, Exception):
+            print(
+                f"Error in update_gpu_resources_for_node_pool for {node_pool_name}: {gpu_resources}"
+            )
+            continue
+        _save_gpu_resources(node_pool_name, gpu_resources)
 
-        # Update the database
-        db = SessionLocal()
-        try:
-            pool = (
-                db.query(SSHNodePoolDB)
-                .filter(SSHNodePoolDB.name == node_pool_name)
-                .first()
+
+def _save_gpu_resources(node_pool_name: str, gpu_resources: dict):
+    # Update the database
+    db = SessionLocal()
+    try:
+        pool = (
+            db.query(SSHNodePoolDB)
+            .filter(SSHNodePoolDB.name == node_pool_name)
+            .first()
+        )
+        if pool:
+            current_other_data = pool.other_data or {}
+            current_other_data.update(
+                {
+                    "gpu_resources": gpu_resources,
+                    "last_updated": datetime.utcnow().isoformat(),
+                }
             )
-            if pool:
-                current_other_data = pool.other_data or {}
-                current_other_data.update(
-                    {
-                        "gpu_resources": gpu_resources,
-                        "last_updated": datetime.utcnow().isoformat(),
-                    }
-                )
-                pool.other_data = current_other_data
+            pool.other_data = current_other_data
 
-                # Explicitly mark the field as modified so SQLAlchemy detects the change
-                from sqlalchemy.orm.attributes import flag_modified
+            # Explicitly mark the field as modified so SQLAlchemy detects the change
+            from sqlalchemy.orm.attributes import flag_modified
 
-                flag_modified(pool, "other_data")
+            flag_modified(pool, "other_data")
 
-                db.commit()
-                print(f"Successfully updated GPU resources for {node_pool_name}")
-            else:
-                print(f"Node pool not found: {node_pool_name}")
-        except Exception as e:
-            print(f"Error updating GPU resources for {node_pool_name}: {e}")
-            db.rollback()
-        finally:
-            db.close()
+            db.commit()
+            print(f"Successfully updated GPU resources for {node_pool_name}")
+        else:
+            print(f"Node pool not found: {node_pool_name}")
     except Exception as e:
-        print(f"Error in update_gpu_resources_for_node_pool for {node_pool_name}: {e}")
+        print(f"Error updating GPU resources for {node_pool_name}: {e}")
+        db.rollback()
+    finally:
+        db.close()
 
 
+# Bounded fan-out: at most SSH_GPU_REFRESH_CONCURRENCY refreshes run at once
+# (pools scheduled together share one refresh)
 _gpu_update_executor = ThreadPoolExecutor(
-    max_workers=4, thread_name_prefix="gpu-update"
+    max_workers=SSH_GPU_REFRESH_CONCURRENCY, thread_name_prefix="gpu-update"
 )
 _inflight_updates_lock = threading.Lock()
-_inflight_updates: set[str] = set()
+# Pool name -> future resolved (with the pool name) when its refresh finishes
+_inflight_updates: dict[str, Future] = {}
 
 
-def _schedule_gpu_resources_update(node_pool_name: str):
-    """Schedule async GPU resources update using a thread pool and avoid duplicates per pool."""
-    try:
-        import asyncio
+def _schedule_gpu_resources_updates(node_pool_names: list[str]) -> dict[str, Future]:
+    """
+    Schedule one background refresh of these pools' GPU resources.
 
+    Pools already being refreshed share that refresh instead (single-flight
+    per pool); the others are refreshed together.
+    """
+    futures: dict[str, Future] = {}
+    new_names = []
+    with _inflight_updates_lock:
+        for name in dict.fromkeys(node_pool_names):
+            future = _inflight_updates.get(name)
+            if future is None:
+                future = _inflight_updates[name] = Future()
+                new_names.append(name)
+            futures[name] = future
+    if not new_names:
+        return futures
+
+    def finish():
         with _inflight_updates_lock:
-            if node_pool_name in _inflight_updates:
-                return
-            _inflight_updates.add(node_pool_name)
+            for name in new_names:
+                _inflight_updates.pop(name, None)
+        for name in new_names:
+            futures[name].set_result(name)
 
-        def run_async_update():
+    def run_async_update():
+        import asyncio
+
+        loop = None
+        try:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(update_gpu_resources_for_node_pools(new_names))
+        except Exception as e:
+            print(
+                f"Background thread: Failed to update GPU resources for {new_names}: {e}"
+            )
+        finally:
             try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                loop.run_until_complete(
-                    update_gpu_resources_for_node_pool(node_pool_name)
-                )
-            except Exception as e:
-                print(
-                    f"Background thread: Failed to update GPU resources for {node_pool_name}: {e}"
-                )
-            finally:
-                try:
+                if loop is not None:
                     loop.close()
-                except Exception:
-                    pass
-                finally:
-                    with _inflight_updates_lock:
-                        _inflight_updates.discard(node_pool_name)
+            except Exception:
+                pass
+            finally:
+                finish()
 
+    try:
         _gpu_update_executor.submit(run_async_update)
     except Exception as e:
-        print(f"Failed to schedule GPU resources update for {node_pool_name}: {e}")
+        finish()
+        print(f"Failed to schedule GPU resources update for {new_names}: {e}")
+        for name in new_names:
+            futures.pop(name)
+    return futures
+
+
+def _schedule_gpu_resources_update(node_pool_name: str) -> Optional[Future]:
+    """Schedule async GPU resources update using a thread pool and avoid duplicates per pool."""
+    return _schedule_gpu_resources_updates([node_pool_name]).get(node_pool_name)
+
 
+def schedule_gpu_resources_update(node_pool_name: str) -> Optional[Future]:
+    """
+    Public helper to schedule GPU resources update in background.
+
+    Returns:
+        A future that resolves when the pool's refresh (new or already
+        running) finishes, or None if it could not be scheduled
+    """
+    return _schedule_gpu_resources_update(node_pool_name)
+
+
+def schedule_gpu_resources_updates(node_pool_names: list[str]) -> dict[str, Future]:
+    """
+    Public helper to refresh several pools' GPU resources in background,
+    probed together rather than one pool per call.
+
+    Returns:
+        Pool name -> future for each pool whose refresh (new or already
+        running) could be scheduled
+    """
+    return _schedule_gpu_resources_updates(node_pool_names)
+
+
+def _refresh_gpu_resources_on_request_event(event: dict):
+    """Refresh an SSH pool's GPU inventory once a cluster on it launched or went down."""
+    if event["status"] not in ("completed", "failed") or event["task_type"] not in (
+        "launch",
+        "down",
+        "terminate",
+    ):
+        return
+    db = SessionLocal()
+    try:
+        # Requests store the display name; it is unique within an organization
+        platform = (
+            db.query(ClusterPlatform.platform)
+            .filter(
+                ClusterPlatform.display_name == event["cluster_name"],
+                ClusterPlatform.organization_id == event["organization_id"],
+            )
+            .scalar()
+        )
+        if platform is None:
+            return
+        is_pool = (
+            db.query(SSHNodePoolDB.id).filter(SSHNodePoolDB.name == platform).first()
+            is not None
+        )
+    finally:
+        db.close()
+    if is_pool:
+        _schedule_gpu_resources_update(platform)
+
+
+event_bus.subscribe(REQUEST_EVENTS_TOPIC, _refresh_gpu_resources_on_request_event)
 
-def schedule_gpu_resources_update(node_pool_name: str):
-    """Public helper to schedule GPU resources update in background."""
-    _schedule_gpu_resources_update(node_pool_name)
+
+def get_inflight_gpu_resources_updates(node_pool_names: list[str]) -> dict[str, Future]:
+    """Futures of the GPU resources refreshes currently running for these pools."""
+    with _inflight_updates_lock:
+        return {
+            name: _inflight_updates[name]
+            for name in node_pool_names
+            if name in _inflight_updates
+        }
+
+
+async def iter_completed_gpu_resources_updates(
+    updates: dict[str, Future], timeout: Optional[float] = None
+):
+    """
+    Yield pool names as their GPU resources refreshes finish.
+
+    Args:
+        updates: Pool name -> refresh future (see schedule_gpu_resources_update)
+        timeout: Stop waiting after this many seconds (None waits for all)
+    """
+    import asyncio
+
+    pending = {asyncio.wrap_future(future): name for name, future in updates.items()}
+    loop = asyncio.get_running_loop()
+    deadline = None if timeout is None else loop.time() + timeout
+    while pending:
+        remaining = None if deadline is None else deadline - loop.time()
+        if remaining is not None and remaining <= 0:
+            return
+        done, _ = await asyncio.wait(
+            pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+        )
+        if not done:
+            return
+        for task in done:
+            yield pending.pop(task)
+
+
+def gpu_resources_age_seconds(other_data: Optional[dict]) -> Optional[float]:
+    """Seconds since a pool's cached GPU resources were refreshed (None if never)."""
+    last_updated = (other_data or {}).get("last_updated")
+    if not last_updated or not (other_data or {}).get("gpu_resources"):
+        return None
+    try:
+        return (datetime.utcnow() - datetime.fromisoformat(last_updated)).total_seconds()
+    except (TypeError, ValueError):
+        return None
 
 
 def get_cached_gpu_resources(node_pool_name: str) -> dict:
@@ -139,85 +291,61 @@ def create_cluster_in_pools(
     user_id: str = None,
     organization_id: str = None,
 ):
-    pools = load_ssh_node_pools()
-    if cluster_name in pools:
-        raise HTTPException(
-            status_code=400, detail=f"Cluster '{cluster_name}' already exists"
-        )
-    cluster_config = {"hosts": []}
-    if user or identity_file or password or resources:
-        defaults = {}
-        if user:
-            defaults["user"] = user
-        if identity_file:
-            defaults["identity_file"] = identity_file
-        if password:
-            defaults["password"] = password
-        if resources:
-            defaults["resources"] = resources
-        cluster_config.update(defaults)
-    pools[cluster_name] = cluster_config
-    save_ssh_node_pools(pools)
+    db = SessionLocal()
     try:
-        db = SessionLocal()
-        existing = (
-            db.query(SSHNodePoolDB).filter(SSHNodePoolDB.name == cluster_name).first()
+        if (
+            db.query(SSHNodePoolDB.id).filter(SSHNodePoolDB.name == cluster_name).first()
+            is not None
+        ):
+            raise HTTPException(
+                status_code=400, detail=f"Cluster '{cluster_name}' already exists"
+            )
+        new_pool = SSHNodePoolDB(
+            name=cluster_name,
+            user_id=user_id,
+            organization_id=organization_id,
+            default_user=user,
+            identity_file_path=identity_file,
+            password=password,
+            resources=resources,
+            nodes=[],
         )
-        if existing is None:
-            new_pool = SSHNodePoolDB(
-                name=cluster_name,
-                user_id=user_id,
-                organization_id=organization_id,
-                default_user=user,
-                identity_file_path=identity_file,
-                password=password,
-                resources=resources,
+
+        # Validate relationships before saving
+        validate_relationships_before_save(new_pool, db)
+
+        db.add(new_pool)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Created concurrently under the same name
+            db.rollback()
+            raise HTTPException(
+                status_code=400, detail=f"Cluster '{cluster_name}' already exists"
             )
-            
-            # Validate relationships before saving
-            validate_relationships_before_save(new_pool, db)
-            
-            db.add(new_pool)
-        else:
-            existing.user_id = user_id
-            existing.organization_id = organization_id
-            existing.default_user = user
-            existing.identity_file_path = identity_file
-            existing.password = password
-            existing.resources = resources
-        db.commit()
-    except Exception as e:
-        print(f"Warning: Failed to persist SSH node pool to DB: {e}")
+        cluster_config = pool_file_config(new_pool)
     finally:
-        try:
-            db.close()
-        except Exception:
-            pass
+        db.close()
+    node_pools_file.schedule()
     return cluster_config
 
 
-def update_pool_resources(pool: SSHNodePoolDB, db):
-    """Update pool resources to reflect the maximum available resources across all nodes"""
-    if not pool:
-        return
-
-    # Get all nodes from JSON field
-    nodes = pool.nodes or []
-
+def _pool_resources(resources: Optional[dict], nodes: list) -> Optional[dict]:
+    """Pool resources with vcpus/memory_gb totalled across its nodes."""
     total_vcpus = 0
     total_memory = 0
 
     # Calculate total resources from all nodes
     for node in nodes:
-        resources = node.get("resources") if isinstance(node, dict) else None
-        if resources:
-            vcpus = int(resources.get("vcpus", "0") or "0")
-            memory = int(resources.get("memory_gb", "0") or "0")
+        node_resources = node.get("resources") if isinstance(node, dict) else None
+        if node_resources:
+            vcpus = int(node_resources.get("vcpus", "0") or "0")
+            memory = int(node_resources.get("memory_gb", "0") or "0")
             total_vcpus += vcpus
             total_memory += memory
 
     # Start with existing pool resources
-    pool_resources = pool.resources or {}
+    pool_resources = dict(resources or {})
 
     # Add or update with total values from nodes
     if total_vcpus > 0:
@@ -225,93 +353,110 @@ def update_pool_resources(pool: SSHNodePoolDB, db):
     if total_memory > 0:
         pool_resources["memory_gb"] = str(total_memory)
 
-    pool.resources = pool_resources if pool_resources else None
+    return pool_resources if pool_resources else None
+
+
+def update_pool_resources(pool: SSHNodePoolDB, db):
+    """Update pool resources to reflect the maximum available resources across all nodes"""
+    if not pool:
+        return
+
+    pool.resources = _pool_resources(pool.resources, pool.nodes or [])
     db.commit()
 
     print(f"Updated pool {pool.name} resources: {pool.resources}")
 
 
-def add_node_to_cluster(cluster_name: str, node: SSHNode):
-    pools = load_ssh_node_pools()
-    if cluster_name not in pools:
+# Compare-and-set attempts before a nodes update gives up under contention
+_NODE_UPDATE_ATTEMPTS = 20
+
+
+def _update_pool_nodes(
+    cluster_name: str, mutate: Callable[[list], list]
+) -> SSHNodePoolDB:
+    """
+    Apply ``mutate`` to a pool's node list without locks or lost updates.
+
+    The new list is written only if the pool's ``version`` is still the one
+    it was computed from; otherwise it is recomputed from the fresh row.
+    ``mutate`` may raise (e.g. HTTPException for a duplicate node).
+
+    Returns:
+        The updated pool row (detached)
+    """
+    db = SessionLocal()
+    try:
+        for _ in range(_NODE_UPDATE_ATTEMPTS):
+            pool = (
+                db.query(SSHNodePoolDB)
+                .filter(SSHNodePoolDB.name == cluster_name)
+                .first()
+            )
+            if pool is None:
+                raise HTTPException(
+                    status_code=404, detail=f"Cluster '{cluster_name}' not found"
+                )
+            version = pool.version or 0
+            nodes = mutate(list(pool.nodes or []))
+            resources = _pool_resources(pool.resources, nodes)
+            updated = (
+                db.query(SSHNodePoolDB)
+                .filter(
+                    SSHNodePoolDB.id == pool.id,
+                    SSHNodePoolDB.version == version,
+                )
+                .update(
+                    {
+                        SSHNodePoolDB.nodes: nodes,
+                        SSHNodePoolDB.resources: resources,
+                        SSHNodePoolDB.version: version + 1,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if updated:
+                db.refresh(pool)
+                db.expunge(pool)
+                node_pools_file.schedule()
+                return pool
+            # Someone else updated the pool in between: start over
+            db.expire_all()
         raise HTTPException(
-            status_code=404, detail=f"Cluster '{cluster_name}' not found"
+            status_code=409,
+            detail=f"Cluster '{cluster_name}' is being modified concurrently, please retry",
         )
-    node_dict = {"ip": node.ip, "user": node.user}
+    finally:
+        db.close()
+
+
+def add_node_to_cluster(cluster_name: str, node: SSHNode):
+    new_node = {"ip": node.ip, "user": node.user}
+    if node.name:
+        new_node["name"] = node.name
     if node.identity_file:
-        node_dict["identity_file"] = node.identity_file
+        new_node["identity_file"] = node.identity_file
     if node.password:
-        node_dict["password"] = node.password
+        new_node["password"] = node.password
     if node.resources:
-        node_dict["resources"] = node.resources
+        new_node["resources"] = node.resources
         print(f"Adding node {node.ip} with resources: {node.resources}")
-    if "hosts" not in pools[cluster_name]:
-        pools[cluster_name]["hosts"] = []
-    for existing_node in pools[cluster_name]["hosts"]:
-        if existing_node.get("ip") == node.ip:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Node with IP '{node.ip}' already exists in cluster '{cluster_name}'",
-            )
-    pools[cluster_name]["hosts"].append(node_dict)
-    save_ssh_node_pools(pools)
 
-    try:
-        db = SessionLocal()
-        pool = (
-            db.query(SSHNodePoolDB).filter(SSHNodePoolDB.name == cluster_name).first()
-        )
-        if pool is None:
-            pool = SSHNodePoolDB(name=cluster_name, nodes=[])
-            
-            # Validate relationships before saving
-            validate_relationships_before_save(pool, db)
-            
-            db.add(pool)
-            db.commit()
-            db.refresh(pool)
-
-        # Ensure nodes list exists
-        current_nodes = list(pool.nodes or [])
-        # Prevent duplicates by IP
-        for existing in current_nodes:
+    def add(nodes: list) -> list:
+        for existing in nodes:
             if isinstance(existing, dict) and existing.get("ip") == node.ip:
-                # Already exists in DB representation
-                break
-        else:
-            # Append new node dict, using identity_file key for JSON
-            new_node = {"ip": node.ip, "user": node.user}
-            if node.name:
-                new_node["name"] = node.name
-            if node.identity_file:
-                new_node["identity_file"] = node.identity_file
-            if node.password:
-                new_node["password"] = node.password
-            if node.resources:
-                new_node["resources"] = node.resources
-            current_nodes.append(new_node)
-
-            # Assign back and flag as modified
-            pool.nodes = current_nodes
-            from sqlalchemy.orm.attributes import flag_modified
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Node with IP '{node.ip}' already exists in cluster '{cluster_name}'",
+                )
+        return nodes + [new_node]
 
-            flag_modified(pool, "nodes")
-            db.commit()
-
-            # Update pool resources to reflect the maximum available resources
-            update_pool_resources(pool, db)
-    except Exception as e:
-        print(f"Warning: Failed to persist SSH node to DB (JSON): {e}")
-    finally:
-        try:
-            db.close()
-        except Exception:
-            pass
+    pool = _update_pool_nodes(cluster_name, add)
 
     # Trigger a background GPU resources update for this node pool
     _schedule_gpu_resources_update(cluster_name)
 
-    return pools[cluster_name]
+    return cluster_config_from_pool(pool)
 
 
 def is_ssh_cluster(cluster_name: str):
@@ -353,90 +498,39 @@ def is_down_only_cluster(cluster_name: str):
 
 
 def delete_cluster_in_pools(cluster_name: str):
-    pools = load_ssh_node_pools()
-    yaml_file_found = cluster_name in pools
-    
-    # Delete from YAML file if it exists there
-    if yaml_file_found:
-        del pools[cluster_name]
-        save_ssh_node_pools(pools)
-    else:
-        print(f"Warning: Cluster '{cluster_name}' not found in YAML file, but will attempt to delete from database")
-    
-    # Always try to delete from database
+    db = SessionLocal()
     try:
-        db = SessionLocal()
         pool = (
             db.query(SSHNodePoolDB).filter(SSHNodePoolDB.name == cluster_name).first()
         )
-        if pool is not None:
-            # Validate relationships before deleting
-            validate_relationships_before_delete(pool, db)
-            
-            db.delete(pool)
-            db.commit()
-            print(f"Successfully deleted cluster '{cluster_name}' from database")
-        else:
-            # If not found in YAML file and not found in database, raise 404
-            if not yaml_file_found:
-                raise HTTPException(
-                    status_code=404, detail=f"Cluster '{cluster_name}' not found in database or YAML file"
-                )
-    except HTTPException:
-        # Re-raise HTTP exceptions (like 404)
-        raise
-    except Exception as e:
-        print(f"Warning: Failed to delete SSH node pool from DB: {e}")
+        if pool is None:
+            raise HTTPException(
+                status_code=404, detail=f"Cluster '{cluster_name}' not found"
+            )
+        # Validate relationships before deleting
+        validate_relationships_before_delete(pool, db)
+
+        db.delete(pool)
+        db.commit()
+        print(f"Successfully deleted cluster '{cluster_name}' from database")
     finally:
-        try:
-            db.close()
-        except Exception:
-            pass
+        db.close()
+    node_pools_file.schedule()
 
 
 def remove_node_from_cluster(cluster_name: str, node_ip: str):
-    pools = load_ssh_node_pools()
-    if cluster_name not in pools:
-        raise HTTPException(
-            status_code=404, detail=f"Cluster '{cluster_name}' not found"
-        )
-    hosts = pools[cluster_name].get("hosts", [])
-    filtered = [host for host in hosts if host.get("ip") != node_ip]
-    if len(filtered) == len(hosts):
-        raise HTTPException(
-            status_code=404,
-            detail=f"Node with IP '{node_ip}' not found in cluster '{cluster_name}'",
-        )
-    pools[cluster_name]["hosts"] = filtered
-    save_ssh_node_pools(pools)
-    try:
-        db = SessionLocal()
-        pool = (
-            db.query(SSHNodePoolDB).filter(SSHNodePoolDB.name == cluster_name).first()
-        )
-        if pool is not None:
-            current_nodes = list(pool.nodes or [])
-            new_nodes = [
-                n
-                for n in current_nodes
-                if not (isinstance(n, dict) and n.get("ip") == node_ip)
-            ]
-            if len(new_nodes) != len(current_nodes):
-                pool.nodes = new_nodes
-                from sqlalchemy.orm.attributes import flag_modified
-
-                flag_modified(pool, "nodes")
-                db.commit()
-
-                # Update pool resources after removing the node
-                update_pool_resources(pool, db)
-    except Exception as e:
-        print(f"Warning: Failed to delete SSH node from DB (JSON): {e}")
-    finally:
-        try:
-            db.close()
-        except Exception:
-            pass
+    def remove(nodes: list) -> list:
+        remaining = [
+            n for n in nodes if not (isinstance(n, dict) and n.get("ip") == node_ip)
+        ]
+        if len(remaining) == len(nodes):
+            raise HTTPException(
+                status_code=404,
+                detail=f"Node with IP '{node_ip}' not found in cluster '{cluster_name}'",
+            )
+        return remaining
+
+    _update_pool_nodes(cluster_name, remove)
 
 
 def list_cluster_names_from_db() -> list[str]:
@@ -511,31 +605,36 @@ def get_cluster_config_from_db(cluster_name: str) -> dict:
             raise HTTPException(
                 status_code=404, detail=f"Cluster '{cluster_name}' not found"
             )
-        hosts = []
-        for n in pool.nodes or []:
-            if not isinstance(n, dict):
-                continue
-            host = {"ip": n.get("ip")}
-            if n.get("user"):
-                host["user"] = n.get("user")
-            if n.get("name"):
-                host["name"] = n.get("name")
-            if n.get("identity_file"):
-                host["identity_file"] = n.get("identity_file")
-            if n.get("password"):
-                host["password"] = n.get("password")
-            if n.get("resources"):
-                host["resources"] = n.get("resources")
-            hosts.append(host)
-        cfg: dict = {"hosts": hosts}
-        if pool.default_user:
-            cfg["user"] = pool.default_user
-        if pool.identity_file_path:
-            cfg["identity_file"] = pool.identity_file_path
-        if pool.password:
-            cfg["password"] = pool.password
-        if pool.resources:
-            cfg["resources"] = pool.resources
-        return cfg
+        return cluster_config_from_pool(pool)
     finally:
         db.close()
+
+
+def cluster_config_from_pool(pool: SSHNodePoolDB) -> dict:
+    """Build the SkyPilot-style pool config (defaults plus hosts) from a loaded pool row."""
+    hosts = []
+    for n in pool.nodes or []:
+        if not isinstance(n, dict):
+            continue
+        host = {"ip": n.get("ip")}
+        if n.get("user"):
+            host["user"] = n.get("user")
+        if n.get("name"):
+            host["name"] = n.get("name")
+        if n.get("identity_file"):
+            host["identity_file"] = n.get("identity_file")
+        if n.get("password"):
+            host["password"] = n.get("password")
+        if n.get("resources"):
+            host["resources"] = n.get("resources")
+        hosts.append(host)
+    cfg: dict = {"hosts": hosts}
+    if pool.default_user:
+        cfg["user"] = pool.default_user
+    if pool.identity_file_path:
+        cfg["identity_file"] = pool.identity_file_path
+    if pool.password:
+        cfg["password"] = pool.password
+    if pool.resources:
+        cfg["resources"] = pool.resources
+    return cfg
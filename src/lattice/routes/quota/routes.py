@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime
-from config import get_db
+from config import SessionLocal, get_db
 from routes.auth.utils import (
     get_current_user,
     check_organization_member,
@@ -23,6 +23,7 @@ from models import (
 )
 from db.db_models import GPUUsageLog, OrganizationQuota
 from utils.cluster_utils import get_display_name_from_actual
+from utils.skypilot_async import skypilot_sdk
 from routes.quota.utils import (
     get_or_create_organization_quota,
     get_or_create_quota_period,
@@ -279,14 +280,33 @@ async def check_quota_availability(
         raise HTTPException(status_code=500, detail=f"Failed to check quota: {str(e)}")
 
 
+def _with_session(func, *args):
+    """
+    Call ``func(db, *args)`` with a session of its own.
+
+    For work handed to SkyPilot worker threads: the request's session is
+    closed when the request ends (e.g. on a timeout or client disconnect)
+    while the thread may still be using it.
+    """
+    db = SessionLocal()
+    try:
+        return func(db, *args)
+    finally:
+        db.close()
+
+
 @router.get("/sync-from-cost-report")
 async def sync_usage_from_cost_report(
-    user=Depends(get_current_user), db: Session = Depends(get_db), __: dict = Depends(requires_admin)
+    user=Depends(get_current_user), __: dict = Depends(requires_admin)
 ):
     """Sync GPU usage from SkyPilot cost report"""
     try:
-        result = sync_gpu_usage_from_cost_report(db)
+        result = await skypilot_sdk.run(
+            "sync_usage", _with_session, sync_gpu_usage_from_cost_report
+        )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to sync from cost report: {str(e)}"
@@ -338,13 +358,20 @@ async def get_organization_user_usage_by_cluster(
     organization_id: str,
     cluster_name: str,
     user=Depends(get_current_user),
-    db: Session = Depends(get_db),
     __: dict = Depends(check_organization_admin),
 ):
     """Get GPU usage breakdown for all users in an organization filtered by cluster/node pool"""
     try:
-        summary = get_organization_user_usage_summary_by_cluster(db, organization_id, cluster_name)
+        summary = await skypilot_sdk.run(
+            "status",
+            _with_session,
+            get_organization_user_usage_summary_by_cluster,
+            organization_id,
+            cluster_name,
+        )
         return summary
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Failed to get organization user usage for cluster: {str(e)}")
         raise HTTPException(
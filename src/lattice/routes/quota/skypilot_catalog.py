@@ -5,11 +5,16 @@ This module provides utilities to fetch and parse VM pricing information
 from the SkyPilot catalog for various cloud providers.
 """
 
+import asyncio
+import bisect
 import csv
 import io
+import json
 import logging
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass
+import os
+import pickle
+from typing import Dict, List, Optional, Any, Tuple
+from dataclasses import dataclass, fields
 from datetime import datetime, timedelta
 import requests
 from pathlib import Path
@@ -187,6 +192,138 @@ class VMPricingInfo:
                 self.spot_price = None
 
 
+# Values treated as "no value" when coercing numeric catalog fields
+_MISSING_VALUES = {"", "n/a", "nan", "null", "none"}
+
+# Numeric VMPricingInfo fields and the value used when the catalog has none
+_NUMERIC_DEFAULTS = {
+    "accelerator_count": None,
+    "vcpus": 0.0,
+    "memory_gib": 0.0,
+    "price": None,
+    "spot_price": None,
+}
+
+# VMPricingInfo fields in declaration order (snapshot columns)
+_FIELDS = [f.name for f in fields(VMPricingInfo)]
+
+# Bump when the snapshot layout changes; older snapshots are ignored
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def _to_float(value: Any, default: Optional[float]) -> Optional[float]:
+    """Coerce a catalog cell to float, using ``default`` for missing/invalid values."""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip()
+    if text.lower() in _MISSING_VALUES:
+        return default
+    try:
+        return float(text)
+    except ValueError:
+        return default
+
+
+class CatalogIndex:
+    """
+    One cloud's parsed catalog, stored column-wise, with filter indexes.
+
+    Columns are what gets persisted in the snapshot; ``instances`` and the
+    indexes are rebuilt from them on load.
+    """
+
+    def __init__(self, cloud_provider: str, columns: Dict[str, List[Any]]):
+        self.cloud_provider = cloud_provider
+        self.columns = columns
+        self.instances: List[VMPricingInfo] = [
+            VMPricingInfo(*row) for row in zip(*(columns[f] for f in _FIELDS))
+        ]
+
+        self._by_instance_type: Dict[str, List[int]] = {}
+        self._by_region: Dict[str, List[int]] = {}
+        self._by_accelerator: Dict[str, List[int]] = {}
+        self._gpu_rows = set()
+        for i, instance in enumerate(self.instances):
+            self._by_instance_type.setdefault(instance.instance_type, []).append(i)
+            self._by_region.setdefault(instance.region.lower(), []).append(i)
+            if instance.accelerator_name:
+                self._by_accelerator.setdefault(
+                    instance.accelerator_name.lower(), []
+                ).append(i)
+                if instance.accelerator_count:
+                    self._gpu_rows.add(i)
+
+        # Row ids sorted by value, for range filters via bisect
+        self._sorted: Dict[str, Tuple[List[float], List[int]]] = {}
+        for name in ("vcpus", "memory_gib"):
+            order = sorted(range(len(self.instances)), key=columns[name].__getitem__)
+            self._sorted[name] = ([columns[name][i] for i in order], order)
+
+        self.regions = sorted({i.region for i in self.instances})
+
+    def __len__(self) -> int:
+        return len(self.instances)
+
+    def _range(
+        self, name: str, low: Optional[float], high: Optional[float]
+    ) -> List[int]:
+        values, order = self._sorted[name]
+        start = 0 if low is None else bisect.bisect_left(values, low)
+        stop = len(values) if high is None else bisect.bisect_right(values, high)
+        return order[start:stop]
+
+    def _accelerator_rows(self, gpu_type: str) -> List[int]:
+        # Substring match against the few distinct accelerator names, not every row
+        needle = gpu_type.lower()
+        rows: List[int] = []
+        for name, ids in self._by_accelerator.items():
+            if needle in name:
+                rows.extend(ids)
+        return rows
+
+    def select(
+        self,
+        region: Optional[str] = None,
+        min_vcpus: Optional[float] = None,
+        max_vcpus: Optional[float] = None,
+        min_memory_gib: Optional[float] = None,
+        max_memory_gib: Optional[float] = None,
+        has_gpu: Optional[bool] = None,
+        gpu_type: Optional[str] = None,
+    ) -> List[VMPricingInfo]:
+        """Instances matching every given filter, in catalog order."""
+        candidates = None
+
+        def narrow(rows):
+            nonlocal candidates
+            candidates = set(rows) if candidates is None else candidates.intersection(rows)
+
+        if region:
+            narrow(self._by_region.get(region.lower(), ()))
+        if gpu_type:
+            narrow(self._accelerator_rows(gpu_type))
+        if has_gpu is True:
+            narrow(self._gpu_rows)
+        if min_vcpus is not None or max_vcpus is not None:
+            narrow(self._range("vcpus", min_vcpus, max_vcpus))
+        if min_memory_gib is not None or max_memory_gib is not None:
+            narrow(self._range("memory_gib", min_memory_gib, max_memory_gib))
+        if has_gpu is False:
+            if candidates is None:
+                candidates = set(range(len(self.instances)))
+            candidates = candidates - self._gpu_rows
+
+        if candidates is None:
+            return list(self.instances)
+        return [self.instances[i] for i in sorted(candidates)]
+
+    def by_instance_type(self, instance_type: str) -> List[VMPricingInfo]:
+        """All rows for an instance type, in catalog order."""
+        return [self.instances[i] for i in self._by_instance_type.get(instance_type, ())]
+
+
 class SkyPilotCatalogManager:
     """
     Manager class for fetching and caching VM pricing information from SkyPilot catalog.
@@ -196,6 +333,16 @@ class SkyPilotCatalogManager:
     - Cache data to avoid repeated API calls
     - Search and filter VM instances by various criteria
     - Get pricing comparisons across regions and instance types
+
+    Catalogs are fetched off the event loop (all clouds in parallel with
+    ``fetch_all_catalogs``). Once the cache duration has passed, a catalog is
+    revalidated with ``If-None-Match``/``If-Modified-Since``, so an unchanged
+    catalog costs a 304 and no re-parse. Each parsed catalog is kept in memory
+    as a ``CatalogIndex`` and persisted as a columnar snapshot
+    (``<cloud>_vms.snapshot``) plus a small metadata file with the HTTP
+    validators and fetch time (``<cloud>_vms.meta.json``). A restart loads the
+    snapshot instead of re-downloading and re-parsing the CSV; a 304 only
+    rewrites the metadata file.
     """
 
     def __init__(self, cache_duration_hours: int = 24):
@@ -206,13 +353,22 @@ class SkyPilotCatalogManager:
             cache_duration_hours: How long to cache data before refreshing (default: 24 hours)
         """
         self.cache_duration_hours = cache_duration_hours
-        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._catalogs: Dict[str, CatalogIndex] = {}
         self._last_fetch: Dict[str, datetime] = {}
+        # cloud -> {"etag": ..., "last_modified": ...} from the last 200 response
+        self._validators: Dict[str, Dict[str, str]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
 
         # Create cache directory if it doesn't exist
         self.cache_dir = Path.home() / ".lattice" / "cache" / "skypilot_catalog"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
+    def _snapshot_file(self, cloud_provider: str) -> Path:
+        return self.cache_dir / f"{cloud_provider}_vms.snapshot"
+
+    def _meta_file(self, cloud_provider: str) -> Path:
+        return self.cache_dir / f"{cloud_provider}_vms.meta.json"
+
     def _is_cache_valid(self, cloud_provider: str) -> bool:
         """Check if cached data for a cloud provider is still valid."""
         if cloud_provider not in self._last_fetch:
@@ -221,176 +377,233 @@ class SkyPilotCatalogManager:
         cache_age = datetime.now() - self._last_fetch[cloud_provider]
         return cache_age < timedelta(hours=self.cache_duration_hours)
 
-    def _load_from_cache(self, cloud_provider: str) -> Optional[List[VMPricingInfo]]:
-        """Load data from local cache file."""
-        cache_file = self.cache_dir / f"{cloud_provider}_vms.csv"
-        if not cache_file.exists():
+    def _write_atomic(self, path: Path, data: bytes):
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _load_from_cache(self, cloud_provider: str) -> Optional[CatalogIndex]:
+        """Load the catalog snapshot and its metadata from the local cache."""
+        snapshot_file = self._snapshot_file(cloud_provider)
+        if not snapshot_file.exists():
             return None
 
         try:
-            with open(cache_file, "r", encoding="utf-8") as f:
-                reader = csv.DictReader(f)
-                instances = []
-                for row in reader:
-                    row["cloud_provider"] = cloud_provider
-                    instances.append(VMPricingInfo(**row))
-                return instances
+            with open(snapshot_file, "rb") as f:
+                snapshot = pickle.load(f)
+            if snapshot.get("format") != SNAPSHOT_FORMAT_VERSION:
+                return None
+            catalog = CatalogIndex(cloud_provider, snapshot["columns"])
         except Exception as e:
             logger.warning(f"Failed to load cache for {cloud_provider}: {e}")
             return None
 
-    def _save_to_cache(self, cloud_provider: str, data: List[VMPricingInfo]):
-        """Save data to local cache file."""
-        cache_file = self.cache_dir / f"{cloud_provider}_vms.csv"
         try:
-            with open(cache_file, "w", encoding="utf-8", newline="") as f:
-                if data:
-                    # Get field names from the first instance, excluding cloud_provider
-                    fieldnames = [
-                        f.name
-                        for f in data[0].__dataclass_fields__.values()
-                        if f.name != "cloud_provider"
-                    ]
-                    writer = csv.DictWriter(f, fieldnames=fieldnames)
-                    writer.writeheader()
-                    for instance in data:
-                        # Create a copy without cloud_provider for CSV writing
-                        row_data = {k: getattr(instance, k) for k in fieldnames}
-                        writer.writerow(row_data)
-        except Exception as e:
-            logger.warning(f"Failed to save cache for {cloud_provider}: {e}")
-
-    def _map_csv_row(self, row: Dict[str, str], cloud_provider: str) -> Dict[str, Any]:
-        """Map CSV row to standardized format based on cloud provider."""
-        mapping = COLUMN_MAPPINGS.get(cloud_provider, COLUMN_MAPPINGS["default"])
-        mapped_row = {"cloud_provider": cloud_provider}
-
-        # Map each field using the provider-specific column mapping
-        for standard_field, csv_column in mapping.items():
-            if csv_column in row:
-                mapped_row[standard_field] = row[csv_column]
-            else:
-                # Set default values for missing columns
-                if standard_field == "vcpus":
-                    mapped_row[standard_field] = 0.0
-                elif standard_field == "memory_gib":
-                    mapped_row[standard_field] = 0.0
-                elif standard_field in [
-                    "accelerator_name",
-                    "accelerator_count",
-                    "gpu_info",
-                    "price",
-                    "spot_price",
-                    "generation",
-                    "availability_zone",
-                    "zone",
-                ]:
-                    mapped_row[standard_field] = None
-                elif standard_field == "region":
-                    mapped_row[standard_field] = ""
-                else:
-                    mapped_row[standard_field] = ""
+            meta = json.loads(self._meta_file(cloud_provider).read_text())
+            self._last_fetch[cloud_provider] = datetime.fromisoformat(meta["fetched_at"])
+            self._validators[cloud_provider] = meta.get("validators", {})
+        except Exception:
+            # Without metadata the snapshot is still usable, but gets revalidated
+            self._validators.pop(cloud_provider, None)
 
-        return mapped_row
+        self._catalogs[cloud_provider] = catalog
+        return catalog
 
-    async def fetch_cloud_catalog(
-        self, cloud_provider: str, force_refresh: bool = False
-    ) -> List[VMPricingInfo]:
+    def _save_to_cache(self, cloud_provider: str, catalog: Optional[CatalogIndex]):
         """
-        Fetch VM catalog data for a specific cloud provider.
+        Persist the fetch metadata, and the snapshot when ``catalog`` is given.
 
-        Args:
-            cloud_provider: The cloud provider (e.g., 'azure', 'runpod', 'aws')
-            force_refresh: Force refresh even if cache is valid
+        A revalidated (304) catalog passes None so only the metadata is rewritten.
+        """
+        try:
+            if catalog is not None:
+                snapshot = {"format": SNAPSHOT_FORMAT_VERSION, "columns": catalog.columns}
+                self._write_atomic(
+                    self._snapshot_file(cloud_provider),
+                    pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL),
+                )
+            meta = {
+                "fetched_at": self._last_fetch[cloud_provider].isoformat(),
+                "validators": self._validators.get(cloud_provider, {}),
+            }
+            self._write_atomic(
+                self._meta_file(cloud_provider), json.dumps(meta).encode("utf-8")
+            )
+        except Exception as e:
+            logger.warning(f"Failed to save cache for {cloud_provider}: {e}")
 
-        Returns:
-            List of VMPricingInfo objects
+    def _lock_for(self, cloud_provider: str) -> asyncio.Lock:
+        # One refresh per cloud at a time; concurrent callers share its result
+        lock = self._locks.get(cloud_provider)
+        if lock is None:
+            lock = self._locks[cloud_provider] = asyncio.Lock()
+        return lock
 
-        Raises:
-            ValueError: If cloud provider is not supported
-            requests.RequestException: If HTTP request fails
-        """
+    async def _get_catalog(
+        self, cloud_provider: str, force_refresh: bool = False
+    ) -> CatalogIndex:
         if cloud_provider not in SUPPORTED_CLOUDS:
             raise ValueError(
                 f"Unsupported cloud provider: {cloud_provider}. "
                 f"Supported providers: {list(SUPPORTED_CLOUDS.keys())}"
             )
 
-        # Check cache first (unless forcing refresh)
-        if not force_refresh and self._is_cache_valid(cloud_provider):
-            cached_data = self._load_from_cache(cloud_provider)
-            if cached_data:
-                logger.info(f"Using cached data for {cloud_provider}")
-                return cached_data
+        async with self._lock_for(cloud_provider):
+            catalog = self._catalogs.get(cloud_provider)
+            if catalog is None:
+                catalog = await asyncio.to_thread(self._load_from_cache, cloud_provider)
+
+            # Check cache first (unless forcing refresh)
+            if (
+                catalog is not None
+                and not force_refresh
+                and self._is_cache_valid(cloud_provider)
+            ):
+                return catalog
 
-        # Fetch fresh data
+            return await self._refresh(cloud_provider, catalog)
+
+    async def _refresh(
+        self, cloud_provider: str, catalog: Optional[CatalogIndex]
+    ) -> CatalogIndex:
         url = SUPPORTED_CLOUDS[cloud_provider]
-        logger.info(f"Fetching fresh catalog data for {cloud_provider} from {url}")
+        headers = {}
+        if catalog is not None:
+            validators = self._validators.get(cloud_provider, {})
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+        logger.info(f"Fetching catalog data for {cloud_provider} from {url}")
 
         try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-
-            # Parse CSV data
-            csv_text = response.text
-            instances = self._parse_csv_data(csv_text, cloud_provider)
+            response = await asyncio.to_thread(
+                requests.get, url, headers=headers, timeout=30
+            )
+            if response.status_code == 304 and catalog is not None:
+                logger.info(f"Catalog for {cloud_provider} not modified")
+                changed = None
+            else:
+                response.raise_for_status()
+                # Parsing a large catalog is CPU-bound; keep it off the event loop
+                changed = catalog = await asyncio.to_thread(
+                    self._parse_csv_catalog, response.text, cloud_provider
+                )
+                self._validators[cloud_provider] = {
+                    "etag": response.headers.get("ETag", ""),
+                    "last_modified": response.headers.get("Last-Modified", ""),
+                }
+                logger.info(
+                    f"Successfully fetched {len(catalog)} instances for {cloud_provider}"
+                )
 
-            # Update cache
-            self._cache[cloud_provider] = {
-                "data": instances,
-                "timestamp": datetime.now(),
-            }
+            self._catalogs[cloud_provider] = catalog
             self._last_fetch[cloud_provider] = datetime.now()
-
-            # Save to local cache
-            self._save_to_cache(cloud_provider, instances)
-
-            logger.info(
-                f"Successfully fetched {len(instances)} instances for {cloud_provider}"
-            )
-            return instances
+            await asyncio.to_thread(self._save_to_cache, cloud_provider, changed)
+            return catalog
 
         except requests.RequestException as e:
             logger.error(f"Failed to fetch catalog for {cloud_provider}: {e}")
             # Try to return cached data if available
-            cached_data = self._load_from_cache(cloud_provider)
-            if cached_data:
+            if catalog is not None:
                 logger.info(
                     f"Returning cached data for {cloud_provider} due to fetch failure"
                 )
-                return cached_data
+                return catalog
             raise
 
-    def _parse_csv_data(
-        self, csv_text: str, cloud_provider: str
+    async def fetch_cloud_catalog(
+        self, cloud_provider: str, force_refresh: bool = False
     ) -> List[VMPricingInfo]:
-        """Parse CSV text into VMPricingInfo objects."""
-        instances = []
+        """
+        Fetch VM catalog data for a specific cloud provider.
+
+        Args:
+            cloud_provider: The cloud provider (e.g., 'azure', 'runpod', 'aws')
+            force_refresh: Revalidate with the server even if cache is valid
+
+        Returns:
+            List of VMPricingInfo objects
+
+        Raises:
+            ValueError: If cloud provider is not supported
+            requests.RequestException: If HTTP request fails
+        """
+        catalog = await self._get_catalog(cloud_provider, force_refresh)
+        return list(catalog.instances)
+
+    async def fetch_all_catalogs(
+        self,
+        cloud_providers: Optional[List[str]] = None,
+        force_refresh: bool = False,
+    ) -> Dict[str, List[VMPricingInfo]]:
+        """
+        Fetch several clouds' catalogs concurrently.
+
+        Args:
+            cloud_providers: Clouds to fetch (default: all supported clouds)
+            force_refresh: Revalidate with the server even if cache is valid
+
+        Returns:
+            Dictionary of cloud provider -> instances; clouds that failed are omitted
+        """
+        cloud_providers = cloud_providers or list(SUPPORTED_CLOUDS.keys())
+        results = await asyncio.gather(
+            *(self._get_catalog(c, force_refresh) for c in cloud_providers),
+            return_exceptions=True,
+        )
+        catalogs = {}
+        for cloud_provider, result in zip(cloud_providers, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Skipping catalog for {cloud_provider}: {result}")
+                continue
+            catalogs[cloud_provider] = list(result.instances)
+        return catalogs
+
+    def _parse_csv_catalog(self, csv_text: str, cloud_provider: str) -> CatalogIndex:
+        """Parse CSV text straight into columns and index them."""
+        columns: Dict[str, List[Any]] = {name: [] for name in _FIELDS}
+        mapping = COLUMN_MAPPINGS.get(cloud_provider, COLUMN_MAPPINGS["default"])
 
         try:
-            csv_file = io.StringIO(csv_text)
-            reader = csv.DictReader(csv_file)
+            reader = csv.reader(io.StringIO(csv_text))
+            header = next(reader, [])
+            positions = {name: i for i, name in enumerate(header)}
+            sources = []
+            for name in _FIELDS:
+                if name == "cloud_provider":
+                    continue
+                position = positions.get(mapping.get(name))
+                sources.append((name, position, columns[name]))
 
             for row in reader:
-                # Map CSV row to standardized format
-                mapped_row = self._map_csv_row(row, cloud_provider)
-
-                # Create VMPricingInfo object
-                try:
-                    instance = VMPricingInfo(**mapped_row)
-                    instances.append(instance)
-                except Exception as e:
-                    instance_type = mapped_row.get("instance_type", "unknown")
-                    logger.warning(
-                        f"Failed to parse row for {cloud_provider}: {instance_type} - {e}"
-                    )
+                if not row:
                     continue
+                for name, position, column in sources:
+                    value = (
+                        row[position]
+                        if position is not None and position < len(row)
+                        else None
+                    )
+                    if name in _NUMERIC_DEFAULTS:
+                        value = _to_float(value, _NUMERIC_DEFAULTS[name])
+                    elif value is None and name in ("instance_type", "region"):
+                        value = ""
+                    column.append(value)
+                columns["cloud_provider"].append(cloud_provider)
 
         except Exception as e:
             logger.error(f"Failed to parse CSV data for {cloud_provider}: {e}")
             raise
 
-        return instances
+        return CatalogIndex(cloud_provider, columns)
+
+    def _parse_csv_data(
+        self, csv_text: str, cloud_provider: str
+    ) -> List[VMPricingInfo]:
+        """Parse CSV text into VMPricingInfo objects."""
+        return self._parse_csv_catalog(csv_text, cloud_provider).instances
 
     async def get_instance_types(
         self,
@@ -419,46 +632,16 @@ class SkyPilotCatalogManager:
         Returns:
             Filtered list of VMPricingInfo objects
         """
-        instances = await self.fetch_cloud_catalog(cloud_provider)
-
-        # Apply filters
-        filtered = instances
-
-        if region:
-            filtered = [i for i in filtered if i.region.lower() == region.lower()]
-
-        if min_vcpus is not None:
-            filtered = [i for i in filtered if i.vcpus >= min_vcpus]
-
-        if max_vcpus is not None:
-            filtered = [i for i in filtered if i.vcpus <= max_vcpus]
-
-        if min_memory_gib is not None:
-            filtered = [i for i in filtered if i.memory_gib >= min_memory_gib]
-
-        if max_memory_gib is not None:
-            filtered = [i for i in filtered if i.memory_gib <= max_memory_gib]
-
-        if has_gpu is not None:
-            if has_gpu:
-                filtered = [
-                    i for i in filtered if i.accelerator_name and i.accelerator_count
-                ]
-            else:
-                filtered = [
-                    i
-                    for i in filtered
-                    if not i.accelerator_name or not i.accelerator_count
-                ]
-
-        if gpu_type:
-            filtered = [
-                i
-                for i in filtered
-                if i.accelerator_name and gpu_type.lower() in i.accelerator_name.lower()
-            ]
-
-        return filtered
+        catalog = await self._get_catalog(cloud_provider)
+        return catalog.select(
+            region=region,
+            min_vcpus=min_vcpus,
+            max_vcpus=max_vcpus,
+            min_memory_gib=min_memory_gib,
+            max_memory_gib=max_memory_gib,
+            has_gpu=has_gpu,
+            gpu_type=gpu_type,
+        )
 
     async def get_pricing_comparison(
         self,
@@ -477,10 +660,10 @@ class SkyPilotCatalogManager:
         Returns:
             Dictionary with pricing comparison data
         """
-        instances = await self.fetch_cloud_catalog(cloud_provider)
+        catalog = await self._get_catalog(cloud_provider)
 
         # Filter by instance type
-        matching_instances = [i for i in instances if i.instance_type == instance_type]
+        matching_instances = catalog.by_instance_type(instance_type)
 
         if not matching_instances:
             return {
@@ -492,10 +675,9 @@ class SkyPilotCatalogManager:
 
         # Filter by regions if specified
         if regions:
+            wanted = {r.lower() for r in regions}
             matching_instances = [
-                i
-                for i in matching_instances
-                if i.region.lower() in [r.lower() for r in regions]
+                i for i in matching_instances if i.region.lower() in wanted
             ]
 
         # Group by region and calculate pricing
@@ -547,7 +729,13 @@ class SkyPilotCatalogManager:
         Returns:
             List of optimization suggestions sorted by cost efficiency
         """
-        instances = await self.fetch_cloud_catalog(cloud_provider)
+        catalog = await self._get_catalog(cloud_provider)
+        # The indexes narrow to instances meeting the size/GPU requirements
+        instances = catalog.select(
+            min_vcpus=target_vcpus,
+            min_memory_gib=target_memory_gib,
+            gpu_type=target_gpu_type,
+        )
 
         # Filter instances that meet requirements
         suitable_instances = []
@@ -638,13 +826,10 @@ class SkyPilotCatalogManager:
 
     def get_regions_for_cloud(self, cloud_provider: str) -> List[str]:
         """Get list of available regions for a cloud provider."""
-        if cloud_provider not in self._cache:
+        catalog = self._catalogs.get(cloud_provider)
+        if catalog is None:
             return []
-
-        instances = self._cache[cloud_provider].get("data", [])
-        regions = list(set(instance.region for instance in instances))
-        regions.sort()
-        return regions
+        return list(catalog.regions)
 
     def clear_cache(self, cloud_provider: Optional[str] = None):
         """
@@ -654,33 +839,33 @@ class SkyPilotCatalogManager:
             cloud_provider: Specific cloud provider to clear, or None for all
         """
         if cloud_provider:
-            if cloud_provider in self._cache:
-                del self._cache[cloud_provider]
-            if cloud_provider in self._last_fetch:
-                del self._last_fetch[cloud_provider]
-
-            # Remove cache file
-            cache_file = self.cache_dir / f"{cloud_provider}_vms.csv"
-            if cache_file.exists():
-                cache_file.unlink()
+            self._catalogs.pop(cloud_provider, None)
+            self._last_fetch.pop(cloud_provider, None)
+            self._validators.pop(cloud_provider, None)
+            pattern = f"{cloud_provider}_vms.*"
         else:
-            self._cache.clear()
+            self._catalogs.clear()
             self._last_fetch.clear()
+            self._validators.clear()
+            pattern = "*_vms.*"
 
-            # Remove all cache files
-            for cache_file in self.cache_dir.glob("*_vms.csv"):
-                cache_file.unlink()
+        # Remove cache files (including CSV caches from older versions)
+        for cache_file in self.cache_dir.glob(pattern):
+            cache_file.unlink()
 
         logger.info(f"Cache cleared for {cloud_provider or 'all providers'}")
 
 
+# Global instance
+catalog_manager = SkyPilotCatalogManager()
+
+
 # Convenience functions for common operations
 async def get_azure_vm_pricing(
     instance_type: str, region: Optional[str] = None
 ) -> Dict[str, Any]:
     """Get Azure VM pricing for a specific instance type and region."""
-    manager = SkyPilotCatalogManager()
-    return await manager.get_pricing_comparison(
+    return await catalog_manager.get_pricing_comparison(
         "azure", instance_type, [region] if region else None
     )
 
@@ -689,8 +874,7 @@ async def get_runpod_vm_pricing(
     instance_type: str, region: Optional[str] = None
 ) -> Dict[str, Any]:
     """Get RunPod VM pricing for a specific instance type and region."""
-    manager = SkyPilotCatalogManager()
-    return await manager.get_pricing_comparison(
+    return await catalog_manager.get_pricing_comparison(
         "runpod", instance_type, [region] if region else None
     )
 
@@ -703,7 +887,6 @@ async def find_cost_effective_instances(
     max_price: Optional[float] = None,
 ) -> List[Dict[str, Any]]:
     """Find cost-effective instances matching requirements."""
-    manager = SkyPilotCatalogManager()
-    return await manager.get_cost_optimization_suggestions(
+    return await catalog_manager.get_cost_optimization_suggestions(
         cloud_provider, vcpus, memory_gib, gpu_type, True, max_price
     )
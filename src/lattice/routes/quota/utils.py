@@ -1,4 +1,6 @@
 import re
+import secrets
+import time
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -12,9 +14,9 @@ from db.db_models import (
     validate_relationships_before_delete,
 )
 from routes.instances.utils import generate_cost_report
-from sqlalchemy import func
+from sqlalchemy import and_, case, func
 from sqlalchemy.orm import Session
-from utils.cluster_utils import get_cluster_platform_info
+from utils.cluster_utils import get_cluster_platform_info, get_cluster_platform_info_map
 
 
 def parse_resources_string(resources_str: str) -> Dict[str, Any]:
@@ -522,178 +524,327 @@ def get_or_create_quota_period(
     return period
 
 
+# Keep IN lists well under SQLite's bound-parameter limit
+_IN_QUERY_CHUNK_SIZE = 500
+
+
+def get_user_quota_limits(
+    db: Session, pairs: List[Tuple[str, str]]
+) -> Dict[Tuple[str, str], float]:
+    """
+    Resolve quota limits for many (organization_id, user_id) pairs at once.
+
+    Same precedence as get_user_quota_limit (individual > team > organization),
+    but with one query per quota table instead of several per user. An
+    organization without a default quota gets one added to the session
+    (not committed), as get_organization_default_quota would create.
+    """
+    org_ids = sorted({org_id for org_id, _ in pairs})
+    if not org_ids:
+        return {}
+
+    user_limits: Dict[Tuple[str, str], float] = {}
+    org_limits: Dict[str, float] = {}
+    team_ids: Dict[Tuple[str, str], str] = {}
+    team_limits: Dict[Tuple[str, str], float] = {}
+    for start in range(0, len(org_ids), _IN_QUERY_CHUNK_SIZE):
+        chunk = org_ids[start : start + _IN_QUERY_CHUNK_SIZE]
+        for quota in db.query(OrganizationQuota).filter(
+            OrganizationQuota.organization_id.in_(chunk)
+        ):
+            if quota.user_id is None:
+                org_limits.setdefault(quota.organization_id, quota.monthly_credits_per_user)
+            elif quota.custom_quota:
+                user_limits.setdefault(
+                    (quota.organization_id, quota.user_id),
+                    quota.monthly_credits_per_user,
+                )
+        for membership in db.query(TeamMembership).filter(
+            TeamMembership.organization_id.in_(chunk)
+        ):
+            team_ids.setdefault(
+                (membership.organization_id, membership.user_id), membership.team_id
+            )
+        for team_quota in db.query(TeamQuota).filter(
+            TeamQuota.organization_id.in_(chunk)
+        ):
+            team_limits.setdefault(
+                (team_quota.organization_id, team_quota.team_id),
+                team_quota.monthly_credits_per_user,
+            )
+
+    for org_id in org_ids:
+        if org_id not in org_limits:
+            org_quota = OrganizationQuota(
+                organization_id=org_id,
+                user_id=None,  # Organization-wide default
+                monthly_credits_per_user=100.0,
+                custom_quota=False,
+            )
+            validate_relationships_before_save(org_quota, db)
+            db.add(org_quota)
+            org_limits[org_id] = org_quota.monthly_credits_per_user
+
+    limits = {}
+    for org_id, user_id in pairs:
+        if (org_id, user_id) in user_limits:
+            limits[(org_id, user_id)] = user_limits[(org_id, user_id)]
+            continue
+        team_id = team_ids.get((org_id, user_id))
+        if team_id and (org_id, team_id) in team_limits:
+            limits[(org_id, user_id)] = team_limits[(org_id, team_id)]
+            continue
+        limits[(org_id, user_id)] = org_limits[org_id]
+    return limits
+
+
+def _refresh_quota_periods_from_usage(db: Session) -> int:
+    """
+    Recompute credits_used of every user's current quota period from usage logs.
+
+    One GROUP BY over the usage logs, one query for the existing periods and
+    bulk writes; the caller commits.
+
+    Returns:
+        Number of quota periods written
+    """
+    period_start, period_end = get_current_period_dates()
+    in_period = and_(
+        GPUUsageLog.start_time >= datetime.combine(period_start, datetime.min.time()),
+        GPUUsageLog.start_time <= datetime.combine(period_end, datetime.max.time()),
+    )
+    # Every user with usage logs gets a period, even with no usage this period
+    usage = dict(
+        (
+            (org_id, user_id),
+            float(total or 0.0),
+        )
+        for org_id, user_id, total in db.query(
+            GPUUsageLog.organization_id,
+            GPUUsageLog.user_id,
+            func.sum(case((in_period, GPUUsageLog.cost_estimate), else_=0.0)),
+        ).group_by(GPUUsageLog.organization_id, GPUUsageLog.user_id)
+    )
+    if not usage:
+        return 0
+
+    limits = get_user_quota_limits(db, list(usage))
+    periods = {}
+    for period in db.query(QuotaPeriod).filter(
+        QuotaPeriod.period_start == period_start,
+        QuotaPeriod.period_end == period_end,
+        QuotaPeriod.user_id.isnot(None),
+    ):
+        periods.setdefault((period.organization_id, period.user_id), period)
+
+    now = datetime.utcnow()
+    updates = []
+    inserts = []
+    for (org_id, user_id), credits_used in usage.items():
+        period = periods.get((org_id, user_id))
+        if period is None:
+            inserts.append(
+                {
+                    "id": secrets.token_urlsafe(16),
+                    "organization_id": org_id,
+                    "user_id": user_id,
+                    "period_start": period_start,
+                    "period_end": period_end,
+                    "credits_used": credits_used,
+                    "credits_limit": limits[(org_id, user_id)],
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+        else:
+            updates.append(
+                {
+                    "id": period.id,
+                    "credits_used": credits_used,
+                    "credits_limit": limits[(org_id, user_id)],
+                    "updated_at": now,
+                }
+            )
+
+    if updates:
+        db.bulk_update_mappings(QuotaPeriod, updates)
+    if inserts:
+        db.bulk_insert_mappings(QuotaPeriod, inserts)
+    return len(updates) + len(inserts)
+
+
 def sync_gpu_usage_from_cost_report(db: Session) -> Dict[str, Any]:
     """
     Sync GPU usage from SkyPilot cost report
     This can be used to reconcile usage data
+
+    Cluster ownership is resolved with one bulk lookup, usage logs are upserted
+    with bulk writes, and quota periods are refreshed from a single
+    GROUP BY organization_id, user_id aggregation, all in one transaction.
+
+    Returns:
+        Dictionary with counts and a "timings" breakdown in seconds
     """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    stage_started = started
+
+    def mark(stage: str):
+        nonlocal stage_started
+        now = time.perf_counter()
+        timings[stage] = round(now - stage_started, 4)
+        stage_started = now
+
     try:
         # Generate cost report
         cost_report = generate_cost_report()
+        mark("cost_report")
 
         if not cost_report:
-            return {"message": "No cost report available", "updated_clusters": 0}
-
-        updated_clusters = 0
-        created_logs = 0
-
-        # Process the cost report to update usage logs
+            return {
+                "message": "No cost report available",
+                "updated_clusters": 0,
+                "timings": timings,
+            }
+
+        # Last entry wins if the report lists a cluster more than once
+        clusters: Dict[str, Dict[str, Any]] = {}
         for cluster_data in cost_report:
             cluster_name = cluster_data.get("name")
             if not cluster_name:
                 continue
-
-            # Get user info from cluster platforms database
-            platform_info = get_cluster_platform_info(cluster_name)
-            if not platform_info or not platform_info.get("user_id"):
-                continue
-
-            user_id = platform_info["user_id"]
-            organization_id = platform_info.get("organization_id")
-
-            if not organization_id:
-                continue
-
-                # Parse resources to get GPU info
-            resources_str = cluster_data.get("resources_str_full", "")
-            parsed_resources = parse_resources_string(resources_str)
-            gpu_count = parsed_resources.get("gpu_count", 0)
-            gpu_type = parsed_resources.get("gpu_type")
-
+            # Parse resources to get GPU info
+            parsed_resources = parse_resources_string(
+                cluster_data.get("resources_str_full", "")
+            )
             # Skip if no GPUs (CPU-only clusters)
-            if gpu_count == 0:
+            if parsed_resources.get("gpu_count", 0) == 0:
                 continue
-
-            # Check if we already have a usage log for this cluster
-            existing_log = (
-                db.query(GPUUsageLog)
-                .filter(GPUUsageLog.cluster_name == cluster_name)
-                .first()
-            )
+            clusters[cluster_name] = {"data": cluster_data, "resources": parsed_resources}
+
+        # Get user info from cluster platforms database
+        platform_info_map = get_cluster_platform_info_map(clusters.keys(), db)
+        names = [
+            name
+            for name in clusters
+            if (platform_info_map.get(name) or {}).get("user_id")
+            and platform_info_map[name].get("organization_id")
+        ]
+
+        existing_logs: Dict[str, Any] = {}
+        for start in range(0, len(names), _IN_QUERY_CHUNK_SIZE):
+            chunk = names[start : start + _IN_QUERY_CHUNK_SIZE]
+            for log in db.query(
+                GPUUsageLog.id,
+                GPUUsageLog.cluster_name,
+                GPUUsageLog.instance_type,
+                GPUUsageLog.gpu_count,
+                GPUUsageLog.cloud_provider,
+                GPUUsageLog.region,
+                GPUUsageLog.cost_estimate,
+                GPUUsageLog.duration_seconds,
+            ).filter(GPUUsageLog.cluster_name.in_(chunk)):
+                # Like .first(): the first log for a cluster is the one kept in sync
+                existing_logs.setdefault(log.cluster_name, log)
+        mark("ownership_lookup")
+
+        updates = []
+        inserts = []
+        updated_clusters = 0
+        for cluster_name in names:
+            cluster_data = clusters[cluster_name]["data"]
+            gpu_count = clusters[cluster_name]["resources"].get("gpu_count", 0)
+            gpu_type = clusters[cluster_name]["resources"].get("gpu_type")
+            # Duration is already in seconds
+            duration_seconds = cluster_data.get("duration", 0)
+            existing_log = existing_logs.get(cluster_name)
 
             if existing_log:
                 # Update existing log with cost report data
-                existing_log.instance_type = gpu_type or existing_log.instance_type
-                existing_log.gpu_count = gpu_count
-                existing_log.cloud_provider = cluster_data.get(
-                    "cloud", existing_log.cloud_provider
-                )
-                existing_log.region = cluster_data.get("region", existing_log.region)
-                # Update cost estimate from report when available
-                try:
-                    total_cost = cluster_data.get("total_cost")
-                    if total_cost is not None:
-                        existing_log.cost_estimate = total_cost
-                except Exception:
-                    pass
-
-                # Calculate duration from cost report
-                duration_seconds = cluster_data.get(
-                    "duration", 0
-                )  # Duration is already in seconds
-
-                # If the cluster is still running, update duration
-                if (
-                    existing_log.duration_seconds is None
-                    or existing_log.duration_seconds != duration_seconds
-                ):
-                    existing_log.duration_seconds = duration_seconds
-
-                db.commit()
-                updated_clusters += 1
-
+                total_cost = cluster_data.get("total_cost")
+                values = {
+                    "instance_type": gpu_type or existing_log.instance_type,
+                    "gpu_count": gpu_count,
+                    "cloud_provider": cluster_data.get(
+                        "cloud", existing_log.cloud_provider
+                    ),
+                    "region": cluster_data.get("region", existing_log.region),
+                    # Update cost estimate from report when available
+                    "cost_estimate": total_cost
+                    if total_cost is not None
+                    else existing_log.cost_estimate,
+                    "duration_seconds": duration_seconds,
+                }
+                # Only rows that actually changed are written
+                if any(getattr(existing_log, k) != v for k, v in values.items()):
+                    updates.append({"id": existing_log.id, **values})
+                    updated_clusters += 1
             else:
                 # Create new usage log from cost report data
+                platform_info = platform_info_map[cluster_name]
                 launched_at = cluster_data.get("launched_at")
                 start_time = (
                     datetime.fromtimestamp(launched_at)
                     if launched_at
                     else datetime.utcnow()
                 )
-
-                duration_seconds = cluster_data.get(
-                    "duration", 0
-                )  # Duration is already in seconds
                 end_time = (
                     start_time + timedelta(seconds=duration_seconds)
                     if duration_seconds > 0
                     else None
                 )
-
-                usage_log = GPUUsageLog(
-                    organization_id=organization_id,
-                    user_id=user_id,
-                    cluster_name=cluster_name,
-                    gpu_count=gpu_count,
-                    start_time=start_time,
-                    end_time=end_time,
-                    duration_seconds=duration_seconds,
-                    instance_type=gpu_type,
-                    cloud_provider=cluster_data.get("cloud"),
-                    region=cluster_data.get("region"),
-                    cost_estimate=cluster_data.get("total_cost"),
+                inserts.append(
+                    {
+                        "id": secrets.token_urlsafe(16),
+                        "organization_id": platform_info["organization_id"],
+                        "user_id": platform_info["user_id"],
+                        "cluster_name": cluster_name,
+                        "gpu_count": gpu_count,
+                        "start_time": start_time,
+                        "end_time": end_time,
+                        "duration_seconds": duration_seconds,
+                        "instance_type": gpu_type,
+                        "cloud_provider": cluster_data.get("cloud"),
+                        "region": cluster_data.get("region"),
+                        "cost_estimate": cluster_data.get("total_cost"),
+                        "created_at": datetime.utcnow(),
+                    }
                 )
 
-                db.add(usage_log)
-                db.commit()
-                created_logs += 1
+        if updates:
+            db.bulk_update_mappings(GPUUsageLog, updates)
+        if inserts:
+            db.bulk_insert_mappings(GPUUsageLog, inserts)
+        created_logs = len(inserts)
+        mark("usage_logs")
 
         # Update quota periods with the new data
+        updated_periods = 0
         if created_logs > 0 or updated_clusters > 0:
-            # Get all organizations that had updates
-            orgs_with_updates = db.query(GPUUsageLog.organization_id).distinct().all()
-
-            for (org_id,) in orgs_with_updates:
-                try:
-                    # Get all users in this organization
-                    users_in_org = (
-                        db.query(GPUUsageLog.user_id)
-                        .filter(GPUUsageLog.organization_id == org_id)
-                        .distinct()
-                        .all()
-                    )
-
-                    for (user_id,) in users_in_org:
-                        # Recalculate quota period usage for each user
-                        current_period = get_or_create_quota_period(db, org_id, user_id)
-                        # Sum estimated costs as credits used in the period
-                        total_cost = (
-                            db.query(GPUUsageLog)
-                            .filter(
-                                GPUUsageLog.organization_id == org_id,
-                                GPUUsageLog.user_id == user_id,
-                                GPUUsageLog.start_time
-                                >= datetime.combine(
-                                    current_period.period_start, datetime.min.time()
-                                ),
-                                GPUUsageLog.start_time
-                                <= datetime.combine(
-                                    current_period.period_end, datetime.max.time()
-                                ),
-                            )
-                            .with_entities(func.sum(GPUUsageLog.cost_estimate))
-                            .scalar()
-                            or 0.0
-                        )
-
-                        current_period.credits_used = float(total_cost)
-                        current_period.updated_at = datetime.utcnow()
-                        db.commit()
-                except Exception as e:
-                    print(f"Failed to update quota period for org {org_id}: {e}")
+            updated_periods = _refresh_quota_periods_from_usage(db)
+        mark("quota_periods")
+
+        db.commit()
+        mark("commit")
+        timings["total"] = round(time.perf_counter() - started, 4)
 
         return {
             "message": f"Synced {updated_clusters} existing clusters and created {created_logs} new logs from cost report",
             "updated_clusters": updated_clusters,
             "created_logs": created_logs,
+            "written_logs": len(updates) + len(inserts),
+            "updated_quota_periods": updated_periods,
+            "timings": timings,
         }
 
     except Exception as e:
+        db.rollback()
         print(f"Failed to sync GPU usage from cost report: {e}")
         return {
             "message": f"Failed to sync: {str(e)}",
             "updated_clusters": 0,
             "created_logs": 0,
+            "timings": timings,
         }
 
 
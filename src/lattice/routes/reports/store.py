@@ -0,0 +1,349 @@
+"""
+Segmented, rolled-up store for per-user report events.
+
+Report events used to be appended to one ``<type>.jsonl`` file per user, and
+every report request re-read and parsed the whole file (six times for the
+summary). Each user's directory under ``~/.sky/reports`` now holds, per
+report type:
+
+- ``segments/<type>/<YYYY-MM-DD>.jsonl``: the raw events of one (local) day.
+  Segments older than ``compact_after_days`` are gzipped into
+  ``<YYYY-MM-DD>.jsonl.gz`` and deleted after ``raw_retention_days``;
+- ``rollups/<type>.json``: per-day sums (event count plus the type's metrics),
+  updated on every write and pruned after ``rollup_retention_days``.
+
+Reports are answered from the rollups of the requested days. Only the first
+day of the window, which is usually partial, is recomputed from its segment
+(or taken whole once that segment has expired). A legacy ``<type>.jsonl`` is
+ingested the first time the user's reports of that type are touched, then
+renamed to ``<type>.jsonl.migrated``.
+"""
+
+import fcntl
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config import (
+    REPORTS_COMPACT_AFTER_DAYS,
+    REPORTS_RAW_RETENTION_DAYS,
+    REPORTS_ROLLUP_RETENTION_DAYS,
+)
+
+ROLLUP_FORMAT_VERSION = 1
+
+
+def _day(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+
+
+def report_metrics(report_type: str, entry: Dict[str, Any]) -> Dict[str, float]:
+    """Values summed into an event's daily rollup (besides the event count)."""
+    if report_type == "usage":
+        return {"duration_minutes": entry.get("duration_minutes") or 0}
+    if report_type == "availability":
+        total_nodes = entry.get("total_nodes", 0)
+        available_nodes = entry.get("available_nodes", 0)
+        if total_nodes > 0:
+            availability_percent = (available_nodes / total_nodes) * 100
+        else:
+            availability_percent = 0
+        return {
+            "availability_percent": availability_percent,
+            "available_nodes": available_nodes,
+            "total_nodes": total_nodes,
+        }
+    if report_type == "job_success":
+        return {"successful": 1 if entry.get("success", False) else 0}
+    return {}
+
+
+def _add(days: Dict[str, Dict[str, float]], day: str, metrics: Dict[str, float]):
+    sums = days.setdefault(day, {"count": 0})
+    sums["count"] += 1
+    for key, value in metrics.items():
+        sums[key] = sums.get(key, 0) + value
+
+
+def _write_atomic(path: Path, text: str):
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class ReportStore:
+    """Daily segments plus daily rollups of each user's report events"""
+
+    def __init__(
+        self,
+        base_dir: Optional[Path] = None,
+        compact_after_days: int = REPORTS_COMPACT_AFTER_DAYS,
+        raw_retention_days: int = REPORTS_RAW_RETENTION_DAYS,
+        rollup_retention_days: int = REPORTS_ROLLUP_RETENTION_DAYS,
+    ):
+        self._base_dir = base_dir
+        self.compact_after_days = compact_after_days
+        self.raw_retention_days = raw_retention_days
+        self.rollup_retention_days = rollup_retention_days
+
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        # (user_id, report_type) whose legacy file has been handled
+        self._migrated = set()
+        # rollup path -> ((mtime_ns, size), days)
+        self._rollup_cache: Dict[Path, Tuple[Tuple[int, int], Dict]] = {}
+
+    @property
+    def base_dir(self) -> Path:
+        # Resolved lazily so it follows $HOME, like get_reports_dir()
+        return self._base_dir or Path.home() / ".sky" / "reports"
+
+    def _user_dir(self, user_id: str) -> Path:
+        user_dir = self.base_dir / user_id
+        user_dir.mkdir(parents=True, exist_ok=True)
+        return user_dir
+
+    def _segment_dir(self, user_id: str, report_type: str) -> Path:
+        return self._user_dir(user_id) / "segments" / report_type
+
+    def _rollup_path(self, user_id: str, report_type: str) -> Path:
+        return self._user_dir(user_id) / "rollups" / f"{report_type}.json"
+
+    @contextmanager
+    def _lock(self, user_id: str) -> Iterator[None]:
+        """Serialize writers of a user's reports across threads and processes."""
+        with self._locks_lock:
+            lock = self._locks.setdefault(user_id, threading.Lock())
+        with lock:
+            with open(self._user_dir(user_id) / ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def append(self, user_id: str, report_type: str, entry: Dict[str, Any]) -> None:
+        """
+        Store one event and add it to its day's rollup.
+
+        Args:
+            user_id: Owner of the event
+            report_type: Report type (e.g. "usage")
+            entry: Event data; must include "timestamp"
+        """
+        self._ensure_migrated(user_id, report_type)
+        day = _day(entry.get("timestamp", 0))
+        with self._lock(user_id):
+            segment_dir = self._segment_dir(user_id, report_type)
+            segment_dir.mkdir(parents=True, exist_ok=True)
+            segment = segment_dir / f"{day}.jsonl"
+            new_segment = not segment.exists()
+            with open(segment, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+            rollups = self._read_rollups(user_id, report_type)
+            _add(rollups, day, report_metrics(report_type, entry))
+            self._write_rollups(user_id, report_type, rollups)
+
+            # The first event of a day is a good time to tidy older days
+            if new_segment:
+                self._maintain(user_id, report_type)
+
+    def entries(
+        self, user_id: str, report_type: str, days: int = 30, now: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Raw events from the last N days, reading only segments in the window."""
+        self._ensure_migrated(user_id, report_type)
+        cutoff = (time.time() if now is None else now) - (days * 24 * 60 * 60)
+        first_day = _day(cutoff)
+        entries = []
+        for day, paths in self._segments(user_id, report_type):
+            if day < first_day:
+                continue
+            for entry in self._read_segment(paths):
+                if entry.get("timestamp", 0) >= cutoff:
+                    entries.append(entry)
+        return entries
+
+    def daily(
+        self, user_id: str, report_type: str, days: int = 30, now: Optional[float] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Per-day sums of the events from the last N days.
+
+        Returns:
+            Dictionary of date (YYYY-MM-DD, ascending) -> {"count": ..., metric: sum}
+        """
+        self._ensure_migrated(user_id, report_type)
+        cutoff = (time.time() if now is None else now) - (days * 24 * 60 * 60)
+        first_day = _day(cutoff)
+        rollups = self._cached_rollups(user_id, report_type)
+        result = {day: dict(sums) for day, sums in rollups.items() if day > first_day}
+
+        if first_day in rollups:
+            # The window starts mid-day: recompute that day from its raw events
+            paths = self._day_segments(user_id, report_type, first_day)
+            if paths:
+                for entry in self._read_segment(paths):
+                    if entry.get("timestamp", 0) >= cutoff:
+                        _add(result, first_day, report_metrics(report_type, entry))
+            else:
+                result[first_day] = dict(rollups[first_day])
+
+        return dict(sorted(result.items()))
+
+    def _segments(self, user_id: str, report_type: str) -> List[Tuple[str, List[Path]]]:
+        """(day, segment files) pairs, oldest first; a day may have a gz and a live file."""
+        segment_dir = self._segment_dir(user_id, report_type)
+        if not segment_dir.exists():
+            return []
+        by_day: Dict[str, List[Path]] = {}
+        for path in segment_dir.iterdir():
+            if path.name.endswith((".jsonl", ".jsonl.gz")):
+                by_day.setdefault(path.name.split(".", 1)[0], []).append(path)
+        # Compacted (older) data first
+        return [
+            (day, sorted(paths, key=lambda p: not p.name.endswith(".gz")))
+            for day, paths in sorted(by_day.items())
+        ]
+
+    def _day_segments(self, user_id: str, report_type: str, day: str) -> List[Path]:
+        segment_dir = self._segment_dir(user_id, report_type)
+        paths = [segment_dir / f"{day}.jsonl.gz", segment_dir / f"{day}.jsonl"]
+        return [path for path in paths if path.exists()]
+
+    def _read_segment(self, paths: List[Path]) -> Iterator[Dict[str, Any]]:
+        for path in paths:
+            try:
+                opener = gzip.open if path.name.endswith(".gz") else open
+                with opener(path, "rt") as f:
+                    for line in f:
+                        try:
+                            yield json.loads(line.strip())
+                        except json.JSONDecodeError:
+                            continue
+            except FileNotFoundError:
+                # Compacted or expired concurrently
+                continue
+
+    def _read_rollups(self, user_id: str, report_type: str) -> Dict[str, Dict[str, float]]:
+        path = self._rollup_path(user_id, report_type)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if data.get("version") != ROLLUP_FORMAT_VERSION:
+            return {}
+        return data.get("days", {})
+
+    def _cached_rollups(self, user_id: str, report_type: str) -> Dict[str, Dict[str, float]]:
+        path = self._rollup_path(user_id, report_type)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return {}
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._rollup_cache.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        rollups = self._read_rollups(user_id, report_type)
+        self._rollup_cache[path] = (version, rollups)
+        return rollups
+
+    def _write_rollups(
+        self, user_id: str, report_type: str, rollups: Dict[str, Dict[str, float]]
+    ):
+        path = self._rollup_path(user_id, report_type)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(
+            path,
+            json.dumps({"version": ROLLUP_FORMAT_VERSION, "days": rollups}, sort_keys=True),
+        )
+
+    def _maintain(self, user_id: str, report_type: str, today: Optional[date] = None):
+        """Compact and expire old segments and prune old rollups (caller holds the lock)."""
+        today = today or date.today()
+        compact_before = (today - timedelta(days=self.compact_after_days)).isoformat()
+        drop_before = (today - timedelta(days=self.raw_retention_days)).isoformat()
+        prune_before = (today - timedelta(days=self.rollup_retention_days)).isoformat()
+
+        for day, paths in self._segments(user_id, report_type):
+            if day < drop_before:
+                for path in paths:
+                    path.unlink(missing_ok=True)
+            elif day < compact_before:
+                for path in paths:
+                    if path.name.endswith(".jsonl"):
+                        self._compact(path)
+
+        rollups = self._read_rollups(user_id, report_type)
+        expired = [day for day in rollups if day < prune_before]
+        if expired:
+            for day in expired:
+                del rollups[day]
+            self._write_rollups(user_id, report_type, rollups)
+
+    def _compact(self, path: Path):
+        """Gzip a live segment, appending to the day's compacted segment if any."""
+        gz_path = path.with_name(path.name + ".gz")
+        tmp_path = gz_path.with_name(f"{gz_path.name}.{os.getpid()}.tmp")
+        if gz_path.exists():
+            shutil.copyfile(gz_path, tmp_path)
+        with open(path, "rb") as src, gzip.open(tmp_path, "ab") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, gz_path)
+        path.unlink()
+
+    def _ensure_migrated(self, user_id: str, report_type: str):
+        if (user_id, report_type) in self._migrated:
+            return
+        legacy = self.base_dir / user_id / f"{report_type}.jsonl"
+        if legacy.exists():
+            with self._lock(user_id):
+                self._migrate_legacy(user_id, report_type, legacy)
+        self._migrated.add((user_id, report_type))
+
+    def _migrate_legacy(self, user_id: str, report_type: str, legacy: Path):
+        """Ingest a pre-segments ``<type>.jsonl`` file (caller holds the lock)."""
+        if not legacy.exists():
+            # Another process got here first
+            return
+
+        by_day: Dict[str, List[str]] = {}
+        rollups = self._read_rollups(user_id, report_type)
+        with open(legacy, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line.strip())
+                except json.JSONDecodeError:
+                    continue
+                day = _day(entry.get("timestamp", 0))
+                by_day.setdefault(day, []).append(json.dumps(entry))
+                _add(rollups, day, report_metrics(report_type, entry))
+
+        segment_dir = self._segment_dir(user_id, report_type)
+        segment_dir.mkdir(parents=True, exist_ok=True)
+        for day, lines in by_day.items():
+            with open(segment_dir / f"{day}.jsonl", "a") as f:
+                f.write("\n".join(lines) + "\n")
+        self._write_rollups(user_id, report_type, rollups)
+        legacy.rename(legacy.with_name(legacy.name + ".migrated"))
+
+        self._maintain(user_id, report_type)
+        print(
+            f"Migrated {sum(len(v) for v in by_day.values())} {report_type} report "
+            f"entries for user {user_id}"
+        )
+
+
+# Global instance
+report_store = ReportStore()
@@ -1,9 +1,9 @@
-import json
 import time
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from models import ReportData
+from routes.reports.store import report_store
 
 
 def get_reports_dir() -> Path:
@@ -23,10 +23,7 @@ def get_user_reports_dir(user_id: str) -> Path:
 
 
 def save_report_entry(user_id: str, report_type: str, data: Dict[str, Any]) -> None:
-    """Save a report entry to the user's reports directory"""
-    user_dir = get_user_reports_dir(user_id)
-    report_file = user_dir / f"{report_type}.jsonl"
-
+    """Save a report entry to the user's report store"""
     # Add timestamp if not present
     if "timestamp" not in data:
         data["timestamp"] = time.time()
@@ -35,34 +32,14 @@ def save_report_entry(user_id: str, report_type: str, data: Dict[str, Any]) -> N
     if "user_id" not in data:
         data["user_id"] = user_id
 
-    # Append to the file
-    with open(report_file, "a") as f:
-        f.write(json.dumps(data) + "\n")
+    report_store.append(user_id, report_type, data)
 
 
 def load_report_entries(
     user_id: str, report_type: str, days: int = 30
 ) -> List[Dict[str, Any]]:
     """Load report entries for a user from the last N days"""
-    user_dir = get_user_reports_dir(user_id)
-    report_file = user_dir / f"{report_type}.jsonl"
-
-    if not report_file.exists():
-        return []
-
-    cutoff_time = time.time() - (days * 24 * 60 * 60)
-    entries = []
-
-    with open(report_file, "r") as f:
-        for line in f:
-            try:
-                entry = json.loads(line.strip())
-                if entry.get("timestamp", 0) >= cutoff_time:
-                    entries.append(entry)
-            except json.JSONDecodeError:
-                continue
-
-    return entries
+    return report_store.entries(user_id, report_type, days)
 
 
 def record_usage(
@@ -149,119 +126,76 @@ def aggregate_daily_data(
     return result
 
 
-def get_usage_data(user_id: str, days: int = 30) -> List[ReportData]:
-    """Get aggregated usage data for the last N days"""
-    entries = load_report_entries(user_id, "usage", days)
-
-    # Convert usage events to daily usage percentages
-    daily_usage = {}
-    for entry in entries:
-        timestamp = entry.get("timestamp", 0)
-        date = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
-        duration_minutes = entry.get("duration_minutes")
-        if duration_minutes is None:
-            duration = 0
-        else:
-            duration = duration_minutes / 60  # Convert to hours
-
-        if date not in daily_usage:
-            daily_usage[date] = 0
-        daily_usage[date] += duration
-
-    # Convert to percentage (assuming 24 hours per day)
+def _usage_points(daily: Dict[str, Dict[str, float]]) -> List[ReportData]:
+    # Convert daily usage hours to percentages (assuming 24 hours per day)
     result = []
-    for date in sorted(daily_usage.keys()):
-        usage_hours = daily_usage[date]
+    for date, sums in daily.items():
+        usage_hours = sums.get("duration_minutes", 0) / 60
         usage_percent = min(100, (usage_hours / 24) * 100)
         result.append(ReportData(date=date, value=round(usage_percent, 2)))
-
     return result
 
 
-def get_availability_data(user_id: str, days: int = 30) -> List[ReportData]:
-    """Get aggregated availability data for the last N days"""
-    entries = load_report_entries(user_id, "availability", days)
-
-    # Calculate daily availability percentages
-    daily_availability = {}
-    for entry in entries:
-        timestamp = entry.get("timestamp", 0)
-        date = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
-        total_nodes = entry.get("total_nodes", 0)
-        available_nodes = entry.get("available_nodes", 0)
-
-        if total_nodes > 0:
-            availability_percent = (available_nodes / total_nodes) * 100
-        else:
-            availability_percent = 0
-
-        if date not in daily_availability:
-            daily_availability[date] = []
-        daily_availability[date].append(availability_percent)
-
-    # Calculate daily averages
+def _availability_points(daily: Dict[str, Dict[str, float]]) -> List[ReportData]:
+    # Daily average of the per-event availability percentages
     result = []
-    for date in sorted(daily_availability.keys()):
-        values = daily_availability[date]
-        avg_value = sum(values) / len(values) if values else 0
+    for date, sums in daily.items():
+        count = sums.get("count", 0)
+        avg_value = sums.get("availability_percent", 0) / count if count else 0
         result.append(ReportData(date=date, value=round(avg_value, 2)))
-
     return result
 
 
-def get_job_success_data(user_id: str, days: int = 30) -> List[ReportData]:
-    """Get aggregated job success data for the last N days"""
-    entries = load_report_entries(user_id, "job_success", days)
-
-    # Calculate daily success rates
-    daily_success = {}
-    for entry in entries:
-        timestamp = entry.get("timestamp", 0)
-        date = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
-        success = entry.get("success", False)
-
-        if date not in daily_success:
-            daily_success[date] = {"successful": 0, "total": 0}
-
-        daily_success[date]["total"] += 1
-        if success:
-            daily_success[date]["successful"] += 1
-
-    # Calculate daily success percentages
+def _job_success_points(daily: Dict[str, Dict[str, float]]) -> List[ReportData]:
+    # Daily success percentages
     result = []
-    for date in sorted(daily_success.keys()):
-        data = daily_success[date]
-        if data["total"] > 0:
-            success_rate = (data["successful"] / data["total"]) * 100
+    for date, sums in daily.items():
+        total = sums.get("count", 0)
+        if total > 0:
+            success_rate = (sums.get("successful", 0) / total) * 100
         else:
             success_rate = 0
         result.append(ReportData(date=date, value=round(success_rate, 2)))
-
     return result
 
 
+def get_usage_data(user_id: str, days: int = 30) -> List[ReportData]:
+    """Get aggregated usage data for the last N days"""
+    return _usage_points(report_store.daily(user_id, "usage", days))
+
+
+def get_availability_data(user_id: str, days: int = 30) -> List[ReportData]:
+    """Get aggregated availability data for the last N days"""
+    return _availability_points(report_store.daily(user_id, "availability", days))
+
+
+def get_job_success_data(user_id: str, days: int = 30) -> List[ReportData]:
+    """Get aggregated job success data for the last N days"""
+    return _job_success_points(report_store.daily(user_id, "job_success", days))
+
+
 def get_reports_summary(user_id: str, days: int = 30) -> Dict[str, Any]:
     """Get a summary of all reports for a user"""
-    usage_data = get_usage_data(user_id, days)
-    availability_data = get_availability_data(user_id, days)
-    job_success_data = get_job_success_data(user_id, days)
+    # One rollup read per report type serves both the series and the totals
+    usage_daily = report_store.daily(user_id, "usage", days)
+    availability_daily = report_store.daily(user_id, "availability", days)
+    job_daily = report_store.daily(user_id, "job_success", days)
 
     # Calculate summary statistics
-    job_entries = load_report_entries(user_id, "job_success", days)
-    total_jobs = len(job_entries)
-    successful_jobs = len([e for e in job_entries if e.get("success", False)])
+    total_jobs = sum(sums.get("count", 0) for sums in job_daily.values())
+    successful_jobs = sum(sums.get("successful", 0) for sums in job_daily.values())
 
-    usage_entries = load_report_entries(user_id, "usage", days)
     total_usage_hours = (
-        sum((e.get("duration_minutes") or 0) for e in usage_entries) / 60
+        sum(sums.get("duration_minutes", 0) for sums in usage_daily.values()) / 60
     )
 
-    availability_entries = load_report_entries(user_id, "availability", days)
-    if availability_entries:
+    if availability_daily:
         total_availability = sum(
-            e.get("available_nodes", 0) for e in availability_entries
+            sums.get("available_nodes", 0) for sums in availability_daily.values()
+        )
+        total_nodes = sum(
+            sums.get("total_nodes", 0) for sums in availability_daily.values()
         )
-        total_nodes = sum(e.get("total_nodes", 0) for e in availability_entries)
         avg_availability = (
             (total_availability / total_nodes * 100) if total_nodes > 0 else 0
         )
@@ -269,11 +203,11 @@ def get_reports_summary(user_id: str, days: int = 30) -> Dict[str, Any]:
         avg_availability = 0
 
     return {
-        "usage": usage_data,
-        "availability": availability_data,
-        "job_success": job_success_data,
-        "total_jobs": total_jobs,
-        "successful_jobs": successful_jobs,
+        "usage": _usage_points(usage_daily),
+        "availability": _availability_points(availability_daily),
+        "job_success": _job_success_points(job_daily),
+        "total_jobs": int(total_jobs),
+        "successful_jobs": int(successful_jobs),
         "total_usage_hours": round(total_usage_hours, 2),
         "average_availability_percent": round(avg_availability, 2),
     }
@@ -8,6 +8,7 @@ from fastapi import (
     UploadFile,
     Form,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import Dict, Any, Optional, List
@@ -25,6 +26,18 @@ from routes.auth.api_key_auth import (
 )
 from routes.auth.utils import get_current_user
 from routes.clouds.azure.utils import az_get_current_config
+from routes.storage_buckets.fs_pool import FilesystemPool
+from routes.storage_buckets.listing import (
+    decode_token,
+    directory_indexes,
+    encode_token,
+    list_item,
+    native_page,
+    normalize_dir,
+    sort_items,
+    stream_listing,
+    supports_native_paging,
+)
 
 router = APIRouter(
     prefix="/storage-buckets",
@@ -47,9 +60,27 @@ class PathRequest(BaseModel):
     )
 
 
+class ListRequest(PathRequest):
+    """Request body for listing a directory, optionally paged or streamed."""
+
+    page_size: Optional[int] = Field(
+        None,
+        ge=1,
+        le=10000,
+        description="Return at most this many items and a continuation token.",
+    )
+    continuation_token: Optional[str] = Field(
+        None, description="Token from the previous page of this directory."
+    )
+    stream: bool = Field(
+        False, description="Stream every item as NDJSON instead of one response."
+    )
+
+
 class ListResponse(BaseModel):
     items: List[Dict[str, Any]]
     path: str
+    next_continuation_token: Optional[str] = None
 
 
 class FileOperationResponse(BaseModel):
@@ -263,22 +294,54 @@ def get_filesystem(
         )
 
 
+def invalidate_listings(fs, base_path: str, *paths: str):
+    """Drop cached directory listings a write through this API made stale."""
+    if hasattr(fs, "account_name"):
+        # Azure listings are keyed by container paths; drop them all
+        paths, base_path = (), None
+    for path in (*paths, base_path):
+        try:
+            fs.invalidate_cache(path)
+        except Exception as e:
+            print(f"Failed to invalidate listing cache for {path}: {e}")
+
+
+# Global instance
+storage_filesystems = FilesystemPool(get_filesystem)
+
+
 # --- API Endpoints ---
+@router.get("/browse/metrics")
+async def get_browse_metrics():
+    """Get counters of the pooled bucket filesystems and cached directory indexes."""
+    return {
+        **storage_filesystems.metrics(),
+        "directory_indexes": directory_indexes.metrics(),
+    }
+
+
 @router.post("/{bucket_id}/list", response_model=ListResponse)
 async def list_files(
     bucket_id: str,
-    req: PathRequest,
+    req: ListRequest,
     request: Request,
     response: Response,
     db: Session = Depends(get_db),
 ):
-    """Lists the contents of a directory within a storage bucket."""
+    """
+    Lists the contents of a directory within a storage bucket.
+
+    Without ``page_size`` or ``stream`` the whole directory is returned, as
+    before. With ``page_size`` one page is returned, with a
+    ``next_continuation_token`` to pass back until it is null. With
+    ``stream`` every item is sent as a line of NDJSON.
+    """
     try:
         user_info = get_current_user(request, response)
         organization_id = user_info.get("organization_id")
 
         bucket = get_bucket_info(bucket_id, db, organization_id)
-        fs, base_path = get_filesystem(bucket, req.storage_options)
+        fs, base_path = storage_filesystems.get(bucket, req.storage_options)
 
         # Combine the base path with the requested path
         if base_path:
@@ -291,49 +354,81 @@ async def list_files(
             # For Azure with az protocol, use just the requested path
             full_path = req.path.lstrip("/") if req.path != "/" else ""
 
-        try:
-            # For Azure, get container name from the source URL
-            container_name = None
-            if hasattr(fs, "account_name"):
-                # Get container name from the bucket source URL
-                container_parts = bucket.source.split("/")
-                container_name = (
-                    container_parts[3] if len(container_parts) > 3 else None
-                )
+        list_path = full_path
+        # For Azure, get container name from the bucket source URL
+        if hasattr(fs, "account_name"):
+            container_parts = bucket.source.split("/")
+            container_name = container_parts[3] if len(container_parts) > 3 else None
 
-                # Use the specific container directly
-                if container_name:
-                    listing = fs.ls(
-                        f"{container_name}/{full_path.lstrip('/')}", detail=True
-                    )
-                else:
-                    raise HTTPException(
-                        status_code=400,
-                        detail="Could not extract container name from source URL",
-                    )
+            # Use the specific container directly
+            if container_name:
+                list_path = f"{container_name}/{full_path.lstrip('/')}"
             else:
-                # Fallback for non-Azure filesystems
-                listing = fs.ls(full_path, detail=True)
+                raise HTTPException(
+                    status_code=400,
+                    detail="Could not extract container name from source URL",
+                )
+
+        directory = normalize_dir(req.path)
+        cache_key = directory_indexes.key(bucket, req.storage_options, directory)
+
+        if req.stream:
+            # Runs in the threadpool as the response is sent
+            return StreamingResponse(
+                stream_listing(fs, list_path, full_path, cache_key, req.path),
+                media_type="application/x-ndjson",
+            )
+
+        def build_index():
+            listing = fs.ls(list_path, detail=True)
             print(f"Successfully listed path, found {len(listing)} items")
             # Transform the listing to ensure consistent output format
-            items = []
-            for item in listing:
-                # Extract just the relative path from the full path
-                name = item["name"].replace(full_path, "")
-                if name == "":  # This is the directory itself
-                    continue
-
-                items.append(
-                    {
-                        "name": name,
-                        "size": item.get("size", 0),
-                        "type": item.get("type", "unknown"),
-                        "last_modified": item.get("last_modified", None),
-                    }
+            items = sort_items(
+                [item for item in (list_item(e, full_path) for e in listing) if item]
+            )
+            directory_indexes.put(cache_key, items)
+            return items
+
+        try:
+            if req.page_size is None:
+                items = directory_indexes.get(cache_key)
+                if items is None:
+                    items = await run_in_threadpool(build_index)
+                return ListResponse(items=items, path=req.path)
+
+            state = decode_token(req.continuation_token, directory)
+            if supports_native_paging(fs) and "o" not in state:
+                # Always page with the provider's own tokens here: they don't
+                # depend on a cached index that may expire mid-listing
+                entries, native_token = await run_in_threadpool(
+                    native_page, fs, list_path, req.page_size, state.get("n")
+                )
+                page = [
+                    item for item in (list_item(e, full_path) for e in entries) if item
+                ]
+                return ListResponse(
+                    items=page,
+                    path=req.path,
+                    next_continuation_token=(
+                        encode_token(directory, n=native_token)
+                        if native_token
+                        else None
+                    ),
                 )
 
+            # Page through the directory index (rebuilt if it expired); offset
+            # tokens from before S3/GCS always paged natively land here too
+            items = directory_indexes.get(cache_key)
+            if items is None:
+                items = await run_in_threadpool(build_index)
+            offset = state.get("o", 0)
+            end = offset + req.page_size
             return ListResponse(
-                items=sorted(items, key=lambda x: (x["type"], x["name"])), path=req.path
+                items=items[offset:end],
+                path=req.path,
+                next_continuation_token=(
+                    encode_token(directory, o=end) if end < len(items) else None
+                ),
             )
         except FileNotFoundError:
             raise HTTPException(status_code=404, detail=f"Path not found: {req.path}")
@@ -359,7 +454,7 @@ async def get_file(
         organization_id = user_info.get("organization_id")
 
         bucket = get_bucket_info(bucket_id, db, organization_id)
-        fs, base_path = get_filesystem(bucket, req.storage_options)
+        fs, base_path = storage_filesystems.get(bucket, req.storage_options)
 
         # Combine the base path with the requested file path
         if base_path:
@@ -459,7 +554,7 @@ async def upload_file(
         organization_id = user_info.get("organization_id")
 
         bucket = get_bucket_info(bucket_id, db, organization_id)
-        fs, base_path = get_filesystem(bucket, json.loads(storage_options))
+        fs, base_path = storage_filesystems.get(bucket, json.loads(storage_options))
 
         # Ensure the target directory exists
         if base_path:
@@ -484,7 +579,11 @@ async def upload_file(
                 while content := await file.read(1024 * 1024):  # Read 1MB chunks
                     f.write(content)
 
-            fs.invalidate_cache(base_path)
+            # Pooled filesystems keep listings; the target dir has changed
+            invalidate_listings(fs, base_path, target_dir)
+            directory_indexes.invalidate(
+                bucket.id, f"{path.rstrip('/')}/{file.filename}"
+            )
 
             return FileOperationResponse(
                 status="success", path=f"{path.rstrip('/')}/{file.filename}"
@@ -513,7 +612,7 @@ async def delete_file(
         organization_id = user_info.get("organization_id")
 
         bucket = get_bucket_info(bucket_id, db, organization_id)
-        fs, base_path = get_filesystem(bucket, req.storage_options)
+        fs, base_path = storage_filesystems.get(bucket, req.storage_options)
 
         # Combine the base path with the requested path
         if base_path:
@@ -529,7 +628,8 @@ async def delete_file(
                 )
 
             fs.rm(full_path, recursive=True)  # Use recursive to delete directories
-            fs.invalidate_cache(base_path)
+            invalidate_listings(fs, base_path, full_path)
+            directory_indexes.invalidate(bucket.id, req.path)
             return FileOperationResponse(status="success", path=req.path)
         except FileNotFoundError:
             raise HTTPException(status_code=404, detail=f"Path not found: {req.path}")
@@ -555,7 +655,7 @@ async def create_dir(
         organization_id = user_info.get("organization_id")
 
         bucket = get_bucket_info(bucket_id, db, organization_id)
-        fs, base_path = get_filesystem(bucket, req.storage_options)
+        fs, base_path = storage_filesystems.get(bucket, req.storage_options)
 
         # Combine the base path with the requested path
         if base_path:
@@ -642,7 +742,8 @@ async def create_dir(
                 fs.mkdir(full_path, create_parents=True)
                 print(f"Successfully created directory at path: {full_path}")
 
-            fs.invalidate_cache(base_path)
+            invalidate_listings(fs, base_path, full_path)
+            directory_indexes.invalidate(bucket.id, req.path)
 
             return FileOperationResponse(status="success", path=req.path)
         except Exception as e:
@@ -0,0 +1,164 @@
+"""
+Pool of fsspec filesystems used to browse storage buckets.
+
+Every browse call (list, get, upload, delete, create-dir) used to build its
+filesystem from scratch: resolving the organization's AWS profile or Azure
+service principal, then creating an s3fs/gcsfs/adlfs client with new TLS
+sessions and an empty listings cache. The pool keeps one filesystem per
+(bucket, storage options):
+
+- entries are reused for ``STORAGE_FS_POOL_TTL_SECONDS`` after they were
+  built, then rebuilt so rotated credentials are picked up;
+- at most ``STORAGE_FS_POOL_MAX_ENTRIES`` are kept, least recently used
+  evicted first;
+- the bucket's ``updated_at`` is part of the key, and bucket or cloud config
+  changes drop the affected entries right away (a filesystem built while
+  its entry was invalidated is not pooled);
+- filesystems are created with ``skip_instance_cache`` so fsspec's own,
+  unbounded instance cache doesn't keep evicted clients alive.
+"""
+
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import STORAGE_FS_POOL_MAX_ENTRIES, STORAGE_FS_POOL_TTL_SECONDS
+from db.db_models import StorageBucket
+
+
+class _Entry:
+    def __init__(self, fs, base_path: str, organization_id: str, built_at: float):
+        self.fs = fs
+        self.base_path = base_path
+        self.organization_id = organization_id
+        self.built_at = built_at
+
+
+class FilesystemPool:
+    """Per-(bucket, options) cache of fsspec filesystems with TTL and LRU eviction"""
+
+    def __init__(
+        self,
+        factory: Callable[[StorageBucket, Optional[Dict[str, Any]]], Tuple[Any, str]],
+        ttl_seconds: float = STORAGE_FS_POOL_TTL_SECONDS,
+        max_entries: int = STORAGE_FS_POOL_MAX_ENTRIES,
+    ):
+        self.factory = factory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evicted": 0,
+            "invalidated": 0,
+        }
+        # Bumped by invalidate(); a build that saw an older generation is stale
+        self._generation = 0
+        self._bucket_generations: Dict[str, int] = {}
+        self._org_generations: Dict[str, int] = {}
+
+    def get(
+        self, bucket: StorageBucket, storage_options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Any, str]:
+        """
+        Filesystem and base path for browsing ``bucket``.
+
+        Args:
+            bucket: The storage bucket (already authorized for the caller)
+            storage_options: Extra filesystem options from the request
+
+        Returns:
+            (fs, base_path) as returned by the factory
+        """
+        key = (
+            bucket.id,
+            str(bucket.updated_at),
+            json.dumps(storage_options or {}, sort_keys=True, default=str),
+        )
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry.built_at < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry.fs, entry.base_path
+            if entry is not None:
+                del self._entries[key]
+                self._counters["expired"] += 1
+            self._counters["misses"] += 1
+            generation = self._generation_of(bucket)
+
+        # The factory edits the options it is given
+        options = copy.deepcopy(storage_options) or {}
+        options["skip_instance_cache"] = True
+        fs, base_path = self.factory(bucket, options)
+
+        with self._lock:
+            if self._generation_of(bucket) != generation:
+                # Invalidated while building, maybe with the old credentials
+                return fs, base_path
+            self._entries[key] = _Entry(fs, base_path, bucket.organization_id, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evicted"] += 1
+        return fs, base_path
+
+    def invalidate(
+        self, bucket_id: Optional[str] = None, organization_id: Optional[str] = None
+    ):
+        """
+        Drop pooled filesystems so the next call builds them again.
+
+        Args:
+            bucket_id: Bucket whose filesystems to drop
+            organization_id: Organization whose filesystems to drop (e.g. after
+                its cloud credentials changed); everything if neither is given
+        """
+        with self._lock:
+            if bucket_id is not None:
+                self._bucket_generations[bucket_id] = (
+                    self._bucket_generations.get(bucket_id, 0) + 1
+                )
+            if organization_id is not None:
+                self._org_generations[organization_id] = (
+                    self._org_generations.get(organization_id, 0) + 1
+                )
+            if bucket_id is None and organization_id is None:
+                self._generation += 1
+            for key in list(self._entries):
+                entry = self._entries[key]
+                if bucket_id is not None and key[0] != bucket_id:
+                    continue
+                if (
+                    organization_id is not None
+                    and entry.organization_id != organization_id
+                ):
+                    continue
+                del self._entries[key]
+                self._counters["invalidated"] += 1
+
+    def _generation_of(self, bucket: StorageBucket) -> Tuple[int, int, int]:
+        # Caller holds the lock
+        return (
+            self._generation,
+            self._bucket_generations.get(bucket.id, 0),
+            self._org_generations.get(bucket.organization_id, 0),
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                **self._counters,
+                "hit_rate": self._counters["hits"] / lookups if lookups else None,
+            }
@@ -0,0 +1,325 @@
+"""
+Paged and streamed bucket listings, with cached directory indexes.
+
+``/list`` used to call ``fs.ls`` on the whole prefix, post-process and sort
+every entry and return them in one response, so prefixes with hundreds of
+thousands of objects timed out and held the whole listing in memory. This
+module supports:
+
+- continuation-token pages: S3 and GCS prefixes are read one native page
+  (``list_objects_v2`` / ``objects.list`` with a delimiter) per request;
+  other filesystems are paged from a directory index;
+- NDJSON streaming of a whole prefix, page by page, without building the
+  full response;
+- a directory index cache: complete listings (sorted as before) keyed by
+  bucket, storage options and directory, kept for
+  ``STORAGE_LIST_CACHE_TTL_SECONDS`` within a total of
+  ``STORAGE_LIST_CACHE_MAX_ITEMS`` entries. Uploads, deletes and new
+  directories made through this API drop the affected directories, so
+  navigating back and forth is served locally.
+
+Tokens are opaque to clients: base64 of the directory they belong to and
+either an offset into the index or the provider's own token.
+"""
+
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from config import STORAGE_LIST_CACHE_MAX_ITEMS, STORAGE_LIST_CACHE_TTL_SECONDS
+
+# Entries per provider request when streaming (S3's maximum)
+STREAM_PAGE_SIZE = 1000
+
+
+def normalize_dir(path: Optional[str]) -> str:
+    """Directory key of a request path ("/a/b/" -> "a/b", "/" -> "")."""
+    return (path or "").strip("/")
+
+
+def list_item(entry: Dict[str, Any], full_path: str) -> Optional[Dict[str, Any]]:
+    """A filesystem entry in the ``/list`` response format (None for the dir itself)."""
+    # Extract just the relative path from the full path
+    name = entry["name"].replace(full_path, "")
+    if name == "":  # This is the directory itself
+        return None
+    return {
+        "name": name,
+        "size": entry.get("size", 0),
+        "type": entry.get("type", "unknown"),
+        "last_modified": entry.get("last_modified", None),
+    }
+
+
+def sort_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return sorted(items, key=lambda x: (x["type"], x["name"]))
+
+
+def encode_token(directory: str, **state) -> str:
+    raw = json.dumps({"d": directory, **state}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_token(token: Optional[str], directory: str) -> Dict[str, Any]:
+    """State of a continuation token; 400 if it is malformed or for another directory."""
+    if not token:
+        return {}
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid continuation token")
+    if not isinstance(state, dict) or state.get("d") != directory:
+        raise HTTPException(
+            status_code=400, detail="Continuation token is for a different path"
+        )
+    offset = state.get("o", 0)
+    if isinstance(offset, bool) or not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid continuation token")
+    if not isinstance(state.get("n", ""), str):
+        raise HTTPException(status_code=400, detail="Invalid continuation token")
+    return state
+
+
+def supports_native_paging(fs) -> bool:
+    return hasattr(fs, "call_s3") or _is_gcs(fs)
+
+
+def native_page(
+    fs, path: str, limit: int, token: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    One page of a directory from the provider's listing API.
+
+    Args:
+        fs: An s3fs or gcsfs filesystem
+        path: Directory to list, as passed to ``fs.ls``
+        limit: Maximum number of entries (objects and sub-directories)
+        token: The provider's continuation token from the previous page
+
+    Returns:
+        (entries, next token): entries shaped like ``fs.ls(detail=True)``,
+        and None as the token on the last page
+    """
+    bucket, key = fs.split_path(path)[:2]
+    prefix = f"{key.rstrip('/')}/" if key else ""
+    if hasattr(fs, "call_s3"):
+        kwargs = {"ContinuationToken": token} if token else {}
+        response = fs.call_s3(
+            "list_objects_v2",
+            Bucket=bucket,
+            Prefix=prefix,
+            Delimiter="/",
+            MaxKeys=limit,
+            **kwargs,
+        )
+        entries = [
+            {
+                "name": f"{bucket}/{p['Prefix'].rstrip('/')}",
+                "size": 0,
+                "type": "directory",
+            }
+            for p in response.get("CommonPrefixes", [])
+        ]
+        entries += [
+            {
+                "name": f"{bucket}/{obj['Key']}",
+                "size": obj.get("Size", 0),
+                "type": "file",
+                "last_modified": _isoformat(obj.get("LastModified")),
+            }
+            for obj in response.get("Contents", [])
+            if obj["Key"] != prefix
+        ]
+        next_token = (
+            response.get("NextContinuationToken")
+            if response.get("IsTruncated")
+            else None
+        )
+        return entries, next_token
+
+    kwargs = {"pageToken": token} if token else {}
+    response = fs.call(
+        "GET",
+        "b/{}/o",
+        bucket,
+        delimiter="/",
+        prefix=prefix,
+        maxResults=limit,
+        json_out=True,
+        **kwargs,
+    )
+    entries = [
+        {"name": f"{bucket}/{p.rstrip('/')}", "size": 0, "type": "directory"}
+        for p in response.get("prefixes", [])
+    ]
+    entries += [
+        {
+            "name": f"{bucket}/{obj['name']}",
+            "size": int(obj.get("size", 0)),
+            "type": "file",
+            "last_modified": obj.get("updated"),
+        }
+        for obj in response.get("items", [])
+        if obj["name"] != prefix
+    ]
+    return entries, response.get("nextPageToken")
+
+
+def native_pages(fs, path: str, page_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """All pages of a directory from the provider's listing API."""
+    token = None
+    while True:
+        entries, token = native_page(fs, path, page_size, token)
+        yield entries
+        if not token:
+            return
+
+
+def stream_listing(
+    fs, list_path: str, full_path: str, cache_key, display_path: str
+) -> Iterator[str]:
+    """
+    NDJSON lines of a directory listing, one item per line.
+
+    Served from the directory index when cached; otherwise read page by page
+    (natively where supported) and indexed on the way if it fits the cache.
+    Errors after the response started are sent as an ``{"error": ...}`` line.
+    """
+    try:
+        items = directory_indexes.get(cache_key)
+        if items is not None:
+            for item in items:
+                yield json.dumps(item, default=str) + "\n"
+            return
+        if supports_native_paging(fs):
+            pages = native_pages(fs, list_path, STREAM_PAGE_SIZE)
+        else:
+            pages = iter([fs.ls(list_path, detail=True)])
+        collected: Optional[List[Dict[str, Any]]] = []
+        for entries in pages:
+            for entry in entries:
+                item = list_item(entry, full_path)
+                if item is None:
+                    continue
+                if collected is not None:
+                    collected.append(item)
+                    if len(collected) > directory_indexes.max_items:
+                        collected = None  # Too large to index
+                yield json.dumps(item, default=str) + "\n"
+        if collected is not None:
+            directory_indexes.put(cache_key, sort_items(collected))
+    except FileNotFoundError:
+        yield json.dumps({"error": f"Path not found: {display_path}"}) + "\n"
+    except Exception as e:
+        print(f"Failed to stream listing: {str(e)}")
+        yield json.dumps({"error": f"Failed to list files: {str(e)}"}) + "\n"
+
+
+class DirectoryIndexCache:
+    """Complete directory listings, LRU-bounded by their total number of items"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = STORAGE_LIST_CACHE_TTL_SECONDS,
+        max_items: int = STORAGE_LIST_CACHE_MAX_ITEMS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        # (bucket id, bucket version, options, directory) -> (items, built at)
+        self._entries: "OrderedDict[Tuple[str, str, str, str], Tuple[list, float]]" = (
+            OrderedDict()
+        )
+        self._total_items = 0
+        self._counters = {"hits": 0, "misses": 0, "invalidated": 0}
+
+    @staticmethod
+    def key(
+        bucket, storage_options: Optional[Dict[str, Any]], directory: str
+    ) -> Tuple[str, str, str, str]:
+        return (
+            bucket.id,
+            str(bucket.updated_at),
+            json.dumps(storage_options or {}, sort_keys=True, default=str),
+            directory,
+        )
+
+    def get(self, key: Tuple[str, str, str, str]) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return entry[0]
+            if entry is not None:
+                self._drop(key)
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, key: Tuple[str, str, str, str], items: List[Dict[str, Any]]):
+        if self.ttl_seconds <= 0 or len(items) > self.max_items:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (items, time.monotonic())
+            self._total_items += len(items)
+            while self._total_items > self.max_items:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, bucket_id: str, path: Optional[str] = None):
+        """
+        Drop cached listings a change at ``path`` made stale: the directory
+        itself, its ancestors and anything below it.
+
+        Args:
+            bucket_id: The bucket that changed
+            path: Request path that was written or deleted (whole bucket if None)
+        """
+        changed = normalize_dir(path) if path is not None else None
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] != bucket_id:
+                    continue
+                directory = key[3]
+                if changed is not None and not (
+                    directory == ""
+                    or directory == changed
+                    or changed.startswith(directory + "/")
+                    or directory.startswith(changed + "/")
+                ):
+                    continue
+                self._drop(key)
+                self._counters["invalidated"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "directories": len(self._entries),
+                "items": self._total_items,
+                **self._counters,
+            }
+
+    def _drop(self, key):
+        items, _ = self._entries.pop(key)
+        self._total_items -= len(items)
+
+
+def _is_gcs(fs) -> bool:
+    protocol = fs.protocol if isinstance(fs.protocol, (tuple, list)) else (fs.protocol,)
+    return hasattr(fs, "call") and any(p in ("gs", "gcs") for p in protocol)
+
+
+def _isoformat(value) -> Optional[str]:
+    if value is None:
+        return None
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+# Global instance
+directory_indexes = DirectoryIndexCache()
@@ -13,6 +13,7 @@ from models import (
 )
 from routes.auth.api_key_auth import get_user_or_api_key, require_scope, enforce_csrf
 from routes.auth.utils import get_current_user
+from routes.storage_buckets.browse import storage_filesystems
 
 router = APIRouter(
     prefix="/storage-buckets",
@@ -346,6 +347,8 @@ async def update_storage_bucket(
 
         db.commit()
         db.refresh(bucket)
+        # Pooled filesystems were built from the old config
+        storage_filesystems.invalidate(bucket_id)
 
         return StorageBucketResponse(
             id=bucket.id,
@@ -401,6 +404,7 @@ async def delete_storage_bucket(
         bucket.updated_at = datetime.utcnow()
 
         db.commit()
+        storage_filesystems.invalidate(bucket_id)
 
         return {"message": f"Storage bucket '{bucket.name}' deleted successfully"}
     except HTTPException:
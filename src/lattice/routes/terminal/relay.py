@@ -0,0 +1,228 @@
+"""
+Event-driven relay between a web terminal's PTY and its WebSocket.
+
+The terminal used to read the PTY master in the default thread pool, 1 KiB at
+a time, sleeping 50 ms whenever the non-blocking fd had nothing to read, and
+sent every chunk as a base64 text frame; keystrokes went through the thread
+pool too. The relay runs on the event loop instead:
+
+- the PTY master is watched with ``add_reader`` and read in chunks of up to
+  ``TERMINAL_READ_SIZE`` bytes, only when it is readable;
+- output is coalesced into frames of at most ``TERMINAL_MAX_FRAME_BYTES``,
+  sent ``TERMINAL_FLUSH_INTERVAL_SECONDS`` after the first unsent byte (or as
+  soon as a frame is full);
+- reading pauses while a full frame waits to be sent, so a slow client
+  applies backpressure to the PTY instead of growing buffers;
+- clients that ask for it (``?protocol=binary``) get binary frames,
+  optionally deflated with one stream-wide zlib context
+  (``&compress=deflate``); others keep the base64 text protocol;
+- keystrokes are written to the non-blocking fd directly, waiting for it to
+  drain only when the PTY can't take them.
+"""
+
+import asyncio
+import base64
+import os
+import zlib
+from typing import Awaitable, Callable, Mapping, Optional, Union
+
+from config import (
+    TERMINAL_COMPRESSION_LEVEL,
+    TERMINAL_FLUSH_INTERVAL_SECONDS,
+    TERMINAL_MAX_FRAME_BYTES,
+    TERMINAL_READ_SIZE,
+)
+
+TEXT_PROTOCOL = "base64"
+BINARY_PROTOCOL = "binary"
+
+
+class FrameCodec:
+    """Encodes PTY output for the wire protocol a client asked for"""
+
+    def __init__(self, protocol: str = TEXT_PROTOCOL, compress: bool = False):
+        self.binary = protocol == BINARY_PROTOCOL
+        # One context for the whole stream: each frame is sync-flushed, so the
+        # client can inflate frames as they arrive with a shared dictionary
+        self._compressor = (
+            zlib.compressobj(TERMINAL_COMPRESSION_LEVEL)
+            if compress and self.binary
+            else None
+        )
+
+    @property
+    def compressed(self) -> bool:
+        return self._compressor is not None
+
+    @classmethod
+    def from_query(cls, query_params: Mapping[str, str]) -> "FrameCodec":
+        """Codec for a WebSocket's ``protocol`` and ``compress`` query params."""
+        return cls(
+            protocol=query_params.get("protocol") or TEXT_PROTOCOL,
+            compress=query_params.get("compress") == "deflate",
+        )
+
+    def encode(self, data: bytes) -> Union[bytes, str]:
+        if not self.binary:
+            return base64.b64encode(data).decode("ascii")
+        if self._compressor is not None:
+            return self._compressor.compress(data) + self._compressor.flush(
+                zlib.Z_SYNC_FLUSH
+            )
+        return data
+
+    async def send(self, websocket, data: bytes):
+        """Send a chunk of PTY output as one WebSocket message."""
+        frame = self.encode(data)
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+
+
+def decode_input(message: Mapping) -> Optional[bytes]:
+    """Keystrokes from a ``websocket.receive()`` message (binary or base64 text)."""
+    if message.get("bytes") is not None:
+        return message["bytes"]
+    if message.get("text") is not None:
+        return base64.b64decode(message["text"])
+    return None
+
+
+class PtyRelay:
+    """Reads a PTY master on the event loop and hands its output out in frames"""
+
+    def __init__(
+        self,
+        master_fd: int,
+        send: Callable[[bytes], Awaitable[None]],
+        read_size: int = TERMINAL_READ_SIZE,
+        max_frame_bytes: int = TERMINAL_MAX_FRAME_BYTES,
+        flush_interval: float = TERMINAL_FLUSH_INTERVAL_SECONDS,
+    ):
+        self.master_fd = master_fd
+        self.send = send
+        self.read_size = read_size
+        self.max_frame_bytes = max_frame_bytes
+        self.flush_interval = flush_interval
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._buffer = bytearray()
+        self._reading = False
+        self._eof = False
+        self._closed = False
+        self._flush = asyncio.Event()
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        # Keystrokes the PTY could not take yet
+        self._pending_input = bytearray()
+        self._drained = asyncio.Event()
+        self._drained.set()
+
+    async def run(self):
+        """Relay PTY output to ``send`` until the PTY closes or ``close()`` is called."""
+        self._loop = asyncio.get_running_loop()
+        os.set_blocking(self.master_fd, False)
+        self._resume_reading()
+        try:
+            while True:
+                await self._flush.wait()
+                self._flush.clear()
+                self._cancel_flush_timer()
+                if self._closed:
+                    break
+                if not self._buffer:
+                    if self._eof:
+                        break
+                    continue
+                frame = bytes(self._buffer[: self.max_frame_bytes])
+                del self._buffer[: self.max_frame_bytes]
+                if not self._eof:
+                    self._resume_reading()
+                await self.send(frame)
+                self.frames_sent += 1
+                self.bytes_sent += len(frame)
+                if self._buffer or self._eof:
+                    # Output that arrived while sending has already waited
+                    self._flush.set()
+        finally:
+            self._pause_reading()
+            self._cancel_flush_timer()
+            if self._pending_input:
+                self._loop.remove_writer(self.master_fd)
+                self._pending_input.clear()
+            self._drained.set()
+
+    def close(self):
+        """Stop relaying (the PTY fd is left to its owner)."""
+        self._closed = True
+        self._flush.set()
+
+    async def write(self, data: bytes):
+        """Write keystrokes to the PTY, waiting only if it can't take them."""
+        if self._pending_input:
+            self._pending_input.extend(data)
+        else:
+            try:
+                written = os.write(self.master_fd, data)
+            except BlockingIOError:
+                written = 0
+            if written < len(data):
+                self._pending_input.extend(memoryview(data)[written:])
+                self._drained.clear()
+                asyncio.get_running_loop().add_writer(
+                    self.master_fd, self._on_writable
+                )
+        await self._drained.wait()
+
+    def _on_writable(self):
+        try:
+            written = os.write(self.master_fd, self._pending_input)
+        except BlockingIOError:
+            return
+        except OSError:
+            # PTY gone; the reader sees the same and ends the relay
+            written = len(self._pending_input)
+        del self._pending_input[:written]
+        if not self._pending_input:
+            asyncio.get_running_loop().remove_writer(self.master_fd)
+            self._drained.set()
+
+    def _on_readable(self):
+        try:
+            data = os.read(self.master_fd, self.read_size)
+        except BlockingIOError:
+            return
+        except OSError:
+            # EIO once the process on the other side has exited
+            data = b""
+        if not data:
+            self._eof = True
+            self._pause_reading()
+            self._flush.set()
+            return
+        if not self._buffer and self._flush_timer is None and self.flush_interval > 0:
+            self._flush_timer = self._loop.call_later(
+                self.flush_interval, self._flush.set
+            )
+        self._buffer.extend(data)
+        full = len(self._buffer) >= self.max_frame_bytes
+        if full:
+            self._pause_reading()
+        if full or self.flush_interval <= 0:
+            self._flush.set()
+
+    def _resume_reading(self):
+        if not self._reading and not self._closed:
+            self._loop.add_reader(self.master_fd, self._on_readable)
+            self._reading = True
+
+    def _pause_reading(self):
+        if self._reading:
+            self._loop.remove_reader(self.master_fd)
+            self._reading = False
+
+    def _cancel_flush_timer(self):
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
@@ -9,32 +9,27 @@ from fastapi import (
 )
 from fastapi.responses import HTMLResponse
 import asyncio
-import base64
-import os
-import uuid
+from typing import Optional
 from werkzeug.utils import secure_filename
 from routes.auth.api_key_auth import get_user_or_api_key
 from routes.auth.utils import (
     get_user_from_sealed_session,
 )
+from config import TERMINAL_COMPRESS_OUTPUT
+from routes.terminal.relay import FrameCodec, decode_input
+from routes.terminal.sessions import terminal_sessions
 from utils.cluster_utils import get_cluster_platform_info
 from utils.cluster_resolver import handle_cluster_name_param
-import pty
-
 
 router = APIRouter(include_in_schema=False)  # Hide all routes in this router from docs
 
-# Store active connections
-active_sessions = {}
-active_sessions_lock = asyncio.Lock()
-SESSION_TTL_SECONDS = 30 * 60
-
 
 @router.get("/terminal", response_class=HTMLResponse)
 async def terminal_connect(
     cluster_name: str,
     request: Request,
     response: Response,
+    session_id: Optional[str] = None,
     user: dict = Depends(get_user_or_api_key),
 ):
     # Get user info from request
@@ -78,46 +73,19 @@ async def terminal_connect(
     # sanitize the actual cluster name:
     actual_cluster_name = secure_filename(actual_cluster_name)
 
-    # Generate a unique session ID
-    session_id = str(uuid.uuid4())
-
-    # Store connection parameters (with TTL) and perform cleanup under lock
-    now = asyncio.get_event_loop().time()
-    async with active_sessions_lock:
-        # TTL cleanup
-        try:
-            expired = [
-                sid
-                for sid, data in active_sessions.items()
-                if (now - data.get("created_at", now)) > SESSION_TTL_SECONDS
-            ]
-            for sid in expired:
-                active_sessions.pop(sid, None)
-        except Exception:
-            pass
-
-        active_sessions[session_id] = {
-            "params": {"cluster_name": actual_cluster_name},
-            "connection": None,
-            "user_id": user_id,
-            "organization_id": org_id,
-            "created_at": now,
-        }
-
-        # Bound size to prevent unbounded growth
-        try:
-            if len(active_sessions) > 1000:
-                oldest_key = next(iter(active_sessions))
-                if oldest_key != session_id:
-                    active_sessions.pop(oldest_key, None)
-        except Exception:
-            pass
+    # Reattach to the caller's live session on this cluster, or issue a new one
+    session = terminal_sessions.find(session_id, actual_cluster_name, user_id, org_id)
+    if session is None:
+        session = terminal_sessions.create(actual_cluster_name, user_id, org_id)
 
     # Return terminal.html but replace placeholders with actual values
     with open("src/lattice/routes/terminal/terminal.html", "r") as f:
         html_content = f.read()
-        html_content = html_content.replace("{{ session_id }}", session_id)
+        html_content = html_content.replace("{{ session_id }}", session.session_id)
         html_content = html_content.replace("{{ cluster_name }}", actual_cluster_name)
+        html_content = html_content.replace(
+            "{{ compress }}", "true" if TERMINAL_COMPRESS_OUTPUT else "false"
+        )
     return HTMLResponse(content=html_content, status_code=200)
 
 
@@ -162,183 +130,68 @@ async def terminal_websocket(
     await websocket.accept()
 
     # Validate session ID
-    if session_id not in active_sessions:
+    session = terminal_sessions.get(session_id)
+    if session is None or session.ended:
         await websocket.close(code=1008, reason="Invalid session")
         print(f"WebSocket closed: Invalid session ID {session_id}")
         return
 
-    session_data = active_sessions[session_id]
     # TTL check
-    try:
-        now = asyncio.get_event_loop().time()
-        if (now - session_data.get("created_at", now)) > SESSION_TTL_SECONDS:
-            await websocket.close(code=1008, reason="Session expired")
-            async with active_sessions_lock:
-                active_sessions.pop(session_id, None)
-            return
-    except Exception as e:
-        print(f"Error during TTL check: {str(e)}")
-        pass
-    params = session_data["params"]
+    if session.expires_in(asyncio.get_running_loop().time()) <= 0:
+        await websocket.close(code=1008, reason="Session expired")
+        await session.close(1008, "Session expired")
+        return
 
     # Enforce that the websocket user matches the session owner
-    if session_data.get("user_id") != user.get("id") or session_data.get(
+    if session.user_id != user.get("id") or session.organization_id != user.get(
         "organization_id"
-    ) != user.get("organization_id"):
+    ):
         print("WebSocket closed: User mismatch.")
         await websocket.close(code=1008, reason="Unauthorized for session")
         return
 
-    ssh_cmd = ["ssh", params["cluster_name"]]
-
-    print(
-        f"Starting SSH connection to {params['cluster_name']} for session {session_id}"
-    )
-
-    # Schedule forced disconnect after TTL from session creation
-    ttl_task = None
-    try:
-        created_at = float(
-            session_data.get("created_at", asyncio.get_event_loop().time())
+    if not session.started:
+        print(
+            f"Starting SSH connection to {session.cluster_name} for session {session_id}"
         )
-        now = asyncio.get_event_loop().time()
-        remain = max(0.0, (SESSION_TTL_SECONDS - (now - created_at)))
-
-        async def _ttl_watchdog(delay: float):
-            try:
-                await asyncio.sleep(delay)
-                try:
-                    await websocket.close(code=1008, reason="Session expired")
-                except Exception:
-                    pass
-            except Exception:
-                pass
-
-        ttl_task = asyncio.create_task(_ttl_watchdog(remain))
-    except Exception:
-        ttl_task = None
-
-    try:
-        # Allocate a PTY for the SSH process
-        try:
-            master_fd, slave_fd = pty.openpty()
-            os.set_blocking(master_fd, False)  # Make PTY non-blocking
-        except Exception as e:
-            error_msg = f"Failed to create PTY: {str(e)}"
-            print(f"WebSocket error: {error_msg}")
-            await websocket.send_text(error_msg)
-            await websocket.close(code=1011, reason="PTY creation failed")
-            return
-
         try:
-            process = await asyncio.create_subprocess_exec(
-                *ssh_cmd,
-                stdin=slave_fd,
-                stdout=slave_fd,
-                stderr=slave_fd,
-                close_fds=True,
-            )
+            # Opens a channel on the user's pooled connection to the cluster
+            await session.start()
         except Exception as e:
-            error_msg = f"Failed to start SSH process: {str(e)}"
+            error_msg = str(e)
             print(f"WebSocket error: {error_msg}")
-            try:
-                os.close(master_fd)
-                os.close(slave_fd)
-            except Exception:
-                pass
             await websocket.send_text(error_msg)
             await websocket.close(code=1011, reason="SSH process failed")
+            await session.close()
             return
 
-        os.close(slave_fd)  # We don't need the slave fd in this process
-        session_data["process"] = process
-        session_data["master_fd"] = master_fd
+    # Replay buffered output from the offset the client last saw, then follow
+    try:
+        offset = int(websocket.query_params.get("offset") or 0)
+    except ValueError:
+        offset = 0
+    codec = FrameCodec.from_query(websocket.query_params)
+    sender_task = asyncio.create_task(session.serve(websocket, codec, offset))
 
-        async def reader():
+    try:
+        while True:
+            message = await websocket.receive()
+            if message.get("type") == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
             try:
-                loop = asyncio.get_event_loop()
-                while True:
-                    try:
-                        data = await loop.run_in_executor(
-                            None, os.read, master_fd, 1024
-                        )
-                        if not data:
-                            await asyncio.sleep(0.05)
-                            continue
-                        await websocket.send_text(
-                            base64.b64encode(data).decode("utf-8")
-                        )
-                    except BlockingIOError:
-                        await asyncio.sleep(0.05)
-                    except OSError:
-                        # FD closed or process exited
-                        break
-            except asyncio.CancelledError:
-                # Task was cancelled, exit cleanly
-                pass
+                data = decode_input(message)
+                if data:
+                    # Write to the PTY master fd
+                    await session.write(data)
             except Exception as e:
-                error_message = f"Error in reader: {str(e)}"
+                error_message = f"Failed to process command: {str(e)}"
                 print(f"WebSocket error: {error_message}")
                 try:
                     await websocket.send_text(error_message)
                 except Exception:
                     pass
-
-        reader_task = asyncio.create_task(reader())
-
-        try:
-            while True:
-                data = await websocket.receive_text()
-                try:
-                    decoded_data = base64.b64decode(data)
-                    # Write to the PTY master fd
-                    loop = asyncio.get_event_loop()
-                    await loop.run_in_executor(None, os.write, master_fd, decoded_data)
-                except Exception as e:
-                    error_message = f"Failed to process command: {str(e)}"
-                    print(f"WebSocket error: {error_message}")
-                    try:
-                        await websocket.send_text(error_message)
-                    except Exception:
-                        pass
-        except WebSocketDisconnect:
-            print(f"WebSocket disconnected: Session ID {session_id}")
-        except Exception as e:
-            error_message = f"Connection error: {str(e)}"
-            print(f"WebSocket error: {error_message}")
-            try:
-                await websocket.send_text(error_message)
-            except Exception:
-                pass
-            try:
-                await websocket.close(code=1011, reason="Connection error")
-            except Exception as close_error:
-                print(f"Error closing WebSocket: {str(close_error)}")
-        finally:
-            # Cleanup: cancel reader, close PTY, terminate process, remove session
-            if ttl_task:
-                try:
-                    ttl_task.cancel()
-                except Exception:
-                    pass
-            if reader_task:
-                reader_task.cancel()
-                # Close PTY and terminate process before awaiting reader_task
-                try:
-                    os.close(master_fd)
-                except Exception:
-                    pass
-                try:
-                    process.terminate()
-                    await process.wait()
-                except Exception:
-                    pass
-                try:
-                    await asyncio.wait_for(reader_task, timeout=2)
-                except Exception:
-                    pass
-            async with active_sessions_lock:
-                active_sessions.pop(session_id, None)
+    except WebSocketDisconnect:
+        print(f"WebSocket disconnected: Session ID {session_id}")
     except Exception as e:
         error_message = f"Connection error: {str(e)}"
         print(f"WebSocket error: {error_message}")
@@ -350,5 +203,11 @@ async def terminal_websocket(
             await websocket.close(code=1011, reason="Connection error")
         except Exception as close_error:
             print(f"Error closing WebSocket: {str(close_error)}")
-        async with active_sessions_lock:
-            active_sessions.pop(session_id, None)
+    finally:
+        # Only this viewer leaves; the session keeps its shell for the grace
+        # period so the page can reattach
+        sender_task.cancel()
+        try:
+            await sender_task
+        except BaseException:
+            pass
@@ -0,0 +1,397 @@
+"""
+Web terminal sessions that outlive their WebSocket.
+
+Every terminal WebSocket used to start its own ``ssh`` process and PTY and
+kill them on disconnect, so a page reload or a network blip cost a new SSH
+handshake and lost the shell with all its output. A session now owns one
+upstream SSH process (a channel on the user's pooled connection to the
+cluster, see ``utils.ssh_pool``) and:
+
+- keeps the last ``TERMINAL_SCROLLBACK_BYTES`` of output in a ring buffer
+  addressed by absolute stream offsets;
+- fans output out to any number of viewers (WebSockets of the same user),
+  each reading the ring buffer at its own pace; a viewer that falls behind
+  the buffer skips ahead instead of stalling the others;
+- lets a viewer attach at an offset, replaying what is still buffered from
+  there (a reconnecting page passes the last offset it received);
+- keeps running for ``TERMINAL_SESSION_GRACE_SECONDS`` after its last viewer
+  left, and ends at the latest ``SESSION_TTL_SECONDS`` after it was issued.
+"""
+
+import asyncio
+import json
+import os
+import pty
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    SSH_POOL_CONNECT_TIMEOUT_SECONDS,
+    SSH_POOL_ENABLED,
+    SSH_POOL_HEALTH_CHECK_SECONDS,
+    SSH_POOL_IDLE_SECONDS,
+    SSH_POOL_MAX_CONNECTIONS_PER_CLUSTER,
+    SSH_POOL_MAX_SESSIONS,
+    TERMINAL_MAX_FRAME_BYTES,
+    TERMINAL_SCROLLBACK_BYTES,
+    TERMINAL_SESSION_GRACE_SECONDS,
+)
+from routes.terminal.relay import FrameCodec, PtyRelay
+from utils.ssh_pool import SSHConnectionPool, SSHLease
+
+SESSION_TTL_SECONDS = 30 * 60
+# Bound on issued sessions, to prevent unbounded growth
+MAX_SESSIONS = 1000
+
+
+class ScrollbackBuffer:
+    """Last ``capacity`` bytes of a byte stream, addressed by stream offset"""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._data = bytearray()
+        # Index in _data of the oldest retained byte; the dropped prefix is
+        # only compacted once it is as large as the buffer itself
+        self._head = 0
+        self.end = 0
+
+    @property
+    def start(self) -> int:
+        """Offset of the oldest retained byte."""
+        return self.end - (len(self._data) - self._head)
+
+    def append(self, data: bytes):
+        self._data += data
+        self.end += len(data)
+        excess = len(self._data) - self._head - self.capacity
+        if excess > 0:
+            self._head += excess
+        if self._head >= self.capacity:
+            del self._data[: self._head]
+            self._head = 0
+
+    def read(self, offset: int, limit: int) -> Tuple[int, bytes]:
+        """
+        Up to ``limit`` bytes from ``offset`` on.
+
+        Returns:
+            (offset, data): where the data starts, which is later than the
+            requested offset if that part is no longer retained
+        """
+        offset = max(offset, self.start)
+        if offset >= self.end:
+            return self.end, b""
+        index = self._head + (offset - self.start)
+        return offset, bytes(self._data[index : index + limit])
+
+
+class _Viewer:
+    def __init__(self, websocket, codec: FrameCodec, cursor: int):
+        self.websocket = websocket
+        self.codec = codec
+        self.cursor = cursor
+        self.wakeup = asyncio.Event()
+
+
+class TerminalSession:
+    """One upstream SSH process shared by the session's viewers"""
+
+    def __init__(
+        self,
+        manager: "TerminalSessionManager",
+        session_id: str,
+        cluster_name: str,
+        user_id: str,
+        organization_id: str,
+        created_at: float,
+    ):
+        self.session_id = session_id
+        self.cluster_name = cluster_name
+        self.user_id = user_id
+        self.organization_id = organization_id
+        self.created_at = created_at
+        self.scrollback = ScrollbackBuffer(manager.scrollback_bytes)
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.ended = False
+        self._manager = manager
+        self._master_fd: Optional[int] = None
+        self._relay: Optional[PtyRelay] = None
+        self._relay_task: Optional[asyncio.Task] = None
+        self._lease: Optional[SSHLease] = None
+        self._start_lock = asyncio.Lock()
+        self._viewers: List[_Viewer] = []
+        self._grace_timer: Optional[asyncio.TimerHandle] = None
+        self._ttl_timer: Optional[asyncio.TimerHandle] = None
+        self._close_code = 1000
+        self._close_reason = "Session ended"
+
+    @property
+    def started(self) -> bool:
+        return self._relay is not None
+
+    @property
+    def viewer_count(self) -> int:
+        return len(self._viewers)
+
+    def expires_in(self, now: float) -> float:
+        return self.created_at + self._manager.ttl_seconds - now
+
+    async def start(self, ssh_cmd: Optional[List[str]] = None):
+        """
+        Start the upstream SSH process, unless it already runs.
+
+        Args:
+            ssh_cmd: Command to run; by default ``ssh`` over a pooled
+                connection to the cluster
+        """
+        async with self._start_lock:
+            if self.started or self.ended:
+                return
+            if ssh_cmd is None:
+                # Opening a new pooled connection blocks for the handshake
+                self._lease = await asyncio.get_running_loop().run_in_executor(
+                    None, self._manager.pool.acquire, self.cluster_name, self.user_id
+                )
+                ssh_cmd = self._lease.command
+            try:
+                master_fd, slave_fd = pty.openpty()
+            except Exception as e:
+                self._release_lease()
+                raise RuntimeError(f"Failed to create PTY: {str(e)}") from e
+            try:
+                self.process = await asyncio.create_subprocess_exec(
+                    *ssh_cmd,
+                    stdin=slave_fd,
+                    stdout=slave_fd,
+                    stderr=slave_fd,
+                    close_fds=True,
+                )
+            except Exception as e:
+                os.close(master_fd)
+                self._release_lease()
+                raise RuntimeError(f"Failed to start SSH process: {str(e)}") from e
+            finally:
+                # We don't need the slave fd in this process
+                os.close(slave_fd)
+            loop = asyncio.get_running_loop()
+            self._master_fd = master_fd
+            self._relay = PtyRelay(master_fd, self._on_output)
+            self._relay_task = loop.create_task(self._run_relay())
+            self._ttl_timer = loop.call_later(
+                max(0.0, self.expires_in(loop.time())), self._expire
+            )
+
+    async def write(self, data: bytes):
+        """Send keystrokes to the shell."""
+        if self._relay is not None and not self.ended:
+            await self._relay.write(data)
+
+    async def serve(self, websocket, codec: FrameCodec, offset: int = 0):
+        """
+        Stream output to a viewer until the session ends or the viewer's
+        connection fails.
+
+        Args:
+            websocket: The viewer's WebSocket
+            codec: Wire protocol the viewer asked for
+            offset: Stream offset to replay from (what is still buffered)
+        """
+        cursor = min(max(offset, self.scrollback.start), self.scrollback.end)
+        viewer = _Viewer(websocket, codec, cursor)
+        self._attach(viewer)
+        try:
+            await self._send_offset(viewer, cursor)
+            while True:
+                viewer.wakeup.clear()
+                start, data = self.scrollback.read(
+                    viewer.cursor, TERMINAL_MAX_FRAME_BYTES
+                )
+                if data:
+                    if start != viewer.cursor:
+                        # Fell behind the buffer; output in between is lost
+                        await self._send_offset(viewer, start)
+                    viewer.cursor = start + len(data)
+                    await codec.send(websocket, data)
+                    continue
+                if self.ended:
+                    await websocket.close(
+                        code=self._close_code, reason=self._close_reason
+                    )
+                    return
+                await viewer.wakeup.wait()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Terminal session {self.session_id}: viewer failed: {str(e)}")
+        finally:
+            self._detach(viewer)
+
+    async def close(self, code: int = 1000, reason: str = "Session ended"):
+        """End the session: stop the SSH process and disconnect all viewers."""
+        if self.ended:
+            return
+        self.ended = True
+        self._close_code, self._close_reason = code, reason
+        for timer in (self._grace_timer, self._ttl_timer):
+            if timer is not None:
+                timer.cancel()
+        self._manager._forget(self)
+        if self._relay is not None:
+            self._relay.close()
+            if self._relay_task is not asyncio.current_task():
+                try:
+                    await asyncio.wait_for(self._relay_task, timeout=2)
+                except Exception:
+                    pass
+        if self._master_fd is not None:
+            try:
+                os.close(self._master_fd)
+            except Exception:
+                pass
+        if self.process is not None:
+            try:
+                self.process.terminate()
+            except Exception:
+                pass
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=5)
+            except Exception:
+                pass
+        self._release_lease()
+        for viewer in list(self._viewers):
+            viewer.wakeup.set()
+
+    async def _send_offset(self, viewer: _Viewer, offset: int):
+        # Binary clients track the offset to resume from; the base64 text
+        # protocol has no control messages
+        if viewer.codec.binary:
+            await viewer.websocket.send_text(
+                json.dumps({"type": "offset", "offset": offset})
+            )
+
+    async def _on_output(self, data: bytes):
+        self.scrollback.append(data)
+        for viewer in self._viewers:
+            viewer.wakeup.set()
+
+    async def _run_relay(self):
+        try:
+            await self._relay.run()
+        except Exception as e:
+            print(f"Terminal session {self.session_id}: relay failed: {str(e)}")
+        await self.close()
+
+    def _release_lease(self):
+        if self._lease is not None:
+            self._lease.release()
+            self._lease = None
+
+    def _attach(self, viewer: _Viewer):
+        self._viewers.append(viewer)
+        if self._grace_timer is not None:
+            self._grace_timer.cancel()
+            self._grace_timer = None
+
+    def _detach(self, viewer: _Viewer):
+        if viewer in self._viewers:
+            self._viewers.remove(viewer)
+        if self._viewers or self.ended:
+            return
+        # Keep the shell for a reload or reconnect
+        self._grace_timer = asyncio.get_running_loop().call_later(
+            self._manager.grace_seconds, self._manager._spawn_close, self
+        )
+
+    def _expire(self):
+        self._manager._spawn_close(self, 1008, "Session expired")
+
+
+class TerminalSessionManager:
+    """Registry of issued terminal sessions"""
+
+    def __init__(
+        self,
+        grace_seconds: float = TERMINAL_SESSION_GRACE_SECONDS,
+        scrollback_bytes: int = TERMINAL_SCROLLBACK_BYTES,
+        ttl_seconds: float = SESSION_TTL_SECONDS,
+        max_sessions: int = MAX_SESSIONS,
+        pool: Optional[SSHConnectionPool] = None,
+    ):
+        self.grace_seconds = grace_seconds
+        self.scrollback_bytes = scrollback_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.pool = pool or ssh_connection_pool
+        self._sessions: Dict[str, TerminalSession] = {}
+        self._closing = set()
+
+    def create(
+        self, cluster_name: str, user_id: str, organization_id: str
+    ) -> TerminalSession:
+        """Issue a session; its SSH process starts when a viewer connects."""
+        now = asyncio.get_running_loop().time()
+        # Sessions never connected to expire here; started ones end themselves
+        for session in list(self._sessions.values()):
+            if not session.started and session.expires_in(now) <= 0:
+                self._sessions.pop(session.session_id, None)
+        session = TerminalSession(
+            self, str(uuid.uuid4()), cluster_name, user_id, organization_id, now
+        )
+        self._sessions[session.session_id] = session
+        if len(self._sessions) > self.max_sessions:
+            oldest = next(iter(self._sessions.values()))
+            self._sessions.pop(oldest.session_id, None)
+            self._spawn_close(oldest)
+        return session
+
+    def get(self, session_id: str) -> Optional[TerminalSession]:
+        return self._sessions.get(session_id)
+
+    def find(
+        self,
+        session_id: Optional[str],
+        cluster_name: str,
+        user_id: str,
+        organization_id: str,
+    ) -> Optional[TerminalSession]:
+        """A live session of this user on this cluster, to reattach to."""
+        session = self._sessions.get(session_id) if session_id else None
+        if (
+            session is None
+            or session.ended
+            or session.cluster_name != cluster_name
+            or session.user_id != user_id
+            or session.organization_id != organization_id
+            or session.expires_in(asyncio.get_running_loop().time()) <= 0
+        ):
+            return None
+        return session
+
+    async def stop(self):
+        """End all sessions (used on application shutdown)."""
+        sessions, self._sessions = list(self._sessions.values()), {}
+        await asyncio.gather(
+            *(session.close(1001, "Server shutting down") for session in sessions),
+            return_exceptions=True,
+        )
+
+    def _spawn_close(self, session: TerminalSession, code=1000, reason="Session ended"):
+        task = asyncio.get_running_loop().create_task(session.close(code, reason))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _forget(self, session: TerminalSession):
+        if self._sessions.get(session.session_id) is session:
+            del self._sessions[session.session_id]
+
+
+# Global instances
+ssh_connection_pool = SSHConnectionPool(
+    enabled=SSH_POOL_ENABLED,
+    idle_seconds=SSH_POOL_IDLE_SECONDS,
+    health_check_seconds=SSH_POOL_HEALTH_CHECK_SECONDS,
+    max_sessions=SSH_POOL_MAX_SESSIONS,
+    max_connections_per_cluster=SSH_POOL_MAX_CONNECTIONS_PER_CLUSTER,
+    connect_timeout_seconds=SSH_POOL_CONNECT_TIMEOUT_SECONDS,
+)
+terminal_sessions = TerminalSessionManager()
@@ -0,0 +1,232 @@
+"""
+In-process cache of resolved API key identities.
+
+Resolving an API key used to cost a database lookup, a WorkOS ``get_user``
+round trip and a commit (for ``last_used_at``) on every authenticated request.
+This module keeps the resolved identity per key hash for a short TTL and
+buffers ``last_used_at`` updates so they are written in periodic batches:
+
+- entries are keyed by key hash and remember the key's own expiry, so an
+  expired key stops authenticating even while its entry is still cached;
+- ``APIKeyService`` calls ``invalidate`` after updating, deleting or
+  regenerating a key, so revocations take effect immediately;
+- last-use timestamps are collected in memory and flushed in one transaction
+  by a background thread (and on shutdown).
+"""
+
+import copy
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, update
+
+from config import (
+    API_KEY_CACHE_TTL_SECONDS,
+    API_KEY_LAST_USED_FLUSH_INTERVAL_SECONDS,
+    SessionLocal,
+)
+from db.db_models import APIKey
+
+
+class _Entry:
+    def __init__(self, identity: dict, key_expires_at: Optional[datetime], cached_at: float):
+        self.identity = identity
+        self.key_expires_at = key_expires_at
+        self.cached_at = cached_at
+
+
+class APIKeyIdentityCache:
+    """TTL cache of API key identities plus a buffered ``last_used_at`` writer"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = API_KEY_CACHE_TTL_SECONDS,
+        flush_interval_seconds: float = API_KEY_LAST_USED_FLUSH_INTERVAL_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        # key id -> key hash, so service-layer invalidation can work by id
+        self._hash_by_key_id: Dict[str, str] = {}
+        # Bumped on every invalidation so a lookup that raced with it is not cached
+        self._generation = 0
+        # key id -> most recent use not yet written to the database
+        self._pending_last_used: Dict[str, datetime] = {}
+
+        self._flusher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def generation(self) -> int:
+        """Current invalidation generation; pass it back to ``put``."""
+        with self._lock:
+            return self._generation
+
+    def get(self, key_hash: str) -> Optional[dict]:
+        """
+        Get the cached identity for a key hash.
+
+        Args:
+            key_hash: Hash of the presented API key
+
+        Returns:
+            A copy of the identity dict, or None on a miss or expired entry
+        """
+        if self.ttl_seconds <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key_hash)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.cached_at > self.ttl_seconds or (
+                entry.key_expires_at is not None
+                and datetime.utcnow() > entry.key_expires_at
+            ):
+                self._drop(key_hash)
+                return None
+            return copy.deepcopy(entry.identity)
+
+    def put(
+        self,
+        key_hash: str,
+        identity: dict,
+        key_expires_at: Optional[datetime],
+        generation: int,
+    ):
+        """
+        Cache a resolved identity.
+
+        Args:
+            key_hash: Hash of the presented API key
+            identity: Resolved user dict (must include ``api_key_id``)
+            key_expires_at: Expiry of the API key itself, if any
+            generation: Value of ``generation()`` taken before the DB lookup
+        """
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            # The key may have been changed while we were resolving it
+            if generation != self._generation:
+                return
+            self._entries[key_hash] = _Entry(
+                copy.deepcopy(identity), key_expires_at, time.monotonic()
+            )
+            self._hash_by_key_id[identity["api_key_id"]] = key_hash
+
+    def invalidate(self, key_id: Optional[str] = None):
+        """
+        Drop cached identities so the next request re-resolves them.
+
+        Args:
+            key_id: API key id to drop (everything if None)
+        """
+        with self._lock:
+            self._generation += 1
+            if key_id is None:
+                self._entries.clear()
+                self._hash_by_key_id.clear()
+                self._pending_last_used.clear()
+                return
+            key_hash = self._hash_by_key_id.pop(key_id, None)
+            if key_hash is not None:
+                self._entries.pop(key_hash, None)
+            # A regenerated key resets last_used_at; don't write an old use back
+            self._pending_last_used.pop(key_id, None)
+
+    def record_use(self, key_id: str, used_at: Optional[datetime] = None):
+        """
+        Buffer a ``last_used_at`` update for the next batched flush.
+
+        Args:
+            key_id: API key id that was used
+            used_at: Time of use (defaults to now, UTC)
+        """
+        used_at = used_at or datetime.utcnow()
+        with self._lock:
+            previous = self._pending_last_used.get(key_id)
+            if previous is None or used_at > previous:
+                self._pending_last_used[key_id] = used_at
+        self._ensure_flusher()
+
+    def flush(self) -> int:
+        """
+        Write buffered ``last_used_at`` values in a single transaction.
+
+        Returns:
+            Number of keys flushed (including any deleted meanwhile)
+        """
+        with self._lock:
+            pending = self._pending_last_used
+            self._pending_last_used = {}
+        if not pending:
+            return 0
+
+        table = APIKey.__table__
+        db = SessionLocal()
+        try:
+            # A Core executemany: unlike ORM bulk updates it doesn't check
+            # row counts, so a key deleted since its use is simply skipped
+            db.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values(last_used_at=bindparam("b_last_used_at")),
+                [
+                    {"b_id": key_id, "b_last_used_at": used_at}
+                    for key_id, used_at in pending.items()
+                ],
+            )
+            db.commit()
+            return len(pending)
+        except Exception as e:
+            db.rollback()
+            print(f"Failed to flush API key last_used_at updates: {str(e)}")
+            # Put the values back unless a newer use has been recorded meanwhile
+            with self._lock:
+                for key_id, used_at in pending.items():
+                    self._pending_last_used.setdefault(key_id, used_at)
+            return 0
+        finally:
+            db.close()
+
+    def stop(self):
+        """Stop the background flusher and write any buffered updates."""
+        self._stop_event.set()
+        flusher = self._flusher
+        if flusher is not None:
+            flusher.join(timeout=5)
+        self._flusher = None
+        self.flush()
+
+    def _drop(self, key_hash: str):
+        entry = self._entries.pop(key_hash, None)
+        if entry is not None:
+            self._hash_by_key_id.pop(entry.identity["api_key_id"], None)
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        if self.flush_interval_seconds <= 0:
+            # Batching disabled: write through
+            self.flush()
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._stop_event.clear()
+            self._flusher = threading.Thread(
+                target=self._run_flusher,
+                name="api-key-last-used-flusher",
+                daemon=True,
+            )
+            self._flusher.start()
+
+    def _run_flusher(self):
+        while not self._stop_event.wait(self.flush_interval_seconds):
+            self.flush()
+
+
+# Global instance
+api_key_identity_cache = APIKeyIdentityCache()
@@ -4,6 +4,7 @@ from db.db_models import APIKey, validate_relationships_before_save, validate_re
 from datetime import datetime, timedelta
 from fastapi import HTTPException
 from config import SessionLocal
+from services.api_keys.identity_cache import api_key_identity_cache
 import json
 from typing import List, Optional
 
@@ -225,6 +226,7 @@ class APIKeyService:
                 api_key.scopes = json.dumps(normalized_scopes)
 
             db.commit()
+            api_key_identity_cache.invalidate(key_id)
             db.refresh(api_key)
 
             return api_key
@@ -255,6 +257,7 @@ class APIKeyService:
 
             db.delete(api_key)
             db.commit()
+            api_key_identity_cache.invalidate(key_id)
 
             return True
 
@@ -288,6 +291,7 @@ class APIKeyService:
             api_key.last_used_at = None  # Reset last used time
 
             db.commit()
+            api_key_identity_cache.invalidate(key_id)
             db.refresh(api_key)
 
             return new_api_key, api_key
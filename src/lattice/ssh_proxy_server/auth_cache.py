@@ -0,0 +1,319 @@
+"""
+In-process cache for the SSH proxy's authentication path.
+
+SSH clients usually offer several keys per connect, and each attempt used to
+open its own sessions to fingerprint-match the key, commit a ``last_used_at``
+write, load the user's clusters and resolve the target cluster name. This
+cache keeps:
+
+- fingerprint -> key owner (misses included, since most offered keys are
+  unknown);
+- user -> clusters they may reach (id, cluster_name, display_name, org);
+- ``last_used_at`` updates in memory, written in one batch periodically.
+
+The proxy runs separately from the API, so changes made through
+``/ssh-config/ssh-keys`` (or new clusters) are picked up by reading each
+table's ``ChangeCounter``, which every insert, update and delete bumps in
+its own transaction, at most once per ``validate_interval_seconds``. A
+changed counter drops the matching cache right away; ``ttl_seconds`` only
+bounds how long an entry can live without being re-read.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam
+from sqlalchemy.orm import Session
+
+from lattice.db.db_models import ChangeCounter, ClusterPlatform, SSHKey
+
+
+class _Entry:
+    def __init__(self, value, cached_at: float):
+        self.value = value
+        self.cached_at = cached_at
+
+
+class SSHAuthCache:
+    """SSH key and cluster ACL cache with batched ``last_used_at`` writes"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl_seconds: float = 300,
+        validate_interval_seconds: float = 1,
+        flush_interval_seconds: float = 30,
+    ):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self.validate_interval_seconds = validate_interval_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._lock = threading.Lock()
+        # fingerprint -> (user_id, key_name, organization_id, key_id) or error message
+        self._keys: Dict[str, _Entry] = {}
+        # user_id -> list of cluster dicts
+        self._clusters: Dict[str, _Entry] = {}
+        self._key_version = None
+        self._cluster_version = None
+        self._validated_at: Optional[float] = None
+        # SSH key id -> most recent use not yet written
+        self._pending_last_used: Dict[str, datetime] = {}
+
+        self._flusher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def lookup_user(self, public_key: str) -> Tuple[str, str, str]:
+        """
+        Look up the owner of an SSH public key.
+
+        Returns:
+            (user_id, key_name, organization_id)
+
+        Raises:
+            ValueError: If the key is unknown, inactive or ambiguous
+        """
+        fingerprint = SSHKey.generate_fingerprint(public_key)
+        self._validate()
+        entry = self._get(self._keys, fingerprint)
+        if entry is None:
+            entry = self._put(self._keys, fingerprint, self._load_key(fingerprint))
+        if isinstance(entry, str):
+            raise ValueError(entry)
+        user_id, key_name, organization_id, key_id = entry
+        self.record_use(key_id)
+        return user_id, key_name, organization_id
+
+    def get_user_permissions(self, user_id: str) -> List[dict]:
+        """
+        Get the clusters a user may reach through the proxy.
+
+        Returns:
+            List of dicts with id, cluster_name, display_name and organization_id
+        """
+        self._validate()
+        clusters = self._get(self._clusters, user_id)
+        if clusters is None:
+            clusters = self._put(self._clusters, user_id, self._load_clusters(user_id))
+        return [dict(c) for c in clusters]
+
+    def get_cluster_name(
+        self, display_name: str, user_id: str, organization_id: str
+    ) -> str:
+        """
+        Resolve a user's cluster display name to its actual cluster name.
+
+        Raises:
+            ValueError: If no cluster, or more than one, matches
+        """
+        matches = [
+            c
+            for c in self.get_user_permissions(user_id)
+            if c["display_name"] == display_name
+            and c["organization_id"] == organization_id
+        ]
+        if not matches:
+            raise ValueError(
+                f"No cluster found for display_name='{display_name}' and user_id='{user_id}'"
+            )
+        if len(matches) > 1:
+            raise ValueError(
+                f"Multiple clusters found for display_name='{display_name}' and user_id='{user_id}'"
+            )
+        return matches[0]["cluster_name"]
+
+    def invalidate(self):
+        """Drop every cached key and ACL entry."""
+        with self._lock:
+            self._keys.clear()
+            self._clusters.clear()
+
+    def record_use(self, key_id: str, used_at: Optional[datetime] = None):
+        """Buffer a ``last_used_at`` update for the next batched flush."""
+        used_at = used_at or datetime.utcnow()
+        with self._lock:
+            previous = self._pending_last_used.get(key_id)
+            if previous is None or used_at > previous:
+                self._pending_last_used[key_id] = used_at
+        self._ensure_flusher()
+
+    def flush(self) -> int:
+        """
+        Write buffered ``last_used_at`` values in one transaction.
+
+        Returns:
+            Number of keys written
+        """
+        with self._lock:
+            pending = self._pending_last_used
+            self._pending_last_used = {}
+        if not pending:
+            return 0
+
+        table = SSHKey.__table__
+        # A Core statement: skips the change counter (a usage update is not a
+        # key change) and keeps updated_at as is
+        stmt = (
+            table.update()
+            .where(table.c.id == bindparam("key_id"))
+            .values(last_used_at=bindparam("used_at"), updated_at=table.c.updated_at)
+        )
+        session = None
+        try:
+            session = self.session_factory()
+            session.execute(
+                stmt,
+                [{"key_id": k, "used_at": used_at} for k, used_at in pending.items()],
+            )
+            session.commit()
+            return len(pending)
+        except Exception as e:
+            if session:
+                session.rollback()
+            logging.error(f"Failed to flush SSH key last_used_at updates: {e}")
+            with self._lock:
+                for key_id, used_at in pending.items():
+                    self._pending_last_used.setdefault(key_id, used_at)
+            return 0
+        finally:
+            if session:
+                session.close()
+
+    def stop(self):
+        """Stop the background flusher and write any buffered updates."""
+        self._stop_event.set()
+        flusher = self._flusher
+        if flusher is not None:
+            flusher.join(timeout=5)
+        self._flusher = None
+        self.flush()
+
+    def _get(self, cache: Dict[str, _Entry], key: str):
+        with self._lock:
+            entry = cache.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.cached_at > self.ttl_seconds:
+                del cache[key]
+                return None
+            return entry.value
+
+    def _put(self, cache: Dict[str, _Entry], key: str, value):
+        with self._lock:
+            cache[key] = _Entry(value, time.monotonic())
+        return value
+
+    def _validate(self):
+        """Drop caches whose table changed since the last check."""
+        with self._lock:
+            if (
+                self._validated_at is not None
+                and time.monotonic() - self._validated_at < self.validate_interval_seconds
+            ):
+                return
+            # Claim this check; concurrent callers keep using the current data
+            self._validated_at = time.monotonic()
+
+        session = None
+        try:
+            session = self.session_factory()
+            versions = dict(
+                session.query(ChangeCounter.name, ChangeCounter.version).filter(
+                    ChangeCounter.name.in_(
+                        (SSHKey.__tablename__, ClusterPlatform.__tablename__)
+                    )
+                )
+            )
+        except Exception as e:
+            logging.error(f"Failed to validate SSH auth cache: {e}")
+            # Can't tell what changed; don't trust anything cached
+            self.invalidate()
+            with self._lock:
+                self._validated_at = None
+            return
+        finally:
+            if session:
+                session.close()
+
+        key_version = versions.get(SSHKey.__tablename__, 0)
+        cluster_version = versions.get(ClusterPlatform.__tablename__, 0)
+        with self._lock:
+            if key_version != self._key_version:
+                self._keys.clear()
+                self._key_version = key_version
+            if cluster_version != self._cluster_version:
+                self._clusters.clear()
+                self._cluster_version = cluster_version
+
+    def _load_key(self, fingerprint: str):
+        session = None
+        try:
+            session = self.session_factory()
+            # Enforce uniqueness: the same fingerprint should not belong to multiple users
+            matches = (
+                session.query(SSHKey)
+                .filter(SSHKey.fingerprint == fingerprint, SSHKey.is_active)
+                .all()
+            )
+            if not matches:
+                return "SSH key not found or inactive"
+            if len(matches) > 1:
+                return "SSH key fingerprint is not unique in database"
+
+            ssh_key = matches[0]
+            # Return raw attributes (some deployments store strings, not Enum-like objects)
+            user_id = getattr(ssh_key.user_id, "value", ssh_key.user_id)
+            key_name = getattr(ssh_key.name, "value", ssh_key.name)
+            organization_id = getattr(
+                ssh_key.organization_id, "value", ssh_key.organization_id
+            )
+            return str(user_id), str(key_name), str(organization_id), ssh_key.id
+        finally:
+            if session:
+                session.close()
+
+    def _load_clusters(self, user_id: str) -> List[dict]:
+        session = None
+        try:
+            session = self.session_factory()
+            rows = (
+                session.query(ClusterPlatform)
+                .filter(ClusterPlatform.user_id == user_id)
+                .all()
+            )
+            return [
+                {
+                    "id": str(cp.id),
+                    "cluster_name": str(cp.cluster_name),
+                    "display_name": str(cp.display_name),
+                    "organization_id": str(cp.organization_id),
+                }
+                for cp in rows
+            ]
+        finally:
+            if session:
+                session.close()
+
+    def _ensure_flusher(self):
+        if self._flusher is not None:
+            return
+        if self.flush_interval_seconds <= 0:
+            self.flush()
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._stop_event.clear()
+            self._flusher = threading.Thread(
+                target=self._run_flusher,
+                name="ssh-key-last-used-flusher",
+                daemon=True,
+            )
+            self._flusher.start()
+
+    def _run_flusher(self):
+        while not self._stop_event.wait(self.flush_interval_seconds):
+            self.flush()
@@ -29,6 +29,7 @@
 # 4) Connect using: ssh -p 2222 Home@localhost
 #
 
+import asyncio
 import socket
 import threading
 import paramiko
@@ -38,12 +39,14 @@ import logging
 import argparse
 import subprocess
 import pty
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 # Import SSHKey model from models.py
-from lattice.db.db_models import ClusterPlatform
 from lattice.db.db_models import SSHKey
+from lattice.ssh_proxy_server.auth_cache import SSHAuthCache
+from lattice.utils.ssh_pool import SSHConnectionPool
 
 # --- Configuration ---
 HOST = "0.0.0.0"  # Listen on all interfaces
@@ -53,7 +56,43 @@ PORT = 2222  # Port for the proxy service to listen on
 # Database URL - by default, use the same SQLite database as the main application
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///lattice.db")
 
-NUMBER_OF_WAITING_CONNECTIONS = 10
+# Listen backlog: connections the kernel queues while we're not accepting
+NUMBER_OF_WAITING_CONNECTIONS = int(os.getenv("SSH_PROXY_BACKLOG", "128"))
+# Asyncio mode: concurrent sessions before new connections wait in the backlog
+MAX_CONNECTIONS = int(os.getenv("SSH_PROXY_MAX_CONNECTIONS", "512"))
+# Asyncio mode: threads opening upstream (cluster) connections, kept apart
+# from client handshakes so slow clusters can't hold up new logins
+UPSTREAM_CONNECT_WORKERS = int(os.getenv("SSH_PROXY_UPSTREAM_CONNECT_WORKERS", "32"))
+# Asyncio mode: bytes read per relay step in either direction
+RELAY_BUFFER_SIZE = int(os.getenv("SSH_PROXY_RELAY_BUFFER_SIZE", str(64 * 1024)))
+# Asyncio mode: seconds a client may keep its SSH window full (not reading
+# our output) before its session is closed
+SEND_STALL_TIMEOUT = float(os.getenv("SSH_PROXY_SEND_STALL_SECONDS", "300"))
+# Asyncio mode: longest wait between checks for window space while it's full
+SEND_RETRY_MAX_SECONDS = 0.1
+# Seconds to wait for the client's shell/exec request after the channel opens
+SESSION_REQUEST_TIMEOUT = 10
+# Auth cache: max age of a cached key/ACL entry, how often to check the DB for
+# key or cluster changes, and how often buffered last_used_at updates are written
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("SSH_PROXY_AUTH_CACHE_TTL_SECONDS", "300"))
+AUTH_CACHE_VALIDATE_SECONDS = float(
+    os.getenv("SSH_PROXY_AUTH_CACHE_VALIDATE_SECONDS", "1")
+)
+LAST_USED_FLUSH_SECONDS = float(os.getenv("SSH_PROXY_LAST_USED_FLUSH_SECONDS", "30"))
+# Upstream connections: sessions share an OpenSSH ControlMaster connection
+# per (cluster, user); same settings as the API's web terminal pool
+SSH_POOL_ENABLED = os.getenv(
+    "SSH_POOL_ENABLED", "true"
+).strip().lower() in ("1", "true", "yes")
+SSH_POOL_IDLE_SECONDS = float(os.getenv("SSH_POOL_IDLE_SECONDS", "300"))
+SSH_POOL_HEALTH_CHECK_SECONDS = float(os.getenv("SSH_POOL_HEALTH_CHECK_SECONDS", "30"))
+SSH_POOL_MAX_SESSIONS = int(os.getenv("SSH_POOL_MAX_SESSIONS", "10"))
+SSH_POOL_MAX_CONNECTIONS_PER_CLUSTER = int(
+    os.getenv("SSH_POOL_MAX_CONNECTIONS_PER_CLUSTER", "4")
+)
+SSH_POOL_CONNECT_TIMEOUT_SECONDS = float(
+    os.getenv("SSH_POOL_CONNECT_TIMEOUT_SECONDS", "20")
+)
 
 # Create database engine and session
 engine = create_engine(DATABASE_URL, echo=False)
@@ -65,6 +104,23 @@ def get_database_session() -> Session:
     return SessionLocal()
 
 
+ssh_auth_cache = SSHAuthCache(
+    get_database_session,
+    ttl_seconds=AUTH_CACHE_TTL_SECONDS,
+    validate_interval_seconds=AUTH_CACHE_VALIDATE_SECONDS,
+    flush_interval_seconds=LAST_USED_FLUSH_SECONDS,
+)
+
+ssh_connection_pool = SSHConnectionPool(
+    enabled=SSH_POOL_ENABLED,
+    idle_seconds=SSH_POOL_IDLE_SECONDS,
+    health_check_seconds=SSH_POOL_HEALTH_CHECK_SECONDS,
+    max_sessions=SSH_POOL_MAX_SESSIONS,
+    max_connections_per_cluster=SSH_POOL_MAX_CONNECTIONS_PER_CLUSTER,
+    connect_timeout_seconds=SSH_POOL_CONNECT_TIMEOUT_SECONDS,
+)
+
+
 # --- Database SSH Key Lookup ---
 # Optional hardening: require the proxy username segment to match the authenticated user ID
 # ENFORCE_PROXY_USERNAME is no longer used
@@ -74,49 +130,13 @@ def lookup_user_by_ssh_key(public_key: str) -> tuple[str, str, str]:
     """
     Look up user by SSH public key in the database.
     Returns (user_id, real_user_name, organization_id) if found, raises ValueError if not found.
+    Served from ssh_auth_cache; last_used_at is written in batches.
     """
-    session = None
     try:
-        # Get database session
-        session = get_database_session()
-
-        # Generate fingerprint for the provided key
-        fingerprint = SSHKey.generate_fingerprint(public_key)
-
-        # Look up the key in the database
-        # Enforce uniqueness: the same fingerprint should not belong to multiple users
-        matches = (
-            session.query(SSHKey)
-            .filter(SSHKey.fingerprint == fingerprint, SSHKey.is_active)
-            .all()
-        )
-
-        if not matches:
-            raise ValueError("SSH key not found or inactive")
-        if len(matches) > 1:
-            raise ValueError("SSH key fingerprint is not unique in database")
-
-        ssh_key = matches[0]
-
-        # Update last_used_at
-        ssh_key.update_last_used()
-        session.commit()
-
-        # Return raw attributes (some deployments store strings, not Enum-like objects)
-        user_id = getattr(ssh_key.user_id, "value", ssh_key.user_id)
-        key_name = getattr(ssh_key.name, "value", ssh_key.name)
-        organization_id = getattr(
-            ssh_key.organization_id, "value", ssh_key.organization_id
-        )
-        return str(user_id), str(key_name), str(organization_id)
+        return ssh_auth_cache.lookup_user(public_key)
     except Exception as e:
-        if session:
-            session.rollback()
         logging.error(f"Database lookup error: {e}")
         raise ValueError(f"Failed to lookup SSH key: {str(e)}")
-    finally:
-        if session:
-            session.close()
 
 
 # --- Mock ACL for now ---
@@ -125,32 +145,13 @@ def lookup_user_by_ssh_key(public_key: str) -> tuple[str, str, str]:
 def get_user_permissions(user_id: str) -> list[dict]:
     """
     Get list of nodes/clusters the user can access.
-    Returns a list of dictionaries with keys: id, cluster_name, and display_name.
+    Returns a list of dictionaries with keys: id, cluster_name, display_name and organization_id.
     """
-    session = None
     try:
-        session = get_database_session()
-        user_permissions = (
-            session.query(ClusterPlatform)
-            .filter(ClusterPlatform.user_id == user_id)
-            .all()
-        )
-        # List of all clusters with their id, cluster_name, and display_name as dictionaries:
-        cluster_permissions = [
-            {
-                "id": str(cp.id),
-                "cluster_name": str(cp.cluster_name),
-                "display_name": str(cp.display_name),
-            }
-            for cp in user_permissions
-        ]
-        return cluster_permissions
+        return ssh_auth_cache.get_user_permissions(user_id)
     except Exception as e:
         logging.error(f"Error fetching user permissions: {e}")
         return []
-    finally:
-        if session:
-            session.close()
 
 
 # Generate or load server host key
@@ -168,13 +169,21 @@ def get_host_key():
 
 
 class ProxySSHServer(paramiko.ServerInterface):
-    def __init__(self):
+    def __init__(self, on_session_request=None):
         self.authenticated_user = None
         self.organization_id = None  # Store organization_id in the session
         self.target_node = None
         self.channel = None
+        # Set once the client asks for a shell or exec; called from paramiko's thread
+        self.session_requested = threading.Event()
+        self.on_session_request = on_session_request
         logging.debug("ProxySSHServer instance created")
 
+    def _mark_session_requested(self):
+        self.session_requested.set()
+        if self.on_session_request:
+            self.on_session_request()
+
     def get_allowed_auths(self, username):
         """
         Return the authentication methods that are allowed for this user.
@@ -259,10 +268,12 @@ class ProxySSHServer(paramiko.ServerInterface):
     # We now primarily expect shell or exec requests that tools will make
     def check_channel_shell_request(self, channel):
         logging.debug("Shell request received")
+        self._mark_session_requested()
         return True
 
     def check_channel_exec_request(self, channel, command):
         logging.debug(f"Exec request received for command: {command}")
+        self._mark_session_requested()
         return True
 
     def check_channel_pty_request(
@@ -324,14 +335,15 @@ def launch_ssh_subprocess(destination=""):
     return proc
 
 
-def launch_ssh_subprocess_with_pty(destination=""):
+def launch_ssh_subprocess_with_pty(destination="", ssh_cmd=None):
     """
     Launch an OpenSSH subprocess with a PTY to connect to the target node.
-    Returns (pid, master_fd, proc).
+    ``ssh_cmd`` overrides the command (e.g. a pooled connection lease's).
+    Returns (proc, master_fd).
     """
     # Create a new pseudo-terminal to attach to the subprocess
     master_fd, slave_fd = pty.openpty()
-    ssh_cmd = ["ssh", destination]
+    ssh_cmd = ssh_cmd or ["ssh", destination]
     logging.debug(f"Launching SSH subprocess with PTY: {' '.join(ssh_cmd)}")
     proc = subprocess.Popen(
         ssh_cmd,
@@ -444,32 +456,11 @@ def get_cluster_name_from_db(display_name, user_id, organization_id):
     Raises:
         ValueError: If no matching cluster is found or if multiple matches exist.
     """
-    session = None
     try:
-        session = get_database_session()
-        cluster = (
-            session.query(ClusterPlatform)
-            .filter(
-                ClusterPlatform.display_name == display_name,
-                ClusterPlatform.user_id == user_id,
-                ClusterPlatform.organization_id == organization_id,
-            )
-            .one_or_none()
-        )
-
-        if not cluster:
-            raise ValueError(
-                f"No cluster found for display_name='{display_name}' and user_id='{user_id}'"
-            )
-
-        return cluster.cluster_name
-
+        return ssh_auth_cache.get_cluster_name(display_name, user_id, organization_id)
     except Exception as e:
         logging.error(f"Error in get_cluster_name_from_db: {e}")
         raise ValueError(f"Failed to retrieve cluster name: {str(e)}")
-    finally:
-        if session:
-            session.close()
 
 
 def handle_client_connection(client_socket):
@@ -477,6 +468,7 @@ def handle_client_connection(client_socket):
     logging.info(f"Handling connection from {client_addr}")
 
     transport = None
+    lease = None
     try:
         transport = paramiko.Transport(client_socket)
         transport.add_server_key(get_host_key())
@@ -513,23 +505,7 @@ def handle_client_connection(client_socket):
         )
 
         # --- Wait for shell or exec request ---
-        # Paramiko sets .event for shell/exec requests, but we can check for them by waiting for a request
-        # We'll use a simple approach: wait for a shell or exec request for up to 10 seconds
-        shell_or_exec_requested = False
-        for _ in range(100):
-            if channel.closed:
-                logging.error("Channel closed before shell/exec request")
-                transport.close()
-                return
-            if channel.recv_ready() or channel.send_ready():
-                # This means the client is ready to send/receive data, likely after shell/exec request
-                shell_or_exec_requested = True
-                break
-            # Sleep briefly and check again
-            import time
-
-            time.sleep(0.1)
-        if not shell_or_exec_requested:
+        if not server.session_requested.wait(SESSION_REQUEST_TIMEOUT):
             logging.error("No shell/exec request received from client")
             transport.close()
             return
@@ -537,9 +513,12 @@ def handle_client_connection(client_socket):
             "Shell/exec request received, proceeding to launch SSH subprocess"
         )
 
-        # Launch OpenSSH subprocess with PTY
+        # Launch OpenSSH subprocess with PTY, on the user's pooled connection
+        lease = ssh_connection_pool.acquire(
+            str(cluster_name), server.authenticated_user
+        )
         ssh_proc, master_fd = launch_ssh_subprocess_with_pty(
-            destination=str(cluster_name)
+            destination=str(cluster_name), ssh_cmd=lease.command
         )
 
         # Do a test to see if the SSH process is running
@@ -564,6 +543,8 @@ def handle_client_connection(client_socket):
             f"Error in handle_client_connection from {client_addr}: {e}", exc_info=True
         )
     finally:
+        if lease is not None:
+            lease.release()
         try:
             if transport:
                 transport.close()
@@ -573,6 +554,318 @@ def handle_client_connection(client_socket):
             logging.error(f"Error during cleanup: {e}")
 
 
+# --- Asyncio proxy mode ---
+# One event loop relays every session: channel and PTY readiness are watched
+# with add_reader/add_writer instead of a bridge thread and select loop per
+# session. Paramiko still runs its own transport thread per connection; only
+# its blocking handshake calls are pushed to a thread pool.
+
+
+async def relay_channel_and_pty(
+    client_channel,
+    master_fd,
+    buffer_size=RELAY_BUFFER_SIZE,
+    stall_timeout=SEND_STALL_TIMEOUT,
+):
+    """
+    Relay data between the Paramiko channel and the PTY master fd on the event loop.
+
+    Each direction pauses its source while the destination can't keep up
+    (PTY write would block, or the client's SSH window is full), so a slow
+    side applies backpressure instead of growing buffers. Paramiko has no fd
+    that signals window space, so a full window is re-checked on a timer; a
+    client that takes no data for ``stall_timeout`` seconds is disconnected.
+    """
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    channel_fd = client_channel.fileno()
+    os.set_blocking(master_fd, False)
+    bytes_transferred = {"client_to_target": 0, "target_to_client": 0}
+    # Client bytes the PTY could not take yet
+    pending_to_pty = bytearray()
+    # PTY output the client's window could not take yet, and its retry timer
+    to_channel = {"view": None, "since": 0.0, "delay": 0.0, "timer": None}
+
+    def finish(reason):
+        if not done.done():
+            logging.debug(reason)
+            done.set_result(None)
+
+    def write_to_pty(view):
+        try:
+            written = os.write(master_fd, view)
+        except BlockingIOError:
+            written = 0
+        except OSError:
+            finish("PTY master fd closed")
+            return
+        if written < len(view):
+            pending_to_pty.extend(view[written:])
+            loop.remove_reader(channel_fd)
+            loop.add_writer(master_fd, on_pty_writable)
+
+    def on_pty_writable():
+        try:
+            written = os.write(master_fd, pending_to_pty)
+        except BlockingIOError:
+            return
+        except OSError:
+            finish("PTY master fd closed")
+            return
+        del pending_to_pty[:written]
+        if not pending_to_pty:
+            loop.remove_writer(master_fd)
+            loop.add_reader(channel_fd, on_channel_readable)
+
+    def on_channel_readable():
+        # The channel's fd only signals buffered data (or EOF), so this won't block
+        try:
+            data = client_channel.recv(buffer_size)
+        except Exception:
+            data = b""
+        if not data:
+            finish("Client channel closed")
+            return
+        bytes_transferred["client_to_target"] += len(data)
+        write_to_pty(memoryview(data))
+
+    def send_to_channel(view):
+        # Sends what the window takes now; send() only blocks on a full window
+        sent = 0
+        while sent < len(view) and client_channel.send_ready():
+            count = client_channel.send(view[sent:])
+            if count <= 0:
+                raise EOFError("Client channel closed")
+            sent += count
+        return sent
+
+    def on_channel_send_retry():
+        to_channel["timer"] = None
+        if done.done():
+            return
+        view = to_channel["view"]
+        try:
+            sent = send_to_channel(view)
+        except Exception:
+            finish("Client channel closed")
+            return
+        if sent == len(view):
+            to_channel["view"] = None
+            loop.add_reader(master_fd, on_pty_readable)
+            return
+        if sent:
+            wait_for_channel(view[sent:])
+        elif loop.time() - to_channel["since"] > stall_timeout:
+            finish("Client stopped reading")
+        else:
+            # Back off while the client isn't reading
+            delay = min(to_channel["delay"] * 2, SEND_RETRY_MAX_SECONDS)
+            to_channel["delay"] = delay
+            to_channel["timer"] = loop.call_later(delay, on_channel_send_retry)
+
+    def wait_for_channel(view):
+        to_channel["view"] = view
+        to_channel["since"] = loop.time()
+        to_channel["delay"] = 0.001
+        to_channel["timer"] = loop.call_later(0.001, on_channel_send_retry)
+
+    def on_pty_readable():
+        try:
+            data = os.read(master_fd, buffer_size)
+        except BlockingIOError:
+            return
+        except OSError:
+            finish("PTY master fd closed")
+            return
+        if not data:
+            finish("PTY master fd EOF")
+            return
+        bytes_transferred["target_to_client"] += len(data)
+        view = memoryview(data)
+        try:
+            sent = send_to_channel(view)
+        except Exception:
+            finish("Client channel closed")
+            return
+        if sent < len(data):
+            # Window full: stop reading the PTY until the rest is delivered
+            loop.remove_reader(master_fd)
+            wait_for_channel(view[sent:])
+
+    loop.add_reader(channel_fd, on_channel_readable)
+    loop.add_reader(master_fd, on_pty_readable)
+    try:
+        await done
+    except Exception as e:
+        logging.error(f"Error in relay_channel_and_pty: {e}")
+    finally:
+        loop.remove_reader(channel_fd)
+        loop.remove_reader(master_fd)
+        loop.remove_writer(master_fd)
+        if to_channel["timer"] is not None:
+            to_channel["timer"].cancel()
+        logging.info(
+            f"Bridge closed. Bytes transferred - C->T: {bytes_transferred['client_to_target']}, T->C: {bytes_transferred['target_to_client']}"
+        )
+        try:
+            client_channel.close()
+        except Exception:
+            pass
+        try:
+            os.close(master_fd)
+        except Exception:
+            pass
+
+
+async def handle_client_connection_async(
+    client_socket, host_key, handshake_executor, connect_executor
+):
+    loop = asyncio.get_running_loop()
+    client_addr = client_socket.getpeername()
+    logging.info(f"Handling connection from {client_addr}")
+
+    transport = None
+    ssh_proc = None
+    lease = None
+    try:
+        session_requested = asyncio.Event()
+        transport = paramiko.Transport(client_socket)
+        transport.add_server_key(host_key)
+        server = ProxySSHServer(
+            on_session_request=lambda: loop.call_soon_threadsafe(session_requested.set)
+        )
+
+        logging.debug("Starting SSH transport server")
+        await loop.run_in_executor(
+            handshake_executor, lambda: transport.start_server(server=server)
+        )
+
+        logging.debug("Waiting for channel establishment")
+        channel = await loop.run_in_executor(handshake_executor, transport.accept, 20)
+        if not channel or not server.target_node:
+            return
+
+        logging.info(
+            f"Establishing proxy connection for {server.authenticated_user}  at {server.organization_id} to {server.target_node}"
+        )
+
+        cluster_name = "None"
+        try:
+            cluster_name = await loop.run_in_executor(
+                handshake_executor,
+                lambda: get_cluster_name_from_db(
+                    display_name=server.target_node,
+                    user_id=server.authenticated_user,
+                    organization_id=server.organization_id,
+                ),
+            )
+        except Exception as e:
+            logging.error(f"Error looking up cluster name: {e}")
+
+        logging.info(
+            f"Cluster name found for {server.authenticated_user}: {cluster_name}"
+        )
+
+        try:
+            await asyncio.wait_for(session_requested.wait(), SESSION_REQUEST_TIMEOUT)
+        except asyncio.TimeoutError:
+            logging.error("No shell/exec request received from client")
+            return
+        logging.debug(
+            "Shell/exec request received, proceeding to launch SSH subprocess"
+        )
+
+        # A new pooled connection blocks for its handshake (up to
+        # SSH_POOL_CONNECT_TIMEOUT_SECONDS); later sessions to the cluster
+        # open a channel on it
+        lease = await loop.run_in_executor(
+            connect_executor,
+            ssh_connection_pool.acquire,
+            str(cluster_name),
+            server.authenticated_user,
+        )
+        ssh_proc, master_fd = launch_ssh_subprocess_with_pty(
+            destination=str(cluster_name), ssh_cmd=lease.command
+        )
+        if ssh_proc.poll() is None:
+            logging.info("SSH subprocess started successfully")
+        else:
+            logging.error("Failed to start SSH subprocess")
+
+        await relay_channel_and_pty(channel, master_fd)
+
+    except Exception as e:
+        logging.error(
+            f"Error in handle_client_connection_async from {client_addr}: {e}",
+            exc_info=True,
+        )
+    finally:
+        try:
+            if ssh_proc is not None and ssh_proc.poll() is None:
+                ssh_proc.terminate()
+            if lease is not None:
+                lease.release()
+            if transport:
+                transport.close()
+            client_socket.close()
+            logging.debug(f"Cleaned up connection from {client_addr}")
+        except Exception as e:
+            logging.error(f"Error during cleanup: {e}")
+
+
+async def serve_async(host, port, backlog, max_connections):
+    """
+    Accept connections on the event loop, running at most ``max_connections``
+    sessions at once. At the limit we stop accepting, so new clients wait in
+    the listen backlog rather than being accepted and starved.
+    """
+    loop = asyncio.get_running_loop()
+    host_key = get_host_key()
+    handshake_executor = ThreadPoolExecutor(
+        max_workers=min(32, max_connections), thread_name_prefix="ssh-proxy-handshake"
+    )
+    connect_executor = ThreadPoolExecutor(
+        max_workers=max(1, min(UPSTREAM_CONNECT_WORKERS, max_connections)),
+        thread_name_prefix="ssh-proxy-connect",
+    )
+    slots = asyncio.Semaphore(max_connections)
+    sessions = set()
+
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server_socket.bind((host, port))
+    server_socket.listen(backlog)
+    server_socket.setblocking(False)
+    logging.info(
+        f"Lighthouse SSH proxy (asyncio) listening on {host}:{port}, backlog {backlog}, max connections {max_connections}"
+    )
+
+    try:
+        while True:
+            await slots.acquire()
+            try:
+                client_sock, addr = await loop.sock_accept(server_socket)
+            except BaseException:
+                slots.release()
+                raise
+            logging.info(f"Accepted connection from {addr}")
+            # Paramiko drives the socket from its own thread with blocking I/O
+            client_sock.setblocking(True)
+            task = loop.create_task(
+                handle_client_connection_async(
+                    client_sock, host_key, handshake_executor, connect_executor
+                )
+            )
+            sessions.add(task)
+            task.add_done_callback(sessions.discard)
+            task.add_done_callback(lambda _task: slots.release())
+    finally:
+        server_socket.close()
+        handshake_executor.shutdown(wait=False)
+        connect_executor.shutdown(wait=False)
+        logging.info("Server socket closed")
+
+
 def setup_logging(level):
     """Configure logging with the specified level."""
     numeric_level = getattr(logging, level.upper(), None)
@@ -610,6 +903,24 @@ def parse_arguments():
         default="INFO",
         help="Set the logging level (default: INFO)",
     )
+    parser.add_argument(
+        "--mode",
+        choices=["asyncio", "threaded"],
+        default="asyncio",
+        help="Relay sessions on one event loop or with a thread per connection (default: asyncio)",
+    )
+    parser.add_argument(
+        "--max-connections",
+        type=int,
+        default=MAX_CONNECTIONS,
+        help=f"Concurrent sessions in asyncio mode (default: {MAX_CONNECTIONS})",
+    )
+    parser.add_argument(
+        "--backlog",
+        type=int,
+        default=NUMBER_OF_WAITING_CONNECTIONS,
+        help=f"Listen backlog (default: {NUMBER_OF_WAITING_CONNECTIONS})",
+    )
     return parser.parse_args()
 
 
@@ -645,14 +956,23 @@ def main():
         )
         return
 
+    if args.mode == "asyncio":
+        try:
+            asyncio.run(serve_async(HOST, PORT, args.backlog, args.max_connections))
+        except KeyboardInterrupt:
+            logging.info("Received shutdown signal")
+        finally:
+            # Write out buffered last_used_at updates, close upstream connections
+            ssh_auth_cache.stop()
+            ssh_connection_pool.stop()
+        return
+
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     server_socket.bind((HOST, PORT))
-    server_socket.listen(NUMBER_OF_WAITING_CONNECTIONS)
+    server_socket.listen(args.backlog)
     logging.info(f"Lighthouse SSH proxy (username-based) listening on {HOST}:{PORT}")
-    logging.debug(
-        f"Server socket bound and listening with backlog of {NUMBER_OF_WAITING_CONNECTIONS}"
-    )
+    logging.debug(f"Server socket bound and listening with backlog of {args.backlog}")
 
     try:
         while True:
@@ -665,6 +985,8 @@ def main():
         logging.info("Received shutdown signal")
     finally:
         server_socket.close()
+        ssh_auth_cache.stop()
+        ssh_connection_pool.stop()
         logging.info("Server socket closed")
 
 
@@ -0,0 +1,182 @@
+"""
+Resolution of the cloud credentials SkyPilot calls on a cluster need.
+
+The platform -> credentials block (Azure service principal or RunPod API key
+from the organization's default cloud config) used to be copied into every
+job, log, stop and down path. Each copy read the cloud config from the
+database, and for multi-cloud clusters first asked ``sky.status`` which cloud
+the cluster had landed on. This module resolves them in one place:
+
+- credentials are cached per (organization, platform) for
+  ``CLOUD_CREDENTIALS_CACHE_TTL_SECONDS``; the cloud config routes call
+  ``invalidate`` after every write, so changes apply immediately;
+- the cloud a multi-cloud cluster runs on is looked up in SkyPilot once and
+  stored as ``ClusterPlatform.actual_cloud``; later calls read it from there.
+"""
+
+import copy
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import CLOUD_CREDENTIALS_CACHE_TTL_SECONDS
+from utils.cluster_utils import get_cluster_platform_info, set_cluster_actual_cloud
+
+# Platforms whose SkyPilot calls take explicit credentials
+CREDENTIAL_PLATFORMS = ("azure", "runpod")
+
+
+def _load_credentials(
+    platform: str, organization_id: Optional[str], db: Optional[Session]
+) -> Optional[dict]:
+    if platform == "azure":
+        from routes.clouds.azure.utils import az_get_current_config
+
+        azure_config_dict = az_get_current_config(
+            organization_id=organization_id, db=db
+        )
+        return {
+            "azure": {
+                "service_principal": {
+                    "tenant_id": azure_config_dict["tenant_id"],
+                    "client_id": azure_config_dict["client_id"],
+                    "client_secret": azure_config_dict["client_secret"],
+                    "subscription_id": azure_config_dict["subscription_id"],
+                },
+            }
+        }
+    if platform == "runpod":
+        from routes.clouds.runpod.utils import rp_get_current_config
+
+        rp_config = rp_get_current_config(organization_id=organization_id, db=db)
+        if rp_config and rp_config.get("api_key"):
+            return {"runpod": {"api_key": rp_config.get("api_key")}}
+    return None
+
+
+class CloudCredentialResolver:
+    """Per-(organization, platform) TTL cache of SkyPilot credentials"""
+
+    def __init__(self, ttl_seconds: float = CLOUD_CREDENTIALS_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # (organization id, platform) -> (credentials, cached at)
+        self._entries: Dict[Tuple[Optional[str], str], Tuple[Optional[dict], float]] = {}
+        # Bumped on every invalidation so a load that raced with it is not cached
+        self._generation = 0
+
+    def for_platform(
+        self,
+        platform: Optional[str],
+        organization_id: Optional[str],
+        db: Optional[Session] = None,
+    ) -> Optional[dict]:
+        """
+        Credentials for SkyPilot calls on ``platform``.
+
+        Args:
+            platform: Cloud platform (azure, runpod, ssh node pool, ...)
+            organization_id: Organization whose default cloud config is used
+            db: Optional database session
+
+        Returns:
+            SkyPilot ``credentials`` dict, or None when the platform needs none
+            or has no usable config
+        """
+        if platform not in CREDENTIAL_PLATFORMS:
+            return None
+        key = (organization_id, platform)
+        with self._lock:
+            entry = self._entries.get(key)
+            generation = self._generation
+        if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+            return copy.deepcopy(entry[0])
+        try:
+            credentials = _load_credentials(platform, organization_id, db)
+        except Exception as e:
+            print(f"Failed to get {platform} credentials: {e}")
+            return None
+        if self.ttl_seconds > 0:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = (credentials, time.monotonic())
+        return copy.deepcopy(credentials)
+
+    def platform_for_cluster(
+        self,
+        cluster_name: str,
+        platform_info: Optional[Dict[str, Any]] = None,
+        db: Optional[Session] = None,
+    ) -> Optional[str]:
+        """
+        Platform a cluster actually runs on.
+
+        Multi-cloud clusters resolve to the cloud SkyPilot picked, which is
+        looked up once and then kept on the cluster's platform record.
+
+        Args:
+            cluster_name: The actual cluster name
+            platform_info: The cluster's platform info, if already loaded
+            db: Optional database session
+        """
+        if platform_info is None:
+            platform_info = get_cluster_platform_info(cluster_name, db)
+        if not platform_info:
+            return None
+        platform = platform_info.get("platform")
+        if platform != "multi-cloud":
+            return platform
+        if platform_info.get("actual_cloud"):
+            return platform_info["actual_cloud"]
+
+        from routes.instances.utils import determine_actual_cloud_from_skypilot_status
+
+        actual_cloud = determine_actual_cloud_from_skypilot_status(cluster_name)
+        if not actual_cloud:
+            return platform
+        set_cluster_actual_cloud(cluster_name, actual_cloud, db)
+        return actual_cloud
+
+    def for_cluster(
+        self,
+        cluster_name: str,
+        organization_id: Optional[str],
+        platform_info: Optional[Dict[str, Any]] = None,
+        db: Optional[Session] = None,
+    ) -> Optional[dict]:
+        """
+        Credentials for SkyPilot calls on a cluster.
+
+        Args:
+            cluster_name: The actual cluster name
+            organization_id: Organization whose cloud config is used
+            platform_info: The cluster's platform info, if already loaded
+            db: Optional database session
+        """
+        platform = self.platform_for_cluster(cluster_name, platform_info, db)
+        return self.for_platform(platform, organization_id, db)
+
+    def invalidate(
+        self, organization_id: Optional[str] = None, platform: Optional[str] = None
+    ):
+        """
+        Drop cached credentials so the next call reads the cloud config again.
+
+        Args:
+            organization_id: Organization to drop (every organization if None)
+            platform: Platform to drop (every platform if None)
+        """
+        with self._lock:
+            self._generation += 1
+            for key in list(self._entries):
+                if organization_id is not None and key[0] != organization_id:
+                    continue
+                if platform is not None and key[1] != platform:
+                    continue
+                del self._entries[key]
+
+
+# Global instance
+cloud_credentials = CloudCredentialResolver()
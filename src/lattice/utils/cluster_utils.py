@@ -3,7 +3,7 @@ Cluster utilities for managing cluster platforms and name mapping with database
 """
 
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
 from nanoid import generate
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
@@ -263,19 +263,82 @@ def get_cluster_platform_info(
         if not cluster:
             return None
 
-        return {
-            "platform": cluster.platform,
-            "user_info": cluster.user_info or {},
-            "state": cluster.state,
-            "display_name": cluster.display_name,
-            "user_id": cluster.user_id,
-            "organization_id": cluster.organization_id,
-        }
+        return _platform_info_from_row(cluster)
     finally:
         if should_close_db:
             db.close()
 
 
+# Keep IN lists well under SQLite's bound-parameter limit
+_IN_QUERY_CHUNK_SIZE = 500
+
+
+def get_cluster_platform_info_map(
+    cluster_names: Iterable[str], db: Optional[Session] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Get cluster platform information for many clusters at once.
+
+    Loads all matching ClusterPlatform rows with a single IN query (chunked for
+    very large inputs) instead of one query per cluster.
+
+    Args:
+        cluster_names: The actual cluster names to resolve
+        db: Optional database session
+
+    Returns:
+        Dictionary mapping actual cluster name to the same platform info
+        returned by get_cluster_platform_info. Clusters without an entry
+        are omitted.
+    """
+    names = list({name for name in cluster_names if name})
+    if not names:
+        return {}
+
+    should_close_db = db is None
+    if db is None:
+        db = SessionLocal()
+
+    try:
+        info_map: Dict[str, Dict[str, Any]] = {}
+        for start in range(0, len(names), _IN_QUERY_CHUNK_SIZE):
+            chunk = names[start : start + _IN_QUERY_CHUNK_SIZE]
+            rows = (
+                db.query(ClusterPlatform)
+                .filter(ClusterPlatform.cluster_name.in_(chunk))
+                .all()
+            )
+            for cluster in rows:
+                info_map[cluster.cluster_name] = _platform_info_from_row(cluster)
+        return info_map
+    finally:
+        if should_close_db:
+            db.close()
+
+
+def is_owned_by(platform_info: Optional[Dict[str, Any]], user: Dict[str, Any]) -> bool:
+    """Check whether platform info belongs to the given user within their organization."""
+    return bool(
+        platform_info
+        and platform_info.get("user_id")
+        and platform_info.get("user_id") == user.get("id")
+        and user.get("organization_id")
+        and platform_info.get("organization_id") == user.get("organization_id")
+    )
+
+
+def _platform_info_from_row(cluster: ClusterPlatform) -> Dict[str, Any]:
+    return {
+        "platform": cluster.platform,
+        "actual_cloud": cluster.actual_cloud,
+        "user_info": cluster.user_info or {},
+        "state": cluster.state,
+        "display_name": cluster.display_name,
+        "user_id": cluster.user_id,
+        "organization_id": cluster.organization_id,
+    }
+
+
 def update_cluster_platform(
     cluster_name: str, new_platform: str, db: Optional[Session] = None
 ) -> bool:
@@ -319,6 +382,44 @@ def update_cluster_platform(
             db.close()
 
 
+def set_cluster_actual_cloud(
+    cluster_name: str, actual_cloud: str, db: Optional[Session] = None
+) -> bool:
+    """
+    Record which cloud SkyPilot picked for a multi-cloud cluster.
+
+    Args:
+        cluster_name: The actual cluster name
+        actual_cloud: Cloud (or SSH node pool) the cluster runs on
+        db: Optional database session
+
+    Returns:
+        True if a cluster was updated
+    """
+    should_close_db = db is None
+    if db is None:
+        db = SessionLocal()
+
+    try:
+        updated = (
+            db.query(ClusterPlatform)
+            .filter(ClusterPlatform.cluster_name == cluster_name)
+            .update(
+                {ClusterPlatform.actual_cloud: actual_cloud},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return updated > 0
+    except Exception as e:
+        print(f"Error recording actual cloud for cluster {cluster_name}: {e}")
+        db.rollback()
+        return False
+    finally:
+        if should_close_db:
+            db.close()
+
+
 def get_user_clusters(
     user_id: str, organization_id: str, db: Optional[Session] = None
 ) -> list[Dict[str, Any]]:
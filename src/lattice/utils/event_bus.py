@@ -0,0 +1,111 @@
+"""
+In-process publish/subscribe for application events.
+
+Components that react to something happening elsewhere in the process (a
+SkyPilot request finishing, say) subscribe to a topic here instead of
+polling for it:
+
+- ``subscribe`` registers a callback that runs synchronously in the
+  publishing thread; it should be quick and hand longer work off;
+- ``subscribe_async`` returns a bounded queue-backed subscription for
+  ``async`` consumers such as SSE endpoints; events are delivered onto the
+  subscriber's event loop and the oldest are dropped if it falls behind.
+
+Subscriber errors are logged and never reach the publisher.
+"""
+
+import asyncio
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Subscription:
+    """Queue of events for one ``async`` consumer"""
+
+    def __init__(self, bus: "EventBus", topic: str, maxsize: int):
+        self.topic = topic
+        self._bus = bus
+        self._loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Next event, or None if none arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self._bus._unsubscribe_async(self)
+
+    def _deliver(self, event: Any):
+        # Runs on the subscriber's loop
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+
+    def _push(self, event: Any):
+        try:
+            self._loop.call_soon_threadsafe(self._deliver, event)
+        except RuntimeError:
+            # Loop closed without unsubscribing
+            self.close()
+
+
+class EventBus:
+    """Topic-based in-process event bus"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks: Dict[str, List[Callable[[Any], None]]] = {}
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+
+    def subscribe(self, topic: str, callback: Callable[[Any], None]) -> Callable[[], None]:
+        """
+        Call ``callback(event)`` for every event published on ``topic``.
+
+        Returns:
+            A function that removes the subscription
+        """
+        with self._lock:
+            self._callbacks.setdefault(topic, []).append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                callbacks = self._callbacks.get(topic, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+
+        return unsubscribe
+
+    def subscribe_async(self, topic: str, maxsize: int = 100) -> Subscription:
+        """Subscribe the running event loop to ``topic``; close() when done."""
+        subscription = Subscription(self, topic, maxsize)
+        with self._lock:
+            self._subscriptions.setdefault(topic, []).append(subscription)
+        return subscription
+
+    def publish(self, topic: str, event: Any):
+        """Deliver ``event`` to every subscriber of ``topic``."""
+        with self._lock:
+            callbacks = list(self._callbacks.get(topic, []))
+            subscriptions = list(self._subscriptions.get(topic, []))
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Event subscriber for {topic} failed: {e}")
+        for subscription in subscriptions:
+            subscription._push(event)
+
+    def _unsubscribe_async(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.topic, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+
+
+# Global instance
+event_bus = EventBus()
@@ -220,10 +220,20 @@ def load_ssh_node_pools():
 
 def save_ssh_node_pools(pools_data):
     pools_file = get_ssh_node_pools_path()
+    # Write a sibling file and rename it over the old one, so SkyPilot never
+    # reads a half-written file
+    tmp_file = pools_file.with_name(f".{pools_file.name}.{os.getpid()}.tmp")
     try:
-        with open(pools_file, "w") as f:
+        with open(tmp_file, "w") as f:
             yaml.dump(pools_data, f, default_flow_style=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, pools_file)
     except Exception as e:
+        try:
+            os.unlink(tmp_file)
+        except OSError:
+            pass
         print(f"Error saving SSH node pools: {e}")
         raise HTTPException(
             status_code=500, detail=f"Failed to save cluster configuration: {str(e)}"
@@ -0,0 +1,298 @@
+"""
+In-process GPU availability probe for SSH node pools.
+
+GPU inventory used to be read by running ``sky show-gpus --infra ssh/<pool>``
+in a subprocess (a cold SkyPilot import every time) and scraping its table.
+This module asks the SkyPilot SDK for the same data as structured values:
+
+- ``realtime_kubernetes_gpu_availability`` for per-pool GPU totals. SkyPilot
+  versions that group the result by context cover several pools in one
+  call; others (e.g. 0.9.x) return a flat list for the queried context, so
+  pools are then queried one context each;
+- ``kubernetes_node_info`` for per-node availability, one call per pool.
+
+SkyPilot serves each SSH node pool as the Kubernetes context ``ssh-<pool>``.
+Results are typed (``PoolGPUInventory``) and convert to the dict stored in
+``SSHNodePool.other_data["gpu_resources"]``. ``parse_show_gpus_output`` keeps
+the old table parser for the subprocess fallback.
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+SSH_CONTEXT_PREFIX = "ssh-"
+
+
+@dataclass
+class GPUAvailability:
+    """GPU totals of one GPU type in a pool"""
+
+    gpu: str
+    requestable_qty_per_node: List[int]
+    free: int
+    total: int
+
+
+@dataclass
+class NodeGPUAvailability:
+    """GPU availability of one node"""
+
+    node_pool: str
+    node: str
+    gpu: Optional[str]
+    free: int
+    total: int
+
+
+@dataclass
+class PoolGPUInventory:
+    """Result of probing one SSH node pool"""
+
+    node_pool: str
+    gpus: List[GPUAvailability] = field(default_factory=list)
+    node_gpus: List[NodeGPUAvailability] = field(default_factory=list)
+    message: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same shape as the old parsed ``sky show-gpus`` output."""
+        result: Dict[str, Any] = {
+            "gpus": [
+                {
+                    "gpu": g.gpu,
+                    "requestable_qty_per_node": ", ".join(
+                        str(q) for q in g.requestable_qty_per_node
+                    ),
+                    "utilization": f"{g.free} of {g.total} free",
+                    "free": str(g.free),
+                    "total": str(g.total),
+                }
+                for g in self.gpus
+            ],
+            "node_gpus": [
+                {
+                    "node_pool": n.node_pool,
+                    "node": n.node,
+                    "gpu": n.gpu or "-",
+                    "utilization": f"{n.free} of {n.total} free",
+                    "free": str(n.free),
+                    "total": str(n.total),
+                }
+                for n in self.node_gpus
+            ],
+        }
+        if self.message:
+            result["message"] = self.message
+        return result
+
+
+def ssh_context(node_pool: str) -> str:
+    return f"{SSH_CONTEXT_PREFIX}{node_pool}"
+
+
+def _field(value: Any, name: str, index: int, default: Any = None) -> Any:
+    # SDK values arrive as objects, dicts or (after JSON decoding) plain lists
+    if isinstance(value, dict):
+        return value.get(name, default)
+    if isinstance(value, (list, tuple)):
+        return value[index] if len(value) > index else default
+    return getattr(value, name, default)
+
+
+def _count(value: Any) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def build_inventory(
+    node_pool: str, availability: Iterable[Any], node_info: Any
+) -> PoolGPUInventory:
+    """
+    Build a pool's inventory from SDK results.
+
+    Args:
+        node_pool: Pool name
+        availability: The pool's RealtimeGpuAvailability entries
+            (gpu, counts, capacity, available)
+        node_info: The pool's KubernetesNodesInfo (or its node_info_dict)
+    """
+    inventory = PoolGPUInventory(node_pool=node_pool)
+    for entry in availability or []:
+        inventory.gpus.append(
+            GPUAvailability(
+                gpu=str(_field(entry, "gpu", 0)),
+                requestable_qty_per_node=[
+                    _count(q) for q in (_field(entry, "counts", 1) or [])
+                ],
+                total=_count(_field(entry, "capacity", 2)),
+                free=_count(_field(entry, "available", 3)),
+            )
+        )
+
+    nodes = _field(node_info, "node_info_dict", 0, node_info) or {}
+    if isinstance(nodes, dict):
+        for node_name, info in nodes.items():
+            total = _field(info, "total", 2) or {}
+            free = _field(info, "free", 3) or {}
+            inventory.node_gpus.append(
+                NodeGPUAvailability(
+                    node_pool=node_pool,
+                    node=str(node_name),
+                    gpu=_field(info, "accelerator_type", 1),
+                    total=_count(_field(total, "accelerator_count", 0)),
+                    free=_count(_field(free, "accelerators_available", 0)),
+                )
+            )
+
+    if not inventory.gpus and not inventory.node_gpus:
+        inventory.message = "No GPUs found in this SSH cluster."
+    return inventory
+
+
+def _is_context_entry(item: Any) -> bool:
+    # (context, [RealtimeGpuAvailability, ...]) rather than a
+    # RealtimeGpuAvailability (gpu, counts, capacity, available)
+    if isinstance(item, dict):
+        return "context" in item
+    if isinstance(item, (list, tuple)) and not hasattr(item, "_fields"):
+        return len(item) == 2 and isinstance(item[1], (list, tuple))
+    return hasattr(item, "context") and not hasattr(item, "gpu")
+
+
+def _availability_by_context(context: Optional[str]) -> Optional[Dict[str, List[Any]]]:
+    """
+    GPU availability per context, or None if the SDK returned one flat list
+    that can't be split by context (no ``context`` given on older versions).
+    """
+    import sky
+
+    request_id = sky.client.sdk.realtime_kubernetes_gpu_availability(context=context)
+    result = list(sky.get(request_id) or [])
+    if result and all(_is_context_entry(item) for item in result):
+        return {
+            str(_field(item, "context", 0)): _field(item, "gpus", 1) or []
+            for item in result
+        }
+    if context is None:
+        return None
+    return {context: result}
+
+
+def _node_info(node_pool: str) -> Any:
+    import sky
+
+    return sky.get(sky.client.sdk.kubernetes_node_info(context=ssh_context(node_pool)))
+
+
+def probe_node_pools(
+    node_pools: List[str], max_workers: int = 8
+) -> Dict[str, PoolGPUInventory]:
+    """
+    Probe GPU availability of several SSH node pools (blocking).
+
+    Pool totals come from one availability call where the SDK groups them
+    by context (for a single pool, scoped to its context), otherwise from
+    one call per pool; per-node details are fetched concurrently per pool.
+
+    Raises:
+        LookupError: The SDK reported no availability for a pool's context
+        Exception: Whatever the SDK raises; callers decide on fallbacks
+    """
+    if not node_pools:
+        return {}
+    workers = min(max_workers, len(node_pools))
+    if len(node_pools) == 1:
+        by_context = _availability_by_context(ssh_context(node_pools[0])) or {}
+    else:
+        # No context: availability for every Kubernetes and SSH context at once
+        by_context = _availability_by_context(None) or {}
+        missing = [
+            ssh_context(n) for n in node_pools if ssh_context(n) not in by_context
+        ]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(workers, len(missing))) as pool:
+                for result in pool.map(_availability_by_context, missing):
+                    by_context.update(result or {})
+    for name in node_pools:
+        if ssh_context(name) not in by_context:
+            raise LookupError(f"No GPU availability reported for SSH node pool {name}")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        node_infos = dict(zip(node_pools, pool.map(_node_info, node_pools)))
+
+    return {
+        name: build_inventory(name, by_context[ssh_context(name)], node_infos[name])
+        for name in node_pools
+    }
+
+
+def probe_node_pool(node_pool: str) -> PoolGPUInventory:
+    """Probe GPU availability of one SSH node pool (blocking)."""
+    return probe_node_pools([node_pool])[node_pool]
+
+
+def parse_show_gpus_output(output: str, cluster_name: str) -> Dict[str, Any]:
+    """Parse ``sky show-gpus --infra ssh/<pool>`` table output (fallback path)."""
+    lines = output.splitlines()
+    gpus = []
+    node_gpus = []
+    pool_section = False
+    per_node_section = False
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(f"SSH Node Pool: {cluster_name}"):
+            pool_section = True
+            per_node_section = False
+            continue
+        if line.startswith("SSH Node Pool per-node GPU availability"):
+            pool_section = False
+            per_node_section = True
+            continue
+        if pool_section:
+            if line.startswith("GPU"):
+                continue  # skip header
+            parts = re.split(r"\s{2,}", line)
+            if len(parts) >= 3:
+                gpus.append(
+                    {
+                        "gpu": parts[0],
+                        "requestable_qty_per_node": parts[1],
+                        "utilization": parts[2],
+                        "free": parts[2].split("of")[0].strip(),
+                        "total": parts[2].split("of")[1].split("free")[0].strip(),
+                    }
+                )
+        elif per_node_section:
+            if line.startswith("NODE_POOL"):
+                continue  # skip per-node header
+            parts = re.split(r"\s{2,}", line)
+            if len(parts) >= 4:
+                node_gpus.append(
+                    {
+                        "node_pool": parts[0],
+                        "node": parts[1],
+                        "gpu": parts[2],
+                        "utilization": parts[3],
+                        "free": parts[3].split("of")[0].strip(),
+                        "total": parts[3].split("of")[1].split("free")[0].strip(),
+                    }
+                )
+    if gpus or node_gpus:
+        return {"gpus": gpus, "node_gpus": node_gpus}
+    if "No GPUs found in any SSH clusters" in output:
+        return {
+            "gpus": [],
+            "node_gpus": [],
+            "message": "No GPUs found in this SSH cluster.",
+        }
+    return {
+        "gpus": [],
+        "node_gpus": [],
+        "message": "No GPU info found for this cluster.",
+    }
@@ -0,0 +1,293 @@
+"""
+Pool of pre-started worker processes for isolated SkyPilot launches.
+
+SkyPilot keeps thread-local state that leaks between launches, so every launch
+runs in its own process. Starting a fresh interpreter per launch meant cold
+imports of ``sky`` and the whole app (several seconds and hundreds of MB), and
+then scraping the child's stdout for a result. This pool instead:
+
+- keeps ``LAUNCH_WORKER_POOL_SIZE`` workers warm, with the launch code already
+  imported;
+- retires a worker after ``LAUNCH_WORKER_MAX_LAUNCHES`` launches (1 by
+  default, so every launch still gets a process nobody launched from before)
+  and starts a replacement in the background;
+- talks to workers over a ``multiprocessing`` pipe with structured messages,
+  so SkyPilot's own stdout output can't corrupt the result;
+- runs at most ``LAUNCH_WORKER_POOL_SIZE`` launches at once; further launches
+  queue.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from config import (
+    LAUNCH_WORKER_MAX_LAUNCHES,
+    LAUNCH_WORKER_POOL_SIZE,
+    LAUNCH_WORKER_STARTUP_TIMEOUT_SECONDS,
+    LAUNCH_WORKER_TIMEOUT_SECONDS,
+)
+
+# Directory the app runs from (src/lattice); workers import from here
+LATTICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LaunchWorkerError(Exception):
+    """A launch could not be completed by a pool worker."""
+
+
+def _serve(conn, handler: Callable[..., Any]):
+    """Worker loop: announce readiness, then run launch requests until told to stop."""
+    conn.send({"type": "ready", "pid": os.getpid()})
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message.get("op") != "launch":
+            break
+        try:
+            result = handler(**message["params"])
+            reply = {"type": "result", "success": True, "request_id": result}
+        except Exception as e:
+            reply = {"type": "result", "success": False, "error": str(e)}
+        conn.send(reply)
+    conn.close()
+
+
+def _worker_main(conn):
+    """Entry point of a launch worker process."""
+    # The app imports both top-level modules and the ``lattice`` package
+    for path in (os.path.dirname(LATTICE_ROOT), LATTICE_ROOT):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    os.chdir(LATTICE_ROOT)
+    try:
+        # Importing this pulls in sky and the rest of the launch path up front
+        from routes.instances.utils import _launch_cluster_worker
+    except BaseException as e:
+        conn.send({"type": "error", "error": f"Worker failed to start: {e}"})
+        conn.close()
+        return
+    _serve(conn, _launch_cluster_worker)
+
+
+class _Worker:
+    """Parent-side handle of one worker process."""
+
+    def __init__(self, ctx, target: Callable):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=target, args=(child_conn,), name="lattice-launch-worker")
+        self.process.start()
+        child_conn.close()
+        self.launches = 0
+        self.ready = False
+
+    def wait_ready(self, timeout: float):
+        if self.ready:
+            return
+        if not self.conn.poll(timeout):
+            raise LaunchWorkerError(f"Launch worker did not start within {timeout}s")
+        message = self.conn.recv()
+        if message.get("type") != "ready":
+            raise LaunchWorkerError(message.get("error", "Launch worker failed to start"))
+        self.ready = True
+
+    def launch(self, params: dict, timeout: float) -> dict:
+        self.conn.send({"op": "launch", "params": params})
+        if not self.conn.poll(timeout):
+            raise LaunchWorkerError(f"Launch did not finish within {timeout}s")
+        return self.conn.recv()
+
+    def close(self):
+        try:
+            self.conn.send({"op": "shutdown"})
+        except Exception:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5)
+        self.conn.close()
+
+
+class LaunchWorkerPool:
+    """Bounded pool of warm, periodically recycled launch worker processes"""
+
+    def __init__(
+        self,
+        size: int = LAUNCH_WORKER_POOL_SIZE,
+        max_launches_per_worker: int = LAUNCH_WORKER_MAX_LAUNCHES,
+        launch_timeout_seconds: float = LAUNCH_WORKER_TIMEOUT_SECONDS,
+        startup_timeout_seconds: float = LAUNCH_WORKER_STARTUP_TIMEOUT_SECONDS,
+        target: Callable = _worker_main,
+    ):
+        self.size = max(1, size)
+        self.max_launches_per_worker = max(1, max_launches_per_worker)
+        self.launch_timeout_seconds = launch_timeout_seconds
+        self.startup_timeout_seconds = startup_timeout_seconds
+        self._target = target
+
+        # spawn, not fork: the API process is multi-threaded
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._idle: List[_Worker] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stopped = False
+
+        self._queued = 0
+        self._busy = 0
+        self._starting = 0
+        self._launches_total = 0
+        self._failures_total = 0
+        self._workers_started = 0
+        self._workers_retired = 0
+        self._launch_seconds_total = 0.0
+
+    def start(self):
+        """Start the pool and warm it up to ``size`` idle workers."""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._stopped = False
+            # One thread per concurrent launch; extra launches wait in its queue
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.size, thread_name_prefix="launch-worker"
+            )
+        self._replenish()
+
+    async def launch(self, params: Dict[str, Any]) -> Any:
+        """
+        Run ``_launch_cluster_worker(**params)`` in a pool worker.
+
+        Args:
+            params: Keyword arguments for the launch (must be picklable)
+
+        Returns:
+            The SkyPilot request id returned by the worker
+
+        Raises:
+            LaunchWorkerError: If the worker failed or the launch raised
+        """
+        self.start()
+        with self._lock:
+            self._queued += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._run_launch, params)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current pool state and counters."""
+        with self._lock:
+            completed = self._launches_total
+            return {
+                "size": self.size,
+                "max_launches_per_worker": self.max_launches_per_worker,
+                "idle_workers": len(self._idle),
+                "busy_workers": self._busy,
+                "queued_launches": self._queued,
+                "launches_total": completed,
+                "failures_total": self._failures_total,
+                "workers_started": self._workers_started,
+                "workers_retired": self._workers_retired,
+                "avg_launch_seconds": (
+                    self._launch_seconds_total / completed if completed else 0.0
+                ),
+            }
+
+    def stop(self):
+        """Shut down all idle workers (used on application shutdown)."""
+        with self._lock:
+            self._stopped = True
+            executor, self._executor = self._executor, None
+            idle, self._idle = self._idle, []
+        if executor is not None:
+            executor.shutdown(wait=False)
+        for worker in idle:
+            worker.close()
+
+    def _run_launch(self, params: Dict[str, Any]) -> Any:
+        with self._lock:
+            self._queued -= 1
+            self._busy += 1
+        started = time.monotonic()
+        worker = None
+        healthy = False
+        try:
+            worker = self._checkout()
+            worker.wait_ready(self.startup_timeout_seconds)
+            reply = worker.launch(params, self.launch_timeout_seconds)
+            healthy = True
+        except (EOFError, OSError) as e:
+            exitcode = worker.process.exitcode if worker is not None else None
+            raise LaunchWorkerError(
+                f"Launch worker exited unexpectedly (exit code {exitcode}): {e}"
+            )
+        finally:
+            with self._lock:
+                self._busy -= 1
+                self._launches_total += 1
+                self._launch_seconds_total += time.monotonic() - started
+                if not healthy:
+                    self._failures_total += 1
+            if worker is not None:
+                self._checkin(worker, healthy)
+
+        if not reply.get("success"):
+            with self._lock:
+                self._failures_total += 1
+            raise LaunchWorkerError(reply.get("error", "Unknown error"))
+        return reply.get("request_id")
+
+    def _checkout(self) -> _Worker:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(0)
+        return self._spawn()
+
+    def _checkin(self, worker: _Worker, healthy: bool):
+        worker.launches += 1
+        retire = not healthy or worker.launches >= self.max_launches_per_worker
+        if not retire:
+            with self._lock:
+                if not self._stopped:
+                    self._idle.append(worker)
+                    return
+        with self._lock:
+            self._workers_retired += 1
+        # Closing can block on join; don't hold up the caller for it
+        threading.Thread(target=worker.close, daemon=True).start()
+        self._replenish()
+
+    def _replenish(self):
+        while True:
+            with self._lock:
+                warm = len(self._idle) + self._busy + self._starting
+                if self._stopped or warm >= self.size:
+                    return
+                self._starting += 1
+            try:
+                worker = self._spawn()
+            finally:
+                with self._lock:
+                    self._starting -= 1
+            with self._lock:
+                if not self._stopped:
+                    self._idle.append(worker)
+                    continue
+            worker.close()
+            return
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self._target)
+        with self._lock:
+            self._workers_started += 1
+        return worker
+
+
+# Global instance
+launch_worker_pool = LaunchWorkerPool()
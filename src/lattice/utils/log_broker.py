@@ -0,0 +1,317 @@
+"""
+Shared log tailers with fan-out to any number of async viewers.
+
+Every log viewer used to start its own thread running ``sky.tail_logs`` (or
+``sky.stream_and_get`` for requests) and poll a queue from a sync generator,
+so N viewers of one job meant N threads and N SkyPilot connections. The
+broker instead runs one upstream tailer per log source (a cluster job or a
+SkyPilot request) and:
+
+- keeps the latest ``LOG_BROKER_BUFFER_LINES`` lines in a ring buffer with
+  increasing sequence numbers; viewers read from it at their own pace, and
+  slow ones skip ahead (with a "skipped" marker) instead of holding memory;
+- lets late joiners replay what is still buffered, or resume after the last
+  event they saw (SSE ``Last-Event-ID``, "<stream id>-<sequence number>");
+- wakes viewers through their event loop rather than polling;
+- stops the tailer once the last viewer has been gone for
+  ``LOG_BROKER_IDLE_GRACE_SECONDS`` (a page reload reattaches in between),
+  and forgets a finished stream after the same grace period.
+
+A tailer can only be stopped when SkyPilot next writes to it, so one
+following an idle log may block for long after it was told to stop. Its
+stream stays registered until its thread has exited, and new viewers of the
+same log reattach to it instead of starting a second tailer.
+"""
+
+import asyncio
+import json
+import secrets
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+from config import LOG_BROKER_BUFFER_LINES, LOG_BROKER_IDLE_GRACE_SECONDS
+
+
+class _TailerStopped(Exception):
+    """Raised into the upstream tailer to make it return."""
+
+
+@dataclass
+class LogEvent:
+    """One item delivered to a viewer"""
+
+    kind: str  # "line", "skipped", "keepalive" or "end"
+    id: Optional[str] = None
+    line: Optional[str] = None
+    skipped: int = 0
+    error: Optional[str] = None
+
+
+class _CaptureStream:
+    """File-like object handed to SkyPilot as ``output_stream``"""
+
+    def __init__(self, stream: "LogStream"):
+        self._stream = stream
+        self._partial = ""
+
+    def write(self, text: str):
+        if self._stream.stopped:
+            raise _TailerStopped()
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        self._stream.append([line.rstrip() for line in lines if line.strip()])
+        return len(text)
+
+    def flush(self):
+        if self._partial.strip():
+            self._stream.append([self._partial.rstrip()])
+        self._partial = ""
+
+
+class _Viewer:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.wakeup = asyncio.Event()
+
+    def notify(self):
+        try:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        except RuntimeError:
+            pass  # Viewer's loop is gone; it will be detached on exit
+
+
+class LogStream:
+    """One upstream tailer and its ring buffer"""
+
+    def __init__(
+        self,
+        broker: "LogBroker",
+        key: Hashable,
+        tail_fn: Callable[[Any], Any],
+        buffer_lines: int,
+    ):
+        self.key = key
+        # Tells resuming viewers whether their event ids belong to this tailer
+        self.id = secrets.token_hex(4)
+        self._broker = broker
+        self._tail_fn = tail_fn
+        self._lock = threading.Lock()
+        self._buffer: deque = deque(maxlen=max(1, buffer_lines))
+        self._next_seq = 0
+        self._viewers: List[_Viewer] = []
+        self.stopped = False
+        # Stopped before the log ended; the buffer is not the whole log
+        self.aborted = False
+        self.done = False
+        self.error: Optional[str] = None
+        self._thread = threading.Thread(
+            target=self._run, name=f"log-tailer-{key}", daemon=True
+        )
+
+    @property
+    def viewer_count(self) -> int:
+        with self._lock:
+            return len(self._viewers)
+
+    def start(self):
+        self._thread.start()
+
+    def append(self, lines: List[str]):
+        if not lines:
+            return
+        with self._lock:
+            for line in lines:
+                self._buffer.append((self._next_seq, line))
+                self._next_seq += 1
+            viewers = list(self._viewers)
+        for viewer in viewers:
+            viewer.notify()
+
+    def read(self, cursor: int) -> Tuple[List[Tuple[int, str]], int, bool]:
+        """
+        Buffered lines from sequence number ``cursor`` on.
+
+        Returns:
+            (lines, skipped, finished): lines as (seq, text), how many lines
+            before them are no longer buffered, and whether the stream ended
+            with nothing left to read
+        """
+        with self._lock:
+            oldest = self._buffer[0][0] if self._buffer else self._next_seq
+            skipped = max(0, oldest - cursor)
+            start = max(cursor, oldest) - oldest
+            lines = [self._buffer[i] for i in range(start, len(self._buffer))]
+            finished = self.done and not lines
+            return lines, skipped, finished
+
+    def attach(self, viewer: _Viewer):
+        with self._lock:
+            self._viewers.append(viewer)
+
+    def detach(self, viewer: _Viewer) -> int:
+        with self._lock:
+            if viewer in self._viewers:
+                self._viewers.remove(viewer)
+            return len(self._viewers)
+
+    def _run(self):
+        try:
+            self._tail_fn(_CaptureStream(self))
+        except _TailerStopped:
+            self.aborted = True
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            with self._lock:
+                self.done = True
+                viewers = list(self._viewers)
+            for viewer in viewers:
+                viewer.notify()
+            self._broker._stream_finished(self)
+
+
+class LogBroker:
+    """Registry of shared log streams"""
+
+    def __init__(
+        self,
+        buffer_lines: int = LOG_BROKER_BUFFER_LINES,
+        idle_grace_seconds: float = LOG_BROKER_IDLE_GRACE_SECONDS,
+    ):
+        self.buffer_lines = buffer_lines
+        self.idle_grace_seconds = idle_grace_seconds
+        self._lock = threading.Lock()
+        self._streams: Dict[Hashable, LogStream] = {}
+
+    async def subscribe(
+        self,
+        key: Hashable,
+        tail_fn: Callable[[Any], Any],
+        last_event_id: Optional[str] = None,
+        keepalive_seconds: Optional[float] = None,
+    ) -> AsyncIterator[LogEvent]:
+        """
+        Follow the log stream ``key``, starting its tailer if needed.
+
+        Args:
+            key: Log source, e.g. ("job", cluster, job_id)
+            tail_fn: Blocking ``tail_fn(output_stream)`` that writes the log to
+                ``output_stream``; only called when no tailer for ``key`` runs
+            last_event_id: Id of the last event the viewer received; lines
+                after it are sent. Without one (or with an id from an earlier
+                tailer) everything still buffered is replayed
+            keepalive_seconds: Yield a "keepalive" event after this long
+                without output
+
+        Yields:
+            LogEvent items, ending with one of kind "end"
+        """
+        loop = asyncio.get_running_loop()
+        viewer = _Viewer(loop)
+        stream = self._acquire(key, tail_fn, viewer)
+        cursor = 0
+        if last_event_id:
+            stream_id, _, seq = last_event_id.rpartition("-")
+            if stream_id == stream.id and seq.isdigit():
+                cursor = int(seq) + 1
+        try:
+            while True:
+                viewer.wakeup.clear()
+                lines, skipped, finished = stream.read(cursor)
+                if skipped:
+                    yield LogEvent(kind="skipped", skipped=skipped)
+                for seq, line in lines:
+                    yield LogEvent(kind="line", id=f"{stream.id}-{seq}", line=line)
+                if lines:
+                    cursor = lines[-1][0] + 1
+                    continue
+                if finished:
+                    yield LogEvent(kind="end", error=stream.error)
+                    return
+                try:
+                    await asyncio.wait_for(viewer.wakeup.wait(), keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield LogEvent(kind="keepalive")
+        finally:
+            self._release(stream, viewer)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Active streams and their viewer counts."""
+        with self._lock:
+            streams = list(self._streams.values())
+        return {
+            "streams": len(streams),
+            "viewers": sum(s.viewer_count for s in streams),
+        }
+
+    def stop(self):
+        """Stop all tailers (used on application shutdown)."""
+        with self._lock:
+            streams, self._streams = list(self._streams.values()), {}
+        for stream in streams:
+            stream.stopped = True
+
+    def _acquire(
+        self, key: Hashable, tail_fn: Callable[[Any], Any], viewer: _Viewer
+    ) -> LogStream:
+        with self._lock:
+            stream = self._streams.get(key)
+            started = stream is None or stream.aborted
+            if started:
+                stream = LogStream(self, key, tail_fn, self.buffer_lines)
+                self._streams[key] = stream
+            else:
+                # Still running (if told to stop, it hasn't noticed yet)
+                stream.stopped = False
+            stream.attach(viewer)
+        if started:
+            stream.start()
+        return stream
+
+    def _release(self, stream: LogStream, viewer: _Viewer):
+        if stream.detach(viewer) == 0:
+            self._schedule_reap(stream)
+
+    def _stream_finished(self, stream: LogStream):
+        # Keep the finished stream briefly so reloads still get the replay
+        self._schedule_reap(stream)
+
+    def _schedule_reap(self, stream: LogStream):
+        if self.idle_grace_seconds <= 0:
+            self._reap(stream)
+            return
+        timer = threading.Timer(self.idle_grace_seconds, self._reap, args=(stream,))
+        timer.daemon = True
+        timer.start()
+
+    def _reap(self, stream: LogStream):
+        with self._lock:
+            if stream.viewer_count or self._streams.get(stream.key) is not stream:
+                return
+            stream.stopped = True
+            # A running tailer stays registered until its thread exits
+            # (_stream_finished reaps it again)
+            if stream.done:
+                del self._streams[stream.key]
+
+
+def format_sse(event: LogEvent) -> str:
+    """Format a log event as the SSE messages the log viewers expect."""
+    if event.kind == "line":
+        return f"id: {event.id}\ndata: {json.dumps({'log_line': event.line})}\n\n"
+    if event.kind == "skipped":
+        return f"data: {json.dumps({'skipped_lines': event.skipped})}\n\n"
+    if event.kind == "keepalive":
+        return ": keepalive\n\n"
+    if event.error:
+        return (
+            f"data: {json.dumps({'log_line': f'ERROR: {event.error}'})}\n\n"
+            f"data: {json.dumps({'status': 'completed'})}\n\n"
+        )
+    return f"data: {json.dumps({'status': 'completed'})}\n\n"
+
+
+# Global instance
+log_broker = LogBroker()
@@ -0,0 +1,316 @@
+"""
+Range access to (potentially very large) job log files.
+
+Serving the last N lines of a log used to mean ``readlines()`` on the whole
+file, and every request downloaded the log again first. This module reads
+only what is asked for:
+
+- ``tail_lines`` seeks backward from EOF block by block until it has N
+  lines;
+- ``LineIndex`` keeps the byte offset of every line start in a sidecar file
+  (``<log>.lineidx``) that is memory-mapped for lookups, so a page of lines
+  anywhere in a 10 GB log costs one seek and one bounded read. The index is
+  extended incrementally when the log grows and rebuilt if it shrank; both
+  happen under a lock per log (a thread lock plus ``flock`` on the log, for
+  other worker processes), and builds are written to a temporary file that
+  then replaces the index;
+- ``read_byte_range`` serves raw byte pages (aligned to line boundaries);
+- ``JobLogCache`` remembers where each (cluster, job) log was downloaded, so
+  repeated views within ``JOB_LOG_CACHE_TTL_SECONDS`` skip
+  ``sky.download_logs``; concurrent misses share one download.
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from config import JOB_LOG_CACHE_TTL_SECONDS
+
+INDEX_SUFFIX = ".lineidx"
+# Header: magic, format version, number of log bytes covered by the index
+_INDEX_HEADER = struct.Struct("<4sIQ")
+_INDEX_MAGIC = b"LIDX"
+_INDEX_VERSION = 1
+_OFFSET = struct.Struct("<Q")
+
+_READ_BLOCK_SIZE = 1 << 20
+_TAIL_BLOCK_SIZE = 64 << 10
+
+# Index updates are serialized per log across LineIndex instances; logs hash
+# onto a fixed set of locks so the set doesn't grow with every log viewed
+_INDEX_LOCKS = [threading.Lock() for _ in range(64)]
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
+
+
+def tail_lines(path: str, count: int, block_size: int = _TAIL_BLOCK_SIZE) -> str:
+    """
+    Last ``count`` lines of a file, reading backward from EOF.
+
+    Memory is bounded by the size of those lines, not the file.
+    """
+    if count <= 0:
+        return ""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        position = end
+        chunks: List[bytes] = []
+        newlines = 0
+        # A trailing newline ends the last line rather than starting a new one
+        if end:
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                newlines = -1
+        while position > 0 and newlines < count:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            chunk = f.read(size)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    data = b"".join(reversed(chunks))
+    lines = data.splitlines(keepends=True)
+    return _decode(b"".join(lines[-count:]))
+
+
+class LineIndex:
+    """Memory-mapped index of line start offsets for one log file"""
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self.index_path = log_path + INDEX_SUFFIX
+        self._lock = _INDEX_LOCKS[hash(self.index_path) % len(_INDEX_LOCKS)]
+
+    def refresh(self) -> Tuple[int, int]:
+        """
+        Bring the index up to date with the log file.
+
+        Returns:
+            (line_count, log_size)
+        """
+        with self._locked():
+            return self._refresh()
+
+    def read_lines(self, start_line: int, limit: int) -> Tuple[str, int]:
+        """
+        Lines ``start_line`` .. ``start_line + limit - 1`` (0-based).
+
+        Returns:
+            (text, total_lines)
+        """
+        with self._locked():
+            total, log_size = self._refresh()
+            start_line = max(0, start_line)
+            if limit <= 0 or start_line >= total:
+                return "", total
+            end_line = min(total, start_line + limit)
+            with open(self.index_path, "rb") as f, mmap.mmap(
+                f.fileno(), 0, access=mmap.ACCESS_READ
+            ) as offsets:
+                start = self._offset_at(offsets, start_line)
+                end = (
+                    self._offset_at(offsets, end_line)
+                    if end_line < total
+                    else log_size
+                )
+        with open(self.log_path, "rb") as log:
+            log.seek(start)
+            return _decode(log.read(end - start)), total
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock, open(self.log_path, "rb") as log:
+            # Other processes serving the same log take the same flock
+            fcntl.flock(log.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(log.fileno(), fcntl.LOCK_UN)
+
+    def _refresh(self) -> Tuple[int, int]:
+        # Called with the lock held
+        log_size = os.path.getsize(self.log_path)
+        indexed_size, entries = self._read_header()
+        if indexed_size is None or indexed_size > log_size:
+            entries = self._build(log_size)
+        elif indexed_size < log_size:
+            entries = self._extend(self.index_path, indexed_size, entries, log_size)
+        return self._line_count(entries, log_size), log_size
+
+    @staticmethod
+    def _offset_at(offsets: mmap.mmap, line: int) -> int:
+        return _OFFSET.unpack_from(offsets, _INDEX_HEADER.size + line * _OFFSET.size)[0]
+
+    def _read_header(self) -> Tuple[Optional[int], int]:
+        try:
+            with open(self.index_path, "rb") as f:
+                header = f.read(_INDEX_HEADER.size)
+                size = os.fstat(f.fileno()).st_size
+        except OSError:
+            return None, 0
+        if len(header) < _INDEX_HEADER.size:
+            return None, 0
+        magic, version, indexed_size = _INDEX_HEADER.unpack(header)
+        if magic != _INDEX_MAGIC or version != _INDEX_VERSION:
+            return None, 0
+        return indexed_size, (size - _INDEX_HEADER.size) // _OFFSET.size
+
+    def _build(self, log_size: int) -> int:
+        # Written aside and swapped in, so an index open elsewhere is never
+        # truncated under its reader
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            # Every file has a line starting at offset 0 (the empty file's
+            # only "line" is dropped by _line_count)
+            with open(tmp_path, "wb") as f:
+                f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, 0))
+                f.write(_OFFSET.pack(0))
+            entries = self._extend(tmp_path, 0, 1, log_size)
+            os.replace(tmp_path, self.index_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        return entries
+
+    def _extend(
+        self, index_path: str, indexed_size: int, entries: int, log_size: int
+    ) -> int:
+        # Growth is appended in place (copying the index for every new line
+        # would cost O(index)); readers hold the same lock
+        with open(self.log_path, "rb") as log, open(index_path, "r+b") as index:
+            index.seek(_INDEX_HEADER.size + entries * _OFFSET.size)
+            log.seek(indexed_size)
+            position = indexed_size
+            while position < log_size:
+                chunk = log.read(min(_READ_BLOCK_SIZE, log_size - position))
+                if not chunk:
+                    break
+                starts = []
+                found = chunk.find(b"\n")
+                while found != -1:
+                    starts.append(position + found + 1)
+                    found = chunk.find(b"\n", found + 1)
+                if starts:
+                    index.write(b"".join(_OFFSET.pack(s) for s in starts))
+                    entries += len(starts)
+                position += len(chunk)
+            # Header last: a crash mid-extend leaves a rebuildable index
+            index.flush()
+            index.seek(0)
+            index.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, position))
+        return entries
+
+    def _line_count(self, entries: int, log_size: int) -> int:
+        # The last recorded start is at EOF when the log ends with a newline
+        # (or is empty); that is not a line
+        if entries == 0:
+            return 0
+        with open(self.index_path, "rb") as f:
+            f.seek(_INDEX_HEADER.size + (entries - 1) * _OFFSET.size)
+            last_start = _OFFSET.unpack(f.read(_OFFSET.size))[0]
+        return entries - 1 if last_start >= log_size else entries
+
+
+def read_byte_range(path: str, offset: int, length: int) -> Tuple[str, int, int]:
+    """
+    Read about ``length`` bytes from ``offset``, ending on a line boundary.
+
+    The page is cut back to its last complete line, so pages never split a
+    line; a single line longer than ``length`` is returned whole.
+
+    Returns:
+        (text, next_offset, file_size); next_offset == file_size at EOF
+    """
+    size = os.path.getsize(path)
+    offset = min(max(0, offset), size)
+    if length <= 0 or offset >= size:
+        return "", offset, size
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+        if offset + len(data) < size and not data.endswith(b"\n"):
+            cut = data.rfind(b"\n")
+            if cut != -1:
+                data = data[: cut + 1]
+            else:
+                # One line longer than the page: read on to its end
+                rest = []
+                while True:
+                    block = f.readline(_READ_BLOCK_SIZE)
+                    rest.append(block)
+                    if not block or block.endswith(b"\n"):
+                        break
+                data += b"".join(rest)
+    return _decode(data), offset + len(data), size
+
+
+class JobLogCache:
+    """Where each (cluster, job) log was downloaded to, and when"""
+
+    def __init__(self, ttl_seconds: float = JOB_LOG_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (local path, fetched at)
+        self._entries: Dict[Hashable, Tuple[str, float]] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+
+    def get_path(
+        self,
+        key: Hashable,
+        download: Callable[[], str],
+        max_age: Optional[float] = None,
+    ) -> str:
+        """
+        Local path of a job's log, downloading it if the cached copy is stale.
+
+        Args:
+            key: (cluster name, job id)
+            download: Blocking function returning the freshly downloaded path
+            max_age: Override of the TTL; 0 forces a download
+
+        Returns:
+            Path of the local log file
+        """
+        max_age = self.ttl_seconds if max_age is None else max_age
+        path = self._fresh_path(key, max_age)
+        if path:
+            return path
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Someone else may have downloaded it while we waited
+            path = self._fresh_path(key, max_age)
+            if path:
+                return path
+            path = download()
+            with self._lock:
+                self._entries[key] = (path, time.monotonic())
+            return path
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _fresh_path(self, key: Hashable, max_age: float) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        path, fetched_at = entry
+        if not os.path.exists(path):
+            return None
+        if time.monotonic() - fetched_at < max_age:
+            return path
+        return None
+
+
+# Global instance
+job_log_cache = JobLogCache()
@@ -0,0 +1,355 @@
+"""
+Async adapter for blocking SkyPilot SDK calls.
+
+SkyPilot SDK calls block: ``sky.get`` waits for the API server to finish a
+request, ``sky.download_logs`` copies files from the cluster, and a cost
+report can take seconds. Called from ``async def`` routes they freeze the
+event loop, and with it every other request on the worker (terminal
+WebSockets included). Route handlers await SDK work through this adapter
+instead, which:
+
+- runs calls on a dedicated, sized thread pool
+  (``SKYPILOT_SDK_MAX_WORKERS``);
+- limits how many calls of one operation type run at once, so a burst of
+  cost reports can't take every thread from status polls;
+- applies a per-call timeout (HTTP 504 when exceeded);
+- on timeout or cancellation (e.g. the client disconnected) cancels the
+  SkyPilot requests the call submitted, see ``track_request``;
+- keeps a latency histogram and outcome counters per operation.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from config import (
+    SKYPILOT_SDK_CONCURRENCY,
+    SKYPILOT_SDK_DEFAULT_CONCURRENCY,
+    SKYPILOT_SDK_DEFAULT_TIMEOUT_SECONDS,
+    SKYPILOT_SDK_MAX_WORKERS,
+    SKYPILOT_SDK_TIMEOUTS,
+)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Built-in (concurrency, timeout seconds) per operation; overridable from config
+OPERATION_DEFAULTS: Dict[str, Tuple[int, float]] = {
+    "status": (4, 30.0),
+    "cost_report": (2, 120.0),
+    "queue": (4, 60.0),
+    "download_logs": (4, 120.0),
+    "cancel": (4, 60.0),
+    "stop": (4, 60.0),
+    "down": (4, 120.0),
+    "sync_usage": (1, 300.0),
+}
+
+_current = threading.local()
+
+
+def _parse_overrides(value: str, cast: Callable[[str], Any]) -> Dict[str, Any]:
+    """Parse ``"op=value,op=value"`` settings, ignoring malformed entries."""
+    overrides = {}
+    for item in (value or "").split(","):
+        name, sep, raw = item.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            overrides[name.strip()] = cast(raw.strip())
+        except ValueError:
+            print(f"Ignoring invalid SkyPilot SDK setting: {item!r}")
+    return overrides
+
+
+class _Call:
+    """One adapter call; collects the SkyPilot request ids it submits"""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.request_ids: List[str] = []
+        self.abandoned = False
+        self.lock = threading.Lock()
+
+
+class _OperationStats:
+    """Counters and latency histogram of one operation"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.waiting = 0
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        else:
+            self.bucket_counts[-1] += 1
+        self.latency_sum += seconds
+
+    def histogram(self) -> Dict[str, Any]:
+        # Cumulative, Prometheus style: each bucket counts calls <= its bound
+        buckets = {}
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.bucket_counts):
+            total += count
+            buckets[f"{bound:g}"] = total
+        total += self.bucket_counts[-1]
+        buckets["+Inf"] = total
+        return {"buckets": buckets, "count": total, "sum": round(self.latency_sum, 6)}
+
+
+def track_request(request_id: Any) -> Any:
+    """
+    Register a SkyPilot request id submitted by the current adapter call.
+
+    If the call times out or is cancelled, the adapter cancels the request on
+    the API server. Outside the adapter this does nothing.
+
+    Returns:
+        The request id, so it can wrap the submitting call
+    """
+    call: Optional[_Call] = getattr(_current, "call", None)
+    if call is not None and request_id:
+        with call.lock:
+            call.request_ids.append(request_id)
+            abandoned = call.abandoned
+        if abandoned:
+            # Submitted after the caller gave up; nobody will wait for it
+            _cancel_requests([request_id])
+    return request_id
+
+
+def _cancel_requests(request_ids: List[str]):
+    def cancel():
+        try:
+            import sky
+
+            sky.api_cancel(request_ids, silent=True)
+        except Exception as e:
+            print(f"Warning: Failed to cancel SkyPilot requests {request_ids}: {e}")
+
+    threading.Thread(target=cancel, daemon=True).start()
+
+
+class SkyPilotSDKAdapter:
+    """Runs blocking SkyPilot SDK calls off the event loop"""
+
+    def __init__(
+        self,
+        max_workers: int = SKYPILOT_SDK_MAX_WORKERS,
+        default_concurrency: int = SKYPILOT_SDK_DEFAULT_CONCURRENCY,
+        default_timeout_seconds: float = SKYPILOT_SDK_DEFAULT_TIMEOUT_SECONDS,
+        concurrency: Optional[Dict[str, int]] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.default_concurrency = max(1, default_concurrency)
+        self.default_timeout_seconds = default_timeout_seconds
+        self._concurrency = {op: c for op, (c, _) in OPERATION_DEFAULTS.items()}
+        self._concurrency.update(
+            _parse_overrides(SKYPILOT_SDK_CONCURRENCY, int)
+            if concurrency is None
+            else concurrency
+        )
+        self._timeouts = {op: t for op, (_, t) in OPERATION_DEFAULTS.items()}
+        self._timeouts.update(
+            _parse_overrides(SKYPILOT_SDK_TIMEOUTS, float)
+            if timeouts is None
+            else timeouts
+        )
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats: Dict[str, _OperationStats] = {}
+        # asyncio semaphores belong to one event loop; keep the loop alongside
+        self._semaphores: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = {}
+
+    def concurrency_for(self, operation: str) -> int:
+        return max(1, self._concurrency.get(operation, self.default_concurrency))
+
+    def timeout_for(self, operation: str) -> float:
+        return self._timeouts.get(operation, self.default_timeout_seconds)
+
+    async def run(
+        self,
+        operation: str,
+        fn: Callable[..., Any],
+        *args,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` on the SDK thread pool.
+
+        Args:
+            operation: Operation type (concurrency limit, timeout and metrics key)
+            fn: Blocking callable
+            timeout: Seconds to wait; defaults to the operation's timeout,
+                ``0``/``None`` in config means no limit
+
+        Returns:
+            Whatever ``fn`` returns
+
+        Raises:
+            HTTPException: 504 if the call timed out
+            Exception: Whatever ``fn`` raises
+        """
+        timeout = self.timeout_for(operation) if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore(operation, loop)
+        stats = self._stats_for(operation)
+        call = _Call(operation)
+        deadline = loop.time() + timeout if timeout else None
+
+        with self._lock:
+            stats.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self._remaining(loop, deadline))
+        except BaseException as e:
+            with self._lock:
+                stats.waiting -= 1
+                if isinstance(e, asyncio.TimeoutError):
+                    stats.timeouts += 1
+                elif isinstance(e, asyncio.CancelledError):
+                    stats.cancelled += 1
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._timeout_error(operation, timeout)
+            raise
+        with self._lock:
+            stats.waiting -= 1
+            stats.in_flight += 1
+
+        future = self._get_executor().submit(self._invoke, call, stats, fn, args, kwargs)
+
+        def release(_):
+            # Hold the slot until the thread is actually done, even if the
+            # caller stopped waiting, so abandoned calls still count
+            with self._lock:
+                stats.in_flight -= 1
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                pass  # Loop already closed; its semaphore goes with it
+
+        future.add_done_callback(release)
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), self._remaining(loop, deadline)
+            )
+        except asyncio.TimeoutError:
+            self._abandon(call, stats, timed_out=True)
+            raise self._timeout_error(operation, timeout)
+        except asyncio.CancelledError:
+            self._abandon(call, stats, timed_out=False)
+            raise
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool size plus per-operation limits, counters and latency histograms."""
+        with self._lock:
+            operations = {
+                name: {
+                    "concurrency_limit": self.concurrency_for(name),
+                    "timeout_seconds": self.timeout_for(name),
+                    "in_flight": stats.in_flight,
+                    "waiting": stats.waiting,
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "timeouts": stats.timeouts,
+                    "cancelled": stats.cancelled,
+                    "latency_seconds": stats.histogram(),
+                }
+                for name, stats in sorted(self._stats.items())
+            }
+        return {"max_workers": self.max_workers, "operations": operations}
+
+    def stop(self):
+        """Shut down the thread pool (used on application shutdown)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _invoke(self, call: _Call, stats: _OperationStats, fn, args, kwargs):
+        _current.call = call
+        started = time.monotonic()
+        failed = False
+        try:
+            return fn(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            _current.call = None
+            with self._lock:
+                stats.calls += 1
+                stats.observe(time.monotonic() - started)
+                if failed:
+                    stats.errors += 1
+
+    def _abandon(self, call: _Call, stats: _OperationStats, timed_out: bool):
+        with call.lock:
+            call.abandoned = True
+            request_ids = list(call.request_ids)
+        with self._lock:
+            if timed_out:
+                stats.timeouts += 1
+            else:
+                stats.cancelled += 1
+        if request_ids:
+            _cancel_requests(request_ids)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="skypilot-sdk"
+                )
+            return self._executor
+
+    def _semaphore(
+        self, operation: str, loop: asyncio.AbstractEventLoop
+    ) -> asyncio.Semaphore:
+        with self._lock:
+            entry = self._semaphores.get(operation)
+            if entry is None or entry[0] is not loop:
+                entry = (loop, asyncio.Semaphore(self.concurrency_for(operation)))
+                self._semaphores[operation] = entry
+            return entry[1]
+
+    def _stats_for(self, operation: str) -> _OperationStats:
+        with self._lock:
+            stats = self._stats.get(operation)
+            if stats is None:
+                stats = self._stats[operation] = _OperationStats()
+            return stats
+
+    @staticmethod
+    def _remaining(
+        loop: asyncio.AbstractEventLoop, deadline: Optional[float]
+    ) -> Optional[float]:
+        if deadline is None:
+            return None
+        return max(0.0, deadline - loop.time())
+
+    @staticmethod
+    def _timeout_error(operation: str, timeout: float) -> HTTPException:
+        return HTTPException(
+            status_code=504,
+            detail=f"SkyPilot {operation} call timed out after {timeout:g}s",
+        )
+
+
+# Global instance
+skypilot_sdk = SkyPilotSDKAdapter()
@@ -0,0 +1,236 @@
+"""
+Process-wide cache of SkyPilot cluster status records.
+
+Every dashboard poll used to issue its own ``sky.status`` round trip. This
+module keeps one shared snapshot per process instead:
+
+- reads are served from the snapshot while it is younger than the caller's
+  ``max_staleness`` (defaults to ``SKYPILOT_STATUS_TTL_SECONDS``);
+- per-cluster entries carry their own fetch timestamp, so a request for a
+  single cluster only refetches that cluster;
+- concurrent misses for the same clusters share one in-flight fetch;
+- a background thread keeps the full snapshot warm while it is being read;
+- launch/stop/down paths call ``invalidate`` so the next read is fresh.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import sky
+
+from config import (
+    SKYPILOT_STATUS_IDLE_SECONDS,
+    SKYPILOT_STATUS_REFRESH_INTERVAL_SECONDS,
+    SKYPILOT_STATUS_TTL_SECONDS,
+)
+
+# Fields stripped from status records before they are cached or returned
+_SANITIZED_FIELDS = (
+    ("credentials", lambda: None),
+    ("last_creation_yaml", lambda: ""),
+    ("last_update_yaml", lambda: ""),
+    ("handle", lambda: ""),
+    ("storage_mounts_metadata", dict),
+)
+
+
+def _sanitize_record(record):
+    for field, placeholder in _SANITIZED_FIELDS:
+        if field in record:
+            record[field] = placeholder()
+    return record
+
+
+class _Flight:
+    """A fetch in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[BaseException] = None
+
+
+class SkyPilotStatusCache:
+    """Shared, TTL-based snapshot of ``sky.status`` results"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = SKYPILOT_STATUS_TTL_SECONDS,
+        refresh_interval_seconds: float = SKYPILOT_STATUS_REFRESH_INTERVAL_SECONDS,
+        idle_seconds: float = SKYPILOT_STATUS_IDLE_SECONDS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.idle_seconds = idle_seconds
+
+        self._lock = threading.Lock()
+        self._records: Dict[str, Any] = {}
+        # Fetch time per cluster name; also set for names SkyPilot did not return
+        self._fetched_at: Dict[str, float] = {}
+        # Fetch time of the last full (unfiltered) snapshot
+        self._snapshot_at: Optional[float] = None
+        # Bumped on every invalidation so in-flight fetches don't mark stale data fresh
+        self._generation = 0
+        self._inflight: Dict[Optional[frozenset], _Flight] = {}
+        self._last_read_at = 0.0
+
+        self._refresher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def get_status(
+        self,
+        cluster_names: Optional[Iterable[str]] = None,
+        max_staleness: Optional[float] = None,
+    ) -> List[Any]:
+        """
+        Get cluster status records, fetching from SkyPilot only when needed.
+
+        Args:
+            cluster_names: Restrict the result to these clusters (all if None)
+            max_staleness: Maximum acceptable age of the data in seconds.
+                Defaults to the cache TTL; 0 forces a fresh fetch.
+
+        Returns:
+            List of status records (shallow copies, safe to mutate)
+        """
+        max_age = self.ttl_seconds if max_staleness is None else max(0.0, max_staleness)
+        self._last_read_at = time.monotonic()
+        self._ensure_refresher()
+
+        if cluster_names is None:
+            with self._lock:
+                fresh = self._is_fresh(self._snapshot_at, max_age)
+            if not fresh:
+                self._fetch(None)
+            with self._lock:
+                return [record.copy() for record in self._records.values()]
+
+        names = list(dict.fromkeys(cluster_names))
+        stale = self._stale_names(names, max_age)
+        if stale:
+            self._fetch(stale)
+        with self._lock:
+            return [self._records[n].copy() for n in names if n in self._records]
+
+    def invalidate(self, cluster_names: Optional[Iterable[str]] = None):
+        """
+        Mark cached status as stale so the next read refetches it.
+
+        Args:
+            cluster_names: Clusters to invalidate (everything if None)
+        """
+        with self._lock:
+            self._generation += 1
+            self._snapshot_at = None
+            if cluster_names is None:
+                self._fetched_at.clear()
+            else:
+                for name in cluster_names:
+                    self._fetched_at.pop(name, None)
+
+    def stop(self):
+        """Stop the background refresher (used on application shutdown)."""
+        self._stop_event.set()
+        refresher = self._refresher
+        if refresher is not None:
+            refresher.join(timeout=5)
+        self._refresher = None
+
+    def _is_fresh(self, fetched_at: Optional[float], max_age: float) -> bool:
+        return fetched_at is not None and time.monotonic() - fetched_at <= max_age
+
+    def _stale_names(self, names: List[str], max_age: float) -> List[str]:
+        with self._lock:
+            snapshot_fresh = self._is_fresh(self._snapshot_at, max_age)
+            stale = []
+            for name in names:
+                fetched_at = self._fetched_at.get(name)
+                # A cluster missing from a fresh full snapshot is known not to exist
+                if fetched_at is None and snapshot_fresh:
+                    continue
+                if not self._is_fresh(fetched_at, max_age):
+                    stale.append(name)
+            return stale
+
+    def _fetch(self, names: Optional[List[str]]):
+        """Fetch status for ``names`` (or everything), coalescing concurrent callers."""
+        key = None if names is None else frozenset(names)
+        with self._lock:
+            # A full fetch in flight answers any per-cluster miss as well
+            flight = self._inflight.get(None) or self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                generation = self._generation
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return
+
+        try:
+            records = self._query(names)
+            self._store(names, records, generation)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _query(self, names: Optional[List[str]]) -> List[Any]:
+        request_id = sky.status(
+            cluster_names=names, refresh=sky.StatusRefreshMode.AUTO
+        )
+        return sky.get(request_id)
+
+    def _store(self, names: Optional[List[str]], records: List[Any], generation: int):
+        now = time.monotonic()
+        by_name = {r["name"]: _sanitize_record(r) for r in records if r.get("name")}
+        with self._lock:
+            # Data fetched across an invalidation is kept but not marked fresh
+            fresh = generation == self._generation
+            if names is None:
+                self._records = by_name
+                self._fetched_at = {name: now for name in by_name} if fresh else {}
+                if fresh:
+                    self._snapshot_at = now
+                return
+            for name in names:
+                if name in by_name:
+                    self._records[name] = by_name[name]
+                else:
+                    self._records.pop(name, None)
+                if fresh:
+                    self._fetched_at[name] = now
+
+    def _ensure_refresher(self):
+        if self.refresh_interval_seconds <= 0 or self._refresher is not None:
+            return
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._stop_event.clear()
+            self._refresher = threading.Thread(
+                target=self._run_refresher,
+                name="skypilot-status-refresher",
+                daemon=True,
+            )
+            self._refresher.start()
+
+    def _run_refresher(self):
+        while not self._stop_event.wait(self.refresh_interval_seconds):
+            # Only keep the snapshot warm while someone is actually reading it
+            if time.monotonic() - self._last_read_at > self.idle_seconds:
+                continue
+            try:
+                self._fetch(None)
+            except Exception as e:
+                print(f"Background SkyPilot status refresh failed: {e}")
+
+
+# Global instance
+skypilot_status_cache = SkyPilotStatusCache()
@@ -1,18 +1,113 @@
+"""
+Tracking of SkyPilot requests (launch, stop, down, ...) and their lifecycle.
+
+Requests are stored as ``SkyPilotRequest`` rows when they are submitted. A
+background watcher then keeps their status current whether or not anyone is
+looking at them:
+
+- every ``SKYPILOT_REQUEST_POLL_INTERVAL_SECONDS`` it asks the SkyPilot API
+  server for the state of all pending/running requests in bulk
+  (``sky.api_status``), in chunks;
+- status transitions are written in one transaction per poll;
+- each transition is published on the ``event_bus`` topic
+  ``REQUEST_EVENTS_TOPIC``, which the status cache, the SSH GPU inventory and
+  the UI's request event stream subscribe to;
+- requests the API server no longer knows about are marked expired (outcome
+  unknown, not a failure) once they are older than
+  ``SKYPILOT_REQUEST_UNKNOWN_GRACE_SECONDS``.
+"""
+
+import json
+import threading
 import sky
-from typing import Optional, Dict, Any
-from datetime import datetime
-from config import get_db
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime, timedelta
+from config import (
+    SKYPILOT_REQUEST_POLL_INTERVAL_SECONDS,
+    SKYPILOT_REQUEST_UNKNOWN_GRACE_SECONDS,
+    SessionLocal,
+)
 from db.db_models import SkyPilotRequest, validate_relationships_before_save
+from utils.event_bus import event_bus
+from utils.skypilot_status_cache import skypilot_status_cache
 from concurrent.futures import ThreadPoolExecutor
 
 
+# Request types whose completion changes cluster status
+CLUSTER_CHANGING_TASK_TYPES = {"launch", "stop", "down", "terminate"}
+
+# Event bus topic for request status transitions
+REQUEST_EVENTS_TOPIC = "skypilot.request"
+
+ACTIVE_STATUSES = ("pending", "running")
+# The API server forgot the request before it was seen finishing
+EXPIRED_STATUS = "expired"
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", EXPIRED_STATUS)
+
+# SkyPilot API server request status -> stored status
+_SKYPILOT_STATUS_MAP = {
+    "PENDING": "pending",
+    "RUNNING": "running",
+    "SUCCEEDED": "completed",
+    "FAILED": "failed",
+    "CANCELLED": "cancelled",
+}
+
+# Request ids per sky.api_status call / per IN (...) query
+_STATUS_BATCH_SIZE = 100
+
+# (request_id, status, result, error_message)
+Transition = Tuple[str, str, Optional[Dict[str, Any]], Optional[str]]
+
+
+def _payload_field(payload: Any, name: str) -> Any:
+    if isinstance(payload, dict):
+        return payload.get(name)
+    return getattr(payload, name, None)
+
+
+def _payload_error_message(payload: Any) -> Optional[str]:
+    error = _payload_field(payload, "error")
+    if isinstance(error, str):
+        try:
+            error = json.loads(error)
+        except ValueError:
+            return error or None
+    if isinstance(error, dict):
+        return error.get("message") or error.get("type") or None
+    return str(error) if error else None
+
+
+def _invalidate_status_cache(event: Dict[str, Any]):
+    # The stored cluster name is the display name, so drop the whole
+    # status snapshot rather than trying to map it back
+    if (
+        event["status"] in TERMINAL_STATUSES
+        and event["task_type"] in CLUSTER_CHANGING_TASK_TYPES
+    ):
+        skypilot_status_cache.invalidate()
+
+
+event_bus.subscribe(REQUEST_EVENTS_TOPIC, _invalidate_status_cache)
+
+
 class SkyPilotTracker:
     """Utility class for tracking SkyPilot requests and streaming logs"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        poll_interval_seconds: float = SKYPILOT_REQUEST_POLL_INTERVAL_SECONDS,
+        unknown_grace_seconds: float = SKYPILOT_REQUEST_UNKNOWN_GRACE_SECONDS,
+    ):
+        self.poll_interval_seconds = poll_interval_seconds
+        self.unknown_grace_seconds = unknown_grace_seconds
         self._executor = ThreadPoolExecutor(
             max_workers=10, thread_name_prefix="skypilot-tracker"
         )
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
 
     def store_request(
         self,
@@ -35,7 +130,7 @@ class SkyPilotTracker:
         Returns:
             Database record ID
         """
-        db = next(get_db())
+        db = SessionLocal()
         try:
             skypilot_request = SkyPilotRequest(
                 user_id=user_id,
@@ -51,7 +146,8 @@ class SkyPilotTracker:
             
             db.add(skypilot_request)
             db.commit()
-            db.refresh(skypilot_request)
+            # Let the watcher pick it up without waiting for the next tick
+            self._wake_event.set()
             return skypilot_request.id
         except Exception as e:
             db.rollback()
@@ -72,34 +168,11 @@ class SkyPilotTracker:
 
         Args:
             request_id: SkyPilot request ID
-            status: New status (pending, completed, failed, cancelled)
+            status: New status (pending, running, completed, failed, cancelled, expired)
             result: Result data from SkyPilot
             error_message: Error message if failed
         """
-        db = next(get_db())
-        try:
-            skypilot_request = (
-                db.query(SkyPilotRequest)
-                .filter(SkyPilotRequest.request_id == request_id)
-                .first()
-            )
-
-            if skypilot_request:
-                skypilot_request.status = status
-                if result:
-                    skypilot_request.result = result
-                if error_message:
-                    skypilot_request.error_message = error_message
-                if status in ["completed", "failed", "cancelled"]:
-                    skypilot_request.completed_at = datetime.utcnow()
-
-                db.commit()
-        except Exception as e:
-            db.rollback()
-            print(f"Error updating SkyPilot request status: {e}")
-            raise
-        finally:
-            db.close()
+        self.apply_transitions([(request_id, status, result, error_message)])
 
     def get_request_by_id(self, request_id: str) -> Optional[SkyPilotRequest]:
         """
@@ -111,7 +184,7 @@ class SkyPilotTracker:
         Returns:
             SkyPilotRequest object or None if not found
         """
-        db = next(get_db())
+        db = SessionLocal()
         try:
             return (
                 db.query(SkyPilotRequest)
@@ -140,7 +213,7 @@ class SkyPilotTracker:
         Returns:
             List of SkyPilotRequest objects
         """
-        db = next(get_db())
+        db = SessionLocal()
         try:
             query = db.query(SkyPilotRequest).filter(
                 SkyPilotRequest.user_id == user_id,
@@ -245,6 +318,172 @@ class SkyPilotTracker:
             print(f"Error cancelling request {request_id}: {e}")
             return False
 
+    def apply_transitions(self, transitions: List[Transition]) -> List[Dict[str, Any]]:
+        """
+        Write status transitions in one transaction and publish them.
+
+        Transitions that don't change a request's status, result or error are
+        skipped.
+
+        Args:
+            transitions: (request_id, status, result, error_message) tuples
+
+        Returns:
+            The published transition events
+        """
+        if not transitions:
+            return []
+        latest = {t[0]: t for t in transitions}
+        events = []
+        db = SessionLocal()
+        try:
+            ids = list(latest)
+            rows = []
+            for start in range(0, len(ids), _STATUS_BATCH_SIZE):
+                rows.extend(
+                    db.query(SkyPilotRequest)
+                    .filter(
+                        SkyPilotRequest.request_id.in_(
+                            ids[start : start + _STATUS_BATCH_SIZE]
+                        )
+                    )
+                    .all()
+                )
+
+            now = datetime.utcnow()
+            for skypilot_request in rows:
+                _, status, result, error_message = latest[skypilot_request.request_id]
+                previous_status = skypilot_request.status
+                if (
+                    status == previous_status
+                    and not result
+                    and (not error_message or error_message == skypilot_request.error_message)
+                ):
+                    continue
+                skypilot_request.status = status
+                if result:
+                    skypilot_request.result = result
+                if error_message:
+                    skypilot_request.error_message = error_message
+                if status in TERMINAL_STATUSES and skypilot_request.completed_at is None:
+                    skypilot_request.completed_at = now
+                events.append(
+                    {
+                        "request_id": skypilot_request.request_id,
+                        "task_type": skypilot_request.task_type,
+                        "cluster_name": skypilot_request.cluster_name,
+                        "user_id": skypilot_request.user_id,
+                        "organization_id": skypilot_request.organization_id,
+                        "previous_status": previous_status,
+                        "status": status,
+                        "error_message": skypilot_request.error_message,
+                        "completed_at": skypilot_request.completed_at.isoformat()
+                        if skypilot_request.completed_at
+                        else None,
+                    }
+                )
+            if events:
+                db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error updating SkyPilot request status: {e}")
+            raise
+        finally:
+            db.close()
+
+        for event in events:
+            event_bus.publish(REQUEST_EVENTS_TOPIC, event)
+        return events
+
+    def refresh_requests(
+        self, request_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Sync stored request status with the SkyPilot API server.
+
+        Args:
+            request_ids: Requests to refresh; all pending/running ones if None
+
+        Returns:
+            The published transition events
+        """
+        db = SessionLocal()
+        try:
+            query = db.query(SkyPilotRequest.request_id, SkyPilotRequest.created_at)
+            if request_ids is None:
+                query = query.filter(SkyPilotRequest.status.in_(ACTIVE_STATUSES))
+            else:
+                query = query.filter(SkyPilotRequest.request_id.in_(request_ids))
+            tracked = dict(query.all())
+        finally:
+            db.close()
+        if not tracked:
+            return []
+
+        transitions: List[Transition] = []
+        seen = set()
+        ids = list(tracked)
+        for start in range(0, len(ids), _STATUS_BATCH_SIZE):
+            chunk = ids[start : start + _STATUS_BATCH_SIZE]
+            for payload in sky.api_status(request_ids=chunk, all_status=True):
+                request_id = _payload_field(payload, "request_id")
+                raw_status = _payload_field(payload, "status")
+                raw_status = getattr(raw_status, "value", raw_status)
+                status = _SKYPILOT_STATUS_MAP.get(str(raw_status).upper())
+                if request_id not in tracked or status is None:
+                    continue
+                seen.add(request_id)
+                error_message = (
+                    _payload_error_message(payload) if status == "failed" else None
+                )
+                transitions.append((request_id, status, None, error_message))
+
+        # The API server forgets old requests; don't watch those forever. Their
+        # outcome is unknown, so they expire rather than fail
+        cutoff = datetime.utcnow() - timedelta(seconds=self.unknown_grace_seconds)
+        for request_id, created_at in tracked.items():
+            if request_id not in seen and created_at is not None and created_at < cutoff:
+                transitions.append(
+                    (
+                        request_id,
+                        EXPIRED_STATUS,
+                        None,
+                        "Request not found on the SkyPilot API server",
+                    )
+                )
+        return self.apply_transitions(transitions)
+
+    def start(self):
+        """Start the background lifecycle watcher."""
+        if self.poll_interval_seconds <= 0:
+            return
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._stop_event.clear()
+            self._watcher = threading.Thread(
+                target=self._run_watcher, name="skypilot-request-watcher", daemon=True
+            )
+            self._watcher.start()
+
+    def stop(self):
+        """Stop the background lifecycle watcher (used on application shutdown)."""
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+        self._stop_event.set()
+        self._wake_event.set()
+        if watcher is not None:
+            watcher.join(timeout=5)
+
+    def _run_watcher(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh_requests()
+            except Exception as e:
+                print(f"SkyPilot request watcher poll failed: {e}")
+            self._wake_event.wait(self.poll_interval_seconds)
+            self._wake_event.clear()
+
 
 # Global instance
 skypilot_tracker = SkyPilotTracker()
@@ -0,0 +1,366 @@
+"""
+Pool of multiplexed upstream SSH connections to cluster head nodes.
+
+The web terminal and the SSH proxy used to run a separate ``ssh <cluster>``
+for every session, each doing a full handshake and key exchange, so ten shells
+on one cluster cost ten handshakes. Sessions now go through OpenSSH
+ControlMaster connections kept per (cluster, user):
+
+- ``acquire`` hands out a lease whose ``command`` is an ``ssh`` invocation
+  that opens a new channel on an existing master connection (milliseconds),
+  starting the master first if there is none;
+- a master carries at most ``max_sessions`` sessions (sshd's ``MaxSessions``
+  defaults to 10) and a cluster gets at most ``max_connections_per_cluster``
+  masters; past that, sessions fall back to their own connection, as they
+  do when a master can't be started;
+- masters are health checked (``ssh -O check``) before reuse once their last
+  check is older than ``health_check_seconds``, and closed after
+  ``idle_seconds`` without sessions.
+
+The pool only uses the standard library and no application config, so both
+the API and the separately run SSH proxy can keep one.
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# How often a starting master is polled for its control socket
+_CONNECT_POLL_SECONDS = 0.05
+
+
+class _Master:
+    """One ControlMaster connection"""
+
+    def __init__(self, key: Tuple[str, str], control_path: str):
+        self.key = key
+        self.control_path = control_path
+        self.process: Optional[subprocess.Popen] = None
+        self.sessions = 0
+        self.idle_since = time.monotonic()
+        self.checked_at = 0.0
+        self.closed = False
+
+    @property
+    def destination(self) -> str:
+        return self.key[0]
+
+
+class SSHLease:
+    """A session's claim on a pooled connection; release it when the session ends"""
+
+    def __init__(
+        self,
+        command: List[str],
+        pool: Optional["SSHConnectionPool"] = None,
+        master: Optional[_Master] = None,
+    ):
+        self.command = command
+        self._pool = pool
+        self._master = master
+        self._released = False
+
+    @property
+    def multiplexed(self) -> bool:
+        return self._master is not None
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        if self._pool is not None and self._master is not None:
+            self._pool._release(self._master)
+
+
+class SSHConnectionPool:
+    """ControlMaster connections per (cluster, user)"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        idle_seconds: float = 300,
+        health_check_seconds: float = 30,
+        max_sessions: int = 10,
+        max_connections_per_cluster: int = 4,
+        connect_timeout_seconds: float = 20,
+        retry_seconds: float = 30,
+        ssh_binary: str = "ssh",
+    ):
+        self.enabled = enabled
+        self.idle_seconds = idle_seconds
+        self.health_check_seconds = health_check_seconds
+        self.max_sessions = max(1, max_sessions)
+        self.max_connections_per_cluster = max(1, max_connections_per_cluster)
+        self.connect_timeout_seconds = connect_timeout_seconds
+        self.retry_seconds = retry_seconds
+        self.ssh_binary = ssh_binary
+        self._lock = threading.Lock()
+        # Serializes master startup per key, so concurrent first sessions
+        # share the connection the first one opens
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._masters: Dict[Tuple[str, str], List[_Master]] = {}
+        # key -> monotonic time until which no master is attempted
+        self._failed_until: Dict[Tuple[str, str], float] = {}
+        # destination -> masters being connected, counted against the cap
+        self._connecting: Dict[str, int] = {}
+        self._socket_dir: Optional[str] = None
+        self._stopped = False
+
+    def direct_command(self, destination: str) -> List[str]:
+        """``ssh`` command for a session with its own connection."""
+        return [self.ssh_binary, destination]
+
+    def acquire(self, destination: str, user_id: Optional[str] = None) -> SSHLease:
+        """
+        Lease a session on a pooled connection to ``destination``.
+
+        Blocks while a new master connection is established (callers on an
+        event loop should run it in an executor).
+
+        Args:
+            destination: ``ssh`` destination (the cluster's host alias)
+            user_id: User the session is for; connections aren't shared
+                between users
+
+        Returns:
+            SSHLease; its command falls back to a direct connection when
+            pooling is disabled, at capacity or failing
+        """
+        key = (destination, user_id or "")
+        if not self.enabled or self._stopped:
+            return SSHLease(self.direct_command(destination))
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            master = self._claim_existing(key)
+            if master is None:
+                master = self._claim_new(key)
+        if master is None:
+            return SSHLease(self.direct_command(destination))
+        return SSHLease(self._control_args(master), self, master)
+
+    def metrics(self) -> Dict[str, int]:
+        """Open master connections and the sessions on them."""
+        with self._lock:
+            masters = [m for ms in self._masters.values() for m in ms]
+        return {
+            "connections": len(masters),
+            "sessions": sum(m.sessions for m in masters),
+        }
+
+    def stop(self):
+        """Close all master connections (used on shutdown)."""
+        with self._lock:
+            self._stopped = True
+            masters = [m for ms in self._masters.values() for m in ms]
+            self._masters = {}
+        for master in masters:
+            self._close(master)
+        if self._socket_dir:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+
+    def _claim_existing(self, key: Tuple[str, str]) -> Optional[_Master]:
+        with self._lock:
+            candidates = [
+                m for m in self._masters.get(key, []) if m.sessions < self.max_sessions
+            ]
+        for master in candidates:
+            if not self._healthy(master):
+                self._discard(master)
+                continue
+            with self._lock:
+                if master.closed or master.sessions >= self.max_sessions:
+                    continue
+                master.sessions += 1
+                return master
+        return None
+
+    def _claim_new(self, key: Tuple[str, str]) -> Optional[_Master]:
+        destination = key[0]
+        with self._lock:
+            if self._failed_until.get(key, 0) > time.monotonic():
+                return None
+            on_cluster = self._connecting.get(destination, 0) + sum(
+                len(ms) for k, ms in self._masters.items() if k[0] == destination
+            )
+            if on_cluster >= self.max_connections_per_cluster:
+                return None
+            # Hold the slot while connecting; other users' keys don't share
+            # the key lock
+            self._connecting[destination] = self._connecting.get(destination, 0) + 1
+            master = _Master(key, self._control_path(key))
+        try:
+            connected = self._connect(master)
+        except BaseException:
+            with self._lock:
+                self._unreserve(destination)
+            raise
+        with self._lock:
+            self._unreserve(destination)
+            if not connected:
+                self._failed_until[key] = time.monotonic() + self.retry_seconds
+                return None
+            if not self._stopped:
+                self._failed_until.pop(key, None)
+                master.sessions = 1
+                self._masters.setdefault(key, []).append(master)
+                return master
+        self._close(master)
+        return None
+
+    def _unreserve(self, destination: str):
+        # Called with the lock held
+        remaining = self._connecting.get(destination, 0) - 1
+        if remaining > 0:
+            self._connecting[destination] = remaining
+        else:
+            self._connecting.pop(destination, None)
+
+    def _release(self, master: _Master):
+        with self._lock:
+            master.sessions = max(0, master.sessions - 1)
+            if master.sessions or master.closed:
+                return
+            master.idle_since = time.monotonic()
+        if self.idle_seconds <= 0:
+            self._reap(master)
+            return
+        timer = threading.Timer(self.idle_seconds, self._reap, args=(master,))
+        timer.daemon = True
+        timer.start()
+
+    def _reap(self, master: _Master):
+        with self._lock:
+            if (
+                master.closed
+                or master.sessions
+                or time.monotonic() - master.idle_since < self.idle_seconds
+            ):
+                return
+            self._remove(master)
+        self._close(master)
+
+    def _discard(self, master: _Master):
+        with self._lock:
+            self._remove(master)
+        self._close(master)
+
+    def _remove(self, master: _Master):
+        # Called with the lock held; a removed master is never claimed again
+        master.closed = True
+        masters = self._masters.get(master.key, [])
+        if master in masters:
+            masters.remove(master)
+        if not masters:
+            self._masters.pop(master.key, None)
+
+    def _healthy(self, master: _Master) -> bool:
+        if master.closed or master.process is None or master.process.poll() is not None:
+            return False
+        if time.monotonic() - master.checked_at < self.health_check_seconds:
+            return True
+        try:
+            result = subprocess.run(
+                self._control_args(master, "-O", "check"),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=5,
+            )
+        except Exception:
+            return False
+        if result.returncode != 0:
+            return False
+        master.checked_at = time.monotonic()
+        return True
+
+    def _connect(self, master: _Master) -> bool:
+        try:
+            master.process = subprocess.Popen(
+                [
+                    self.ssh_binary,
+                    "-M",
+                    "-N",
+                    "-o", "ControlMaster=yes",
+                    "-o", f"ControlPath={master.control_path}",
+                    "-o", "ControlPersist=no",
+                    # No terminal to prompt on; key authentication only
+                    "-o", "BatchMode=yes",
+                    "-o", "ServerAliveInterval=30",
+                    master.destination,
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        except Exception as e:
+            print(f"Failed to start SSH master for {master.destination}: {e}")
+            return False
+        deadline = time.monotonic() + self.connect_timeout_seconds
+        # The control socket appears once the connection is authenticated
+        while time.monotonic() < deadline:
+            if os.path.exists(master.control_path):
+                master.checked_at = time.monotonic()
+                return True
+            if master.process.poll() is not None:
+                break
+            time.sleep(_CONNECT_POLL_SECONDS)
+        print(f"SSH master connection to {master.destination} failed")
+        self._close(master)
+        return False
+
+    def _close(self, master: _Master):
+        master.closed = True
+        process = master.process
+        if process is None:
+            return
+        if process.poll() is None:
+            try:
+                subprocess.run(
+                    self._control_args(master, "-O", "exit"),
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    timeout=5,
+                )
+            except Exception:
+                pass
+            try:
+                process.terminate()
+                process.wait(timeout=5)
+            except Exception:
+                pass
+        try:
+            os.unlink(master.control_path)
+        except OSError:
+            pass
+
+    def _control_args(self, master: _Master, *args: str) -> List[str]:
+        return [
+            self.ssh_binary,
+            "-o", "ControlMaster=no",
+            "-o", f"ControlPath={master.control_path}",
+            *args,
+            master.destination,
+        ]
+
+    def _control_path(self, key: Tuple[str, str]) -> str:
+        # Unix socket paths are short (~104 bytes), so names are hashed into
+        # a private directory
+        if self._socket_dir is None:
+            self._socket_dir = tempfile.mkdtemp(prefix="lattice-ssh-")
+        digest = hashlib.sha1("\0".join(key).encode()).hexdigest()[:16]
+        suffix = 0
+        while True:
+            path = os.path.join(self._socket_dir, f"{digest}-{suffix}.sock")
+            if not os.path.exists(path) and not any(
+                m.control_path == path for ms in self._masters.values() for m in ms
+            ):
+                return path
+            suffix += 1
@@ -0,0 +1,220 @@
+"""
+Indexed, in-memory view of SkyPilot's VM catalogs.
+
+SkyPilot's ``read_catalog`` re-reads the CSV on every call, and the cloud
+helpers then scanned the frame row by row (``iterrows``/``df.copy()``) on every
+request. ``get_vm_catalog`` parses each catalog file once per file version
+(mtime and size; a changed file is reloaded on the next call) into a
+``VMCatalog`` that keeps:
+
+- the catalog columns as arrays, and the rows as plain dicts;
+- first-row indexes by instance type, instance type + region,
+  accelerator name + count, and CPU shape (vCPUs, memory);
+- memoized derived views (e.g. provider display options), built on first use.
+"""
+
+import math
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# Columns that may hold an instance's accelerator count / accelerator name
+_ACCELERATOR_COUNT_COLUMNS = (
+    "AcceleratorCount",
+    "GPUs",
+    "GpuCount",
+    "GPUCount",
+    "NumAccelerators",
+    "num_accelerators",
+)
+_ACCELERATOR_NAME_COLUMNS = ("AcceleratorName", "GPU", "Gpu", "Accelerator")
+
+
+def _is_nan(value) -> bool:
+    return str(value).lower() == "nan"
+
+
+def _number_key(value) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def _distinct_sorted(values, header: str) -> List[str]:
+    distinct = set()
+    for value in values:
+        value = str(value).strip()
+        # Skip NaN/empty values and stray header rows
+        if value and value != header and value.lower() != "nan":
+            distinct.add(value)
+    return sorted(distinct)
+
+
+class VMCatalog:
+    """One parsed catalog file with lookup indexes"""
+
+    def __init__(self, df: pd.DataFrame, version: Any = None):
+        self.version = version
+        self.columns = set(df.columns)
+        self.records: List[Dict[str, Any]] = df.to_dict("records")
+        self.arrays = {column: df[column].to_numpy() for column in df.columns}
+
+        self._by_instance_type: Dict[str, int] = {}
+        self._by_instance_type_region: Dict[Tuple[str, str], int] = {}
+        self._by_accelerator: Dict[Tuple[Any, float], int] = {}
+        self._cpu_by_shape: Dict[Tuple[float, float], int] = {}
+        self._cpu_by_vcpus: Dict[float, int] = {}
+        self._build_indexes()
+
+        self.instance_types = _distinct_sorted(
+            self.arrays.get("InstanceType", ()), "InstanceType"
+        )
+        self.regions = _distinct_sorted(self.arrays.get("Region", ()), "Region")
+
+        self._derived: Dict[str, Any] = {}
+        self._derived_lock = threading.Lock()
+
+    def _build_indexes(self):
+        instance_types = self.arrays.get("InstanceType")
+        regions = self.arrays.get("Region")
+        names = self.arrays.get("AcceleratorName")
+        counts = self.arrays.get("AcceleratorCount")
+        vcpus = self.arrays.get("vCPUs")
+        memory = self.arrays.get("MemoryGiB")
+
+        # setdefault keeps the first matching row, like ``rows.iloc[0]``
+        for i in range(len(self.records)):
+            if instance_types is not None:
+                instance_type = str(instance_types[i])
+                self._by_instance_type.setdefault(instance_type, i)
+                if regions is not None:
+                    self._by_instance_type_region.setdefault(
+                        (instance_type, str(regions[i])), i
+                    )
+            if names is None:
+                continue
+            name = names[i]
+            if isinstance(name, str) and name != "" and name.lower() != "nan":
+                count = _number_key(counts[i]) if counts is not None else None
+                if count is not None:
+                    self._by_accelerator.setdefault((name, count), i)
+            elif vcpus is not None and (isinstance(name, str) or pd.isna(name)):
+                # No accelerator: a CPU instance
+                cpu_count = _number_key(vcpus[i])
+                if cpu_count is None:
+                    continue
+                self._cpu_by_vcpus.setdefault(cpu_count, i)
+                memory_gib = _number_key(memory[i]) if memory is not None else None
+                if memory_gib is not None:
+                    self._cpu_by_shape.setdefault((cpu_count, memory_gib), i)
+
+    def row(self, instance_type: str, region: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        First catalog row for an instance type.
+
+        Args:
+            instance_type: Instance type to look up
+            region: Prefer a row in this region; falls back to any region
+
+        Returns:
+            The row as a dict, or None if the instance type is unknown
+        """
+        index = None
+        if region:
+            index = self._by_instance_type_region.get((str(instance_type), str(region)))
+        if index is None:
+            index = self._by_instance_type.get(str(instance_type))
+        return None if index is None else self.records[index]
+
+    def price(self, instance_type: str, region: Optional[str] = None) -> Optional[float]:
+        """Hourly price of an instance type (optionally in a region), or None."""
+        row = self.row(instance_type, region)
+        if row is None:
+            return None
+        price = row.get("Price")
+        try:
+            return float(price) if price is not None and not _is_nan(price) else None
+        except Exception:
+            return None
+
+    def gpu_count(self, instance_type: str) -> int:
+        """Accelerator count of an instance type; 0 for CPU-only or unknown types."""
+        row = self.row(instance_type)
+        if row is None:
+            return 0
+        for key in _ACCELERATOR_COUNT_COLUMNS:
+            if key in row and not _is_nan(row[key]):
+                try:
+                    return max(0, int(float(row[key])))
+                except Exception:
+                    continue
+        # If accelerator name exists and is non-empty, assume 1 GPU
+        for key in _ACCELERATOR_NAME_COLUMNS:
+            if key in row and str(row[key]).strip().lower() not in ("", "nan", "none"):
+                return 1
+        return 0
+
+    def accelerator_instance_type(self, accelerator_name: str, count: float) -> Optional[Any]:
+        """First instance type offering ``count`` x ``accelerator_name``."""
+        index = self._by_accelerator.get((accelerator_name, float(count)))
+        return None if index is None else self.records[index]["InstanceType"]
+
+    def cpu_instance_type(self, vcpus: float, memory_gib: Optional[float] = None) -> Optional[Any]:
+        """First accelerator-less instance type with this many vCPUs (and memory)."""
+        if memory_gib is None:
+            index = self._cpu_by_vcpus.get(float(vcpus))
+        else:
+            index = self._cpu_by_shape.get((float(vcpus), float(memory_gib)))
+        return None if index is None else self.records[index]["InstanceType"]
+
+    def derived(self, key: str, build: Callable[["VMCatalog"], Any]) -> Any:
+        """
+        Memoize a view computed from this catalog (rebuilt when the file changes).
+
+        Args:
+            key: Name of the view
+            build: Called once with this catalog to compute the view
+        """
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = build(self)
+            return self._derived[key]
+
+
+_catalogs: Dict[str, VMCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def _file_version(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_vm_catalog(filename: str) -> VMCatalog:
+    """
+    Get the indexed catalog for a SkyPilot catalog file (e.g. "azure/vms.csv").
+
+    The file is parsed only when it is first requested or has changed since.
+    """
+    from sky.catalog import common as catalog_common
+
+    path = catalog_common.get_catalog_path(filename)
+    version = _file_version(path)
+    with _catalogs_lock:
+        catalog = _catalogs.get(filename)
+    if catalog is not None and version is not None and catalog.version == version:
+        return catalog
+
+    # read_catalog downloads the file if it is missing; copy() forces the lazy load
+    df = catalog_common.read_catalog(filename).copy()
+    catalog = VMCatalog(df, version=_file_version(path))
+    with _catalogs_lock:
+        _catalogs[filename] = catalog
+    return catalog
@@ -0,0 +1,112 @@
+"""Micro-benchmark: in-process GPU probe vs. the ``sky show-gpus`` subprocess path.
+
+Run from the repo root:
+
+    python tests/benchmarks/bench_gpu_probe.py [--nodes 64] [--repeat 5]
+    python tests/benchmarks/bench_gpu_probe.py --live <ssh-node-pool>
+
+Offline, the "subprocess" side pays what every refresh used to: starting a
+Python process that imports SkyPilot (as the ``sky`` CLI does), then scraping
+a show-gpus table for a pool of --nodes nodes. The "probe" side builds the
+typed inventory from equivalent SDK results. With --live, both paths query a
+real SSH node pool through the API server. Not collected by pytest.
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src" / "lattice"))
+
+from utils.gpu_probe import (  # noqa: E402
+    build_inventory,
+    parse_show_gpus_output,
+    probe_node_pool,
+)
+
+
+def make_sdk_results(nodes: int):
+    availability = [
+        SimpleNamespace(gpu="A100", counts=[1, 2, 4, 8], capacity=nodes * 8, available=nodes * 4)
+    ]
+    node_info = {
+        f"10.0.{i // 256}.{i % 256}": SimpleNamespace(
+            accelerator_type="A100",
+            total={"accelerator_count": 8},
+            free={"accelerators_available": 4},
+        )
+        for i in range(nodes)
+    }
+    return availability, {"node_info_dict": node_info}
+
+
+def make_show_gpus_output(pool: str, nodes: int) -> str:
+    lines = [
+        f"SSH Node Pool: {pool}",
+        "GPU   REQUESTABLE_QTY_PER_NODE  UTILIZATION",
+        f"A100  1, 2, 4, 8                {nodes * 4} of {nodes * 8} free",
+        "",
+        "SSH Node Pool per-node GPU availability",
+        "NODE_POOL  NODE          GPU   UTILIZATION",
+    ]
+    for i in range(nodes):
+        lines.append(f"{pool}      10.0.{i // 256}.{i % 256}    A100  4 of 8 free")
+    return "\n".join(lines)
+
+
+def timed(label, fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    per_call = (time.perf_counter() - start) / repeat
+    print(f"  {label:<12} {per_call * 1e3:10.2f} ms/call")
+    return per_call, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--live", metavar="POOL", help="Benchmark against a real SSH node pool")
+    args = parser.parse_args()
+
+    if args.live:
+        pool = args.live
+
+        def subprocess_path():
+            out = subprocess.run(
+                ["sky", "show-gpus", "--infra", f"ssh/{pool}"],
+                capture_output=True,
+                text=True,
+            ).stdout
+            return parse_show_gpus_output(out, pool)
+
+        def probe_path():
+            return probe_node_pool(pool).to_dict()
+
+    else:
+        pool = "bench"
+        availability, node_info = make_sdk_results(args.nodes)
+        output = make_show_gpus_output(pool, args.nodes)
+        assert build_inventory(pool, availability, node_info).to_dict() == parse_show_gpus_output(output, pool)
+
+        def subprocess_path():
+            subprocess.run([sys.executable, "-c", "import sky; from sky.client import sdk"], check=True)
+            return parse_show_gpus_output(output, pool)
+
+        def probe_path():
+            return build_inventory(pool, availability, node_info).to_dict()
+
+    print(f"GPU inventory for pool {pool!r}")
+    subprocess_time, subprocess_result = timed("subprocess", subprocess_path, args.repeat)
+    probe_time, probe_result = timed("probe", probe_path, args.repeat)
+    print(f"  speedup      {subprocess_time / probe_time:10.0f}x")
+    if subprocess_result != probe_result:
+        print("  note: results differ (table layout and SDK data disagree)")
+
+
+if __name__ == "__main__":
+    main()
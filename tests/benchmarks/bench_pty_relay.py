@@ -0,0 +1,137 @@
+"""Throughput benchmark: web terminal PTY relay vs. the previous executor reader.
+
+Run from the repo root:
+
+    python tests/benchmarks/bench_pty_relay.py [--mb 64] [--line-bytes 120]
+
+A child process writes ``--mb`` MiB of training-log-like lines into a local
+PTY. The "executor" side reproduces the old WebSocket reader:
+``run_in_executor(os.read, 1024)``, a 50 ms sleep on ``BlockingIOError`` and a
+base64 text frame per chunk. The relay side runs PtyRelay with binary frames,
+with and without deflate. Frames go to an in-memory sink that only counts
+messages and wire bytes. Not collected by pytest.
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import pty
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src" / "lattice"))
+
+from routes.terminal.relay import FrameCodec, PtyRelay  # noqa: E402
+
+WRITER = """
+import sys
+line = ("epoch 3 step %08d loss 0.4182 lr 3e-4 " + "x" * {pad} + "\\n")
+remaining = {total}
+i = 0
+out = sys.stdout.buffer
+while remaining > 0:
+    chunk = "".join(line % (i + j) for j in range(256)).encode()[:remaining]
+    out.write(chunk)
+    remaining -= len(chunk)
+    i += 256
+out.flush()
+"""
+
+
+class Sink:
+    def __init__(self):
+        self.messages = 0
+        self.wire_bytes = 0
+
+    def send(self, frame):
+        self.messages += 1
+        self.wire_bytes += len(frame)
+
+
+def spawn(total, line_bytes):
+    master_fd, slave_fd = pty.openpty()
+    code = WRITER.format(pad=max(0, line_bytes - 40), total=total)
+    process = subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdin=slave_fd,
+        stdout=slave_fd,
+        stderr=slave_fd,
+        close_fds=True,
+    )
+    os.close(slave_fd)
+    os.set_blocking(master_fd, False)
+    return master_fd, process
+
+
+async def executor_reader(master_fd, sink):
+    loop = asyncio.get_event_loop()
+    relayed = 0
+    while True:
+        try:
+            data = await loop.run_in_executor(None, os.read, master_fd, 1024)
+            if not data:
+                await asyncio.sleep(0.05)
+                continue
+            relayed += len(data)
+            sink.send(base64.b64encode(data).decode("utf-8"))
+        except BlockingIOError:
+            await asyncio.sleep(0.05)
+        except OSError:
+            break
+    return relayed
+
+
+async def relay_reader(master_fd, sink, compress):
+    codec = FrameCodec(protocol="binary", compress=compress)
+    relayed = 0
+
+    async def send(data):
+        nonlocal relayed
+        relayed += len(data)
+        sink.send(codec.encode(data))
+
+    await PtyRelay(master_fd, send).run()
+    return relayed
+
+
+def run_case(label, reader, total, line_bytes):
+    master_fd, process = spawn(total, line_bytes)
+    sink = Sink()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        relayed = asyncio.run(reader(master_fd, sink))
+    finally:
+        os.close(master_fd)
+        process.wait()
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    print(
+        f"  {label:<10} {relayed / elapsed / 2**20:8.1f} MiB/s  "
+        f"{sink.messages:8d} msgs  {sink.wire_bytes / relayed:5.2f}x wire  "
+        f"{cpu / elapsed * 100:5.0f}% cpu"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=int, default=64)
+    parser.add_argument("--line-bytes", type=int, default=120)
+    args = parser.parse_args()
+    total = args.mb * 2**20
+
+    print(f"{args.mb} MiB of {args.line_bytes}-byte lines through a local PTY")
+    run_case("executor", executor_reader, total, args.line_bytes)
+    run_case(
+        "binary", lambda fd, sink: relay_reader(fd, sink, False), total, args.line_bytes
+    )
+    run_case(
+        "deflate", lambda fd, sink: relay_reader(fd, sink, True), total, args.line_bytes
+    )
+
+
+if __name__ == "__main__":
+    main()
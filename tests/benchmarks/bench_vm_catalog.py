@@ -0,0 +1,125 @@
+"""Micro-benchmark: indexed VMCatalog vs. the previous per-request catalog scans.
+
+Run from the repo root:
+
+    python tests/benchmarks/bench_vm_catalog.py [--rows 5000] [--repeat 50]
+
+The "scan" side reproduces what each helper did before: SkyPilot's
+``read_catalog`` re-reads the CSV on every call, then the frame is filtered or
+walked with ``iterrows``. The "indexed" side is a lookup on a loaded VMCatalog.
+Not collected by pytest.
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "src" / "lattice"))
+
+from utils.vm_catalog import VMCatalog  # noqa: E402
+
+
+def make_catalog_csv(rows: int, path: str):
+    rng = random.Random(0)
+    gpus = ["A100", "A100-80GB", "H100", "L4", "RTX 4090", "RTX A6000"]
+    data = []
+    for i in range(rows):
+        gpu = rng.choice(gpus + [None] * 2)
+        data.append(
+            {
+                "InstanceType": f"Standard_{i % (rows // 4 or 1)}",
+                "AcceleratorName": gpu,
+                "AcceleratorCount": rng.choice([1, 2, 4, 8]) if gpu else None,
+                "vCPUs": rng.choice([2, 4, 8, 16, 32]),
+                "MemoryGiB": rng.choice([8, 16, 32, 64, 128]),
+                "Price": round(rng.uniform(0.1, 30), 3),
+                "Region": rng.choice(["eastus", "westus", "westeurope", "japaneast"]),
+            }
+        )
+    pd.DataFrame(data).to_csv(path, index=False)
+
+
+def scan_price(path, instance_type, region):
+    df = pd.read_csv(path)
+    base = df.copy()
+    base["InstanceType"] = base["InstanceType"].astype(str)
+    subset = base[base["InstanceType"] == str(instance_type)]
+    tmp = subset.copy()
+    tmp["Region"] = tmp["Region"].astype(str)
+    tmp = tmp[tmp["Region"] == str(region)]
+    if len(tmp) > 0:
+        subset = tmp
+    return float(subset.iloc[0]["Price"]) if len(subset) else None
+
+
+def scan_regions(path):
+    df = pd.read_csv(path)
+    regions = set()
+    for _, row in df.iterrows():
+        region = str(row.get("Region", "")).strip()
+        if region and region.lower() != "nan":
+            regions.add(region)
+    return sorted(regions)
+
+
+def scan_gpu_instance(path, name, count):
+    df = pd.read_csv(path)
+    rows = df[(df["AcceleratorName"] == name) & (df["AcceleratorCount"] == count)]
+    return rows.iloc[0]["InstanceType"] if not rows.empty else None
+
+
+def timed(label, fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    per_call = (time.perf_counter() - start) / repeat
+    print(f"  {label:<10} {per_call * 1e6:12.1f} us/call")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/vms.csv"
+        make_catalog_csv(args.rows, path)
+
+        start = time.perf_counter()
+        catalog = VMCatalog(pd.read_csv(path))
+        print(f"VMCatalog load ({args.rows} rows): {(time.perf_counter() - start) * 1e3:.1f} ms (once per catalog version)")
+
+        cases = [
+            (
+                "price(instance_type, region)",
+                lambda: scan_price(path, "Standard_7", "westus"),
+                lambda: catalog.price("Standard_7", "westus"),
+            ),
+            (
+                "regions",
+                lambda: scan_regions(path),
+                lambda: list(catalog.regions),
+            ),
+            (
+                "instance type by accelerator",
+                lambda: scan_gpu_instance(path, "H100", 8),
+                lambda: catalog.accelerator_instance_type("H100", 8),
+            ),
+        ]
+        for name, scan, indexed in cases:
+            assert scan() == indexed(), name
+            print(name)
+            scan_time = timed("scan", scan, max(1, args.repeat // 10))
+            indexed_time = timed("indexed", indexed, args.repeat * 100)
+            print(f"  speedup    {scan_time / indexed_time:12.0f}x")
+
+
+if __name__ == "__main__":
+    main()
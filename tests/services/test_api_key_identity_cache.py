@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+
+def _identity(key_id):
+    return {"id": "user_1", "api_key_id": key_id, "scopes": ["compute:write"]}
+
+
+def test_put_get_returns_copies_and_honours_key_expiry():
+    from lattice.services.api_keys.identity_cache import APIKeyIdentityCache
+
+    cache = APIKeyIdentityCache(ttl_seconds=60, flush_interval_seconds=0)
+    cache.put("h1", _identity("k1"), None, cache.generation())
+
+    got = cache.get("h1")
+    assert got == _identity("k1")
+    got["scopes"].append("admin")
+    assert cache.get("h1")["scopes"] == ["compute:write"]
+
+    expired_at = datetime.utcnow() - timedelta(seconds=1)
+    cache.put("h2", _identity("k2"), expired_at, cache.generation())
+    assert cache.get("h2") is None
+
+
+def test_invalidate_by_key_id_and_stale_generation():
+    from lattice.services.api_keys.identity_cache import APIKeyIdentityCache
+
+    cache = APIKeyIdentityCache(ttl_seconds=60, flush_interval_seconds=0)
+    cache.put("h1", _identity("k1"), None, cache.generation())
+    cache.invalidate("k1")
+    assert cache.get("h1") is None
+
+    # A lookup that started before an invalidation must not be cached
+    generation = cache.generation()
+    cache.invalidate("k1")
+    cache.put("h1", _identity("k1"), None, generation)
+    assert cache.get("h1") is None
+
+
+def test_service_update_invalidates_and_uses_are_flushed_in_batch(db_session):
+    from lattice.services.api_keys.service import APIKeyService
+    # Same module path the service (and the app) import the global from
+    from services.api_keys.identity_cache import api_key_identity_cache
+    from lattice.db.db_models import APIKey
+
+    _, rec = APIKeyService.create_api_key(
+        user_id="user_1", name="Key", organization_id="org_1", db=db_session
+    )
+    api_key_identity_cache.put(
+        rec.key_hash, _identity(rec.id), None, api_key_identity_cache.generation()
+    )
+    APIKeyService.update_api_key(
+        key_id=rec.id, user_id="user_1", is_active=False, db=db_session
+    )
+    assert api_key_identity_cache.get(rec.key_hash) is None
+
+    used_at = datetime(2030, 1, 1, 12, 0, 0)
+    api_key_identity_cache.record_use(rec.id, used_at)
+    api_key_identity_cache.record_use(rec.id, used_at - timedelta(minutes=5))
+    assert api_key_identity_cache.flush() == 1
+
+    db_session.expire_all()
+    assert db_session.get(APIKey, rec.id).last_used_at == used_at
+    api_key_identity_cache.stop()
+
+
+def test_flush_skips_keys_deleted_since_their_use(db_session):
+    from lattice.services.api_keys.identity_cache import APIKeyIdentityCache
+    from lattice.services.api_keys.service import APIKeyService
+    from lattice.db.db_models import APIKey
+
+    _, kept = APIKeyService.create_api_key(
+        user_id="user_1", name="Kept", organization_id="org_1", db=db_session
+    )
+    _, deleted = APIKeyService.create_api_key(
+        user_id="user_1", name="Deleted", organization_id="org_1", db=db_session
+    )
+    cache = APIKeyIdentityCache(ttl_seconds=60, flush_interval_seconds=3600)
+    used_at = datetime(2030, 1, 2, 12, 0, 0)
+    cache.record_use(kept.id, used_at)
+    cache.record_use(deleted.id, used_at)
+    # Deleted by another worker, whose cache never saw this use
+    db_session.delete(db_session.get(APIKey, deleted.id))
+    db_session.commit()
+
+    assert cache.flush() == 2
+    db_session.expire_all()
+    assert db_session.get(APIKey, kept.id).last_used_at == used_at
+
+    # Nothing is re-queued, and later uses are still written
+    assert cache.flush() == 0
+    cache.record_use(kept.id, used_at + timedelta(hours=1))
+    assert cache.flush() == 1
+    db_session.expire_all()
+    assert db_session.get(APIKey, kept.id).last_used_at == used_at + timedelta(hours=1)
+    cache.stop()
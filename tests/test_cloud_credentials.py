@@ -0,0 +1,67 @@
+def test_credentials_are_cached_per_org_and_platform_until_invalidated(monkeypatch):
+    from utils import cloud_credentials as module
+
+    loads = []
+
+    def load(platform, organization_id, db):
+        loads.append((platform, organization_id))
+        return {"runpod": {"api_key": f"key-{organization_id}-{len(loads)}"}}
+
+    monkeypatch.setattr(module, "_load_credentials", load)
+    resolver = module.CloudCredentialResolver(ttl_seconds=300)
+
+    first = resolver.for_platform("runpod", "org_a")
+    assert first == {"runpod": {"api_key": "key-org_a-1"}}
+    # Callers get copies; mutating one doesn't poison the cache
+    first["runpod"]["api_key"] = "changed"
+    assert resolver.for_platform("runpod", "org_a") == {"runpod": {"api_key": "key-org_a-1"}}
+    resolver.for_platform("runpod", "org_b")
+    # Platforms without explicit credentials never hit the database
+    assert resolver.for_platform("aws", "org_a") is None
+    assert loads == [("runpod", "org_a"), ("runpod", "org_b")]
+
+    resolver.invalidate("org_a", "runpod")
+    assert resolver.for_platform("runpod", "org_a") == {"runpod": {"api_key": "key-org_a-3"}}
+    resolver.for_platform("runpod", "org_b")
+    assert len(loads) == 3
+
+
+def test_multi_cloud_cluster_resolves_its_cloud_once(db_session, monkeypatch):
+    from lattice.db.db_models import ClusterPlatform
+    from routes.instances import utils as instances_utils
+    from utils import cloud_credentials as module
+
+    db_session.add(
+        ClusterPlatform(
+            cluster_name="creds-multi-actual", display_name="creds-multi",
+            platform="multi-cloud", user_id="u1", organization_id="org_creds",
+        )
+    )
+    db_session.commit()
+
+    status_calls = []
+
+    def determine(cluster_name):
+        status_calls.append(cluster_name)
+        return "azure"
+
+    monkeypatch.setattr(
+        instances_utils, "determine_actual_cloud_from_skypilot_status", determine
+    )
+    monkeypatch.setattr(
+        module,
+        "_load_credentials",
+        lambda platform, organization_id, db: {platform: {"org": organization_id}},
+    )
+    resolver = module.CloudCredentialResolver()
+
+    for _ in range(2):
+        assert resolver.for_cluster("creds-multi-actual", "org_creds") == {
+            "azure": {"org": "org_creds"}
+        }
+    assert status_calls == ["creds-multi-actual"]
+
+    db_session.expire_all()
+    row = db_session.query(ClusterPlatform).filter_by(cluster_name="creds-multi-actual").one()
+    assert row.actual_cloud == "azure"
+    assert row.platform == "multi-cloud"
@@ -0,0 +1,35 @@
+def test_get_cluster_platform_info_map_resolves_many_clusters(db_session):
+    from lattice.utils.cluster_utils import (
+        create_cluster_platform_entry,
+        get_cluster_platform_info,
+        get_cluster_platform_info_map,
+    )
+
+    names = []
+    for i in range(3):
+        actual, _ = create_cluster_platform_entry(
+            display_name=f"cluster-{i}",
+            platform="azure" if i % 2 else "runpod",
+            user_id="user_cu",
+            organization_id="org_cu",
+            user_info={"id": "user_cu", "organization_id": "org_cu"},
+            db=db_session,
+        )
+        names.append(actual)
+
+    info_map = get_cluster_platform_info_map(names + ["unknown-cluster", ""], db=db_session)
+
+    assert set(info_map) == set(names)
+    for name in names:
+        assert info_map[name] == get_cluster_platform_info(name, db=db_session)
+    assert get_cluster_platform_info_map([], db=db_session) == {}
+
+
+def test_is_owned_by_requires_matching_user_and_org():
+    from lattice.utils.cluster_utils import is_owned_by
+
+    info = {"user_id": "u1", "organization_id": "o1"}
+    assert is_owned_by(info, {"id": "u1", "organization_id": "o1"})
+    assert not is_owned_by(info, {"id": "u1", "organization_id": "o2"})
+    assert not is_owned_by(info, {"id": "u2", "organization_id": "o1"})
+    assert not is_owned_by(None, {"id": "u1", "organization_id": "o1"})
@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+
+SHOW_GPUS_OUTPUT = """
+SSH Node Pool: lab
+GPU   REQUESTABLE_QTY_PER_NODE  UTILIZATION
+A100  1, 2                      1 of 2 free
+
+SSH Node Pool per-node GPU availability
+NODE_POOL  NODE        GPU   UTILIZATION
+lab        10.0.0.1    A100  1 of 2 free
+"""
+
+
+def _node_info():
+    return SimpleNamespace(
+        node_info_dict={
+            "10.0.0.1": SimpleNamespace(
+                name="10.0.0.1",
+                accelerator_type="A100",
+                total={"accelerator_count": 2},
+                free={"accelerators_available": 1},
+            )
+        }
+    )
+
+
+def test_structured_probe_matches_show_gpus_parser():
+    from lattice.utils.gpu_probe import build_inventory, parse_show_gpus_output
+
+    availability = [SimpleNamespace(gpu="A100", counts=[1, 2], capacity=2, available=1)]
+    inventory = build_inventory("lab", availability, _node_info())
+    assert inventory.gpus[0].free == 1 and inventory.gpus[0].total == 2
+    assert inventory.to_dict() == parse_show_gpus_output(SHOW_GPUS_OUTPUT, "lab")
+
+    # JSON-decoded SDK payloads (lists/dicts) are accepted too
+    decoded = build_inventory(
+        "lab",
+        [["A100", [1, 2], 2, 1]],
+        {"node_info_dict": {"10.0.0.1": {"accelerator_type": "A100",
+                                         "total": {"accelerator_count": 2},
+                                         "free": {"accelerators_available": 1}}}},
+    )
+    assert decoded == inventory
+
+    empty = build_inventory("cpu-pool", [], {"node_info_dict": {}})
+    assert empty.to_dict()["message"] == "No GPUs found in this SSH cluster."
+
+
+def _fake_sdk(monkeypatch, availability):
+    import sky
+
+    availability_calls = []
+
+    def realtime(context=None, **kwargs):
+        availability_calls.append(context)
+        return ("availability", context)
+
+    monkeypatch.setattr(sky.client.sdk, "realtime_kubernetes_gpu_availability", realtime, raising=False)
+    monkeypatch.setattr(
+        sky.client.sdk, "kubernetes_node_info", lambda context=None: ("nodes", context), raising=False
+    )
+
+    def get(request):
+        kind, context = request
+        if kind == "availability":
+            return availability(context)
+        return {"node_info_dict": {}}
+
+    monkeypatch.setattr(sky, "get", get)
+    return availability_calls
+
+
+def test_probing_many_pools_uses_one_availability_call(monkeypatch):
+    from lattice.utils import gpu_probe
+
+    def availability(context):
+        if context is None:
+            return [
+                ("ssh-a", [("H100", [1, 8], 8, 8)]),
+                ("ssh-b", [("L4", [1], 1, 0)]),
+                ("my-k8s", [("T4", [1], 4, 4)]),
+            ]
+        # Pools missing from the grouped result are asked for on their own
+        return [("ssh-a", [("H100", [1, 8], 8, 8)])] if context == "ssh-a" else []
+
+    availability_calls = _fake_sdk(monkeypatch, availability)
+
+    result = gpu_probe.probe_node_pools(["a", "b", "c"])
+    assert availability_calls == [None, "ssh-c"]
+    assert result["a"].gpus[0].gpu == "H100"
+    assert result["b"].gpus[0].free == 0
+    assert result["c"].gpus == [] and result["c"].message
+
+    gpu_probe.probe_node_pool("a")
+    assert availability_calls == [None, "ssh-c", "ssh-a"]
+
+
+def test_flat_availability_of_a_context_is_used_for_its_pool(monkeypatch):
+    import pytest
+    from sky.models import RealtimeGpuAvailability
+
+    from lattice.utils import gpu_probe
+
+    per_context = {
+        "ssh-a": [RealtimeGpuAvailability("H100", [1, 8], 8, 6)],
+        "ssh-b": [RealtimeGpuAvailability("L4", [1], 1, 1)],
+    }
+
+    def availability(context):
+        # SkyPilot 0.9.x: a flat list, across all contexts without one
+        if context is None:
+            return [entry for entries in per_context.values() for entry in entries]
+        return per_context[context]
+
+    availability_calls = _fake_sdk(monkeypatch, availability)
+
+    inventory = gpu_probe.probe_node_pool("a")
+    assert (inventory.gpus[0].gpu, inventory.gpus[0].free) == ("H100", 6)
+    assert availability_calls == ["ssh-a"]
+
+    # The flat list for all contexts can't be split by pool
+    result = gpu_probe.probe_node_pools(["a", "b"])
+    assert availability_calls[1] is None
+    assert sorted(availability_calls[2:]) == ["ssh-a", "ssh-b"]
+    assert result["b"].gpus[0].gpu == "L4"
+
+    # A grouped result without the pool's context is an error, not "no GPUs",
+    # so callers fall back to show-gpus
+    _fake_sdk(monkeypatch, lambda context: [("ssh-other", [])])
+    with pytest.raises(LookupError):
+        gpu_probe.probe_node_pool("a")
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+
+def test_sync_upserts_logs_and_refreshes_periods_in_one_pass(db_session, monkeypatch):
+    from lattice.db.db_models import ClusterPlatform, GPUUsageLog, QuotaPeriod
+    from lattice.routes.quota import utils
+
+    org = "orgSync"
+    db_session.add_all(
+        [
+            ClusterPlatform(
+                cluster_name=f"sync-{i}",
+                display_name=f"sync-{i}",
+                platform="runpod",
+                user_id="alice" if i % 2 else "bob",
+                organization_id=org,
+            )
+            for i in range(4)
+        ]
+    )
+    db_session.add(
+        GPUUsageLog(
+            organization_id=org,
+            user_id="bob",
+            cluster_name="sync-0",
+            gpu_count=1,
+            start_time=datetime.now(),
+            cost_estimate=1.0,
+            instance_type="A100",
+        )
+    )
+    db_session.commit()
+
+    launched_at = datetime.now().timestamp()
+    report = [
+        {
+            "name": f"sync-{i}",
+            "resources_str_full": "1x(gpus=A100:2, cpus=8, mem=32)",
+            "launched_at": launched_at,
+            "duration": 3600,
+            "total_cost": 2.5,
+            "cloud": "runpod",
+        }
+        for i in range(4)
+    ]
+    report += [
+        {"name": "unowned", "resources_str_full": "1x(gpus=A100:1)", "total_cost": 9},
+        {"name": "sync-1", "resources_str_full": "1x(cpus=4)"},
+    ]
+    # CPU-only entries are skipped without touching the GPU entry of the same cluster
+    monkeypatch.setattr(utils, "generate_cost_report", lambda: report)
+
+    result = utils.sync_gpu_usage_from_cost_report(db_session)
+
+    assert result["updated_clusters"] == 1
+    assert result["created_logs"] == 3
+    assert set(result["timings"]) == {
+        "cost_report",
+        "ownership_lookup",
+        "usage_logs",
+        "quota_periods",
+        "commit",
+        "total",
+    }
+
+    db_session.expire_all()
+    log = db_session.query(GPUUsageLog).filter_by(cluster_name="sync-0").one()
+    assert (log.gpu_count, log.cost_estimate, log.duration_seconds) == (2, 2.5, 3600)
+    assert db_session.query(GPUUsageLog).filter_by(cluster_name="unowned").count() == 0
+
+    periods = {
+        p.user_id: p
+        for p in db_session.query(QuotaPeriod).filter_by(organization_id=org)
+    }
+    assert periods["bob"].credits_used == 5.0
+    assert periods["alice"].credits_used == 5.0
+    assert periods["alice"].credits_limit == 100.0
+
+    # A second run changes nothing but keeps the totals
+    result = utils.sync_gpu_usage_from_cost_report(db_session)
+    assert result["written_logs"] == 0
+    assert result["updated_clusters"] == 0
+    db_session.expire_all()
+    assert db_session.get(QuotaPeriod, periods["bob"].id).credits_used == 5.0
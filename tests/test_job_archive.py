@@ -0,0 +1,98 @@
+import gzip
+import json
+
+
+def _store(tmp_path):
+    from routes.jobs.archive import JobArchiveStore
+
+    return JobArchiveStore(base_dir=tmp_path)
+
+
+def test_legacy_files_are_backfilled_per_owner(tmp_path, db_session):
+    from lattice.db.db_models import ClusterPlatform
+
+    db_session.add_all(
+        [
+            ClusterPlatform(
+                cluster_name="arch-c1-actual", display_name="arch-c1",
+                platform="aws", user_id="u1", organization_id="org_arch",
+            ),
+            ClusterPlatform(
+                cluster_name="arch-c2-actual", display_name="arch-c2",
+                platform="aws", user_id="u2", organization_id="org_arch",
+            ),
+        ]
+    )
+    db_session.commit()
+
+    jobs_dir = tmp_path / "jobs"
+    jobs_dir.mkdir()
+    legacy_log = tmp_path / "logs" / "arch-c1_3_x.log"
+    legacy_log.parent.mkdir()
+    legacy_log.write_text("a\nb\nc\n")
+    for cluster, saved_at in [
+        ("arch-c1", "2026-01-01T10:00:00"),
+        ("arch-c1", "2026-01-02T10:00:00"),
+        ("arch-c2", "2026-01-03T10:00:00"),
+    ]:
+        (jobs_dir / f"{cluster}_{saved_at}.json").write_text(
+            json.dumps(
+                {
+                    "cluster_name": cluster,
+                    "saved_at": saved_at,
+                    "jobs": [
+                        {"job_id": 3, "job_name": "train", "status": "SUCCEEDED",
+                         "submitted_at": 1.5, "log_path": str(legacy_log)},
+                    ],
+                }
+            )
+        )
+
+    store = _store(tmp_path)
+    page = store.list_archives("u1", "org_arch", limit=1)
+    assert page["total"] == 2
+    assert page["next_offset"] == 1
+    (newest,) = page["past_jobs"]
+    assert newest["cluster_name"] == "arch-c1"
+    assert newest["saved_at"] == "2026-01-02T10:00:00"
+    assert newest["jobs"][0]["job_name"] == "train"
+    assert newest["jobs"][0]["submitted_at"] == 1.5
+
+    second = store.list_archives("u1", "org_arch", limit=1, offset=1)
+    assert second["past_jobs"][0]["saved_at"] == "2026-01-01T10:00:00"
+    assert second["next_offset"] is None
+    assert store.list_archives("u2", "org_arch")["total"] == 1
+
+    # Files are imported once and renamed out of the way
+    assert not list(jobs_dir.glob("*.json"))
+    assert len(list(jobs_dir.glob("*.json.migrated"))) == 3
+    assert _store(tmp_path).backfill_legacy_files() == 0
+
+    # Legacy plain-text logs stay where they were
+    assert store.find_job_log("org_arch", "arch-c1", 3) == str(legacy_log)
+
+
+def test_archived_logs_are_compressed_and_readable(tmp_path):
+    store = _store(tmp_path)
+    archive_id = store.create_archive(
+        "arch-logs", [{"job_id": 7, "job_name": "eval"}],
+        user_id="u3", organization_id="org_logs",
+    )
+    source = tmp_path / "run.log"
+    source.write_text("".join(f"line {i}\n" for i in range(100)))
+
+    path = store.write_log(archive_id, 7, str(source))
+    assert path.endswith(".log.gz")
+    with gzip.open(path, "rt") as f:
+        assert f.read() == source.read_text()
+    assert store.find_job_log("org_logs", "arch-logs", 7) == path
+    assert store.find_job_log("org_logs", "arch-logs", 8) is None
+
+    assert store.read_log(path, tail_lines=2) == {"logs": "line 98\nline 99\n"}
+    page = store.read_log(path, start_line=10, limit=2)
+    assert page == {
+        "logs": "line 10\nline 11\n",
+        "start_line": 10,
+        "end_line": 12,
+        "total_lines": 100,
+    }
@@ -0,0 +1,178 @@
+import gzip
+import threading
+import time
+
+
+def _wait_for(store, archive_id, condition, user_id="u1", org="org_bg"):
+    deadline = time.monotonic() + 5
+    while True:
+        archive = store.get_archive(archive_id, user_id, org)
+        if condition(archive) or time.monotonic() > deadline:
+            return archive
+        time.sleep(0.02)
+
+
+def test_archival_downloads_in_parallel_batches_then_tears_down(
+    tmp_path, monkeypatch
+):
+    from routes.jobs import archiver as archiver_module
+    from routes.jobs.archive import JobArchiveStore
+
+    jobs = [{"job_id": i, "job_name": f"job-{i}", "status": "SUCCEEDED"} for i in range(1, 8)]
+    monkeypatch.setattr(
+        archiver_module, "get_cluster_job_queue", lambda name, credentials=None: jobs
+    )
+
+    downloads = []
+    in_flight = {"now": 0, "max": 0}
+    lock = threading.Lock()
+    both_started = threading.Barrier(2, timeout=5)
+
+    def download_job_logs(cluster_name, job_ids, credentials=None):
+        with lock:
+            downloads.append((cluster_name, list(job_ids), credentials))
+            in_flight["now"] += 1
+            in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        if len(downloads) <= 2:
+            both_started.wait()
+        with lock:
+            in_flight["now"] -= 1
+        files = {}
+        for job_id in job_ids:
+            if job_id == 5:
+                continue  # Log missing on the cluster
+            path = tmp_path / f"run-{job_id}.log"
+            path.write_text(f"log of {job_id}\n")
+            files[str(job_id)] = str(path)
+        return files
+
+    monkeypatch.setattr(archiver_module, "download_job_logs", download_job_logs)
+
+    store = JobArchiveStore(base_dir=tmp_path)
+    archiver = archiver_module.JobArchiver(
+        store=store, max_pipelines=1, download_parallelism=2, batch_size=3
+    )
+    done = threading.Event()
+    try:
+        archive_id = archiver.archive_cluster(
+            "c-actual", "arch-bg", "u1", "org_bg",
+            credentials={"runpod": {"api_key": "k"}},
+            teardown=lambda: done.set() or "down-req-1",
+        )
+        assert done.wait(10)
+    finally:
+        archiver.stop()
+
+    archive = _wait_for(store, archive_id, lambda a: a["down_request_id"])
+    assert archive["status"] == "complete"
+    assert archive["down_request_id"] == "down-req-1"
+    assert archive["job_count"] == 7
+    assert (archive["logs_saved"], archive["logs_failed"]) == (6, 1)
+    assert archive["completed_at"] is not None
+
+    # Three batched downloads, two at a time, with the caller's credentials
+    assert sorted(ids for _, ids, _ in downloads) == [[1, 2, 3], [4, 5, 6], [7]]
+    assert in_flight["max"] == 2
+    assert all(creds == {"runpod": {"api_key": "k"}} for _, _, creds in downloads)
+
+    path = store.find_job_log("org_bg", "arch-bg", 2)
+    with gzip.open(path, "rt") as f:
+        assert f.read() == "log of 2\n"
+    assert store.find_job_log("org_bg", "arch-bg", 5) is None
+
+
+def test_failed_archival_still_tears_down(tmp_path, monkeypatch):
+    from routes.jobs import archiver as archiver_module
+    from routes.jobs.archive import JobArchiveStore
+
+    def unreachable(name, credentials=None):
+        raise RuntimeError("cluster unreachable")
+
+    monkeypatch.setattr(archiver_module, "get_cluster_job_queue", unreachable)
+    store = JobArchiveStore(base_dir=tmp_path)
+    archiver = archiver_module.JobArchiver(store=store)
+    done = threading.Event()
+    try:
+        archive_id = archiver.archive_cluster(
+            "c-down", "arch-fail", "u1", "org_bg", teardown=done.set
+        )
+        assert done.wait(10)
+    finally:
+        archiver.stop()
+
+    archive = _wait_for(store, archive_id, lambda a: a["status"] == "failed")
+    assert archive["status"] == "failed"
+    assert archive["error_message"] == "cluster unreachable"
+    assert store.get_archive(archive_id, "u2", "org_bg") is None
+
+
+def test_slow_archival_tears_down_at_the_deadline_once(tmp_path, monkeypatch):
+    from routes.jobs import archiver as archiver_module
+    from routes.jobs.archive import JobArchiveStore
+
+    release = threading.Event()
+
+    def hanging_queue(name, credentials=None):
+        release.wait(10)
+        return []
+
+    monkeypatch.setattr(archiver_module, "get_cluster_job_queue", hanging_queue)
+    store = JobArchiveStore(base_dir=tmp_path)
+    archiver = archiver_module.JobArchiver(store=store, timeout_seconds=0.2)
+    downs = []
+    try:
+        archive_id = archiver.archive_cluster(
+            "c-slow", "arch-slow", "u1", "org_bg",
+            teardown=lambda: downs.append("c-slow") or "down-req-2",
+        )
+        archive = _wait_for(store, archive_id, lambda a: a["down_request_id"])
+        assert archive["status"] == "failed"
+        assert archive["error_message"] == "Archival did not finish in time"
+        assert downs == ["c-slow"]
+
+        # Archival finishing later neither tears down again nor overwrites
+        # the timeout
+        release.set()
+        archiver._pipelines.shutdown(wait=True)
+        archive = store.get_archive(archive_id, "u1", "org_bg")
+        assert archive["status"] == "failed"
+        assert archive["error_message"] == "Archival did not finish in time"
+        assert downs == ["c-slow"]
+    finally:
+        release.set()
+        archiver.stop()
+
+
+def test_teardowns_left_by_a_previous_run_are_issued_on_recover(tmp_path):
+    from datetime import datetime, timedelta
+
+    from routes.jobs.archive import JobArchiveStore
+    from routes.jobs.archiver import JobArchiver
+
+    store = JobArchiveStore(base_dir=tmp_path)
+    # Interrupted mid-archival an hour ago, and one whose down failed
+    stale = store.create_archive(
+        "arch-stale", [], "u1", "org_rec", status="downloading",
+        saved_at=datetime.now() - timedelta(hours=1), teardown_cluster="c-stale",
+    )
+    retry = store.create_archive(
+        "arch-retry", [], "u1", "org_rec", teardown_cluster="c-retry"
+    )
+
+    downs = []
+    archiver = JobArchiver(store=store, timeout_seconds=600)
+    try:
+        assert archiver.recover(
+            lambda archive: downs.append(archive["teardown_cluster"]) or "down-req"
+        ) >= 2
+        for archive_id in (stale, retry):
+            _wait_for(store, archive_id, lambda a: a["down_request_id"], org="org_rec")
+    finally:
+        archiver.stop()
+
+    assert {"c-retry", "c-stale"} <= set(downs)
+    archive = store.get_archive(stale, "u1", "org_rec")
+    assert archive["status"] == "failed"
+    assert store.get_archive(retry, "u1", "org_rec")["status"] == "complete"
+    # Nothing is left to recover
+    assert all(a["organization_id"] != "org_rec" for a in store.interrupted_archives())
@@ -0,0 +1,55 @@
+import asyncio
+import os
+
+
+def _echo_launch(**params):
+    if params.get("fail"):
+        raise RuntimeError("boom")
+    print("noise on stdout that must not be parsed")
+    return f"{params['cluster_name']}:{os.getpid()}"
+
+
+def _echo_worker(conn):
+    from lattice.utils.launch_worker_pool import _serve
+
+    _serve(conn, _echo_launch)
+
+
+def test_pool_recycles_workers_and_reports_errors():
+    from lattice.utils.launch_worker_pool import LaunchWorkerError, LaunchWorkerPool
+
+    pool = LaunchWorkerPool(
+        size=1,
+        max_launches_per_worker=2,
+        launch_timeout_seconds=30,
+        startup_timeout_seconds=30,
+        target=_echo_worker,
+    )
+
+    async def run():
+        first = await pool.launch({"cluster_name": "a"})
+        second = await pool.launch({"cluster_name": "b"})
+        third = await pool.launch({"cluster_name": "c"})
+        try:
+            await pool.launch({"cluster_name": "d", "fail": True})
+            raise AssertionError("expected LaunchWorkerError")
+        except LaunchWorkerError as e:
+            assert "boom" in str(e)
+        return first, second, third
+
+    try:
+        first, second, third = asyncio.run(run())
+    finally:
+        pool.stop()
+
+    pid = lambda result: result.split(":")[1]  # noqa: E731
+    assert first.startswith("a:") and second.startswith("b:")
+    # Two launches per worker, then a fresh process
+    assert pid(first) == pid(second)
+    assert pid(third) != pid(first)
+
+    metrics = pool.metrics()
+    assert metrics["launches_total"] == 4
+    assert metrics["failures_total"] == 1
+    assert metrics["workers_retired"] == 2
+    assert metrics["busy_workers"] == 0 and metrics["queued_launches"] == 0
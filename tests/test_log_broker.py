@@ -0,0 +1,117 @@
+import asyncio
+import threading
+
+
+def test_viewers_share_one_tailer_and_can_resume():
+    from lattice.utils.log_broker import LogBroker, format_sse
+
+    broker = LogBroker(buffer_lines=3, idle_grace_seconds=0)
+    started = []
+    release = threading.Event()
+
+    def tail(output_stream):
+        started.append(1)
+        output_stream.write("one\ntw")
+        output_stream.write("o\n\nthree\n")
+        release.wait(5)
+        output_stream.write("four\nfive\n")
+
+    async def collect(last_event_id=None, stop_after=None):
+        events = []
+        async for event in broker.subscribe(
+            ("job", "c", 1), tail, last_event_id=last_event_id
+        ):
+            events.append(event)
+            if stop_after and len(events) == stop_after:
+                break
+        return events
+
+    async def run():
+        first = asyncio.create_task(collect())
+        while broker.metrics()["viewers"] == 0:
+            await asyncio.sleep(0.01)
+        # Late joiner reads the buffered lines, then both follow the same tailer
+        early = await collect(stop_after=3)
+        assert [e.line for e in early] == ["one", "two", "three"]
+        second = asyncio.create_task(collect(last_event_id=early[1].id))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await first, await second
+
+    first, second = asyncio.run(run())
+    assert len(started) == 1
+    assert [e.line for e in first if e.kind == "line"] == [
+        "one", "two", "three", "four", "five"
+    ]
+    # Resumed after "two"; "four"/"five" arrived while following
+    assert [e.kind for e in second][-1] == "end"
+    assert [e.line for e in second if e.kind == "line"] == ["three", "four", "five"]
+    assert broker.metrics() == {"streams": 0, "viewers": 0}
+    assert format_sse(first[-1]) == 'data: {"status": "completed"}\n\n'
+
+
+def test_slow_viewer_skips_ahead_and_tailer_stops_without_viewers():
+    from lattice.utils.log_broker import LogBroker
+
+    broker = LogBroker(buffer_lines=2, idle_grace_seconds=0)
+    stopped = threading.Event()
+
+    def tail(output_stream):
+        output_stream.write("a\nb\nc\nd\n")
+        try:
+            while True:
+                threading.Event().wait(0.01)
+                output_stream.write("tick\n")
+        except Exception:
+            stopped.set()
+            raise
+
+    async def run():
+        events = []
+        async for event in broker.subscribe(("request", "r"), tail):
+            events.append(event)
+            if event.kind == "line":
+                break
+        return events
+
+    events = asyncio.run(run())
+    assert events[0].kind == "skipped" and events[0].skipped >= 2
+    assert stopped.wait(2)
+
+
+def test_idle_tailer_stays_registered_until_it_exits():
+    from lattice.utils.log_broker import LogBroker
+
+    broker = LogBroker(buffer_lines=10, idle_grace_seconds=0)
+    started = []
+    more = threading.Event()
+
+    def tail(output_stream):
+        # Like a follow tail of an idle job: blocked without writing
+        started.append(1)
+        output_stream.write("first\n")
+        more.wait(5)
+        output_stream.write("second\n")
+
+    async def first_line():
+        async for event in broker.subscribe(("job", "idle", 1), tail):
+            if event.kind == "line":
+                return event.line
+
+    async def run():
+        assert await first_line() == "first"
+        # The stopped tailer hasn't written since; it is still the stream
+        assert broker.metrics()["streams"] == 1
+        assert await first_line() == "first"
+        assert len(started) == 1
+
+        # Once it notices the stop and exits, the next viewer starts afresh
+        more.set()
+        while broker.metrics()["streams"]:
+            await asyncio.sleep(0.01)
+        more.clear()
+        assert await first_line() == "first"
+        assert len(started) == 2
+        more.set()
+
+    asyncio.run(run())
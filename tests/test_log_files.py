@@ -0,0 +1,89 @@
+import threading
+
+
+def test_tail_and_line_ranges_match_a_full_read(tmp_path):
+    from lattice.utils.log_files import LineIndex, read_byte_range, tail_lines
+
+    log = tmp_path / "run.log"
+    lines = [f"step {i} " + "x" * (i % 7) for i in range(2000)]
+    log.write_text("\n".join(lines) + "\n")
+
+    assert tail_lines(str(log), 3, block_size=16) == "".join(
+        line + "\n" for line in lines[-3:]
+    )
+    assert tail_lines(str(log), 5000) == log.read_text()
+
+    index = LineIndex(str(log))
+    text, total = index.read_lines(1500, 2)
+    assert total == 2000
+    assert text == f"{lines[1500]}\n{lines[1501]}\n"
+
+    # The index is extended when the log grows, including a partial last line
+    with open(log, "a") as f:
+        f.write("more\npartial")
+    text, total = index.read_lines(1999, 10)
+    assert total == 2002
+    assert text == f"{lines[1999]}\nmore\npartial"
+
+    # A rewritten (shorter) log rebuilds the index
+    log.write_text("a\nb\n")
+    assert index.read_lines(0, 10) == ("a\nb\n", 2)
+
+    page, next_offset, size = read_byte_range(str(log), 0, 3)
+    assert (page, next_offset, size) == ("a\n", 2, 4)
+    assert read_byte_range(str(log), next_offset, 100) == ("b\n", 4, 4)
+
+
+def test_job_log_cache_downloads_once_while_fresh(tmp_path):
+    from lattice.utils.log_files import JobLogCache
+
+    log = tmp_path / "run.log"
+    log.write_text("hello\n")
+    cache = JobLogCache(ttl_seconds=60)
+    downloads = []
+    gate = threading.Event()
+
+    def download():
+        downloads.append(1)
+        gate.wait(2)
+        return str(log)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_path(("c", "1"), download)))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert results == [str(log)] * 4
+    assert len(downloads) == 1
+    cache.get_path(("c", "1"), download, max_age=0)
+    assert len(downloads) == 2
+
+
+def test_concurrent_readers_share_one_consistent_index(tmp_path):
+    from lattice.utils.log_files import LineIndex
+
+    log = tmp_path / "big.log"
+    log.write_text("".join(f"line {i}\n" for i in range(300000)))
+
+    results = []
+    barrier = threading.Barrier(8)
+
+    def read():
+        # Each request builds its own LineIndex, as read_log_range does
+        barrier.wait()
+        results.append(LineIndex(str(log)).read_lines(123456, 1))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [("line 123456\n", 300000)] * 8
+    assert not any(p.name.endswith(".tmp") for p in tmp_path.iterdir())
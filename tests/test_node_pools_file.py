@@ -0,0 +1,88 @@
+import threading
+
+import yaml
+
+
+def test_concurrent_node_registrations_are_all_kept_and_written_once(monkeypatch):
+    from models import SSHNode
+    from routes.node_pools import pools_file
+    from routes.node_pools import utils as pool_utils
+    from utils.file_utils import get_ssh_node_pools_path
+
+    writer = pools_file.NodePoolsFileWriter(debounce_seconds=1, max_delay_seconds=10)
+    monkeypatch.setattr(pool_utils, "node_pools_file", writer)
+    monkeypatch.setattr(pool_utils, "_schedule_gpu_resources_update", lambda name: None)
+
+    pool_utils.create_cluster_in_pools(
+        "file-pool", user="ubuntu", user_id="u1", organization_id="org_file"
+    )
+
+    errors = []
+
+    def register(i):
+        try:
+            pool_utils.add_node_to_cluster(
+                "file-pool",
+                SSHNode(
+                    ip=f"10.0.0.{i}", user="ubuntu", name=f"node-{i}",
+                    resources={"vcpus": "2", "memory_gb": "4"},
+                ),
+            )
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=register, args=(i,)) for i in range(100)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+    # Duplicate IPs are still rejected
+    register(7)
+    assert len(errors) == 1 and errors[0].status_code == 400
+
+    pool_utils.remove_node_from_cluster("file-pool", "10.0.0.0")
+    writer.flush()
+    # The burst (create, 100 adds, remove) was coalesced into the final flush
+    assert writer.writes == 1
+
+    config = yaml.safe_load(get_ssh_node_pools_path().read_text())["file-pool"]
+    assert config["user"] == "ubuntu"
+    assert len(config["hosts"]) == 99
+    assert "name" not in config["hosts"][0]
+    assert config["resources"] == {"vcpus": "198", "memory_gb": "396"}
+
+    pool_utils.delete_cluster_in_pools("file-pool")
+    writer.flush()
+    assert "file-pool" not in (yaml.safe_load(get_ssh_node_pools_path().read_text()) or {})
+
+
+def test_pools_only_in_the_file_are_imported(db_session):
+    from lattice.db.db_models import SSHNodePool
+    from routes.node_pools.pools_file import NodePoolsFileWriter, pool_file_config
+    from utils.file_utils import save_ssh_node_pools
+
+    save_ssh_node_pools(
+        {
+            "legacy-pool": {
+                "user": "root",
+                # SkyPilot also takes bare addresses / SSH config aliases
+                "hosts": [{"ip": "10.1.0.1", "user": "root"}, "10.1.0.2", 42],
+            }
+        }
+    )
+    writer = NodePoolsFileWriter()
+    assert writer.import_legacy_pools() == 1
+    assert writer.import_legacy_pools() == 0
+
+    pool = db_session.query(SSHNodePool).filter_by(name="legacy-pool").one()
+    assert pool.default_user == "root"
+    assert pool.nodes == [{"ip": "10.1.0.1", "user": "root"}, {"ip": "10.1.0.2"}]
+    # The bare host keeps inheriting the pool's user
+    assert pool_file_config(pool)["hosts"] == [
+        {"ip": "10.1.0.1", "user": "root"},
+        {"ip": "10.1.0.2"},
+    ]
+    db_session.delete(pool)
+    db_session.commit()
@@ -0,0 +1,91 @@
+import gzip
+import json
+from datetime import date, datetime, timedelta
+
+
+def _ts(days_ago: int, hour: int = 12) -> float:
+    day = date.today() - timedelta(days=days_ago)
+    return datetime(day.year, day.month, day.day, hour).timestamp()
+
+
+def _store(tmp_path, **kwargs):
+    from lattice.routes.reports.store import ReportStore
+
+    return ReportStore(base_dir=tmp_path, **kwargs)
+
+
+def test_legacy_file_is_migrated_and_window_is_exact(tmp_path):
+    user_dir = tmp_path / "user_1"
+    user_dir.mkdir()
+    legacy = [
+        {"timestamp": _ts(3, 6), "success": True},
+        {"timestamp": _ts(3, 18), "success": False},
+        {"timestamp": _ts(1), "success": True},
+        {"timestamp": _ts(40), "success": True},
+    ]
+    (user_dir / "job_success.jsonl").write_text(
+        "\n".join(json.dumps(e) for e in legacy) + "\nnot json\n"
+    )
+    store = _store(tmp_path)
+
+    # The window starts at noon three days ago: only the 18:00 event that day counts
+    now = _ts(0)
+    daily = store.daily("user_1", "job_success", days=3, now=now)
+    day_3 = (date.today() - timedelta(days=3)).isoformat()
+    day_1 = (date.today() - timedelta(days=1)).isoformat()
+    assert daily == {
+        day_3: {"count": 1, "successful": 0},
+        day_1: {"count": 1, "successful": 1},
+    }
+    assert len(store.entries("user_1", "job_success", days=3, now=now)) == 2
+    assert not (user_dir / "job_success.jsonl").exists()
+    assert (user_dir / "job_success.jsonl.migrated").exists()
+
+    # Closed days were compacted during migration; reads are unchanged
+    segments = user_dir / "segments" / "job_success"
+    assert (segments / f"{day_3}.jsonl.gz").exists()
+    with gzip.open(segments / f"{day_3}.jsonl.gz", "rt") as f:
+        assert len(f.read().splitlines()) == 2
+    assert store.daily("user_1", "job_success", days=3, now=now) == daily
+
+    store.append("user_1", "job_success", {"timestamp": _ts(0), "success": True})
+    today = date.today().isoformat()
+    assert store.daily("user_1", "job_success", days=3, now=now + 1)[today] == {
+        "count": 1,
+        "successful": 1,
+    }
+
+
+def test_retention_keeps_rollups_after_raw_segments_expire(tmp_path):
+    store = _store(tmp_path, compact_after_days=1, raw_retention_days=5)
+    for days_ago in (10, 2, 0):
+        store.append(
+            "user_2",
+            "usage",
+            {"timestamp": _ts(days_ago), "duration_minutes": 90},
+        )
+
+    segments = tmp_path / "user_2" / "segments" / "usage"
+    names = sorted(p.name for p in segments.iterdir())
+    two_days_ago = (date.today() - timedelta(days=2)).isoformat()
+    assert names == [f"{two_days_ago}.jsonl.gz", f"{date.today().isoformat()}.jsonl"]
+
+    # Ten days ago is still reported (whole day) from its rollup
+    daily = store.daily("user_2", "usage", days=10, now=_ts(0, 18))
+    assert [sums["duration_minutes"] for sums in daily.values()] == [90, 90, 90]
+
+
+def test_reports_summary_reads_the_store(tmp_path, monkeypatch):
+    from routes.reports import utils
+
+    monkeypatch.setattr(utils, "report_store", _store(tmp_path))
+    utils.record_availability("user_3", "c1", "check", 4, 3)
+    utils.record_availability("user_3", "c1", "check", 4, 1)
+    utils.record_usage("user_3", "c1", "job", duration_minutes=720)
+
+    summary = utils.get_reports_summary("user_3", 30)
+    assert summary["average_availability_percent"] == 50.0
+    assert summary["availability"][0].value == 50.0
+    assert summary["usage"][0].value == 50.0
+    assert summary["total_usage_hours"] == 12.0
+    assert summary["total_jobs"] == 0
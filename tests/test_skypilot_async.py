@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+def test_adapter_limits_concurrency_per_operation_and_records_latency():
+    from lattice.utils.skypilot_async import SkyPilotSDKAdapter
+
+    adapter = SkyPilotSDKAdapter(
+        max_workers=8, concurrency={"cost_report": 1}, timeouts={}
+    )
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def slow_report(n):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.02)
+        with lock:
+            running["now"] -= 1
+        return n
+
+    def failing_status():
+        raise RuntimeError("api server down")
+
+    async def run():
+        results = await asyncio.gather(
+            *(adapter.run("cost_report", slow_report, i) for i in range(3))
+        )
+        assert results == [0, 1, 2]
+        with pytest.raises(RuntimeError):
+            await adapter.run("status", failing_status)
+
+    try:
+        asyncio.run(run())
+    finally:
+        adapter.stop()
+
+    assert running["peak"] == 1
+    metrics = adapter.metrics()["operations"]
+    report = metrics["cost_report"]
+    assert report["concurrency_limit"] == 1
+    assert (report["calls"], report["errors"], report["in_flight"]) == (3, 0, 0)
+    assert report["latency_seconds"]["count"] == 3
+    assert report["latency_seconds"]["buckets"]["+Inf"] == 3
+    assert report["latency_seconds"]["buckets"]["0.05"] >= 1
+    assert metrics["status"]["errors"] == 1
+
+
+def test_timeout_returns_504_and_cancels_submitted_requests(monkeypatch):
+    import sky
+    from fastapi import HTTPException
+
+    from lattice.utils import skypilot_async
+
+    cancelled = []
+    cancel_done = threading.Event()
+
+    def api_cancel(request_ids, silent=False):
+        cancelled.extend(request_ids)
+        cancel_done.set()
+
+    monkeypatch.setattr(sky, "api_cancel", api_cancel)
+    adapter = skypilot_async.SkyPilotSDKAdapter(max_workers=2, concurrency={}, timeouts={})
+    release = threading.Event()
+
+    def queue_call():
+        skypilot_async.track_request("req-1")
+        release.wait(5)
+        return []
+
+    async def run():
+        with pytest.raises(HTTPException) as exc:
+            await adapter.run("queue", queue_call, timeout=0.05)
+        assert exc.value.status_code == 504
+
+    try:
+        asyncio.run(run())
+        assert cancel_done.wait(2)
+        assert cancelled == ["req-1"]
+        assert adapter.metrics()["operations"]["queue"]["timeouts"] == 1
+    finally:
+        release.set()
+        adapter.stop()
+
+    # Outside the adapter tracking is a no-op
+    assert skypilot_async.track_request("req-2") == "req-2"
+
+
+def test_handlers_pass_timeouts_through_with_their_own_session(monkeypatch):
+    from fastapi import HTTPException
+
+    from routes.quota import routes as quota_routes
+
+    async def timed_out(operation, func, *args, **kwargs):
+        raise HTTPException(status_code=504, detail=f"SkyPilot {operation} timed out")
+
+    monkeypatch.setattr(quota_routes.skypilot_sdk, "run", timed_out)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(quota_routes.sync_usage_from_cost_report(user={}, __={}))
+    assert exc.value.status_code == 504
+
+    # Work run on SDK threads gets a session that outlives the request's
+    sessions = []
+
+    async def run_inline(operation, func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    monkeypatch.setattr(quota_routes.skypilot_sdk, "run", run_inline)
+
+    def sync(db):
+        sessions.append(db)
+        return {"ok": True}
+
+    monkeypatch.setattr(quota_routes, "sync_gpu_usage_from_cost_report", sync)
+    assert asyncio.run(quota_routes.sync_usage_from_cost_report(user={}, __={})) == {
+        "ok": True
+    }
+    assert len(sessions) == 1
@@ -0,0 +1,95 @@
+import asyncio
+import types
+
+CSV = """InstanceType,AcceleratorName,AcceleratorCount,vCPUs,MemoryGiB,GpuInfo,Price,SpotPrice,Region
+gpu-a,A100,2,16,64,,3.5,1.2,eastus
+gpu-a,A100,2,16,64,,3.9,,westus
+gpu-h,H100-80GB,8,96,1024,,30,,westus
+cpu-8,,,8,32,,0.4,0.1,westus
+cpu-2,,,2,N/A,,,,eastus
+"""
+
+
+def _manager(tmp_path, monkeypatch, responses):
+    from lattice.routes.quota import skypilot_catalog
+
+    calls = []
+
+    def fake_get(url, headers=None, timeout=None):
+        calls.append(dict(headers or {}))
+        status, body, response_headers = responses.pop(0)
+        response = types.SimpleNamespace(
+            status_code=status, text=body, headers=response_headers
+        )
+        response.raise_for_status = lambda: None
+        return response
+
+    monkeypatch.setattr(skypilot_catalog.requests, "get", fake_get)
+    manager = skypilot_catalog.SkyPilotCatalogManager(cache_duration_hours=0)
+    manager.cache_dir = tmp_path
+    return manager, calls
+
+
+def test_filters_use_indexes(tmp_path, monkeypatch):
+    manager, _ = _manager(tmp_path, monkeypatch, [(200, CSV, {})])
+
+    async def run():
+        instances = await manager.fetch_cloud_catalog("azure")
+        assert len(instances) == 5
+        cpu_2 = instances[-1]
+        assert cpu_2.memory_gib == 0.0 and cpu_2.price is None
+
+        manager.cache_duration_hours = 24
+        types_ = await manager.get_instance_types("azure", region="WESTUS")
+        assert [i.instance_type for i in types_] == ["gpu-a", "gpu-h", "cpu-8"]
+        types_ = await manager.get_instance_types("azure", has_gpu=False, min_vcpus=4)
+        assert [i.instance_type for i in types_] == ["cpu-8"]
+        types_ = await manager.get_instance_types(
+            "azure", gpu_type="h100", max_memory_gib=2048, min_memory_gib=128
+        )
+        assert [i.instance_type for i in types_] == ["gpu-h"]
+
+        comparison = await manager.get_pricing_comparison("azure", "gpu-a", ["WestUS"])
+        assert list(comparison["regions"]) == ["westus"]
+        assert comparison["regions"]["westus"]["on_demand_price"] == 3.9
+
+        suggestions = await manager.get_cost_optimization_suggestions("azure", 8, 32)
+        assert [s["instance_type"] for s in suggestions] == ["cpu-8", "gpu-a", "gpu-a", "gpu-h"]
+        assert manager.get_regions_for_cloud("azure") == ["eastus", "westus"]
+
+    asyncio.run(run())
+
+
+def test_revalidates_with_validators_and_reloads_snapshot(tmp_path, monkeypatch):
+    responses = [
+        (200, CSV, {"ETag": '"v1"', "Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"}),
+        (304, "", {}),
+    ]
+    manager, calls = _manager(tmp_path, monkeypatch, responses)
+
+    async def run():
+        first = await manager.fetch_cloud_catalog("runpod")
+        snapshot_mtime = (tmp_path / "runpod_vms.snapshot").stat().st_mtime_ns
+
+        # Cache expired (duration 0): a conditional request, answered with 304
+        second = await manager.fetch_cloud_catalog("runpod")
+        assert calls[0] == {}
+        assert calls[1] == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT",
+        }
+        assert second == first
+        assert (tmp_path / "runpod_vms.snapshot").stat().st_mtime_ns == snapshot_mtime
+
+        # A new manager (i.e. a restart) serves the snapshot without fetching
+        from lattice.routes.quota.skypilot_catalog import SkyPilotCatalogManager
+
+        restarted = SkyPilotCatalogManager(cache_duration_hours=24)
+        restarted.cache_dir = tmp_path
+        assert await restarted.fetch_cloud_catalog("runpod") == first
+        assert len(calls) == 2
+
+        restarted.clear_cache("runpod")
+        assert not list(tmp_path.glob("runpod_vms.*"))
+
+    asyncio.run(run())
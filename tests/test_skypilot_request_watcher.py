@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+
+def test_watcher_applies_bulk_transitions_and_publishes_them(db_session, monkeypatch):
+    import sky
+
+    from lattice.db.db_models import SkyPilotRequest
+    from utils import skypilot_tracker as tracker_module
+
+    org = "org_watch"
+    old = datetime.utcnow() - timedelta(hours=2)
+    db_session.add_all(
+        [
+            SkyPilotRequest(
+                user_id="u1", organization_id=org, task_type="launch",
+                request_id="w-launch", cluster_name="c1", status="pending",
+            ),
+            SkyPilotRequest(
+                user_id="u1", organization_id=org, task_type="stop",
+                request_id="w-stop", cluster_name="c2", status="pending",
+            ),
+            SkyPilotRequest(
+                user_id="u1", organization_id=org, task_type="down",
+                request_id="w-running", cluster_name="c3", status="pending",
+            ),
+            SkyPilotRequest(
+                user_id="u1", organization_id=org, task_type="down",
+                request_id="w-gone", cluster_name="c4", status="pending",
+                created_at=old,
+            ),
+            SkyPilotRequest(
+                user_id="u1", organization_id=org, task_type="launch",
+                request_id="w-done", cluster_name="c5", status="completed",
+            ),
+        ]
+    )
+    db_session.commit()
+
+    calls = []
+
+    def api_status(request_ids=None, all_status=False):
+        calls.append(sorted(request_ids))
+        return [
+            {"request_id": "w-launch", "status": "SUCCEEDED", "error": "null"},
+            {
+                "request_id": "w-stop",
+                "status": "FAILED",
+                "error": '{"type": "ClusterNotUpError", "message": "cluster is not up"}',
+            },
+            {"request_id": "w-running", "status": "RUNNING", "error": "null"},
+        ]
+
+    monkeypatch.setattr(sky, "api_status", api_status)
+    invalidations = []
+    monkeypatch.setattr(
+        tracker_module.skypilot_status_cache, "invalidate", lambda *a: invalidations.append(a)
+    )
+    published = []
+    unsubscribe = tracker_module.event_bus.subscribe(tracker_module.REQUEST_EVENTS_TOPIC, published.append)
+
+    tracker = tracker_module.SkyPilotTracker(unknown_grace_seconds=600)
+    try:
+        events = tracker.refresh_requests()
+        # Nothing changed since the last poll: no writes, no events
+        assert tracker.refresh_requests() == []
+    finally:
+        unsubscribe()
+
+    assert calls[0] == ["w-gone", "w-launch", "w-running", "w-stop"]
+    assert {e["request_id"]: e["status"] for e in events} == {
+        "w-launch": "completed",
+        "w-stop": "failed",
+        "w-running": "running",
+        "w-gone": "expired",
+    }
+    assert published == events
+    # Completed launch, failed stop and the expired down (outcome unknown)
+    # may have changed cluster status; running doesn't
+    assert len(invalidations) == 3
+
+    db_session.expire_all()
+    rows = {
+        r.request_id: r
+        for r in db_session.query(SkyPilotRequest).filter_by(organization_id=org)
+    }
+    assert rows["w-stop"].error_message == "cluster is not up"
+    assert rows["w-stop"].completed_at is not None
+    assert rows["w-running"].completed_at is None
+    assert rows["w-gone"].error_message.startswith("Request not found")
+    assert rows["w-gone"].completed_at is not None
+    assert rows["w-done"].status == "completed"
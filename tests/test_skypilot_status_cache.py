@@ -0,0 +1,82 @@
+import threading
+import time
+
+
+def _make_cache(records, **kwargs):
+    from lattice.utils.skypilot_status_cache import SkyPilotStatusCache
+
+    class FakeCache(SkyPilotStatusCache):
+        def __init__(self):
+            super().__init__(refresh_interval_seconds=0, **kwargs)
+            self.queries = []
+            self.delay = 0.0
+
+        def _query(self, names):
+            self.queries.append(None if names is None else sorted(names))
+            if self.delay:
+                time.sleep(self.delay)
+            return [
+                dict(r, credentials={"secret": "x"})
+                for r in records
+                if names is None or r["name"] in names
+            ]
+
+    return FakeCache()
+
+
+def test_full_snapshot_is_reused_within_ttl_and_sanitized():
+    cache = _make_cache([{"name": "a"}, {"name": "b"}], ttl_seconds=60)
+
+    first = cache.get_status()
+    second = cache.get_status()
+    assert {r["name"] for r in first} == {"a", "b"}
+    assert all(r["credentials"] is None for r in second)
+    assert cache.queries == [None]
+
+    # Per-cluster reads are answered from the fresh full snapshot,
+    # including clusters SkyPilot does not know about
+    assert [r["name"] for r in cache.get_status(["b", "missing"])] == ["b"]
+    assert cache.queries == [None]
+
+    # max_staleness=0 forces a fresh fetch
+    cache.get_status(max_staleness=0)
+    assert cache.queries == [None, None]
+
+
+def test_invalidate_refetches_only_the_invalidated_cluster():
+    cache = _make_cache([{"name": "a"}, {"name": "b"}], ttl_seconds=60)
+    cache.get_status(["a", "b"])
+    assert cache.queries == [["a", "b"]]
+
+    cache.invalidate(["a"])
+    cache.get_status(["a", "b"])
+    assert cache.queries == [["a", "b"], ["a"]]
+
+    cache.invalidate()
+    cache.get_status(["b"])
+    assert cache.queries[-1] == ["b"]
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache = _make_cache([{"name": "a"}], ttl_seconds=60)
+    cache.delay = 0.2
+    results = []
+
+    def read():
+        results.append(cache.get_status())
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == 8
+    assert all(len(r) == 1 for r in results)
+    assert cache.queries == [None]
+
+
+def test_returned_records_are_copies():
+    cache = _make_cache([{"name": "a"}], ttl_seconds=60)
+    cache.get_status()[0]["name"] = "mutated"
+    assert cache.get_status()[0]["name"] == "a"
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+
+def test_node_info_is_cache_first_with_single_flight_refresh(db_session, monkeypatch):
+    from db.db_models import SSHNodePool
+    from routes.clouds.ssh import routes
+    from routes.node_pools import utils
+
+    fresh = datetime.utcnow().isoformat()
+    db_session.add_all(
+        [
+            SSHNodePool(
+                name="pool-fresh",
+                organization_id="org_gpu",
+                nodes=[{"ip": "10.0.0.1"}],
+                other_data={"gpu_resources": {"gpus": ["A"]}, "last_updated": fresh},
+            ),
+            SSHNodePool(
+                name="pool-stale",
+                organization_id="org_gpu",
+                nodes=[{"ip": "10.0.0.2"}],
+                other_data={
+                    "gpu_resources": {"gpus": ["old"]},
+                    "last_updated": (datetime.utcnow() - timedelta(days=1)).isoformat(),
+                },
+            ),
+        ]
+    )
+    db_session.commit()
+
+    release = threading.Event()
+    calls = []
+
+    async def fake_update(node_pool_names):
+        calls.append(node_pool_names)
+        release.wait(5)
+        db = utils.SessionLocal()
+        try:
+            for name in node_pool_names:
+                pool = db.query(SSHNodePool).filter_by(name=name).one()
+                pool.other_data = {
+                    "gpu_resources": {"gpus": ["new"]},
+                    "last_updated": datetime.utcnow().isoformat(),
+                }
+            db.commit()
+        finally:
+            db.close()
+
+    monkeypatch.setattr(utils, "update_gpu_resources_for_node_pools", fake_update)
+    user = {"organization_id": "org_gpu"}
+
+    async def run():
+        info = await routes.get_ssh_node_info(None, None, user=user, db=db_session)
+        assert info["pool-fresh"]["gpu_resources"] == {"gpus": ["A"]}
+        assert info["pool-fresh"]["refreshing"] is False
+        assert info["pool-stale"]["gpu_resources"] == {"gpus": ["old"]}
+        assert info["pool-stale"]["refreshing"] is True
+        assert info["pool-stale"]["hosts"] == [{"ip": "10.0.0.2"}]
+
+        # A second page load joins the refresh already in flight
+        await routes.get_ssh_node_info(None, None, user=user, db=db_session)
+
+        release.set()
+        info = await routes.get_ssh_node_info(
+            None, None, user=user, db=db_session, refresh="none", wait=True, timeout=5
+        )
+        assert info["pool-stale"]["gpu_resources"] == {"gpus": ["new"]}
+        assert info["pool-stale"]["refreshing"] is False
+
+    asyncio.run(run())
+    assert calls == [["pool-stale"]]
+
+
+def test_completed_refreshes_are_yielded_as_they_finish():
+    from concurrent.futures import Future
+
+    from routes.node_pools.utils import iter_completed_gpu_resources_updates
+
+    async def run():
+        first, second = Future(), Future()
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, second.set_result, "b")
+        loop.call_later(0.05, first.set_result, "a")
+        seen = [
+            name
+            async for name in iter_completed_gpu_resources_updates(
+                {"a": first, "b": second}, timeout=2
+            )
+        ]
+        assert seen == ["b", "a"]
+
+        never = Future()
+        seen = [
+            name
+            async for name in iter_completed_gpu_resources_updates(
+                {"c": never}, timeout=0.01
+            )
+        ]
+        assert seen == []
+
+    asyncio.run(run())
+
+
+def test_refreshing_several_pools_probes_them_together(monkeypatch):
+    from routes.instances import utils
+    from utils.gpu_probe import PoolGPUInventory
+
+    ssh_up_calls, probe_calls = [], []
+
+    def ssh_up(infra):
+        ssh_up_calls.append(infra)
+        return f"req-{infra}"
+
+    def get(request_id):
+        if request_id == "req-broken":
+            raise RuntimeError("unreachable")
+
+    def probe_node_pools(names):
+        probe_calls.append(list(names))
+        return {name: PoolGPUInventory(node_pool=name) for name in names}
+
+    monkeypatch.setattr(utils.node_pools_file, "flush", lambda: None)
+    monkeypatch.setattr(utils.sky.client.sdk, "ssh_up", ssh_up, raising=False)
+    monkeypatch.setattr(utils.sky, "get", get)
+    monkeypatch.setattr(utils, "probe_node_pools", probe_node_pools)
+
+    results = asyncio.run(
+        utils.fetch_and_parse_gpu_resources_for_pools(["a", "broken", "b"])
+    )
+    assert sorted(ssh_up_calls) == ["a", "b", "broken"]
+    assert probe_calls == [["a", "b"]]
+    assert isinstance(results["broken"], Exception)
+    assert results["a"] == PoolGPUInventory(node_pool="a").to_dict()
@@ -0,0 +1,146 @@
+import os
+import sys
+import threading
+import time
+
+FAKE_SSH = """\
+#!{python}
+# Stand-in for OpenSSH: "-M" runs a master that listens on its ControlPath
+# until terminated, "-O check" succeeds while that socket exists
+import os, signal, socket, sys, time
+
+args = sys.argv[1:]
+path = next(a.split("=", 1)[1] for a in args if a.startswith("ControlPath="))
+destination = args[-1]
+if "-M" in args:
+    with open({log!r}, "a") as f:
+        f.write(destination + "\\n")
+    if destination == "down":
+        sys.exit(255)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    sock = socket.socket(socket.AF_UNIX)
+    sock.bind(path)
+    sock.listen()
+    while True:
+        time.sleep(1)
+if "-O" in args and args[args.index("-O") + 1] == "check":
+    sys.exit(0 if os.path.exists(path) else 255)
+"""
+
+
+def _make_pool(tmp_path, **kwargs):
+    from utils.ssh_pool import SSHConnectionPool
+
+    log = tmp_path / "masters.log"
+    log.touch()
+    script = tmp_path / "ssh"
+    script.write_text(FAKE_SSH.format(python=sys.executable, log=str(log)))
+    script.chmod(0o755)
+    return SSHConnectionPool(ssh_binary=str(script), **kwargs), log
+
+
+def test_sessions_share_masters_up_to_the_caps(tmp_path):
+    pool, log = _make_pool(
+        tmp_path, max_sessions=3, max_connections_per_cluster=2, idle_seconds=0.2
+    )
+    try:
+        leases = []
+        lock = threading.Lock()
+
+        def open_session():
+            lease = pool.acquire("head-1", "u1")
+            with lock:
+                leases.append(lease)
+
+        threads = [threading.Thread(target=open_session) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # Concurrent first sessions wait for one master instead of each
+        # starting their own; two masters of three sessions each
+        assert log.read_text().split() == ["head-1", "head-1"]
+        assert all(lease.multiplexed for lease in leases)
+        assert pool.metrics() == {"connections": 2, "sessions": 6}
+        paths = {a for lease in leases for a in lease.command if "ControlPath" in a}
+        assert len(paths) == 2
+        assert leases[0].command[-1] == "head-1"
+
+        # The cluster is at its cap: the next session connects on its own
+        direct = pool.acquire("head-1", "u2")
+        assert not direct.multiplexed
+        assert direct.command == [pool.ssh_binary, "head-1"]
+
+        # Idle masters are closed once their sessions are released
+        for lease in leases:
+            lease.release()
+        deadline = time.monotonic() + 5
+        while pool.metrics()["connections"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert pool.metrics() == {"connections": 0, "sessions": 0}
+    finally:
+        pool.stop()
+
+
+def test_cluster_cap_holds_for_concurrent_users(tmp_path):
+    pool, log = _make_pool(tmp_path, max_connections_per_cluster=2)
+    try:
+        leases = []
+        lock = threading.Lock()
+
+        def open_session(user_id):
+            lease = pool.acquire("head-4", user_id)
+            with lock:
+                leases.append(lease)
+
+        # Different users don't share a key lock, so they connect in parallel
+        threads = [
+            threading.Thread(target=open_session, args=(f"u{i}",)) for i in range(6)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert log.read_text().split() == ["head-4", "head-4"]
+        assert sum(lease.multiplexed for lease in leases) == 2
+        assert pool.metrics()["connections"] == 2
+    finally:
+        pool.stop()
+
+
+def test_dead_masters_are_replaced_and_failures_fall_back(tmp_path):
+    pool, log = _make_pool(tmp_path, health_check_seconds=0)
+    try:
+        first = pool.acquire("head-2", "u1")
+        assert first.multiplexed
+        master = pool._masters[("head-2", "u1")][0]
+        master.process.kill()
+        master.process.wait()
+        os.unlink(master.control_path)
+
+        # The health check notices the dead master and opens a new one
+        second = pool.acquire("head-2", "u1")
+        assert second.multiplexed
+        assert log.read_text().split() == ["head-2", "head-2"]
+
+        # An unreachable cluster falls back to a direct connection and isn't
+        # retried on every session
+        assert not pool.acquire("down", "u1").multiplexed
+        assert not pool.acquire("down", "u1").multiplexed
+        assert log.read_text().split().count("down") == 1
+        # The failed connect gave its slot on the cluster back
+        assert pool._connecting == {}
+    finally:
+        pool.stop()
+    # Control sockets live in a private directory removed on stop
+    assert not os.path.exists(pool._socket_dir)
+
+
+def test_disabled_pool_connects_directly(tmp_path):
+    pool, log = _make_pool(tmp_path, enabled=False)
+    lease = pool.acquire("head-3", "u1")
+    assert lease.command == [pool.ssh_binary, "head-3"]
+    lease.release()
+    assert log.read_text() == ""
@@ -0,0 +1,115 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+
+def _public_key(seed: bytes) -> str:
+    return "ssh-ed25519 " + base64.b64encode(seed * 8).decode()
+
+
+def _make_cache(**kwargs):
+    from lattice.config import SessionLocal
+    from lattice.ssh_proxy_server.auth_cache import SSHAuthCache
+
+    return SSHAuthCache(SessionLocal, flush_interval_seconds=0, **kwargs)
+
+
+def test_key_and_acl_lookups_follow_db_changes(db_session):
+    from lattice.db.db_models import ClusterPlatform, SSHKey
+
+    public_key = _public_key(b"k1")
+    key = SSHKey(
+        user_id="user_1",
+        organization_id="org_1",
+        name="laptop",
+        public_key=public_key,
+        fingerprint=SSHKey.generate_fingerprint(public_key),
+        key_type="ssh-ed25519",
+    )
+    db_session.add(key)
+    db_session.add(
+        ClusterPlatform(
+            cluster_name="home-abc123",
+            display_name="Home",
+            platform="runpod",
+            user_id="user_1",
+            organization_id="org_1",
+        )
+    )
+    db_session.commit()
+
+    cache = _make_cache(validate_interval_seconds=0)
+    assert cache.lookup_user(public_key) == ("user_1", "laptop", "org_1")
+    assert cache.get_cluster_name("Home", "user_1", "org_1") == "home-abc123"
+    with pytest.raises(ValueError):
+        cache.lookup_user(_public_key(b"zz"))
+
+    # A cluster created after the ACL was cached is visible on the next lookup
+    db_session.add(
+        ClusterPlatform(
+            cluster_name="work-def456",
+            display_name="Work",
+            platform="runpod",
+            user_id="user_1",
+            organization_id="org_1",
+        )
+    )
+    db_session.commit()
+    assert cache.get_cluster_name("Work", "user_1", "org_1") == "work-def456"
+
+    # Deactivating the key (as PUT /ssh-config/ssh-keys does) revokes it,
+    # even within the second it was cached in
+    key.is_active = False
+    db_session.commit()
+    with pytest.raises(ValueError):
+        cache.lookup_user(public_key)
+
+    # So does deleting it, even if another key is added right after
+    key.is_active = True
+    db_session.commit()
+    assert cache.lookup_user(public_key) == ("user_1", "laptop", "org_1")
+    other_key = _public_key(b"k3")
+    db_session.delete(key)
+    db_session.add(
+        SSHKey(
+            user_id="user_1",
+            organization_id="org_1",
+            name="desktop",
+            public_key=other_key,
+            fingerprint=SSHKey.generate_fingerprint(other_key),
+            key_type="ssh-ed25519",
+        )
+    )
+    db_session.commit()
+    with pytest.raises(ValueError):
+        cache.lookup_user(public_key)
+
+
+def test_last_used_is_flushed_without_touching_updated_at(db_session):
+    from lattice.db.db_models import ChangeCounter, SSHKey
+
+    public_key = _public_key(b"k2")
+    key = SSHKey(
+        user_id="user_2",
+        organization_id="org_1",
+        name="desktop",
+        public_key=public_key,
+        fingerprint=SSHKey.generate_fingerprint(public_key),
+        key_type="ssh-ed25519",
+        updated_at=datetime(2030, 1, 1),
+    )
+    db_session.add(key)
+    db_session.commit()
+
+    cache = _make_cache(validate_interval_seconds=60)
+    version = db_session.get(ChangeCounter, "ssh_keys").version
+    used_at = datetime(2030, 6, 1, 8, 30)
+    cache.record_use(key.id, used_at)
+
+    db_session.expire_all()
+    refreshed = db_session.get(SSHKey, key.id)
+    assert refreshed.last_used_at == used_at
+    assert refreshed.updated_at == datetime(2030, 1, 1)
+    # A usage update doesn't count as a key change
+    assert db_session.get(ChangeCounter, "ssh_keys").version == version
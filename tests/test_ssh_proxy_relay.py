@@ -0,0 +1,98 @@
+import asyncio
+import socket
+
+
+class _FakeChannel:
+    """Minimal stand-in for a paramiko Channel backed by a socket."""
+
+    def __init__(self, sock, window_open=True):
+        self.sock = sock
+        self.window_open = window_open
+        self.closed = False
+        self.sendall_calls = 0
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def recv(self, size):
+        return self.sock.recv(size)
+
+    def send_ready(self):
+        return self.window_open
+
+    def send(self, data):
+        return self.sock.send(data)
+
+    def sendall(self, data):
+        self.sendall_calls += 1
+        self.sock.sendall(data)
+
+    def close(self):
+        self.closed = True
+        self.sock.close()
+
+
+def _read_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        assert chunk
+        data += chunk
+    return data
+
+
+def test_relay_moves_data_both_ways_and_waits_when_window_is_full():
+    from lattice.ssh_proxy_server.main import relay_channel_and_pty
+
+    client_end, channel_sock = socket.socketpair()
+    remote_end, pty_sock = socket.socketpair()
+    # A closed SSH window holds PTY output back until the window opens
+    channel = _FakeChannel(channel_sock, window_open=False)
+    payload = bytes(range(256)) * 1024
+
+    async def run():
+        relay = asyncio.create_task(
+            relay_channel_and_pty(channel, pty_sock.detach(), buffer_size=4096)
+        )
+        loop = asyncio.get_running_loop()
+
+        await loop.run_in_executor(None, client_end.sendall, b"ls -la\n")
+        assert await loop.run_in_executor(None, _read_exactly, remote_end, 7) == b"ls -la\n"
+
+        reader = loop.run_in_executor(None, _read_exactly, client_end, len(payload))
+        await loop.run_in_executor(None, remote_end.sendall, payload[:4096])
+        await asyncio.sleep(0.2)
+        channel.window_open = True
+        await loop.run_in_executor(None, remote_end.sendall, payload[4096:])
+        assert await reader == payload
+
+        client_end.close()
+        await asyncio.wait_for(relay, 5)
+
+    asyncio.run(run())
+    assert channel.closed
+    # Sends never block a thread on the window
+    assert channel.sendall_calls == 0
+    remote_end.close()
+
+
+def test_relay_closes_sessions_that_stop_reading():
+    from lattice.ssh_proxy_server.main import relay_channel_and_pty
+
+    client_end, channel_sock = socket.socketpair()
+    remote_end, pty_sock = socket.socketpair()
+    channel = _FakeChannel(channel_sock, window_open=False)
+
+    async def run():
+        relay = asyncio.create_task(
+            relay_channel_and_pty(channel, pty_sock.detach(), stall_timeout=0.2)
+        )
+        await asyncio.get_running_loop().run_in_executor(
+            None, remote_end.sendall, b"output nobody reads\n"
+        )
+        await asyncio.wait_for(relay, 5)
+
+    asyncio.run(run())
+    assert channel.closed
+    client_end.close()
+    remote_end.close()
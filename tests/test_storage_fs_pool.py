@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+
+def _bucket(bucket_id, org="org_fs", updated_at="2026-01-01 00:00:00"):
+    return SimpleNamespace(id=bucket_id, organization_id=org, updated_at=updated_at)
+
+
+def test_filesystems_are_reused_per_bucket_and_options(monkeypatch):
+    from routes.storage_buckets import fs_pool
+
+    builds = []
+
+    def factory(bucket, options):
+        builds.append((bucket.id, dict(options)))
+        options.pop("profile", None)  # Factories edit their options
+        return object(), f"s3://{bucket.id}"
+
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(fs_pool.time, "monotonic", lambda: clock["now"])
+    pool = fs_pool.FilesystemPool(factory, ttl_seconds=60, max_entries=2)
+
+    options = {"profile": "dev"}
+    fs, base_path = pool.get(_bucket("b1"), options)
+    assert base_path == "s3://b1"
+    assert pool.get(_bucket("b1"), {"profile": "dev"})[0] is fs
+    assert options == {"profile": "dev"}
+    # fsspec's own instance cache is bypassed; the pool is the only cache
+    assert builds == [("b1", {"profile": "dev", "skip_instance_cache": True})]
+
+    # Different options or a changed bucket config get their own filesystem
+    assert pool.get(_bucket("b1"), {"anon": True})[0] is not fs
+    assert pool.get(_bucket("b1", updated_at="2026-02-01"))[0] is not fs
+    assert len(builds) == 3
+    assert pool.metrics()["evicted"] == 1
+
+    # Entries are rebuilt after the TTL
+    pool.get(_bucket("b2"))
+    clock["now"] += 61
+    pool.get(_bucket("b2"))
+    assert len(builds) == 5
+
+    metrics = pool.metrics()
+    assert (metrics["hits"], metrics["misses"], metrics["expired"]) == (1, 5, 1)
+    assert metrics["size"] == 2
+
+
+def test_invalidation_by_bucket_and_organization():
+    from routes.storage_buckets.fs_pool import FilesystemPool
+
+    pool = FilesystemPool(lambda bucket, options: (object(), ""), max_entries=10)
+    pool.get(_bucket("b1", org="org_a"))
+    pool.get(_bucket("b2", org="org_a"))
+    pool.get(_bucket("b3", org="org_b"))
+
+    pool.invalidate(bucket_id="b1")
+    assert pool.metrics()["size"] == 2
+    pool.invalidate(organization_id="org_a")
+    assert pool.metrics()["size"] == 1
+    pool.get(_bucket("b3", org="org_b"))
+    assert pool.metrics()["hits"] == 1
+    assert pool.metrics()["invalidated"] == 2
+
+
+def test_filesystems_invalidated_while_building_are_not_pooled():
+    from routes.storage_buckets.fs_pool import FilesystemPool
+
+    during_build = []
+
+    def factory(bucket, options):
+        # Credentials change while this filesystem is being built
+        if during_build:
+            during_build.pop()(pool)
+        return object(), ""
+
+    pool = FilesystemPool(factory, max_entries=10)
+    for invalidate in (
+        lambda pool: pool.invalidate(bucket_id="b1"),
+        lambda pool: pool.invalidate(organization_id="org_a"),
+        lambda pool: pool.invalidate(),
+    ):
+        during_build.append(invalidate)
+        first = pool.get(_bucket("b1", org="org_a"))[0]
+        assert pool.metrics()["size"] == 0
+        # The next call builds (and pools) a fresh one
+        assert pool.get(_bucket("b1", org="org_a"))[0] is not first
+        assert pool.metrics()["size"] == 1
+        pool.invalidate()
+
+    # Other buckets' builds are unaffected
+    during_build.append(lambda pool: pool.invalidate(bucket_id="b1"))
+    fs = pool.get(_bucket("b2", org="org_b"))[0]
+    assert pool.get(_bucket("b2", org="org_b"))[0] is fs
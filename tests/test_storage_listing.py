@@ -0,0 +1,184 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+
+def _bucket(bucket_id="b1", updated_at="2026-01-01 00:00:00"):
+    return SimpleNamespace(id=bucket_id, updated_at=updated_at)
+
+
+class FakeS3:
+    """Just enough of s3fs for native paging: a flat list of keys"""
+
+    def __init__(self, keys):
+        self.keys = sorted(keys)
+
+    def split_path(self, path):
+        bucket, _, key = path.partition("/")
+        return bucket, key, None
+
+    def call_s3(self, method, Bucket, Prefix, Delimiter, MaxKeys, **kwargs):
+        rows = []
+        for key in self.keys:
+            if not key.startswith(Prefix):
+                continue
+            rest = key[len(Prefix) :]
+            if Delimiter in rest:
+                row = ("prefix", Prefix + rest.split(Delimiter)[0] + Delimiter)
+            else:
+                row = ("key", key)
+            if row not in rows:
+                rows.append(row)
+        start = int(kwargs.get("ContinuationToken", 0))
+        page = rows[start : start + MaxKeys]
+        truncated = start + MaxKeys < len(rows)
+        return {
+            "CommonPrefixes": [{"Prefix": v} for k, v in page if k == "prefix"],
+            "Contents": [{"Key": v, "Size": 1} for k, v in page if k == "key"],
+            "IsTruncated": truncated,
+            "NextContinuationToken": str(start + MaxKeys) if truncated else None,
+        }
+
+
+def test_tokens_are_bound_to_their_directory():
+    from fastapi import HTTPException
+
+    from routes.storage_buckets.listing import decode_token, encode_token
+
+    token = encode_token("data/train", o=100)
+    assert decode_token(token, "data/train") == {"d": "data/train", "o": 100}
+    assert decode_token(None, "data/train") == {}
+    for bad in (token, "not-a-token"):
+        with pytest.raises(HTTPException) as exc:
+            decode_token(bad, "data/eval")
+        assert exc.value.status_code == 400
+    # Offsets must be non-negative integers
+    for offset in (-5, "10", 1.5, True):
+        with pytest.raises(HTTPException) as exc:
+            decode_token(encode_token("data/train", o=offset), "data/train")
+        assert exc.value.status_code == 400
+
+
+def test_native_pages_follow_provider_tokens():
+    from routes.storage_buckets.listing import (
+        list_item,
+        native_page,
+        native_pages,
+        supports_native_paging,
+    )
+
+    fs = FakeS3(["b/data/a.txt", "b/data/sub/x.txt", "b/data/z.txt", "b/data/c.txt"])
+    fs.keys = [k.split("/", 1)[1] for k in fs.keys]
+    assert supports_native_paging(fs)
+
+    entries, token = native_page(fs, "b/data", 2)
+    assert [e["name"] for e in entries] == ["b/data/a.txt", "b/data/c.txt"]
+    assert token == "2"
+    entries, token = native_page(fs, "b/data", 2, token)
+    assert token is None
+    assert [(e["name"], e["type"]) for e in entries] == [
+        ("b/data/sub", "directory"),
+        ("b/data/z.txt", "file"),
+    ]
+    assert list_item(entries[0], "b/data")["name"] == "/sub"
+
+    pages = list(native_pages(fs, "b/data", 3))
+    assert [len(p) for p in pages] == [3, 1]
+
+
+def test_streamed_listings_fill_the_directory_index(monkeypatch):
+    import fsspec
+
+    from routes.storage_buckets import listing
+
+    fs = fsspec.filesystem("memory", skip_instance_cache=True)
+    for name in ("b.txt", "a.txt", "sub/c.txt"):
+        fs.pipe(f"/stream-test/{name}", b"x")
+    cache = listing.DirectoryIndexCache(ttl_seconds=60, max_items=100)
+    monkeypatch.setattr(listing, "directory_indexes", cache)
+    key = cache.key(_bucket(), None, "")
+
+    lines = list(listing.stream_listing(fs, "/stream-test", "/stream-test", key, "/"))
+    names = {json.loads(line)["name"] for line in lines}
+    assert names == {"/a.txt", "/b.txt", "/sub"}
+    assert [i["name"] for i in cache.get(key)] == ["/sub", "/a.txt", "/b.txt"]
+
+    # The second stream is served from the index
+    monkeypatch.setattr(fs, "ls", lambda *a, **kw: pytest.fail("listed again"))
+    assert (
+        len(list(listing.stream_listing(fs, "/stream-test", "/stream-test", key, "/")))
+        == 3
+    )
+
+    monkeypatch.undo()
+    missing = list(
+        listing.stream_listing(fs, "/nope", "/nope", ("b1", "", "{}", "nope"), "/nope")
+    )
+    assert json.loads(missing[0]) == {"error": "Path not found: /nope"}
+
+
+def test_index_invalidation_and_bounds(monkeypatch):
+    from routes.storage_buckets import listing
+
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(listing.time, "monotonic", lambda: clock["now"])
+    cache = listing.DirectoryIndexCache(ttl_seconds=60, max_items=10)
+    keys = {
+        d: cache.key(_bucket(), {"anon": True}, listing.normalize_dir(d))
+        for d in ("/", "/data/", "/data/train", "/data/train/x", "/models")
+    }
+    for key in keys.values():
+        cache.put(key, [{"name": "f", "type": "file"}])
+    cache.put(cache.key(_bucket("b2"), None, ""), [{"name": "f", "type": "file"}])
+    assert cache.metrics()["directories"] == 6
+
+    # A file written in data/train drops that listing and its ancestors
+    cache.invalidate("b1", "/data/train/new.txt")
+    for d in ("/", "/data/", "/data/train"):
+        assert cache.get(keys[d]) is None
+    assert cache.get(keys["/data/train/x"]) is not None
+    assert cache.get(keys["/models"]) is not None
+    # A deleted directory also drops what was below it
+    cache.invalidate("b1", "/data/train")
+    assert cache.get(keys["/data/train/x"]) is None
+    assert cache.metrics()["directories"] == 2
+
+    # Listings expire, and the cache holds at most max_items items
+    clock["now"] += 61
+    assert cache.get(keys["/models"]) is None
+    cache.put(keys["/"], [{}] * 11)
+    assert cache.get(keys["/"]) is None
+    cache.put(keys["/"], [{}] * 6)
+    cache.put(keys["/models"], [{}] * 6)
+    assert cache.get(keys["/"]) is None
+    assert cache.metrics()["items"] == 6
+
+
+def test_s3_pages_use_provider_tokens_even_with_a_cached_index(monkeypatch):
+    import asyncio
+
+    from routes.storage_buckets import browse, listing
+
+    fs = FakeS3(["data/a.txt", "data/b.txt", "data/c.txt"])
+    bucket = SimpleNamespace(id="b1", updated_at="2026-01-01 00:00:00", source="s3://b")
+    cache = listing.DirectoryIndexCache(ttl_seconds=60, max_items=100)
+    monkeypatch.setattr(browse, "directory_indexes", cache)
+    monkeypatch.setattr(browse, "get_current_user", lambda request, response: {})
+    monkeypatch.setattr(browse, "get_bucket_info", lambda *a: bucket)
+    monkeypatch.setattr(browse.storage_filesystems, "get", lambda *a: (fs, "b"))
+    # A complete listing cached by an earlier unpaged request
+    key = cache.key(bucket, None, listing.normalize_dir("/data"))
+    cache.put(key, [{"name": "/stale.txt", "type": "file"}])
+
+    def list_page(token=None):
+        req = browse.ListRequest(path="/data", page_size=2, continuation_token=token)
+        return asyncio.run(browse.list_files("b1", req, None, None, db=None))
+
+    first = list_page()
+    assert [i["name"] for i in first.items] == ["/a.txt", "/b.txt"]
+    # The index expiring mid-listing doesn't invalidate the token
+    cache.invalidate("b1")
+    second = list_page(first.next_continuation_token)
+    assert [i["name"] for i in second.items] == ["/c.txt"]
+    assert second.next_continuation_token is None
@@ -0,0 +1,77 @@
+import asyncio
+import base64
+import os
+import pty
+import tty
+import zlib
+
+
+def _drain(fd, size):
+    data = b""
+    while len(data) < size:
+        data += os.read(fd, size - len(data))
+    return data
+
+
+def test_pty_output_is_coalesced_into_bounded_frames_and_input_written():
+    from routes.terminal.relay import PtyRelay
+
+    master_fd, slave_fd = pty.openpty()
+    # Raw mode on the slave so bytes pass through unchanged
+    tty.setraw(slave_fd)
+    payload = bytes(range(256)) * 1024
+    frames = []
+
+    async def send(frame):
+        frames.append(frame)
+
+    async def run():
+        relay = PtyRelay(master_fd, send, max_frame_bytes=16 * 1024, flush_interval=0.02)
+        task = asyncio.create_task(relay.run())
+        loop = asyncio.get_running_loop()
+
+        await relay.write(b"echo hi\n")
+        assert await loop.run_in_executor(None, _drain, slave_fd, 8) == b"echo hi\n"
+
+        await loop.run_in_executor(None, os.write, slave_fd, payload)
+        while sum(map(len, frames)) < len(payload):
+            await asyncio.sleep(0.01)
+        os.close(slave_fd)
+        await asyncio.wait_for(task, 5)
+        return relay
+
+    try:
+        relay = asyncio.run(run())
+    finally:
+        os.close(master_fd)
+
+    assert b"".join(frames) == payload
+    assert all(len(f) <= 16 * 1024 for f in frames)
+    # Coalesced far beyond the PTY's per-read chunks
+    assert len(frames) <= len(payload) // (8 * 1024)
+    assert relay.frames_sent == len(frames)
+    assert relay.bytes_sent == len(payload)
+
+
+def test_frame_codec_protocols():
+    from routes.terminal.relay import FrameCodec, decode_input
+
+    text = FrameCodec.from_query({})
+    assert not text.binary
+    assert text.encode(b"\x1b[0m$ ") == base64.b64encode(b"\x1b[0m$ ").decode()
+
+    binary = FrameCodec.from_query({"protocol": "binary"})
+    assert binary.encode(b"abc") == b"abc"
+
+    deflated = FrameCodec.from_query({"protocol": "binary", "compress": "deflate"})
+    assert deflated.compressed
+    inflate = zlib.decompressobj()
+    chunks = [b"epoch 1 loss 0.5\n" * 50, b"epoch 2 loss 0.4\n" * 50]
+    frames = [deflated.encode(c) for c in chunks]
+    # Each frame inflates on its own, in order, with a shared dictionary
+    assert [inflate.decompress(f) for f in frames] == chunks
+    assert len(frames[1]) < len(chunks[1]) // 10
+
+    assert decode_input({"bytes": b"ls\r"}) == b"ls\r"
+    assert decode_input({"text": base64.b64encode(b"ls\r").decode()}) == b"ls\r"
+    assert decode_input({"type": "websocket.receive"}) is None
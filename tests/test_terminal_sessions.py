@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+
+class _FakeWebSocket:
+    def __init__(self):
+        self.output = bytearray()
+        self.control = []
+        self.closed = None
+        self.received = asyncio.Event()
+
+    async def send_bytes(self, data):
+        self.output += data
+        self.received.set()
+
+    async def send_text(self, text):
+        self.control.append(json.loads(text))
+
+    async def close(self, code=1000, reason=""):
+        self.closed = (code, reason)
+
+    async def wait_for(self, text):
+        while text not in self.output:
+            self.received.clear()
+            await asyncio.wait_for(self.received.wait(), 5)
+
+
+def test_scrollback_keeps_the_latest_bytes_by_offset():
+    from routes.terminal.sessions import ScrollbackBuffer
+
+    buffer = ScrollbackBuffer(capacity=10)
+    for chunk in (b"0123", b"4567", b"89ab", b"cdef"):
+        buffer.append(chunk)
+    assert (buffer.start, buffer.end) == (6, 16)
+    assert buffer.read(0, 100) == (6, b"6789abcdef")
+    assert buffer.read(12, 2) == (12, b"cd")
+    assert buffer.read(16, 100) == (16, b"")
+
+
+def test_session_survives_disconnects_and_is_shared_by_viewers():
+    from routes.terminal.relay import FrameCodec
+    from routes.terminal.sessions import TerminalSessionManager
+
+    async def run():
+        manager = TerminalSessionManager(grace_seconds=0.2)
+        session = manager.create("cluster-a", "u1", "org_a")
+        # A local shell stands in for ssh to the cluster
+        await session.start(["sh", "-c", "stty -echo; cat"])
+        process = session.process
+        binary = FrameCodec(protocol="binary")
+
+        first = _FakeWebSocket()
+        first_task = asyncio.create_task(session.serve(first, binary))
+        await session.write(b"hello\n")
+        await first.wait_for(b"hello")
+
+        # A second viewer shares the upstream shell and replays its output
+        second = _FakeWebSocket()
+        second_task = asyncio.create_task(session.serve(second, FrameCodec("binary")))
+        await second.wait_for(b"hello")
+        await session.write(b"both\n")
+        await first.wait_for(b"both")
+        await second.wait_for(b"both")
+        assert session.viewer_count == 2
+
+        # Both leave; within the grace period a reload reattaches and resumes
+        seen = session.scrollback.end
+        first_task.cancel()
+        second_task.cancel()
+        await asyncio.gather(first_task, second_task)
+        await asyncio.sleep(0.05)
+        assert manager.find(session.session_id, "cluster-a", "u1", "org_a") is session
+        assert manager.find(session.session_id, "cluster-a", "u2", "org_a") is None
+
+        await session.write(b"later\n")
+        third = _FakeWebSocket()
+        third_task = asyncio.create_task(session.serve(third, FrameCodec("binary"), seen))
+        await third.wait_for(b"later")
+        assert b"hello" not in third.output
+        assert third.control[0] == {"type": "offset", "offset": seen}
+        assert process.returncode is None
+
+        # Once the last viewer has been gone for the grace period, it ends
+        third_task.cancel()
+        await third_task
+        await asyncio.sleep(0.5)
+        assert session.ended
+        assert process.returncode is not None
+        assert manager.get(session.session_id) is None
+
+    asyncio.run(run())
+
+
+def test_session_end_closes_viewers():
+    from routes.terminal.relay import FrameCodec
+    from routes.terminal.sessions import TerminalSessionManager
+
+    async def run():
+        manager = TerminalSessionManager()
+        session = manager.create("cluster-b", "u1", "org_a")
+        await session.start(["sh", "-c", "echo bye"])
+        viewer = _FakeWebSocket()
+        await asyncio.wait_for(session.serve(viewer, FrameCodec("binary")), 5)
+        assert b"bye" in viewer.output
+        assert viewer.closed == (1000, "Session ended")
+        assert manager.get(session.session_id) is None
+
+    asyncio.run(run())
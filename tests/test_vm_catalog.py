@@ -0,0 +1,79 @@
+import os
+import sys
+import types
+
+import pandas as pd
+
+
+def _frame():
+    nan = float("nan")
+    return pd.DataFrame(
+        [
+            {"InstanceType": "gpu-a", "AcceleratorName": "A100", "AcceleratorCount": 2.0,
+             "vCPUs": 16.0, "MemoryGiB": 64.0, "Price": 3.5, "Region": "eastus"},
+            {"InstanceType": "gpu-a", "AcceleratorName": "A100", "AcceleratorCount": 2.0,
+             "vCPUs": 16.0, "MemoryGiB": 64.0, "Price": 3.9, "Region": "westus"},
+            {"InstanceType": "cpu-8", "AcceleratorName": nan, "AcceleratorCount": nan,
+             "vCPUs": 8.0, "MemoryGiB": 32.0, "Price": nan, "Region": "westus"},
+            {"InstanceType": "cpu-8b", "AcceleratorName": "", "AcceleratorCount": nan,
+             "vCPUs": 8.0, "MemoryGiB": 16.0, "Price": 0.2, "Region": nan},
+        ]
+    )
+
+
+def test_lookups_use_first_matching_row():
+    from lattice.utils.vm_catalog import VMCatalog
+
+    catalog = VMCatalog(_frame())
+
+    assert catalog.regions == ["eastus", "westus"]
+    assert catalog.instance_types == ["cpu-8", "cpu-8b", "gpu-a"]
+    assert catalog.price("gpu-a") == 3.5
+    assert catalog.price("gpu-a", "westus") == 3.9
+    # Unknown region falls back to any region; NaN price is None
+    assert catalog.price("gpu-a", "japaneast") == 3.5
+    assert catalog.price("cpu-8") is None
+    assert catalog.price("missing") is None
+
+    assert catalog.gpu_count("gpu-a") == 2
+    assert catalog.gpu_count("cpu-8") == 0
+    assert catalog.accelerator_instance_type("A100", 2) == "gpu-a"
+    assert catalog.accelerator_instance_type("A100", 4) is None
+    assert catalog.cpu_instance_type(8) == "cpu-8"
+    assert catalog.cpu_instance_type(8, 16) == "cpu-8b"
+
+    calls = []
+    view = catalog.derived("names", lambda c: calls.append(1) or len(c.records))
+    assert view == 4 and catalog.derived("names", lambda c: 0) == 4
+    assert calls == [1]
+
+
+def test_get_vm_catalog_reloads_when_file_changes(tmp_path, monkeypatch):
+    from lattice.utils import vm_catalog
+
+    path = tmp_path / "vms.csv"
+    _frame().to_csv(path, index=False)
+    reads = []
+
+    def read_catalog(filename):
+        reads.append(filename)
+        return pd.read_csv(path)
+
+    common = types.SimpleNamespace(
+        read_catalog=read_catalog, get_catalog_path=lambda filename: str(path)
+    )
+    monkeypatch.setitem(sys.modules, "sky.catalog", types.SimpleNamespace(common=common))
+    monkeypatch.setitem(sys.modules, "sky.catalog.common", common)
+    monkeypatch.setattr(vm_catalog, "_catalogs", {})
+
+    first = vm_catalog.get_vm_catalog("test/vms.csv")
+    assert vm_catalog.get_vm_catalog("test/vms.csv") is first
+    assert len(reads) == 1
+
+    _frame().head(1).to_csv(path, index=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    reloaded = vm_catalog.get_vm_catalog("test/vms.csv")
+    assert reloaded is not first
+    assert reloaded.regions == ["eastus"]
+    assert len(reads) == 2